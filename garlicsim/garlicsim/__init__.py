@@ -23,10 +23,7 @@ import garlicsim.bootstrap
 import garlicsim.general_misc
 import garlicsim.general_misc.version_info
 import garlicsim.general_misc.monkeypatch_copy_reg
-import garlicsim.misc
-from garlicsim.asynchronous_crunching import Project
-from garlicsim.synchronous_crunching import (simulate, list_simulate,
-                                             iter_simulate)
+from garlicsim.general_misc import lazy_module
 
 
 __all__ = ['Project', 'simulate', 'list_simulate', 'iter_simulate']
@@ -35,3 +32,17 @@ __all__ = ['Project', 'simulate', 'list_simulate', 'iter_simulate']
 __version_info__ = garlicsim.general_misc.version_info.VersionInfo(0, 6, 3)
 __version__ = '0.6.3'
 
+
+# The subpackages, like `garlicsim.misc` and `garlicsim.asynchronous_crunching`,
+# and the objects in `__all__` are imported on first access, so that scripts
+# and `ProcessCruncher` worker processes don't pay for what they don't use:
+lazy_module.make_module_lazy(
+    __name__,
+    {
+        'Project': 'garlicsim.asynchronous_crunching',
+        'simulate': 'garlicsim.synchronous_crunching',
+        'list_simulate': 'garlicsim.synchronous_crunching',
+        'iter_simulate': 'garlicsim.synchronous_crunching',
+    }
+)
+
@@ -13,11 +13,14 @@ that the user needs to interact with. It employs all the other classes.
 from .obsolete_cruncher_error import ObsoleteCruncherError
 from .history_browser import HistoryBrowser
 from .crunching_profile import CrunchingProfile
+from .cruncher_telemetry import CruncherTelemetry
 from .base_cruncher import BaseCruncher
 from . import crunchers
 from .project import Project
 from .job import Job
+from .job_scheduler import JobScheduler
 from .crunching_manager import CrunchingManager
+from .autosync_thread import AutosyncThread
 
 
 CRUNCHER_QUEUE_SIZE = 100
@@ -27,4 +30,23 @@ The `max_size` given to the crunchers' work queues.
 This is needed for simpacks with very fast step functions, because without a
 `max_size` the cruncher might work so fast that the GUI will never catch up
 with it.
-'''
\ No newline at end of file
+'''
+
+
+RECENT_STATES_BUFFER_SIZE = 100
+'''
+The number of recent states that a `HistoryBrowser` keeps for quick access.
+
+Requests for states in this range are served without touching the tree. It
+shouldn't be smaller than `CRUNCHER_QUEUE_SIZE`, so that states that are still
+in a cruncher's work queue would usually be found in the buffer.
+'''
+
+
+TELEMETRY_REPORT_INTERVAL = 0.5
+'''
+Seconds between telemetry reports sent by crunchers that don't share memory.
+
+`ProcessCruncher` can't update the main process's `CruncherTelemetry` object
+directly, so it sends over its counters once in this interval.
+'''
@@ -0,0 +1,92 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `AutosyncThread` class.
+
+See its documentation for more information.
+'''
+
+import threading
+
+import garlicsim
+
+
+__all__ = ['AutosyncThread']
+
+
+class AutosyncThread(threading.Thread):
+    '''
+    A thread that keeps syncing the crunchers of a crunching manager.
+
+    Without it, nothing is added to the tree unless someone calls
+    `sync_crunchers`, and crunchers block once their work queues fill up. This
+    thread calls `sync_crunchers` repeatedly, (which takes the tree lock in
+    write mode,) so headless scripts can just wait for their jobs.
+
+    The interval between syncs adapts to the crunchers' speed: If the work
+    queues were more than half full on the last sync, the interval is halved,
+    and if they were less than a quarter full, it's increased, always staying
+    between `min_interval` and `max_interval` seconds.
+
+    Use `CrunchingManager.start_autosync` rather than creating it directly.
+    '''
+
+    def __init__(self, crunching_manager, min_interval=0.001,
+                 max_interval=0.5):
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+        self.crunching_manager = crunching_manager
+        '''The crunching manager whose crunchers we sync.'''
+
+        self.min_interval = min_interval
+        '''The shortest interval between syncs, in seconds.'''
+
+        self.max_interval = max_interval
+        '''The longest interval between syncs, in seconds.'''
+
+        self.interval = min_interval
+        '''The current interval between syncs, in seconds.'''
+
+        self.exception = None
+        '''The exception that stopped the thread, if there was one.'''
+
+        self._stop_event = threading.Event()
+        '''Event that's set when the thread should stop.'''
+
+
+    def run(self):
+        '''Sync the crunchers repeatedly until stopped.'''
+        crunching_manager = self.crunching_manager
+        queue_size = garlicsim.asynchronous_crunching.CRUNCHER_QUEUE_SIZE
+        try:
+            while not self._stop_event.isSet():
+                n_crunchers = len(crunching_manager.crunchers)
+                nodes_added = crunching_manager.sync_crunchers()
+                self._adapt_interval(
+                    nodes_added / float(queue_size * max(n_crunchers, 1))
+                )
+                self._stop_event.wait(self.interval)
+        except Exception, exception:
+            self.exception = exception
+            raise
+
+
+    def _adapt_interval(self, queue_fullness):
+        '''Change the interval according to how full the work queues were.'''
+        if queue_fullness > 0.5:
+            self.interval = max(self.interval / 2, self.min_interval)
+        elif queue_fullness < 0.25:
+            self.interval = min(self.interval * 1.5, self.max_interval)
+
+
+    def stop(self):
+        '''Stop the thread, waiting for it to finish its current sync.'''
+        self._stop_event.set()
+        if threading.currentThread() is not self:
+            self.join()
+
+
+    is_alive = threading.Thread.isAlive
+    '''Crutch for Python 2.5 and below.'''
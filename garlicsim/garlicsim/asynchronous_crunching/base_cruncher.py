@@ -48,6 +48,15 @@ class BaseCruncher(object):
     
     This will be displayed to GUI users who may not be programmers.
     '''
+    
+    pausable = False
+    '''
+    Flag saying whether crunchers of this type can be paused with `.pause`.
+    
+    The crunching manager pauses the crunchers of jobs whose turn is over;
+    crunchers that can't be paused are retired instead, and new crunchers are
+    created when the jobs get another turn.
+    '''
 
     
     def __init__(self, crunching_manager, initial_state, crunching_profile):
@@ -72,6 +81,22 @@ class BaseCruncher(object):
         assert isinstance(self.crunching_profile,
                           garlicsim.asynchronous_crunching.CrunchingProfile)
         
+        self.telemetry = \
+            garlicsim.asynchronous_crunching.CruncherTelemetry()
+        '''Performance counters for this cruncher.'''
+        
+        self.paused = False
+        '''Flag saying whether the cruncher was paused with `.pause`.'''
+        
+        self.error = None
+        '''
+        Text describing an error that made the cruncher stop for good.
+        
+        If a cruncher stops with an error, the crunching manager doesn't
+        recruit another cruncher for its job; it finishes the job with the
+        error instead.
+        '''
+        
     
     @abc_tools.abstract_static_method
     def can_be_used_with_simpack_grokker(simpack_grokker):
@@ -82,6 +107,17 @@ class BaseCruncher(object):
         '''
         
     
+    @staticmethod
+    def can_be_used_with_project(project):
+        '''
+        Return whether this cruncher type can be used in a project.
+        
+        This is asked only if the cruncher type can be used with the project's
+        simpack grokker. By default it can. (Static method.)
+        '''
+        return True
+        
+    
     @abc.abstractmethod
     def start(self):
         '''
@@ -102,4 +138,48 @@ class BaseCruncher(object):
     @abc.abstractmethod
     def is_alive(self):
         '''Report whether the cruncher is alive and crunching.'''
-        
\ No newline at end of file
+        
+    
+    def pause(self):
+        '''
+        Pause the cruncher, making it stop crunching until `.resume`.
+        
+        The cruncher stays alive, and keeps processing orders like `.retire`.
+        Cruncher types that set `.pausable` should override this.
+        '''
+        raise NotImplementedError
+    
+    
+    def resume(self):
+        '''Resume the cruncher after it was paused with `.pause`.'''
+        raise NotImplementedError
+        
+    
+    
+    def collect_telemetry(self):
+        '''
+        Get the cruncher's up-to-date telemetry object.
+        
+        Crunchers that don't share memory with the main program should
+        override this to fold in any telemetry reports they've sent.
+        '''
+        return self.telemetry
+    
+    
+    def update_profiling(self, profiling):
+        '''
+        Turn profiling of the step function on or off.
+        
+        Crunchers that support profiling should override this, and then
+        deliver their profiling data in `.collect_profile_stats`.
+        '''
+        
+        
+    def collect_profile_stats(self):
+        '''
+        Get the raw stats `dict`s that the cruncher profiled so far.
+        
+        See `garlicsim.general_misc.cute_profile.SamplingProfiler` for more
+        info about these.
+        '''
+        return []
@@ -0,0 +1,199 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `CruncherTelemetry` class.
+
+See its documentation for more information.
+'''
+
+from __future__ import division
+
+import math
+import time
+
+
+__all__ = ['CruncherTelemetry']
+
+
+class CruncherTelemetry(object):
+    '''
+    Performance counters for a single cruncher.
+
+    A cruncher updates its telemetry object in its main loop: It records how
+    long each call to the step function took, how long it was blocked because
+    its `.work_queue` was full, and (for `ProcessCruncher`) how many bytes of
+    pickled states it sent. The crunching manager adds the measurements that
+    only it can make: The depth of the cruncher's work queue, and how long the
+    tree lock was held while taking work from the cruncher.
+
+    `ThreadCruncher` shares its telemetry object with the main thread.
+    `ProcessCruncher` periodically ships a telemetry object with the counters
+    accumulated since its last report, and those are folded into the
+    main-process telemetry object using `.merge`.
+
+    The counters are plain attributes so that updating them in the cruncher
+    loop is cheap; derived figures like `.states_per_second` are computed only
+    when asked for.
+    '''
+
+    def __init__(self):
+
+        self.start_time = time.time()
+        '''The time at which we started counting.'''
+
+        self.last_update_time = self.start_time
+        '''The time at which the last state was recorded.'''
+
+        self.n_states = 0
+        '''The number of states that the cruncher produced.'''
+
+        self.step_time = 0
+        '''Total time spent inside the step function, in seconds.'''
+
+        self.min_step_time = None
+        '''The shortest step, in seconds. `None` if no steps were recorded.'''
+
+        self.max_step_time = 0
+        '''The longest step, in seconds.'''
+
+        self.step_time_histogram = {}
+        '''
+        Histogram of step times, with bins that grow by powers of two.
+
+        Maps binary exponent `e` to the number of steps that took between
+        `2 ** (e - 1)` and `2 ** e` seconds. Use `.get_step_time_distribution`
+        for a friendlier view.
+        '''
+
+        self.blocked_time = 0
+        '''Total time the cruncher was blocked on a full `.work_queue`.'''
+
+        self.pickled_bytes = 0
+        '''Total size of the pickled states sent. (`ProcessCruncher` only.)'''
+
+        self.queue_depth = 0
+        '''The number of items in the work queue at the last sync.'''
+
+        self.queue_high_water_mark = 0
+        '''The maximal number of items ever seen in the work queue.'''
+
+        self.tree_lock_wait_time = 0
+        '''Total time spent waiting to acquire the tree lock.'''
+
+        self.tree_lock_hold_time = 0
+        '''Total time the tree lock was held to add this cruncher's work.'''
+
+
+    def add_step(self, start_time, end_time):
+        '''Record a call to the step function that ran between given times.'''
+        step_time = end_time - start_time
+        self.n_states += 1
+        self.step_time += step_time
+        self.last_update_time = end_time
+        if self.min_step_time is None or step_time < self.min_step_time:
+            self.min_step_time = step_time
+        if step_time > self.max_step_time:
+            self.max_step_time = step_time
+        exponent = math.frexp(step_time)[1]
+        self.step_time_histogram[exponent] = \
+            self.step_time_histogram.get(exponent, 0) + 1
+
+
+    def add_queue_depth(self, queue_depth):
+        '''Record the current depth of the work queue.'''
+        self.queue_depth = queue_depth
+        if queue_depth > self.queue_high_water_mark:
+            self.queue_high_water_mark = queue_depth
+
+
+    def merge(self, other):
+        '''
+        Fold the counters of the telemetry object `other` into this one.
+
+        This is used to accumulate the partial reports that `ProcessCruncher`
+        sends from its process.
+        '''
+        self.n_states += other.n_states
+        self.step_time += other.step_time
+        self.last_update_time = max(self.last_update_time,
+                                    other.last_update_time)
+        if other.min_step_time is not None and \
+           (self.min_step_time is None or
+            other.min_step_time < self.min_step_time):
+            self.min_step_time = other.min_step_time
+        self.max_step_time = max(self.max_step_time, other.max_step_time)
+        for exponent, count in other.step_time_histogram.iteritems():
+            self.step_time_histogram[exponent] = \
+                self.step_time_histogram.get(exponent, 0) + count
+        self.blocked_time += other.blocked_time
+        self.pickled_bytes += other.pickled_bytes
+        self.queue_high_water_mark = max(self.queue_high_water_mark,
+                                         other.queue_high_water_mark)
+        self.tree_lock_wait_time += other.tree_lock_wait_time
+        self.tree_lock_hold_time += other.tree_lock_hold_time
+
+
+    def get_elapsed_time(self):
+        '''Get the time between the start of counting and the last update.'''
+        return self.last_update_time - self.start_time
+
+
+    def get_states_per_second(self):
+        '''Get the average rate at which the cruncher produced states.'''
+        elapsed_time = self.get_elapsed_time()
+        if elapsed_time <= 0:
+            return 0
+        return self.n_states / elapsed_time
+
+
+    def get_mean_step_time(self):
+        '''Get the average time of a step, or `None` if there were none.'''
+        if not self.n_states:
+            return None
+        return self.step_time / self.n_states
+
+
+    def get_mean_pickled_size(self):
+        '''Get the average size of a pickled state, or `None` if unknown.'''
+        if not (self.n_states and self.pickled_bytes):
+            return None
+        return self.pickled_bytes / self.n_states
+
+
+    def get_step_time_distribution(self):
+        '''
+        Get the distribution of step times as a list.
+
+        Returns a list of `(low, high, count)` tuples, sorted by time, meaning
+        that `count` steps took between `low` and `high` seconds.
+        '''
+        return [
+            (2.0 ** (exponent - 1), 2.0 ** exponent, count) for
+            (exponent, count) in sorted(self.step_time_histogram.items())
+        ]
+
+
+    def __repr__(self):
+        '''
+        Get a string representation of the telemetry.
+
+        Example output:
+
+            <CruncherTelemetry: 1200 states, 398.7 states/sec, mean step
+            1.9ms, blocked 0.6s, queue depth 31 (max 100)>
+        '''
+        mean_step_time = self.get_mean_step_time()
+        return (
+            '<%s: %s states, %.1f states/sec, mean step %s, blocked %.1fs, '
+            'queue depth %s (max %s)>' % (
+                type(self).__name__,
+                self.n_states,
+                self.get_states_per_second(),
+                ('%.1fms' % (mean_step_time * 1000)) if
+                mean_step_time is not None else 'unknown',
+                self.blocked_time,
+                self.queue_depth,
+                self.queue_high_water_mark
+            )
+        )
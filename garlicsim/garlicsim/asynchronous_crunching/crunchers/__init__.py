@@ -49,13 +49,11 @@ cruncher_types_list.append(ProcessCruncher)
 ### Finished adding `ProcessCruncher`. ########################################
 
 
-
-### Adding `PiCloudCruncher` dummy: ###########################################
+### Adding `RemoteCruncher`: ################################################
 #                                                                             #
 
-from .pi_cloud_cruncher import PiCloudCruncher
-cruncher_types_list.append(PiCloudCruncher)
+from .remote_cruncher import RemoteCruncher
+cruncher_types_list.append(RemoteCruncher)
 
 #                                                                             #
-### Finished adding `PiCloudCruncher` dummy. ##################################
-
+### Finished adding `RemoteCruncher`. #########################################
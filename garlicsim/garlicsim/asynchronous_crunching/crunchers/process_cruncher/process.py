@@ -9,6 +9,7 @@ See its documentation for more info.
 
 import multiprocessing
 import Queue
+import time
 import sys
 import os
 
@@ -18,8 +19,12 @@ except Exception:
     pass
 
 import garlicsim
+from garlicsim.general_misc.persistent import (ChannelPickler,
+                                               ChannelUnpickler)
+from garlicsim.data_structures.scalar_columns import \
+     attach_scalar_values, SCALAR_VALUES_ATTRIBUTE_NAME
 from garlicsim.asynchronous_crunching import \
-     BaseCruncher, CrunchingProfile, ObsoleteCruncherError
+     BaseCruncher, CrunchingProfile, ObsoleteCruncherError, CruncherTelemetry
 
 
 class Process(multiprocessing.Process):
@@ -60,6 +65,37 @@ class Process(multiprocessing.Process):
         
         self.order_queue = multiprocessing.Queue()
         '''Queue for receiving instructions from the main thread.'''
+        
+        self.telemetry_queue = multiprocessing.Queue()
+        '''
+        Queue for sending telemetry reports to the main thread.
+        
+        Every `TELEMETRY_REPORT_INTERVAL` seconds, the process puts in this
+        queue a `CruncherTelemetry` object with the counters it accumulated
+        since the previous report.
+        '''
+        
+        self.profile_queue = multiprocessing.Queue()
+        '''
+        Queue for sending profiling data to the main thread.
+        
+        When profiling is on, the process puts here a raw stats `dict` for
+        every window of steps that it profiled.
+        '''
+        
+        self.sampling_profiler = None
+        '''The profiler sampling our step iterator, if profiling is on.'''
+        
+        self.work_pickler = ChannelPickler()
+        '''
+        Pickler for the states we put in the `.work_queue`.
+        
+        It sends every `CrossProcessPersistent` only once; the main process
+        unpickles the states with a matching `ChannelUnpickler`.
+        '''
+        
+        self.order_unpickler = ChannelUnpickler()
+        '''Unpickler for the crunching profiles we get in the `.order_queue`.'''
     
         
     def set_low_priority(self):
@@ -94,10 +130,18 @@ class Process(multiprocessing.Process):
         its job, so it is propagated up to this level, where it causes the
         cruncher to terminate.
         '''
+        self.telemetry_queue.cancel_join_thread()
+        self.profile_queue.cancel_join_thread()
+        # (The main thread might never read our last reports; we don't want
+        # that to stop us from exiting.)
         try:
             self.main_loop()
         except ObsoleteCruncherError:
             return
+        finally:
+            self.report_telemetry()
+            if self.sampling_profiler is not None:
+                self.put_profile_stats(self.sampling_profiler.flush())
 
         
     def main_loop(self):
@@ -137,17 +181,102 @@ class Process(multiprocessing.Process):
         
         order = None
         
+        self.telemetry = CruncherTelemetry()
+        self.last_report_time = self.telemetry.start_time
+        report_interval = \
+            garlicsim.asynchronous_crunching.TELEMETRY_REPORT_INTERVAL
+        
+        state = self.initial_state
+        
         try:
-            for state in self.iterator:
-                self.work_queue.put(state)
+            step_start_time = time.time()
+            while True:
+                state = self.crunch_next_state()
+                step_end_time = time.time()
+                self.telemetry.add_step(step_start_time, step_end_time)
+                if self.sampling_profiler is not None:
+                    self.put_profile_stats(self.sampling_profiler.after_call())
+                self.put_work(state)
                 self.check_crunching_profile(state)
                 order = self.get_order()
                 if order:
-                    self.process_order(order) 
+                    self.process_order(order)
+                if step_end_time - self.last_report_time >= report_interval:
+                    self.report_telemetry()
+                if self.sampling_profiler is not None:
+                    self.sampling_profiler.before_call()
+                step_start_time = time.time()
         except garlicsim.misc.WorldEnded:
+            # If the simulation ended in the middle of a stride, the iterator
+            # holds the last state, which we didn't deliver yet:
+            last_state = getattr(self.iterator, 'current_state', state)
+            if last_state is not state:
+                self.put_work(last_state)
             self.work_queue.put(
                 garlicsim.asynchronous_crunching.misc.EndMarker()
             )
+            
+            
+    def crunch_next_state(self):
+        '''
+        Crunch the next state that we should deliver.
+        
+        That's `.crunching_profile.stride` steps ahead of the last one.
+        '''
+        stride = self.crunching_profile.stride
+        if stride == 1:
+            return self.iterator.next()
+        else:
+            return self.iterator.next_many(stride)
+
+            
+    def put_work(self, state):
+        '''
+        Pickle a state and put it in the `.work_queue`.
+        
+        We pickle the state ourselves, rather than letting the queue do it, so
+        we could count the bytes we send, and so we could send every
+        `CrossProcessPersistent` only once. If the queue is full, we block until
+        the main process takes work from it, and we count the time we were
+        blocked in our telemetry.
+        '''
+        scalar_functions = self.crunching_profile.scalar_functions
+        if scalar_functions:
+            attach_scalar_values(state, scalar_functions)
+            pickled_state = self.work_pickler.dumps(state)
+            # The step function may copy our state, so we don't leave the
+            # values on it:
+            delattr(state, SCALAR_VALUES_ATTRIBUTE_NAME)
+        else:
+            pickled_state = self.work_pickler.dumps(state)
+        self.telemetry.pickled_bytes += len(pickled_state)
+        try:
+            self.work_queue.put_nowait(pickled_state)
+        except Queue.Full:
+            blocking_start_time = time.time()
+            self.work_queue.put(pickled_state)
+            self.telemetry.blocked_time += time.time() - blocking_start_time
+            self.telemetry.add_queue_depth(
+                garlicsim.asynchronous_crunching.CRUNCHER_QUEUE_SIZE
+            )
+
+            
+    def put_profile_stats(self, stats_dict):
+        '''Put a raw stats `dict`, if we got one, in the `.profile_queue`.'''
+        if stats_dict is not None:
+            self.profile_queue.put(stats_dict)
+
+            
+    def report_telemetry(self):
+        '''
+        Send the telemetry accumulated since the last report, and reset it.
+        '''
+        telemetry = getattr(self, 'telemetry', None)
+        if telemetry is None:
+            return
+        self.telemetry_queue.put(telemetry)
+        self.telemetry = CruncherTelemetry()
+        self.last_report_time = self.telemetry.start_time
 
             
     def check_crunching_profile(self, state):
@@ -182,9 +311,39 @@ class Process(multiprocessing.Process):
             raise ObsoleteCruncherError("Cruncher received a 'retire' order; "
                                         "Shutting down.")
         
-        elif isinstance(order, CrunchingProfile):
-            self.process_crunching_profile_order(order)
+        elif order == 'start profiling':
+            if self.sampling_profiler is None:
+                from garlicsim.general_misc import cute_profile
+                self.sampling_profiler = cute_profile.SamplingProfiler()
+        
+        elif order == 'stop profiling':
+            if self.sampling_profiler is not None:
+                self.put_profile_stats(self.sampling_profiler.flush())
+                self.sampling_profiler = None
+        
+        elif order == 'pause':
+            self.wait_for_resume_order()
+        
+        else:
+            # Any other string is a crunching profile, pickled by the
+            # `ProcessCruncher`'s `ChannelPickler`.
+            self.process_crunching_profile_order(
+                self.order_unpickler.loads(order)
+            )
+            
+            
             
+    def wait_for_resume_order(self):
+        '''
+        Wait until we get a 'resume' order, processing the other orders.
+        
+        This is how the process is paused, without using any CPU.
+        '''
+        while True:
+            order = self.order_queue.get()
+            if order == 'resume':
+                return
+            self.process_order(order)
             
             
     def process_crunching_profile_order(self, order):
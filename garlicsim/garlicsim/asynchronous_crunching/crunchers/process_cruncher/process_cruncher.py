@@ -7,14 +7,22 @@ This module defines the `ProcessCruncher` class.
 See its documentation for more information.
 '''
 
+from __future__ import with_statement
+
+import os
 import sys
 
 from garlicsim.general_misc.reasoned_bool import ReasonedBool
+from garlicsim.general_misc.temp_value_setters import TempValueSetter
 from garlicsim.general_misc import string_tools
 from garlicsim.general_misc import import_tools
+from garlicsim.general_misc import queue_tools
+from garlicsim.general_misc.persistent import (ChannelPickler,
+                                               ChannelUnpickler)
 
 import garlicsim
 from garlicsim.asynchronous_crunching import BaseCruncher
+from garlicsim.bootstrap.bootstrap import SKIP_PREREQUISITE_CHECKS_VARIABLE
 
 
 multiprocessing_missing_text = (
@@ -87,8 +95,29 @@ class ProcessCruncher(BaseCruncher):
         
         self.order_queue = self.process.order_queue
         '''Queue for receiving instructions from the main thread.'''
+        
+        self.telemetry_queue = self.process.telemetry_queue
+        '''Queue for receiving telemetry reports from the process.'''
+        
+        self.profile_queue = self.process.profile_queue
+        '''Queue for receiving profiling data from the process.'''
+        
+        self.work_unpickler = ChannelUnpickler()
+        '''
+        Unpickler for the states that the process puts in the `.work_queue`.
+        
+        The process sends every `CrossProcessPersistent` in full only once, and
+        later refers to it by uuid; this unpickler remembers the persistents it
+        got so it could resolve those uuids.
+        '''
+        
+        self.order_pickler = ChannelPickler()
+        '''Pickler for the crunching profiles we put in the `.order_queue`.'''
      
     
+    pausable = True
+    
+    
     @staticmethod
     def can_be_used_with_simpack_grokker(simpack_grokker):
         '''
@@ -120,7 +149,14 @@ class ProcessCruncher(BaseCruncher):
         '''
         Start the cruncher so it will start crunching and delivering states.
         '''
-        self.process.start()
+        # The prerequisites were checked when this process imported
+        # `garlicsim`, so on platforms that don't fork, the worker process,
+        # which runs the same interpreter, doesn't need to check them again.
+        # We set the variable only while starting it, so other processes don't
+        # inherit it:
+        with TempValueSetter((os.environ, SKIP_PREREQUISITE_CHECKS_VARIABLE),
+                             '1'):
+            self.process.start()
 
             
     def retire(self):
@@ -134,12 +170,54 @@ class ProcessCruncher(BaseCruncher):
         
     def update_crunching_profile(self, profile):
         '''Update the cruncher's crunching profile. Process-safe.'''
-        self.order_queue.put(profile)
+        self.order_queue.put(self.order_pickler.dumps(profile))
+        
+        
+    def pause(self):
+        '''
+        Pause the cruncher until `.resume` is called. Process-safe.
+        
+        The process stays alive, so resuming it is much cheaper than starting
+        a new process.
+        '''
+        self.order_queue.put('pause')
+        self.paused = True
+        
+        
+    def resume(self):
+        '''Resume the cruncher after it was paused. Process-safe.'''
+        self.order_queue.put('resume')
+        self.paused = False
+        
+        
+    def update_profiling(self, profiling):
+        '''Turn profiling of the step function on or off. Process-safe.'''
+        self.order_queue.put('start profiling' if profiling else
+                             'stop profiling')
         
         
     def is_alive(self):
         '''Report whether the cruncher is alive and crunching.'''
         return self.process.is_alive()
+    
+    
+    def collect_telemetry(self):
+        '''
+        Get the cruncher's up-to-date telemetry object.
         
-        
-    
\ No newline at end of file
+        This folds in all the telemetry reports that the process has sent so
+        far.
+        '''
+        for report in queue_tools.iterate(self.telemetry_queue):
+            self.telemetry.merge(report)
+        return self.telemetry
+    
+    
+    def load_work(self, pickled_work):
+        '''Unpickle a string that the process put in the `.work_queue`.'''
+        return self.work_unpickler.loads(pickled_work)
+    
+    
+    def collect_profile_stats(self):
+        '''Get the raw stats `dict`s that the process profiled so far.'''
+        return queue_tools.dump(self.profile_queue)
@@ -0,0 +1,11 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This package defines the `RemoteCruncher` class and the `Worker` daemon.
+
+See their documentation for more information.
+'''
+
+from .remote_cruncher import RemoteCruncher
+from .worker import Worker
@@ -0,0 +1,384 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the protocol between `RemoteCruncher` and its workers.
+
+Crunchers and workers share a secret, the authkey. When a cruncher connects,
+both sides prove to each other that they know it, in a challenge handshake
+like `multiprocessing.connection`'s, before any message is unpickled. (See
+`Connection.authenticate`.)
+
+A connection then carries messages in both directions. Every message is a
+tuple whose first item is a string saying what kind of message it is. It's
+pickled and sent as a frame: A 4-byte length, an HMAC of the pickle and of the
+frame's number, and the pickle. Frames with a wrong HMAC are rejected before
+they're unpickled.
+
+From the cruncher to the worker:
+
+ - `('crunch', simpack_name, pickled_state, pickled_crunching_profile)`: The
+   first message, asking the worker to crunch from the state.
+ - `('retire',)`
+ - `('crunching profile', pickled_crunching_profile)`
+ - `('start profiling',)` and `('stop profiling',)`
+ - `('heartbeat',)`
+
+From the worker to the cruncher:
+
+ - `('state', pickled_state)`
+ - `('end',)`: The simulation ended.
+ - `('telemetry', cruncher_telemetry)`
+ - `('profile stats', stats_dict)`
+ - `('error', text)`: The worker couldn't crunch.
+ - `('heartbeat',)`
+ - `('done',)`: The worker finished crunching, and it's closing the connection.
+
+States and crunching profiles are pickled with a `ChannelPickler` for the
+connection, so every `CrossProcessPersistent` is sent only once.
+
+Both sides send a heartbeat if they haven't sent anything for
+`HEARTBEAT_INTERVAL` seconds, and consider the connection lost if they haven't
+received anything for `HEARTBEAT_TIMEOUT` seconds while waiting for a message.
+'''
+
+from __future__ import with_statement
+
+import cPickle
+import hashlib
+import hmac
+import os
+import select
+import socket
+import struct
+import threading
+import time
+
+from garlicsim.misc import GarlicSimException
+
+
+DEFAULT_PORT = 7347
+'''The port that workers listen on by default.'''
+
+HEARTBEAT_INTERVAL = 1.0
+'''Seconds of silence after which a heartbeat is sent.'''
+
+HEARTBEAT_TIMEOUT = 10.0
+'''Seconds of waiting for a message after which the connection is lost.'''
+
+AUTHKEY_VARIABLE = 'GARLICSIM_REMOTE_AUTHKEY'
+'''The environment variable from which workers take the authkey.'''
+
+_header = struct.Struct('!I')
+
+_frame_number = struct.Struct('!Q')
+
+_digest_size = hashlib.sha1().digest_size
+
+_challenge_size = 20
+
+_chunk_size = 65536
+
+
+class ConnectionLost(GarlicSimException):
+    '''The other side closed the connection or stopped sending heartbeats.'''
+
+
+class AuthenticationError(ConnectionLost):
+    '''The other side doesn't know the authkey, or sent a forged frame.'''
+
+
+def _get_digest(key, message):
+    '''Get the HMAC-SHA1 digest of `message` with `key`.'''
+    return hmac.new(key, message, hashlib.sha1).digest()
+
+
+def _digests_equal(digest, other_digest):
+    '''Compare two digests in time that doesn't depend on where they differ.'''
+    if len(digest) != len(other_digest):
+        return False
+    result = 0
+    for (char, other_char) in zip(digest, other_digest):
+        result |= ord(char) ^ ord(other_char)
+    return result == 0
+
+
+def parse_address(address):
+    '''
+    Parse a worker address into a `(host, port)` tuple.
+
+    The address may be a tuple, or a string like `'host:port'` or `'host'`.
+    '''
+    if isinstance(address, basestring):
+        if ':' in address:
+            (host, port) = address.rsplit(':', 1)
+            return (host, int(port))
+        return (address, DEFAULT_PORT)
+    (host, port) = address
+    return (host, int(port))
+
+
+class Connection(object):
+    '''
+    A connection that sends and receives framed messages over a socket.
+
+    Both sides must call `.authenticate` before sending or receiving messages.
+    Sending is thread-safe. Receiving should be done from a single thread.
+    '''
+
+    def __init__(self, socket_, authkey):
+        if not authkey:
+            raise GarlicSimException('An authkey must be given to make a '
+                                     'connection.')
+
+        self.socket = socket_
+        '''The connected socket.'''
+
+        self.authkey = authkey
+        '''The secret that both sides of the connection must know.'''
+
+        self.authenticated = False
+        '''Flag saying whether both sides proved that they know the authkey.'''
+
+        self.last_send_time = time.time()
+        '''The last time we sent a message.'''
+
+        self.closed = False
+        '''Flag saying whether we closed the connection.'''
+
+        self._chunks = []
+        '''Chunks that we received that don't make a complete frame yet.'''
+
+        self._n_received_bytes = 0
+        '''The total length of `._chunks`.'''
+
+        self._n_needed_bytes = _header.size
+        '''The number of bytes that we need to make progress in parsing.'''
+
+        self._message = None
+        '''The message that `._parse_frame` parsed last.'''
+
+        self._send_key = None
+        '''The key with which we sign the frames we send.'''
+
+        self._receive_key = None
+        '''The key with which the other side signs the frames it sends.'''
+
+        self._n_sent_frames = 0
+        '''The number of frames we sent.'''
+
+        self._n_received_frames = 0
+        '''The number of frames we received.'''
+
+        self._send_lock = threading.Lock()
+        '''Lock making sure that frames aren't interleaved.'''
+
+
+    @staticmethod
+    def connect(address, authkey, timeout=HEARTBEAT_TIMEOUT):
+        '''
+        Connect to the worker at `address` and authenticate with `authkey`.
+
+        Raises `ConnectionLost` if we can't connect, and `AuthenticationError`
+        if the worker doesn't know the authkey or doesn't accept ours.
+        '''
+        socket_ = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        socket_.settimeout(timeout)
+        try:
+            socket_.connect(parse_address(address))
+        except (socket.error, socket.timeout), error:
+            socket_.close()
+            raise ConnectionLost("Couldn't connect to %s: %s" %
+                                 (address, error))
+        # We wait for messages with `select`, and sends block until the other
+        # side reads:
+        socket_.settimeout(None)
+        socket_.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = Connection(socket_, authkey)
+        try:
+            connection.authenticate('cruncher', timeout)
+        except ConnectionLost, error:
+            connection.close()
+            raise error
+        return connection
+
+
+    def authenticate(self, side, timeout=HEARTBEAT_TIMEOUT):
+        '''
+        Prove to the other side that we know the authkey, and check that it
+        does too.
+
+        `side` is either `'worker'` or `'cruncher'`. The worker sends a random
+        challenge; the cruncher answers with a challenge of its own and an HMAC
+        of both; the worker checks it and answers with an HMAC of its own, or
+        closes the connection if the cruncher's HMAC is wrong.
+        Both challenges go into the keys that sign the frames, so frames can't
+        be replayed from another connection.
+
+        Raises `AuthenticationError` if the other side doesn't know the
+        authkey, and `ConnectionLost` if it doesn't answer within `timeout`
+        seconds.
+        '''
+        assert side in ('worker', 'cruncher')
+        if side == 'worker':
+            other_side = 'cruncher'
+            worker_challenge = os.urandom(_challenge_size)
+            self._send_raw(worker_challenge)
+            answer = self._receive_raw(_challenge_size + _digest_size,
+                                       timeout)
+            challenges = worker_challenge + answer[:_challenge_size]
+            self._check_digest(answer[_challenge_size:],
+                               'cruncher' + challenges)
+            self._send_raw(_get_digest(self.authkey, 'worker' + challenges))
+        else: # side == 'cruncher'
+            other_side = 'worker'
+            worker_challenge = self._receive_raw(_challenge_size, timeout)
+            cruncher_challenge = os.urandom(_challenge_size)
+            challenges = worker_challenge + cruncher_challenge
+            self._send_raw(cruncher_challenge +
+                           _get_digest(self.authkey, 'cruncher' + challenges))
+            try:
+                digest = self._receive_raw(_digest_size, timeout)
+            except ConnectionLost:
+                # The worker closes the connection if it rejects us.
+                raise AuthenticationError("The worker rejected us; it may "
+                                          "have a different authkey.")
+            self._check_digest(digest, 'worker' + challenges)
+        self._send_key = _get_digest(self.authkey,
+                                     '%s frames' % side + challenges)
+        self._receive_key = _get_digest(self.authkey,
+                                        '%s frames' % other_side + challenges)
+        self.authenticated = True
+
+
+    def _check_digest(self, digest, message):
+        '''Raise `AuthenticationError` if `digest` isn't `message`'s HMAC.'''
+        if not _digests_equal(digest, _get_digest(self.authkey, message)):
+            raise AuthenticationError("The other side doesn't know the "
+                                      "authkey.")
+
+
+    def _send_raw(self, data):
+        '''Send handshake data, which isn't framed.'''
+        try:
+            self.socket.sendall(data)
+        except socket.error, error:
+            raise ConnectionLost(str(error))
+
+
+    def _receive_raw(self, n_bytes, timeout):
+        '''Receive `n_bytes` bytes of handshake data.'''
+        chunks = []
+        n_received_bytes = 0
+        while n_received_bytes < n_bytes:
+            try:
+                (ready, _, _) = select.select([self.socket], [], [], timeout)
+                if not ready:
+                    raise ConnectionLost('The handshake timed out.')
+                chunk = self.socket.recv(n_bytes - n_received_bytes)
+            except (socket.error, select.error, ValueError), error:
+                raise ConnectionLost(str(error))
+            if not chunk:
+                raise ConnectionLost('The connection was closed.')
+            chunks.append(chunk)
+            n_received_bytes += len(chunk)
+        return ''.join(chunks)
+
+
+    def send(self, message):
+        '''Send a message. Raises `ConnectionLost` if we can't.'''
+        if not self.authenticated:
+            raise AuthenticationError("Can't send before authenticating.")
+        pickled_message = cPickle.dumps(message, 2)
+        with self._send_lock:
+            digest = _get_digest(
+                self._send_key,
+                _frame_number.pack(self._n_sent_frames) + pickled_message
+            )
+            self._n_sent_frames += 1
+            try:
+                self.socket.sendall(_header.pack(len(pickled_message)) +
+                                    digest + pickled_message)
+            except socket.error, error:
+                raise ConnectionLost(str(error))
+            self.last_send_time = time.time()
+
+
+    def send_heartbeat_if_needed(self):
+        '''Send a heartbeat if we didn't send anything for a while.'''
+        if time.time() - self.last_send_time >= HEARTBEAT_INTERVAL:
+            self.send(('heartbeat',))
+
+
+    def receive(self, timeout=HEARTBEAT_TIMEOUT):
+        '''
+        Receive a message, waiting up to `timeout` seconds for it to start.
+
+        Raises `ConnectionLost` if the connection was closed, or if nothing
+        arrived for `timeout` seconds, and `AuthenticationError` if the frame
+        wasn't signed by the other side.
+        '''
+        if not self.authenticated:
+            raise AuthenticationError("Can't receive before authenticating.")
+        while self._n_received_bytes < self._n_needed_bytes or \
+              not self._parse_frame():
+            try:
+                (ready, _, _) = select.select([self.socket], [], [], timeout)
+                if not ready:
+                    raise ConnectionLost('No message arrived for %s seconds.'
+                                         % timeout)
+                chunk = self.socket.recv(_chunk_size)
+            except (socket.error, select.error, ValueError), error:
+                # (`ValueError` is raised if the socket was closed meanwhile.)
+                raise ConnectionLost(str(error))
+            if not chunk:
+                raise ConnectionLost('The connection was closed.')
+            self._chunks.append(chunk)
+            self._n_received_bytes += len(chunk)
+        return self._message
+
+
+    def _parse_frame(self):
+        '''
+        Try to parse a frame from the chunks that we received.
+
+        If there's a complete frame, puts its message in `._message` and
+        returns `True`. Otherwise updates `._n_needed_bytes` and returns
+        `False`. We join the chunks only when we have enough bytes, so big
+        messages arriving in many chunks take linear time.
+
+        Raises `AuthenticationError` if the frame's HMAC is wrong; the pickle
+        isn't loaded in that case.
+        '''
+        data = ''.join(self._chunks)
+        (length,) = _header.unpack(data[:_header.size])
+        pickle_start = _header.size + _digest_size
+        frame_end = pickle_start + length
+        if len(data) < frame_end:
+            self._chunks = [data]
+            self._n_needed_bytes = frame_end
+            return False
+        pickled_message = data[pickle_start:frame_end]
+        digest = _get_digest(
+            self._receive_key,
+            _frame_number.pack(self._n_received_frames) + pickled_message
+        )
+        if not _digests_equal(data[_header.size:pickle_start], digest):
+            raise AuthenticationError('Received a frame with a wrong HMAC.')
+        self._n_received_frames += 1
+        self._message = cPickle.loads(pickled_message)
+        remainder = data[frame_end:]
+        self._chunks = [remainder] if remainder else []
+        self._n_received_bytes = len(remainder)
+        self._n_needed_bytes = _header.size
+        return True
+
+
+    def close(self):
+        '''Close the connection. Blocked sends and receives will fail.'''
+        self.closed = True
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self.socket.close()
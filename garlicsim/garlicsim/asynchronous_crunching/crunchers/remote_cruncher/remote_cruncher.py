@@ -0,0 +1,398 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `RemoteCruncher` class.
+
+See its documentation for more information.
+'''
+
+from __future__ import with_statement
+
+import Queue
+import itertools
+import threading
+
+from garlicsim.general_misc.reasoned_bool import ReasonedBool
+from garlicsim.general_misc import string_tools
+from garlicsim.general_misc import queue_tools
+from garlicsim.general_misc.persistent import (ChannelPickler,
+                                               ChannelUnpickler)
+
+import garlicsim
+from garlicsim.asynchronous_crunching import BaseCruncher
+from .protocol import (Connection, ConnectionLost, AuthenticationError,
+                       HEARTBEAT_INTERVAL, parse_address)
+
+
+__all__ = ['RemoteCruncher']
+
+
+_worker_counter = itertools.count()
+'''Counter used to spread crunchers between the workers.'''
+
+
+class RemoteCruncher(threading.Thread, BaseCruncher):
+    '''
+    Cruncher that crunches on a worker daemon, possibly on another computer.
+
+    A cruncher is a worker which crunches the simulation. It receives a state
+    from the main program, and then it repeatedly applies the step function of
+    the simulation to produce more states. Those states are then put in the
+    cruncher's `.work_queue`. They are then taken by the main program when
+    `Project.sync_crunchers` is called, and put into the tree.
+
+    Read more about crunchers in the documentation of the `crunchers` package.
+
+    `RemoteCruncher` connects over TCP to one of the workers in the project's
+    `.remote_workers`, (see `remote_cruncher.worker.Worker`,) authenticates
+    with the project's `.remote_authkey`, sends it the initial state and
+    crunching profile, and receives the states it crunches from a thread.
+    Orders to retire or update the crunching profile are forwarded to the
+    worker. If the worker disconnects or stops sending heartbeats, the cruncher
+    reconnects, to the next worker if there is one, and continues crunching
+    from the last state it received.
+
+    This lets you crunch many forks of a simulation in parallel on several
+    computers. The simpack must be importable on the workers and allowed by
+    them, and it can't be history-dependent.
+    '''
+
+    gui_explanation = string_tools.docstring_trim(
+    '''
+    `RemoteCruncher`:
+
+     - Crunches on worker daemons over the network, relieving this computer of
+       the CPU stress.
+
+     - Able to crunch many forks in parallel on several computers.
+
+     - Requires workers running on the computers in the project's
+       `remote_workers`, which must know the project's `remote_authkey` and
+       allow the simpack.
+    ''')
+
+
+    @staticmethod
+    def can_be_used_with_simpack_grokker(simpack_grokker):
+        '''
+        Return whether `RemoteCruncher` can be used with `simpack_grokker`.
+
+        `RemoteCruncher` can be used if the simpack is not history-dependent.
+        Whether a project has workers is checked by
+        `.can_be_used_with_project`.
+        '''
+        if simpack_grokker.history_dependent:
+            return ReasonedBool(
+                False,
+                "`RemoteCruncher` can't be used in history-dependent "
+                "simulations because workers don't have the tree."
+            )
+        else:
+            return True
+
+
+    @staticmethod
+    def can_be_used_with_project(project):
+        '''
+        Return whether `RemoteCruncher` can be used in `project`.
+
+        It can be used if the project has `.remote_workers` and a
+        `.remote_authkey`.
+        '''
+        if not project.remote_workers:
+            return ReasonedBool(
+                False,
+                "`RemoteCruncher` can't be used because the project has no "
+                "`remote_workers`. Specify them in the "
+                "`GARLICSIM_REMOTE_WORKERS` environment variable, like "
+                "'host1:7347,host2:7347', or in the project's "
+                "`.remote_workers`."
+            )
+        elif not project.remote_authkey:
+            return ReasonedBool(
+                False,
+                "`RemoteCruncher` can't be used because the project has no "
+                "`remote_authkey`. Specify it in the "
+                "`GARLICSIM_REMOTE_AUTHKEY` environment variable, or in the "
+                "project's `.remote_authkey`."
+            )
+        else:
+            return True
+
+
+    def __init__(self, crunching_manager, initial_state, crunching_profile):
+        BaseCruncher.__init__(self, crunching_manager, initial_state,
+                              crunching_profile)
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+        self.worker_addresses = \
+            [parse_address(address) for address in
+             self.project.remote_workers]
+        '''The addresses of the workers we may crunch on.'''
+        if not self.worker_addresses:
+            raise garlicsim.misc.GarlicSimException(
+                "Can't use `RemoteCruncher` because the project has no "
+                "`remote_workers`."
+            )
+
+        self.authkey = self.project.remote_authkey
+        '''The secret that the workers know.'''
+        if not self.authkey:
+            raise garlicsim.misc.GarlicSimException(
+                "Can't use `RemoteCruncher` because the project has no "
+                "`remote_authkey`."
+            )
+
+        self.simpack_name = self.project.simpack.__name__
+        '''The name of the simpack, which the worker imports.'''
+
+        self.work_queue = Queue.Queue(
+            garlicsim.asynchronous_crunching.CRUNCHER_QUEUE_SIZE
+        )
+        '''
+        Queue for putting completed work to be picked up by the main thread.
+
+        In this queue the cruncher will put the states that it produces, in
+        chronological order. If the cruncher reaches a simulation ends, it will
+        put an `EndMarker` in this queue.
+        '''
+
+        self.profile_queue = Queue.Queue()
+        '''Queue for putting profiling data sent by the worker.'''
+
+        self.telemetry_queue = Queue.Queue()
+        '''Queue for putting telemetry reports sent by the worker.'''
+
+        self.last_state = initial_state
+        '''The last state we got, from which we continue if we reconnect.'''
+
+        self.connection = None
+        '''The connection to the worker, if we're connected.'''
+
+        self.worker_address = None
+        '''The address of the worker we're connected to.'''
+
+        self.n_reconnections = 0
+        '''The number of times we lost a worker and reconnected.'''
+
+        self.profiling = False
+        '''Flag saying whether the worker should profile the step function.'''
+
+        self.order_pickler = None
+        '''Pickler for the states and crunching profiles we send.'''
+
+        self.work_unpickler = None
+        '''Unpickler for the states the worker sends.'''
+
+        self._retired = threading.Event()
+        '''Event that's set when we're retired.'''
+
+        self._lock = threading.Lock()
+        '''Lock protecting `.connection` and `.order_pickler`.'''
+
+
+    def run(self):
+        '''
+        Internal method.
+
+        This is called when the cruncher is started. It connects to a worker
+        and receives work from it until we're done, reconnecting whenever the
+        connection is lost. If a worker reports an error, or authentication
+        fails, we stop and put the error in `.error`.
+        '''
+        while not self._retired.isSet():
+            try:
+                self.connect()
+            except AuthenticationError, error:
+                self.error = 'AuthenticationError: %s' % error
+                return
+            except ConnectionLost:
+                # No worker is available; we'll try again in a while:
+                self._retired.wait(HEARTBEAT_INTERVAL)
+                continue
+            try:
+                self.receive_work()
+                return
+            except AuthenticationError, error:
+                self.error = 'AuthenticationError: %s' % error
+                return
+            except ConnectionLost:
+                self.n_reconnections += 1
+            finally:
+                self.disconnect()
+
+
+    def connect(self):
+        '''
+        Connect to a worker and ask it to crunch from `.last_state`.
+
+        We start with a different worker each time, so crunchers are spread
+        between the workers. Raises `ConnectionLost` if no worker is
+        available, and `AuthenticationError` if a worker doesn't know our
+        authkey.
+        '''
+        n_workers = len(self.worker_addresses)
+        first_index = _worker_counter.next() % n_workers
+        for i in xrange(n_workers):
+            address = self.worker_addresses[(first_index + i) % n_workers]
+            try:
+                connection = Connection.connect(address, self.authkey)
+            except AuthenticationError:
+                raise
+            except ConnectionLost:
+                continue
+            with self._lock:
+                if self._retired.isSet():
+                    connection.close()
+                    raise ConnectionLost('The cruncher was retired.')
+                self.order_pickler = ChannelPickler()
+                self.work_unpickler = ChannelUnpickler()
+                try:
+                    connection.send((
+                        'crunch',
+                        self.simpack_name,
+                        self.order_pickler.dumps(self.last_state),
+                        self.order_pickler.dumps(self.crunching_profile)
+                    ))
+                    if self.profiling:
+                        connection.send(('start profiling',))
+                except ConnectionLost:
+                    connection.close()
+                    continue
+                self.connection = connection
+                self.worker_address = address
+                return
+        raise ConnectionLost('No worker is available.')
+
+
+    def disconnect(self):
+        '''Close the connection to the worker.'''
+        with self._lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+
+    def receive_work(self):
+        '''
+        Receive work from the worker until it's done.
+
+        Raises `ConnectionLost` if the connection is lost before that.
+        '''
+        connection = self.connection
+        while True:
+            message = connection.receive()
+            kind = message[0]
+            if kind == 'state':
+                state = self.work_unpickler.loads(message[1])
+                self.telemetry.pickled_bytes += len(message[1])
+                if not self.put_work(state):
+                    return
+                self.last_state = state
+            elif kind == 'end':
+                self.put_work(
+                    garlicsim.asynchronous_crunching.misc.EndMarker()
+                )
+            elif kind == 'telemetry':
+                self.telemetry_queue.put(message[1])
+            elif kind == 'profile stats':
+                self.profile_queue.put(message[1])
+            elif kind == 'error':
+                self.error = message[1]
+                return
+            elif kind == 'done':
+                return
+            connection.send_heartbeat_if_needed()
+
+
+    def put_work(self, thing):
+        '''
+        Put a state or an `EndMarker` in the `.work_queue`.
+
+        If the queue is full, we wait until the main thread takes work from it,
+        sending heartbeats to the worker meanwhile. (The worker waits for us to
+        read, since we don't read while we wait.)
+
+        Returns `False` if we were retired while waiting.
+        '''
+        while True:
+            if self._retired.isSet():
+                return False
+            try:
+                self.work_queue.put(thing, timeout=HEARTBEAT_INTERVAL / 2.)
+            except Queue.Full:
+                self.connection.send_heartbeat_if_needed()
+            else:
+                return True
+
+
+    def send_order(self, order):
+        '''Send an order to the worker, if we're connected to one.'''
+        with self._lock:
+            if self.connection is not None:
+                try:
+                    self.connection.send(order)
+                except ConnectionLost:
+                    # We'll send the up-to-date crunching profile when we
+                    # reconnect.
+                    pass
+
+
+    def retire(self):
+        '''
+        Retire the cruncher. Thread-safe.
+
+        Causes it to shut down as soon as the worker receives the order.
+        '''
+        self._retired.set()
+        self.send_order(('retire',))
+
+
+    def update_crunching_profile(self, profile):
+        '''Update the cruncher's crunching profile. Thread-safe.'''
+        with self._lock:
+            step_profile_changed = (self.crunching_profile.step_profile !=
+                                    profile.step_profile)
+            self.crunching_profile = profile
+            if self.connection is not None and not step_profile_changed:
+                try:
+                    self.connection.send((
+                        'crunching profile',
+                        self.order_pickler.dumps(profile)
+                    ))
+                except ConnectionLost:
+                    pass
+        if step_profile_changed:
+            # Crunchers can't change step profile on the fly, so we retire and
+            # let the crunching manager recruit a new cruncher.
+            self.retire()
+
+
+    def update_profiling(self, profiling):
+        '''Turn profiling of the step function on or off. Thread-safe.'''
+        self.profiling = profiling
+        self.send_order(('start profiling',) if profiling else
+                        ('stop profiling',))
+
+
+    def collect_telemetry(self):
+        '''
+        Get the cruncher's up-to-date telemetry object.
+
+        This folds in all the telemetry reports that the worker has sent so
+        far.
+        '''
+        for report in queue_tools.iterate(self.telemetry_queue):
+            self.telemetry.merge(report)
+        return self.telemetry
+
+
+    def collect_profile_stats(self):
+        '''Get the raw stats `dict`s that the worker profiled so far.'''
+        return queue_tools.dump(self.profile_queue)
+
+
+    is_alive = threading.Thread.isAlive
+    '''Crutch for Python 2.5 and below.'''
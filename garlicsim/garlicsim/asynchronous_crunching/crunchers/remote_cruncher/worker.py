@@ -0,0 +1,449 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `Worker` class, a daemon that crunches for
+`RemoteCruncher`.
+
+See its documentation for more information. To launch a worker from the
+command line:
+
+    python -m garlicsim.asynchronous_crunching.crunchers.remote_cruncher.worker
+
+The worker takes the authkey that crunchers must know from the
+`GARLICSIM_REMOTE_AUTHKEY` environment variable, and only crunches the simpacks
+that you give with `--simpack` options. Those must be importable on the
+worker's machine. It listens on `127.0.0.1` unless you give a `--host`; you
+may also give a `--port`.
+'''
+
+from __future__ import with_statement
+
+import Queue
+import select
+import socket
+import threading
+import time
+
+from garlicsim.general_misc import import_tools
+from garlicsim.general_misc.persistent import (ChannelPickler,
+                                               ChannelUnpickler)
+
+import garlicsim
+from garlicsim.data_structures.scalar_columns import \
+     attach_scalar_values, SCALAR_VALUES_ATTRIBUTE_NAME
+from garlicsim.asynchronous_crunching import \
+     ObsoleteCruncherError, CruncherTelemetry
+from .protocol import (Connection, ConnectionLost, DEFAULT_PORT,
+                       HEARTBEAT_INTERVAL, HEARTBEAT_TIMEOUT,
+                       AUTHKEY_VARIABLE)
+
+
+__all__ = ['Worker']
+
+
+class Session(threading.Thread):
+    '''
+    A worker's session with one `RemoteCruncher`.
+
+    The session crunches from the state that the cruncher sent, sending it the
+    states, in the same way that `ProcessCruncher`'s process does. Another
+    thread reads orders from the cruncher, and yet another sends heartbeats
+    while we're busy crunching.
+    '''
+
+    def __init__(self, worker, connection):
+        threading.Thread.__init__(self)
+        self.daemon = True
+
+        self.worker = worker
+        '''The worker that we belong to.'''
+
+        self.connection = connection
+        '''The connection to the cruncher.'''
+
+        self.order_queue = Queue.Queue()
+        '''Queue of orders that the cruncher sent.'''
+
+        self.work_pickler = ChannelPickler()
+        '''Pickler for the states we send.'''
+
+        self.order_unpickler = ChannelUnpickler()
+        '''Unpickler for the state and crunching profiles we get.'''
+
+        self.sampling_profiler = None
+        '''The profiler sampling our step iterator, if profiling is on.'''
+
+        self._finished = threading.Event()
+        '''Event that's set when the session is finished.'''
+
+
+    def run(self):
+        '''Crunch for the cruncher until we're done or the cruncher is gone.'''
+        try:
+            try:
+                self.start_crunching()
+                self.main_loop()
+            except (ObsoleteCruncherError, ConnectionLost):
+                pass
+            except Exception, exception:
+                self.connection.send(('error', '%s: %s' %
+                                      (type(exception).__name__, exception)))
+            else:
+                self.put_end_marker()
+            self.report_telemetry()
+            if self.sampling_profiler is not None:
+                self.put_profile_stats(self.sampling_profiler.flush())
+            self.connection.send(('done',))
+        except ConnectionLost:
+            pass
+        finally:
+            self._finished.set()
+            self.connection.close()
+            self.worker._session_finished(self)
+
+
+    def start_crunching(self):
+        '''
+        Authenticate the cruncher, get its `crunch` request and prepare to
+        crunch.
+        '''
+        self.connection.authenticate('worker')
+        message = self.connection.receive()
+        (kind, simpack_name, pickled_state, pickled_crunching_profile) = \
+            message
+        assert kind == 'crunch'
+        self.simpack_grokker = self.worker.get_simpack_grokker(simpack_name)
+        self.initial_state = self.order_unpickler.loads(pickled_state)
+        self.crunching_profile = \
+            self.order_unpickler.loads(pickled_crunching_profile)
+
+        for target in (self.read_orders, self.send_heartbeats):
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+
+
+    def main_loop(self):
+        '''
+        Crunch and send states until we're done.
+
+        Returns normally if the simulation ended, and raises
+        `ObsoleteCruncherError` if we're done for any other reason.
+        '''
+        self.iterator = self.simpack_grokker.get_step_iterator(
+            self.initial_state,
+            self.crunching_profile.step_profile
+        )
+        self.telemetry = CruncherTelemetry()
+        self.last_report_time = self.telemetry.start_time
+        report_interval = \
+            garlicsim.asynchronous_crunching.TELEMETRY_REPORT_INTERVAL
+
+        state = self.initial_state
+        try:
+            step_start_time = time.time()
+            while True:
+                state = self.crunch_next_state()
+                step_end_time = time.time()
+                self.telemetry.add_step(step_start_time, step_end_time)
+                if self.sampling_profiler is not None:
+                    self.put_profile_stats(self.sampling_profiler.after_call())
+                self.put_work(state)
+                if self.crunching_profile.state_satisfies(state):
+                    raise ObsoleteCruncherError("We're done working, the "
+                                                "clock target has been "
+                                                "reached. Shutting down.")
+                order = self.get_order()
+                if order:
+                    self.process_order(order)
+                if step_end_time - self.last_report_time >= report_interval:
+                    self.report_telemetry()
+                if self.sampling_profiler is not None:
+                    self.sampling_profiler.before_call()
+                step_start_time = time.time()
+        except garlicsim.misc.WorldEnded:
+            last_state = getattr(self.iterator, 'current_state', state)
+            if last_state is not state:
+                self.put_work(last_state)
+
+
+    def crunch_next_state(self):
+        '''Crunch the state that's `.crunching_profile.stride` steps ahead.'''
+        stride = self.crunching_profile.stride
+        if stride == 1:
+            return self.iterator.next()
+        else:
+            return self.iterator.next_many(stride)
+
+
+    def put_work(self, state):
+        '''
+        Pickle a state and send it to the cruncher.
+
+        If the cruncher isn't reading, (because its work queue is full,) this
+        blocks until it reads, and we count the time in our telemetry.
+        '''
+        scalar_functions = self.crunching_profile.scalar_functions
+        if scalar_functions:
+            attach_scalar_values(state, scalar_functions)
+            pickled_state = self.work_pickler.dumps(state)
+            delattr(state, SCALAR_VALUES_ATTRIBUTE_NAME)
+        else:
+            pickled_state = self.work_pickler.dumps(state)
+        self.telemetry.pickled_bytes += len(pickled_state)
+        sending_start_time = time.time()
+        self.connection.send(('state', pickled_state))
+        self.telemetry.blocked_time += time.time() - sending_start_time
+
+
+    def put_end_marker(self):
+        '''Tell the cruncher that the simulation ended.'''
+        self.connection.send(('end',))
+
+
+    def put_profile_stats(self, stats_dict):
+        '''Send a raw stats `dict`, if we got one, to the cruncher.'''
+        if stats_dict is not None:
+            self.connection.send(('profile stats', stats_dict))
+
+
+    def report_telemetry(self):
+        '''Send the telemetry accumulated since the last report, and reset.'''
+        telemetry = getattr(self, 'telemetry', None)
+        if telemetry is None:
+            return
+        self.connection.send(('telemetry', telemetry))
+        self.telemetry = CruncherTelemetry()
+        self.last_report_time = self.telemetry.start_time
+
+
+    def get_order(self):
+        '''Get an order that the cruncher sent, or `None` if there isn't.'''
+        try:
+            return self.order_queue.get(block=False)
+        except Queue.Empty:
+            return None
+
+
+    def process_order(self, order):
+        '''Process an order that the cruncher sent.'''
+        kind = order[0]
+        if kind == 'retire':
+            raise ObsoleteCruncherError("Cruncher sent a 'retire' order; "
+                                        "Shutting down.")
+
+        elif kind == 'start profiling':
+            if self.sampling_profiler is None:
+                from garlicsim.general_misc import cute_profile
+                self.sampling_profiler = cute_profile.SamplingProfiler()
+
+        elif kind == 'stop profiling':
+            if self.sampling_profiler is not None:
+                self.put_profile_stats(self.sampling_profiler.flush())
+                self.sampling_profiler = None
+
+        elif kind == 'crunching profile':
+            crunching_profile = self.order_unpickler.loads(order[1])
+            if self.crunching_profile.step_profile != \
+               crunching_profile.step_profile:
+                raise ObsoleteCruncherError('Step profile changed; shutting '
+                                            'down. Crunching manager should '
+                                            'create a new cruncher.')
+            self.crunching_profile = crunching_profile
+
+
+    def read_orders(self):
+        '''
+        Read orders from the cruncher until the session is finished.
+
+        Heartbeats are dropped. If the cruncher is gone, we retire.
+        '''
+        try:
+            while not self._finished.isSet():
+                order = self.connection.receive()
+                if order[0] != 'heartbeat':
+                    self.order_queue.put(order)
+        except ConnectionLost:
+            self.order_queue.put(('retire',))
+            if not self._finished.isSet():
+                # The main loop might be blocked sending to a dead cruncher;
+                # this makes it fail:
+                self.connection.close()
+
+
+    def send_heartbeats(self):
+        '''Send heartbeats while we're busy, until the session is finished.'''
+        try:
+            while not self._finished.isSet():
+                self.connection.send_heartbeat_if_needed()
+                self._finished.wait(HEARTBEAT_INTERVAL / 2.)
+        except ConnectionLost:
+            pass
+
+
+class Worker(object):
+    '''
+    A daemon that crunches simulations for `RemoteCruncher`s over TCP.
+
+    Every cruncher that connects gets a session, which crunches from the state
+    that the cruncher sent, until the crunching profile is satisfied, the
+    simulation ends or the cruncher retires it.
+
+    Crunchers must know `authkey`, and they may only crunch the simpacks
+    whose names are in `simpack_names`.
+
+    To try it out on one machine, start a worker with `.start`, put its
+    `.address` in `project.remote_workers` and its authkey in
+    `project.remote_authkey`.
+    '''
+
+    def __init__(self, authkey, simpack_names, host='127.0.0.1',
+                 port=DEFAULT_PORT):
+
+        if not authkey:
+            raise garlicsim.misc.GarlicSimException(
+                "A worker can't be made without an authkey."
+            )
+
+        self.authkey = authkey
+        '''The secret that crunchers must know to connect.'''
+
+        self.simpack_names = frozenset(simpack_names)
+        '''The names of the simpacks that crunchers may crunch.'''
+
+        self.listening_socket = socket.socket(socket.AF_INET,
+                                              socket.SOCK_STREAM)
+        '''The socket on which we accept connections.'''
+        self.listening_socket.setsockopt(socket.SOL_SOCKET,
+                                         socket.SO_REUSEADDR, 1)
+        self.listening_socket.bind((host, port))
+        self.listening_socket.listen(5)
+
+        self.address = self.listening_socket.getsockname()
+        '''The `(host, port)` address on which we listen.'''
+
+        self.sessions = []
+        '''The sessions that are crunching now.'''
+
+        self.n_sessions = 0
+        '''The total number of sessions we had.'''
+
+        self.thread = None
+        '''The thread serving connections, if we used `.start`.'''
+
+        self._simpack_grokkers = {}
+        '''Simpack grokkers that we made, by simpack name.'''
+
+        self._lock = threading.Lock()
+        '''Lock protecting `.sessions` and `._simpack_grokkers`.'''
+
+        self._stopped = threading.Event()
+        '''Event that's set when the worker should stop.'''
+
+
+    def get_simpack_grokker(self, simpack_name):
+        '''
+        Get a simpack grokker for the simpack with the given name.
+
+        Raises `GarlicSimException` if the simpack isn't in
+        `.simpack_names`; we don't import it in that case.
+        '''
+        if simpack_name not in self.simpack_names:
+            raise garlicsim.misc.GarlicSimException(
+                "The simpack %r isn't allowed on this worker." % simpack_name
+            )
+        with self._lock:
+            if simpack_name not in self._simpack_grokkers:
+                simpack = import_tools.normal_import(simpack_name)
+                self._simpack_grokkers[simpack_name] = \
+                    garlicsim.misc.SimpackGrokker(simpack)
+            return self._simpack_grokkers[simpack_name]
+
+
+    def serve_forever(self):
+        '''Accept connections and start sessions for them, until stopped.'''
+        try:
+            while not self._stopped.isSet():
+                (ready, _, _) = select.select([self.listening_socket], [], [],
+                                              HEARTBEAT_INTERVAL / 4.)
+                if not ready:
+                    continue
+                (socket_, address) = self.listening_socket.accept()
+                socket_.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                session = Session(self, Connection(socket_, self.authkey))
+                with self._lock:
+                    self.sessions.append(session)
+                    self.n_sessions += 1
+                session.start()
+        finally:
+            self.listening_socket.close()
+
+
+    def start(self):
+        '''
+        Serve connections from a daemon thread.
+
+        Returns the worker.
+        '''
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+
+    def stop(self):
+        '''
+        Stop accepting connections and close all the sessions.
+
+        The crunchers will reconnect to other workers.
+        '''
+        self._stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        with self._lock:
+            sessions = self.sessions[:]
+        for session in sessions:
+            session.connection.close()
+
+
+    def _session_finished(self, session):
+        '''Forget a session that finished.'''
+        with self._lock:
+            if session in self.sessions:
+                self.sessions.remove(session)
+
+
+def main():
+    '''Run a worker from the command line.'''
+    import optparse
+    import os
+    parser = optparse.OptionParser(
+        description='Crunch GarlicSim simulations for remote crunchers. The '
+                    'authkey that crunchers must know is taken from the %s '
+                    'environment variable.' % AUTHKEY_VARIABLE
+    )
+    parser.add_option('--host', default='127.0.0.1',
+                      help='The interface to listen on. (Default: '
+                           '%default.)')
+    parser.add_option('--port', type='int', default=DEFAULT_PORT,
+                      help='The port to listen on. (Default: %default.)')
+    parser.add_option('--simpack', action='append', dest='simpack_names',
+                      default=[], metavar='SIMPACK',
+                      help='The name of a simpack that crunchers may crunch. '
+                           'May be given many times.')
+    (options, arguments) = parser.parse_args()
+    authkey = os.environ.get(AUTHKEY_VARIABLE)
+    if not authkey:
+        parser.error('The %s environment variable must be set.' %
+                     AUTHKEY_VARIABLE)
+    if not options.simpack_names:
+        parser.error('At least one --simpack must be given.')
+    worker = Worker(authkey, options.simpack_names, options.host,
+                    options.port)
+    print('Worker listening on %s:%s' % worker.address)
+    worker.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
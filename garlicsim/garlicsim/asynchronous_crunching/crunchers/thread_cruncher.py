@@ -10,10 +10,13 @@ See its documentation for more information.
 import threading
 import Queue
 import copy
+import time
 
 from garlicsim.general_misc import string_tools
+from garlicsim.general_misc import queue_tools
 
 import garlicsim
+from garlicsim.data_structures.scalar_columns import attach_scalar_values
 from garlicsim.asynchronous_crunching import \
      BaseCruncher, HistoryBrowser, ObsoleteCruncherError, CrunchingProfile
 
@@ -66,6 +69,9 @@ class ThreadCruncher(threading.Thread, BaseCruncher):
     )
     
     
+    pausable = True
+    
+    
     @staticmethod
     def can_be_used_with_simpack_grokker(simpack_grokker):
         '''
@@ -100,6 +106,17 @@ class ThreadCruncher(threading.Thread, BaseCruncher):
 
         self.order_queue = Queue.Queue()
         '''Queue for receiving instructions from the main thread.'''
+        
+        self.profile_queue = Queue.Queue()
+        '''
+        Queue for putting profiling data to be picked up by the main thread.
+        
+        When profiling is on, the cruncher puts here a raw stats `dict` for
+        every window of steps that it profiled.
+        '''
+        
+        self.sampling_profiler = None
+        '''The profiler sampling our step iterator, if profiling is on.'''
 
         
     def run(self):
@@ -149,27 +166,88 @@ class ThreadCruncher(threading.Thread, BaseCruncher):
         
         if self.history_dependent:
             self.history_browser = HistoryBrowser(cruncher=self)
+            self.history_browser.record_state(self.initial_state)
             thing = self.history_browser
         else:
+            self.history_browser = None
             thing = self.initial_state
 
         self.iterator = self.step_iterator_getter(thing, self.step_profile)
             
         order = None
         
+        telemetry = self.telemetry
+        history_browser = self.history_browser
+        
+        state = self.initial_state
+        
         try:
-            for state in self.iterator:
-                self.work_queue.put(state)
+            step_start_time = time.time()
+            while True:
+                state = self.crunch_next_state()
+                telemetry.add_step(step_start_time, time.time())
+                if self.sampling_profiler is not None:
+                    self.put_profile_stats(self.sampling_profiler.after_call())
+                self.put_work(state)
+                if history_browser is not None:
+                    history_browser.record_state(state)
                 self.check_crunching_profile(state)
                 order = self.get_order()
                 if order:
                     self.process_order(order)
+                if self.sampling_profiler is not None:
+                    self.sampling_profiler.before_call()
+                step_start_time = time.time()
         except garlicsim.misc.WorldEnded:
+            # If the simulation ended in the middle of a stride, the iterator
+            # holds the last state, which we didn't deliver yet:
+            last_state = getattr(self.iterator, 'current_state', state)
+            if last_state is not state:
+                self.put_work(last_state)
             self.work_queue.put(
                 garlicsim.asynchronous_crunching.misc.EndMarker()
             )
+            
+            
+    def crunch_next_state(self):
+        '''
+        Crunch the next state that we should deliver.
+        
+        That's `.crunching_profile.stride` steps ahead of the last one, unless
+        the simulation is history-dependent.
+        '''
+        stride = self.crunching_profile.stride
+        if stride == 1 or self.history_dependent:
+            return self.iterator.next()
+        else:
+            return self.iterator.next_many(stride)
 
         
+    def put_work(self, state):
+        '''
+        Put a state in the `.work_queue`, timing how long we were blocked.
+        
+        If the queue is full, we block until the main thread takes work from
+        it, and we count the time we were blocked in our telemetry.
+        '''
+        scalar_functions = self.crunching_profile.scalar_functions
+        if scalar_functions:
+            attach_scalar_values(state, scalar_functions)
+        try:
+            self.work_queue.put_nowait(state)
+        except Queue.Full:
+            blocking_start_time = time.time()
+            self.work_queue.put(state)
+            self.telemetry.blocked_time += time.time() - blocking_start_time
+            self.telemetry.add_queue_depth(self.work_queue.maxsize)
+
+            
+    def put_profile_stats(self, stats_dict):
+        '''Put a raw stats `dict`, if we got one, in the `.profile_queue`.'''
+        if stats_dict is not None:
+            self.profile_queue.put(stats_dict)
+            
+            
     def check_crunching_profile(self, state):
         '''
         Check if the cruncher crunched enough states. If so retire.
@@ -201,10 +279,36 @@ class ThreadCruncher(threading.Thread, BaseCruncher):
             raise ObsoleteCruncherError("Cruncher received a 'retire' order; "
                                         "Shutting down.")
         
+        elif order == 'start profiling':
+            if self.sampling_profiler is None:
+                from garlicsim.general_misc import cute_profile
+                self.sampling_profiler = cute_profile.SamplingProfiler()
+        
+        elif order == 'stop profiling':
+            if self.sampling_profiler is not None:
+                self.put_profile_stats(self.sampling_profiler.flush())
+                self.sampling_profiler = None
+        
+        elif order == 'pause':
+            self.wait_for_resume_order()
+        
         elif isinstance(order, CrunchingProfile):
             self.process_crunching_profile_order(order)
             
             
+    def wait_for_resume_order(self):
+        '''
+        Wait until we get a 'resume' order, processing the other orders.
+        
+        This is how the cruncher is paused, without using any CPU.
+        '''
+        while True:
+            order = self.order_queue.get()
+            if order == 'resume':
+                return
+            self.process_order(order)
+            
+            
     def process_crunching_profile_order(self, order):
         '''Process an order to update the crunching profile.'''
         if self.crunching_profile.step_profile != order.step_profile:
@@ -228,6 +332,29 @@ class ThreadCruncher(threading.Thread, BaseCruncher):
         self.order_queue.put(profile)
         
         
+    def pause(self):
+        '''Pause the cruncher until `.resume` is called. Thread-safe.'''
+        self.order_queue.put('pause')
+        self.paused = True
+        
+        
+    def resume(self):
+        '''Resume the cruncher after it was paused. Thread-safe.'''
+        self.order_queue.put('resume')
+        self.paused = False
+        
+        
+    def update_profiling(self, profiling):
+        '''Turn profiling of the step function on or off. Thread-safe.'''
+        self.order_queue.put('start profiling' if profiling else
+                             'stop profiling')
+        
+        
+    def collect_profile_stats(self):
+        '''Get the raw stats `dict`s that the cruncher profiled so far.'''
+        return queue_tools.dump(self.profile_queue)
+        
+        
     is_alive = threading.Thread.isAlive
     '''Crutch for Python 2.5 and below.'''
     
@@ -9,6 +9,8 @@ See its documentation for more information.
 
 from __future__ import with_statement
 
+import time
+
 from garlicsim.general_misc import queue_tools
 from garlicsim.general_misc import decorator_tools
 import garlicsim.general_misc.change_tracker
@@ -16,6 +18,7 @@ from garlicsim.general_misc.infinity import infinity
 from garlicsim.general_misc import misc_tools
 from garlicsim.general_misc import address_tools
 from garlicsim.general_misc import cute_iter_tools
+from garlicsim.general_misc.nifty_collections import OrderedDict
 
 import garlicsim
 import garlicsim.data_structures
@@ -25,6 +28,8 @@ from .crunching_profile import CrunchingProfile
 from .base_cruncher import BaseCruncher
 from garlicsim.misc.step_profile import StepProfile
 from .misc import EndMarker
+from .autosync_thread import AutosyncThread
+from .job_scheduler import JobScheduler
 
 
 __all__ = ['CrunchingManager']
@@ -34,10 +39,19 @@ __all__ = ['CrunchingManager']
 def with_tree_lock(method, *args, **kwargs):
     '''
     Decorator for using the tree lock (in write mode) as a context manager.
+    
+    The time spent waiting for the lock and holding it is added to the
+    crunching manager's counters.
     '''
     self = args[0]
+    wait_start_time = time.time()
     with self.project.tree.lock.write:
-        return method(*args, **kwargs)
+        hold_start_time = time.time()
+        self.tree_lock_wait_time += hold_start_time - wait_start_time
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self.tree_lock_hold_time += time.time() - hold_start_time
 
 
 class CrunchingManager(object):
@@ -82,6 +96,15 @@ class CrunchingManager(object):
         each cruncher uses.
         '''
         
+        self.strides = {}
+        '''
+        Dict that maps each cruncher to the stride of the states it delivers.
+        
+        Like step profiles, strides aren't changed on the fly: If the stride
+        of a job changes, we replace its cruncher, so we always know how many
+        steps are between the states that a cruncher delivered.
+        '''
+        
         self.crunching_profiles_change_tracker = \
             garlicsim.general_misc.change_tracker.ChangeTracker()
         '''
@@ -101,6 +124,42 @@ class CrunchingManager(object):
             )
             
         
+        self.tree_lock_wait_time = 0
+        '''Total time spent waiting for the tree lock in `.sync_crunchers`.'''
+        
+        self.tree_lock_hold_time = 0
+        '''Total time the tree lock was held in `.sync_crunchers`.'''
+        
+        self.profiling = False
+        '''
+        Flag saying whether the crunchers should profile the step function.
+        
+        Don't set this directly; use `.set_profiling`.
+        '''
+        
+        self.profile_stats = {}
+        '''
+        Dict mapping each step profile to its aggregated profiling data.
+        
+        The profiling data is a `pstats.Stats` object merged from the
+        profiling data sent by all the crunchers that used that step profile.
+        '''
+        
+        self.autosync_thread = None
+        '''
+        Thread that calls `.sync_crunchers` repeatedly, if autosync is on.
+        
+        Use `.start_autosync` and `.stop_autosync` to control it.
+        '''
+        
+        self.scheduler = JobScheduler()
+        '''
+        The scheduler that decides which jobs get crunchers.
+        
+        Change its `.max_crunchers` to control how many crunchers may crunch
+        at the same time.
+        '''
+        
         self.cruncher_type = available_cruncher_types[0]
         '''
         The cruncher type that we will use to crunch the simulation.
@@ -141,6 +200,7 @@ class CrunchingManager(object):
                     self.__add_work_to_tree(cruncher, job, retire=True)
                 total_added_nodes += added_nodes
                 del self.crunchers[job]
+                job._finish()
 
                 
         # In this point all the crunchers in `.crunchers` have an active job
@@ -150,18 +210,21 @@ class CrunchingManager(object):
         
         for job in self.jobs[:]:
             
+            if job.crunching_manager is None:
+                # The job was appended to `.jobs` directly rather than with
+                # `.add_job`.
+                job.crunching_manager = self
             
             if job not in self.crunchers:
                 
-                # If there is no cruncher associated with the job, we create
-                # one. (As long as the job is unfinished, and the node isn't in
-                # editing.) And that's it for this job, we `continue` to the
-                # next one.
+                # If there is no cruncher associated with the job, the
+                # scheduler will decide below whether to create one. (As long
+                # as the job is unfinished.) And that's it for this job, we
+                # `continue` to the next one.
                 
-                if not job.is_done():
-                    self.__conditional_create_cruncher(job)
-                else: # job.is_done() is True
+                if job.is_done():
                     self.jobs.remove(job)
+                    job._finish()
                 continue
 
             # job in self.crunchers
@@ -204,11 +267,14 @@ class CrunchingManager(object):
                     # First we'll check if the step profile changed:
                     
                     if crunching_profile.step_profile != \
-                       self.step_profiles[cruncher]:
+                       self.step_profiles[cruncher] or \
+                       self.__get_stride(crunching_profile) != \
+                       self.strides[cruncher]:
                         
-                        # If it did, we immediately replace the cruncher,
-                        # because crunchers can't change step profile on the
-                        # fly.
+                        # If it did, (or if the stride changed,) we
+                        # immediately replace the cruncher, because crunchers
+                        # can't change step profile on the fly, and we must
+                        # know the stride of each state we get.
                         
                         if cruncher.is_alive():
                             cruncher.retire()
@@ -229,6 +295,20 @@ class CrunchingManager(object):
                         
                         continue
                         
+                elif cruncher.error is not None and \
+                     not cruncher.is_alive():
+                    
+                    # The cruncher stopped with an error, which another
+                    # cruncher would probably get too. We finish the job with
+                    # the error.
+                    
+                    self.jobs.remove(job)
+                    del self.crunchers[job]
+                    job.error = cruncher.error
+                    job._finish()
+                    
+                    continue
+                
                 else: 
                     
                     # Either the cruncher died, or it is of the wrong type. The
@@ -252,12 +332,137 @@ class CrunchingManager(object):
                 if cruncher.is_alive():
                     cruncher.retire()
                 del self.crunchers[job]
+                job._finish()
 
+        
+        # Finally, we let the scheduler choose which jobs should crunch now,
+        # pausing the crunchers of jobs that should wait and creating
+        # crunchers for jobs that should crunch.
+        
+        total_added_nodes += self.__schedule_crunchers()
             
         return total_added_nodes
+    
+    
+    def __schedule_crunchers(self):
+        '''
+        Pause, resume and create crunchers according to the scheduler.
+        
+        Returns the number of nodes that were added to the tree from the
+        crunchers that were retired.
+        '''
+        total_added_nodes = garlicsim.misc.NodesAdded(0)
+        
+        # Jobs on nodes in editing can't be crunched yet, so they don't compete
+        # for crunchers:
+        jobs = [job for job in self.jobs if
+                job in self.crunchers or job.node.still_in_editing is False]
+        crunching_jobs = set(job for (job, cruncher) in
+                             self.crunchers.iteritems() if not cruncher.paused)
+        selected_jobs = self.scheduler.select_jobs(jobs, crunching_jobs)
+        
+        for job in jobs:
+            if job in crunching_jobs and job not in selected_jobs:
+                cruncher = self.crunchers[job]
+                if cruncher.pausable:
+                    # Pausing the cruncher in place, so we won't have to
+                    # start a new one, (which may be a new process,) when the
+                    # job gets another turn. We'll keep taking the work that
+                    # it did before it got the order.
+                    cruncher.pause()
+                    continue
+                # The cruncher can't be paused, so we take its work and retire
+                # it, and a new cruncher will continue from the job's node when
+                # the job gets another turn.
+                del self.crunchers[job]
+                (added_nodes, new_leaf) = \
+                    self.__add_work_to_tree(cruncher, job, retire=True)
+                total_added_nodes += added_nodes
+                job.node = new_leaf
+                if job.is_done():
+                    self.jobs.remove(job)
+                    job._finish()
+                    
+        for job in jobs:
+            if job in selected_jobs:
+                if job not in self.crunchers:
+                    self.__conditional_create_cruncher(job)
+                elif self.crunchers[job].paused:
+                    self.crunchers[job].resume()
+                
+        return total_added_nodes
 
     
     
+    def add_job(self, job):
+        '''
+        Add a job for the crunching manager to do.
+        
+        Returns the job, which may be used like a future to wait for the
+        crunching to finish.
+        '''
+        job.crunching_manager = self
+        self.jobs.append(job)
+        return job
+    
+    
+    def start_autosync(self, min_interval=0.001, max_interval=0.5):
+        '''
+        Start syncing the crunchers automatically from a background thread.
+        
+        The thread will call `.sync_crunchers` repeatedly, at an interval
+        between `min_interval` and `max_interval` seconds which adapts to how
+        fast the crunchers produce work. This keeps the crunchers from blocking
+        on full work queues without you having to call `.sync_crunchers`.
+        
+        Note that the tree will change in the background; When reading from
+        the tree while autosync is on, hold `project.tree.lock.read`.
+        '''
+        if self.is_autosyncing():
+            return
+        self.autosync_thread = AutosyncThread(self, min_interval, max_interval)
+        self.autosync_thread.start()
+        
+        
+    def stop_autosync(self):
+        '''Stop syncing the crunchers automatically.'''
+        if self.autosync_thread is not None:
+            self.autosync_thread.stop()
+            self.autosync_thread = None
+            
+            
+    def is_autosyncing(self):
+        '''Return whether the crunchers are being synced automatically.'''
+        return self.autosync_thread is not None and \
+               self.autosync_thread.is_alive()
+        
+    
+    def get_cruncher_types_availability(self):
+        '''
+        Get a dict mapping from cruncher type to whether it can be used.
+        
+        This is like the simpack grokker's `.cruncher_types_availability`,
+        except that cruncher types may also be unavailable in this project,
+        like `RemoteCruncher` when the project has no `.remote_workers`.
+        '''
+        cruncher_types_availability = OrderedDict()
+        simpack_availability = \
+            self.project.simpack_grokker.cruncher_types_availability
+        for (cruncher_type, availability) in simpack_availability.items():
+            if availability:
+                availability = \
+                    cruncher_type.can_be_used_with_project(self.project)
+            cruncher_types_availability[cruncher_type] = availability
+        return cruncher_types_availability
+    
+    
+    def get_available_cruncher_types(self):
+        '''Get the cruncher types that can be used in this project.'''
+        return [cruncher_type for (cruncher_type, availability) in
+                self.get_cruncher_types_availability().items() if
+                availability]
+        
+    
     def __conditional_create_cruncher(self, job):
         '''
         Create a cruncher to crunch the node, unless there is reason not to.
@@ -265,14 +470,98 @@ class CrunchingManager(object):
         node = job.node
         crunching_profile = job.crunching_profile
         
+        scalar_columns = self.project.tree.scalar_columns
+        if scalar_columns is not None and \
+           scalar_columns.compute_in_crunchers:
+            scalar_functions = scalar_columns.state_functions
+        else:
+            scalar_functions = ()
+        if crunching_profile.scalar_functions != scalar_functions:
+            crunching_profile.scalar_functions = scalar_functions
+        
         if node.still_in_editing is False:
             cruncher = self.cruncher_type(self, node.state, crunching_profile)
             cruncher.start()
             self.crunchers[job] = cruncher
             
+            if self.profiling:
+                cruncher.update_profiling(True)
+            
             self.crunching_profiles_change_tracker.check_in(crunching_profile)
             self.step_profiles[cruncher] = \
                 crunching_profile.step_profile
+            self.strides[cruncher] = self.__get_stride(crunching_profile)
+            
+    
+    def __get_stride(self, crunching_profile):
+        '''
+        Get the stride of the states that crunchers will deliver.
+        
+        That's the stride of `crunching_profile`, except in history-dependent
+        simulations, whose crunchers deliver every state.
+        '''
+        if self.project.simpack_grokker.history_dependent:
+            return 1
+        else:
+            return crunching_profile.stride
+            
+    
+    def get_telemetry(self):
+        '''
+        Get the telemetry of the crunchers that are currently working.
+        
+        Returns a dict mapping each job that has a cruncher to the
+        `CruncherTelemetry` of that cruncher.
+        '''
+        return dict((job, cruncher.collect_telemetry()) for (job, cruncher)
+                    in self.crunchers.items())
+    
+    
+    def set_profiling(self, profiling=True):
+        '''
+        Turn profiling of the step function on or off for all crunchers.
+        
+        While profiling is on, every cruncher profiles its step iterator in
+        sampled windows and sends the profiling data to the crunching manager,
+        which aggregates it per step profile in `.profile_stats`.
+        '''
+        profiling = bool(profiling)
+        if profiling == self.profiling:
+            return
+        self.profiling = profiling
+        for cruncher in self.crunchers.itervalues():
+            cruncher.update_profiling(profiling)
+            
+    
+    def get_profile_stats(self, step_profile=None):
+        '''
+        Get aggregated profiling data of the crunchers as a `pstats.Stats`.
+        
+        If `step_profile` is given, get only the data for that step profile.
+        Otherwise the data for all step profiles is merged. Returns `None` if
+        there's no profiling data.
+        '''
+        if step_profile is not None:
+            return self.profile_stats.get(step_profile)
+        if not self.profile_stats:
+            return None
+        from garlicsim.general_misc import cute_profile
+        return cute_profile.make_stats(
+            *[stats.stats for stats in self.profile_stats.itervalues()]
+        )
+        
+        
+    def __add_profile_stats(self, step_profile, stats_dicts):
+        '''Aggregate raw profiling stats `dict`s under `step_profile`.'''
+        if not stats_dicts:
+            return
+        from garlicsim.general_misc import cute_profile
+        if step_profile in self.profile_stats:
+            cute_profile.add_stats(self.profile_stats[step_profile],
+                                   *stats_dicts)
+        else:
+            self.profile_stats[step_profile] = \
+                cute_profile.make_stats(*stats_dicts)
             
     
     def get_jobs_by_node(self, node):
@@ -298,10 +587,25 @@ class CrunchingManager(object):
         
         tree = self.project.tree
         node = job.node
+        step_profile = self.step_profiles[cruncher]
+        stride = self.strides[cruncher]
         
         current_node = node
         counter = 0
         
+        telemetry = cruncher.collect_telemetry()
+        try:
+            telemetry.add_queue_depth(cruncher.work_queue.qsize())
+        except NotImplementedError:
+            # Some platforms don't support `qsize` on `multiprocessing`
+            # queues.
+            pass
+        
+        # The tree lock is held by our caller; we count only the time that we
+        # spend adding this cruncher's work to the tree, excluding the
+        # telemetry collection above.
+        start_time = time.time()
+        
         queue_iterator = queue_tools.iterate(
             cruncher.work_queue,
             limit_to_original_size=True,
@@ -310,26 +614,40 @@ class CrunchingManager(object):
         
         for thing in queue_iterator:
             
+            if isinstance(thing, str):
+                # `ProcessCruncher` pickles its states itself so it could
+                # count the bytes and send persistents only once.
+                thing = cruncher.load_work(thing)
+            
             if isinstance(thing, garlicsim.data_structures.State):
                 counter += 1
                 current_node = tree.add_state(
                     thing,
                     parent=current_node,
-                    step_profile=self.step_profiles[cruncher],            
+                    step_profile=step_profile,
+                    stride=stride
                 )
-                # todo optimization: save step profile in variable, it's
-                # wasteful to do a dict lookup every state.
             
             elif isinstance(thing, EndMarker):
+                if stride != 1 and current_node.stride == stride:
+                    # If the simulation ended in the middle of a stride, the
+                    # last state is fewer steps after its parent, and we don't
+                    # know how many:
+                    current_node.stride = None
                 tree.make_end(node=current_node,
-                              step_profile=self.step_profiles[cruncher])
+                              step_profile=step_profile)
                 job.resulted_in_end = True
                 
             else:
                 raise TypeError('Unexpected object `%s` in work queue' % thing)
                         
+        self.__add_profile_stats(step_profile,
+                                 cruncher.collect_profile_stats())
+                        
         if retire or job.resulted_in_end:
             cruncher.retire()
+            
+        telemetry.tree_lock_hold_time += time.time() - start_time
         
         nodes_added = garlicsim.misc.NodesAdded(counter)
 
@@ -13,12 +13,24 @@ import garlicsim.misc
 class CrunchingProfile(object):
     '''Instructions that a cruncher follows when crunching the simulation.'''
     
-    def __init__(self, clock_target, step_profile):
+    def __init__(self, clock_target, step_profile, stride=1,
+                 scalar_functions=()):
         '''
         Construct the CrunchingProfile.
         
         `clock_target` is the clock until which we want to crunch.
         `step_profile` is the step profile we want to use.
+        `stride` is the number of steps between every two recorded states.
+        `scalar_functions` are scalar state functions that the cruncher should
+        evaluate on every state it produces.
+        '''
+        
+        self.version = 0
+        '''
+        Modification counter, incremented whenever an attribute is set.
+        
+        `ChangeTracker` compares it to tell whether the profile changed, which
+        is much cheaper than pickling the profile with its step profile.
         '''
         
         self.clock_target = clock_target
@@ -27,6 +39,27 @@ class CrunchingProfile(object):
         assert isinstance(step_profile, garlicsim.misc.StepProfile)
         self.step_profile = step_profile
         '''The step profile we want to be used with the step function.'''
+        
+        assert stride >= 1
+        self.stride = stride
+        '''
+        The number of steps between every two states that we record.
+        
+        With a stride bigger than 1, the cruncher skips the states in between,
+        which is much faster if the simpack has a multi-step function. (See
+        `MULTI_STEP_SUFFIX`.) History-dependent simulations need all the
+        states, so their crunchers ignore this.
+        '''
+        
+        self.scalar_functions = tuple(scalar_functions)
+        '''
+        Scalar state functions that the cruncher evaluates on every state.
+        
+        The values are sent along with the states, so the tree's
+        `ScalarColumns` doesn't need to compute them in the main thread. This
+        is set by the crunching manager according to
+        `Project.enable_scalar_columns`.
+        '''
   
         
     def state_satisfies(self, state):
@@ -42,10 +75,27 @@ class CrunchingProfile(object):
             self.clock_target = clock_target
     
             
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name != 'version':
+            # Profiles pickled by older versions don't have `.version`:
+            self.version = getattr(self, 'version', 0) + 1
+    
+            
+    def __setstate__(self, state):
+        # Profiles pickled by older versions don't have `.stride` and
+        # `.scalar_functions`:
+        self.__dict__['stride'] = 1
+        self.__dict__['scalar_functions'] = ()
+        self.__dict__.update(state)
+        
+            
     def __eq__(self, other):
         return isinstance(other, CrunchingProfile) and \
                self.clock_target == other.clock_target and \
-               self.step_profile == other.step_profile
+               self.step_profile == other.step_profile and \
+               self.stride == other.stride and \
+               self.scalar_functions == other.scalar_functions
 
     
     __hash__ = None
@@ -65,9 +115,10 @@ class CrunchingProfile(object):
             CrunchingProfile(clock_target=infinity,
             step_profile=life.State.step(<state>))
         '''
-        return 'CrunchingProfile(clock_target=%s, step_profile=%s)' % (
+        return 'CrunchingProfile(clock_target=%s, step_profile=%s%s)' % (
             self.clock_target,
-            self.step_profile.__repr__(short_form=True)
+            self.step_profile.__repr__(short_form=True),
+            (', stride=%s' % self.stride) if self.stride != 1 else ''
         )
         
     
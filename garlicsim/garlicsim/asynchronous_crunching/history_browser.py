@@ -10,6 +10,7 @@ See its documentation for more info.
 from __future__ import with_statement
 
 import threading
+import time
 
 from garlicsim.general_misc import binary_search
 from garlicsim.general_misc import queue_tools
@@ -27,6 +28,9 @@ __all__ = ['HistoryBrowser']
 def with_self(method, *args, **kwargs):
     '''Decorator for using the history browser as a context manager.'''
     self = args[0]
+    if self.tree_lock.is_held():
+        # This is a nested call, we already hold the tree lock.
+        return method(*args, **kwargs)
     with self:
         return method(*args, **kwargs)
 
@@ -51,6 +55,13 @@ class HistoryBrowser(garlicsim.misc.BaseHistoryBrowser, ContextManager):
     When using a `HistoryBroswer`, the lock of the project's tree is acquired
     for reading. That acquiring action can also be invoked by using
     `HistoryBrowser` as a context manager.
+    
+    The cruncher records every state it produces with `.record_state`, and the
+    last few of them are kept in `.recent_states`. Requests for recent history,
+    which are by far the most common, are served from there without acquiring
+    the tree lock or looking at the tree or the work queue. If the simpack
+    declared a maximum lookback in its settings, `.recent_states` keeps all
+    the states in that lookback.
     '''
         
     def __init__(self, cruncher):
@@ -58,17 +69,77 @@ class HistoryBrowser(garlicsim.misc.BaseHistoryBrowser, ContextManager):
         self.project = cruncher.project
         self.tree = self.project.tree
         self.tree_lock = self.project.tree.lock
+        
+        settings = self.project.simpack_grokker.settings
+        self.history_window = garlicsim.misc.HistoryWindow(
+            max_lookback_clock=settings.MAX_LOOKBACK_CLOCK,
+            max_lookback_steps=max(
+                settings.MAX_LOOKBACK_STEPS or 0,
+                garlicsim.asynchronous_crunching.RECENT_STATES_BUFFER_SIZE - 1
+            )
+        )
+        '''
+        Window of the last states in the timeline.
+        
+        Holds `RECENT_STATES_BUFFER_SIZE` states, or more if the simpack's
+        maximum lookback needs them.
+        '''
+        
+        self.recent_states = self.history_window.states
+        '''The last states in the timeline, oldest first.'''
+        
+        self.n_recorded_states = 0
+        '''The number of states that were recorded with `.record_state`.'''
+        
+        self._timeline_offset = None
+        '''
+        The length of the timeline before the first recorded state.
+        
+        This is `None` until we first need it.
+        '''
+        
+        self._our_path = None
+        '''Cached path that contains `._our_path_node`.'''
+        
+        self._our_path_node = None
+        '''The node of our cruncher when `._our_path` was last updated.'''
+        
+        
+    def record_state(self, state):
+        '''
+        Record a state that was added to the end of the timeline.
+        
+        This is called by the cruncher for its initial state and for every
+        state that it produces.
+        '''
+        self.history_window.append(state)
+        self.n_recorded_states += 1
     
         
-    def manage_context(self):
+    def __enter__(self):
         '''
-        Manage the `HistoryBrowser` context, using the tree lock in read mode.
+        Enter the `HistoryBrowser` context, acquiring the tree lock for reading.
+        
+        The time spent waiting for the lock is added to the cruncher's
+        telemetry. Nested entries, (which happen on almost every method call,)
+        are cheap, since the tree lock is reentrant.
         '''
-        with self.tree_lock.read:
-            yield self
+        tree_lock = self.tree_lock
+        if tree_lock.is_held():
+            tree_lock.acquireRead()
+        else:
+            wait_start_time = time.time()
+            tree_lock.acquireRead()
+            self.cruncher.telemetry.tree_lock_wait_time += \
+                time.time() - wait_start_time
+        return self
+    
+    
+    def __exit__(self, type_=None, value=None, traceback=None):
+        '''Exit the `HistoryBrowser` context, releasing the tree lock.'''
+        self.tree_lock.release()
 
         
-    @with_self
     def get_last_state(self):
         '''
         Get the last state in the timeline. Identical to `.__getitem__(-1)`.
@@ -76,13 +147,21 @@ class HistoryBrowser(garlicsim.misc.BaseHistoryBrowser, ContextManager):
         return self[-1]
 
     
-    @with_self
     def __getitem__(self, index):
         '''Get a state by its position in the timeline.'''
         assert isinstance(index, int)
+        recent_states = self.recent_states
         if index < 0:
+            if -index <= len(recent_states):
+                return recent_states[index]
             return self.__get_item_negative(index)
         else: # index >= 0
+            if self._timeline_offset is not None:
+                recent_index = index - (self._timeline_offset +
+                                        self.n_recorded_states -
+                                        len(recent_states))
+                if 0 <= recent_index < len(recent_states):
+                    return recent_states[recent_index]
             return self.__get_item_positive(index)
 
         
@@ -98,7 +177,7 @@ class HistoryBrowser(garlicsim.misc.BaseHistoryBrowser, ContextManager):
             queue_size = self.cruncher.work_queue.qsize()
             new_index = index + queue_size
             our_node = self.__get_our_node()
-            path = our_node.make_containing_path()
+            path = self.__get_our_path(our_node)
             result_node = path.__getitem__(new_index, tail=our_node)
             return result_node.state
             
@@ -109,7 +188,7 @@ class HistoryBrowser(garlicsim.misc.BaseHistoryBrowser, ContextManager):
         Get a state by its position in the timeline. Positive indices only.
         '''
         our_node = self.__get_our_node()
-        path = our_node.make_containing_path()
+        path = self.__get_our_path(our_node)
         try:
             result_node = path.__getitem__(index, tail=our_node)
             return result_node.state
@@ -139,7 +218,6 @@ class HistoryBrowser(garlicsim.misc.BaseHistoryBrowser, ContextManager):
         return queue_tools.get_item(self.cruncher.work_queue, index)
 
     
-    @with_self
     def get_state_by_monotonic_function(self, function, value,
                                         rounding=binary_search.CLOSEST):
         '''
@@ -153,6 +231,40 @@ class HistoryBrowser(garlicsim.misc.BaseHistoryBrowser, ContextManager):
         
         assert issubclass(rounding, binary_search.Rounding)
         
+        # Only our cruncher's thread changes the recent states, so we can
+        # search them in place without copying:
+        recent_states = self.recent_states
+        if recent_states and function(recent_states[0]) < value:
+            # The result is in the recent states or beyond their future edge.
+            recent_result = binary_search.binary_search(
+                recent_states,
+                function,
+                value,
+                rounding=binary_search.BOTH
+            )
+            return binary_search.make_both_data_into_preferred_rounding(
+                recent_result,
+                function,
+                value,
+                rounding
+            )
+        
+        return self.__get_state_by_monotonic_function_from_timeline(
+            function,
+            value,
+            rounding
+        )
+    
+    
+    @with_self
+    def __get_state_by_monotonic_function_from_timeline(self, function, value,
+                                                        rounding):
+        '''
+        Get a state by measure function and desired value, the slow way.
+        
+        This searches the tree and the work queue, without using the recent
+        states.
+        '''
         tree_result = self.__get_both_states_by_monotonic_function_from_tree \
                       (function, value)
         
@@ -203,7 +315,7 @@ class HistoryBrowser(garlicsim.misc.BaseHistoryBrowser, ContextManager):
         This uses the `binary_search.BOTH` rounding. See its documentation.
         '''
         our_node = self.__get_our_node()
-        path = our_node.make_containing_path()
+        path = self.__get_our_path(our_node)
         new_function = lambda node: function(node.state)
         
         result_in_nodes = path.get_node_by_monotonic_function \
@@ -235,7 +347,6 @@ class HistoryBrowser(garlicsim.misc.BaseHistoryBrowser, ContextManager):
                (queue_as_list, function, value, rounding)
 
     
-    @with_self
     def __len__(self):
         '''
         Get the length of the timeline in nodes.
@@ -244,14 +355,26 @@ class HistoryBrowser(garlicsim.misc.BaseHistoryBrowser, ContextManager):
         1. The length of the `.work_queue` of our cruncher.
         2. The length of the path in the tree which leads to our node, up to
            our node.
+           
+        That sum is calculated only once; after that we just add the number of
+        states recorded since.
         '''
+        if self._timeline_offset is None:
+            self.__calculate_timeline_offset()
+        return self._timeline_offset + self.n_recorded_states
+    
+    
+    @with_self
+    def __calculate_timeline_offset(self):
+        '''Calculate the length of the timeline before the recorded states.'''
         queue_length = self.cruncher.work_queue.qsize()
         
         our_node = self.__get_our_node()
-        our_path = our_node.make_containing_path()
+        our_path = self.__get_our_path(our_node)
         path_length = our_path.__len__(tail=our_node)
         
-        return queue_length + path_length
+        self._timeline_offset = \
+            queue_length + path_length - self.n_recorded_states
 
     
     @with_self
@@ -270,5 +393,32 @@ class HistoryBrowser(garlicsim.misc.BaseHistoryBrowser, ContextManager):
         else: # num == 0
             raise ObsoleteCruncherError
         return our_node
+    
+    
+    @with_self
+    def __get_our_path(self, our_node):
+        '''
+        Get a path that contains `our_node`.
+        
+        The path is cached and updated as our node advances, so we don't have
+        to build a new path from the root every time. Only the decisions up to
+        our node are relevant, since we always use our node as the tail.
+        '''
+        path = self._our_path
+        if path is None:
+            path = self._our_path = our_node.make_past_path()
+        elif our_node is not self._our_path_node:
+            current = our_node
+            while current is not self._our_path_node:
+                parent = current.parent
+                if parent is None:
+                    # Our old node is not an ancestor of our new node; can't
+                    # reuse the path.
+                    path = self._our_path = our_node.make_past_path()
+                    break
+                if len(parent.children) > 1:
+                    path.decisions[parent] = current
+                current = parent
+        self._our_path_node = our_node
+        return path
         
-    
\ No newline at end of file
@@ -7,7 +7,13 @@ This module defines the `Job` class.
 See its documentation for more info.
 '''
 
+from __future__ import with_statement
+
+import threading
+import time
+
 import garlicsim
+from garlicsim.general_misc.infinity import infinity
 
 # At bottom:
 # from .crunching_profile import CrunchingProfile
@@ -19,10 +25,15 @@ class Job(object):
         
     A job specifies a node and a crunching profile. It means we should crunch
     from `node` according to the cruncing profile.
+    
+    A job can also be used like a future: You can `.wait` for it to be
+    finished, register callbacks with `.add_done_callback` and check its
+    `.get_progress`. A job is finished when the crunching manager removes it
+    from its jobs, either because it's done or because it was cancelled.
     '''
     # todo: should there be other helpful methods here?
     
-    def __init__(self, node, crunching_profile):
+    def __init__(self, node, crunching_profile, priority=0):
         
         assert isinstance(node, garlicsim.data_structures.Node)
         self.node = node
@@ -32,10 +43,53 @@ class Job(object):
         self.crunching_profile = crunching_profile
         '''The crunching profile to be used for crunching.'''
         
+        self.priority = priority
+        '''
+        The priority of the job, used to decide which jobs get crunchers.
+        
+        Jobs with higher priorities go first. See documentation of
+        `JobScheduler` for the standard priorities.
+        '''
+        
         self.resulted_in_end = False
         '''
         Flag marking that the job has resulted in an end of the simulation.
         '''
+        
+        self.error = None
+        '''
+        Text describing the error that made the job fail, if any.
+        
+        When a cruncher stops with an error, its job is finished with the
+        error even though it's not done.
+        '''
+        
+        self.crunching_manager = None
+        '''
+        The crunching manager that's doing the job.
+        
+        This is set when the job is added to a crunching manager.
+        '''
+        
+        self.initial_clock = node.state.clock
+        '''The clock reading of the node from which the job started.'''
+        
+        self.finished = False
+        '''
+        Flag saying whether the crunching manager is finished with the job.
+        
+        This happens when the job is done, or when it's removed from the
+        crunching manager's jobs before being done.
+        '''
+        
+        self._finished_event = threading.Event()
+        '''Event that's set when the job is finished.'''
+        
+        self._done_callbacks = []
+        '''Functions to call with the job when it's finished.'''
+        
+        self._lock = threading.Lock()
+        '''Lock protecting `._done_callbacks` and `.finished`.'''
   
         
     def is_done(self):
@@ -46,6 +100,81 @@ class Job(object):
                self.resulted_in_end
     
         
+    def get_progress(self):
+        '''
+        Get the part of the job that was done so far, between 0 and 1.
+        
+        This is measured in clock time from the job's initial node towards the
+        clock target.
+        '''
+        if self.finished or self.is_done():
+            return 1.0
+        clock_target = self.crunching_profile.clock_target
+        if clock_target == infinity:
+            return 0.0
+        total_clock = clock_target - self.initial_clock
+        if total_clock <= 0:
+            return 1.0
+        progress = (self.node.state.clock - self.initial_clock) / \
+                   float(total_clock)
+        return min(max(progress, 0.0), 1.0)
+    
+    
+    def wait(self, timeout=None):
+        '''
+        Wait until the job is finished, or until `timeout` seconds pass.
+        
+        If the crunching manager is autosyncing, this just waits for its thread
+        to finish the job. Otherwise, this syncs the crunchers by itself until
+        the job is finished.
+        
+        Returns whether the job is finished. (Check `.error` to see whether it
+        failed.)
+        '''
+        crunching_manager = self.crunching_manager
+        if crunching_manager is None or crunching_manager.is_autosyncing():
+            self._finished_event.wait(timeout)
+            return self.finished
+        
+        end_time = time.time() + timeout if timeout is not None else infinity
+        while True:
+            crunching_manager.sync_crunchers()
+            if self.finished or time.time() >= end_time:
+                return self.finished
+            time.sleep(0.01)
+    
+    
+    def add_done_callback(self, function):
+        '''
+        Call `function` with the job when it's finished.
+        
+        If the job is already finished, `function` is called right away.
+        Otherwise it will be called from the thread that syncs the crunchers.
+        '''
+        with self._lock:
+            if not self.finished:
+                self._done_callbacks.append(function)
+                return
+        function(self)
+        
+        
+    def _finish(self):
+        '''
+        Mark the job as finished, calling the callbacks.
+        
+        This is called by the crunching manager.
+        '''
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            done_callbacks = self._done_callbacks
+            self._done_callbacks = []
+        self._finished_event.set()
+        for done_callback in done_callbacks:
+            done_callback(self)
+            
+    
     def __repr__(self): #todo: ensure not subclass?
         '''
         Get a string representation of the job.
@@ -0,0 +1,166 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `JobScheduler` class.
+
+See its documentation for more information.
+'''
+
+import time
+
+
+__all__ = ['JobScheduler', 'NORMAL_PRIORITY', 'PATH_PRIORITY',
+           'PLAYBACK_PRIORITY']
+
+
+NORMAL_PRIORITY = 0
+'''Priority of jobs by default, like background forks.'''
+
+PATH_PRIORITY = 1
+'''Priority of jobs that crunch the path that the user is looking at.'''
+
+PLAYBACK_PRIORITY = 2
+'''Priority of the job that crunches ahead of the playback.'''
+
+
+def _get_n_cores():
+    '''Get the number of cores on this machine, or 1 if it's unknown.'''
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        return 1
+
+
+class JobScheduler(object):
+    '''
+    Decides which of the crunching manager's jobs get crunchers.
+
+    Without a scheduler, every unfinished job gets its own cruncher, so forty
+    forks mean forty crunchers fighting over the cores. The scheduler lets at
+    most `max_crunchers` jobs crunch at the same time, choosing them like
+    this:
+
+     - Jobs with a higher `.priority` go first. `Project.ensure_buffer_on_path`
+       gives its jobs `PATH_PRIORITY`, and the GUI gives the job that crunches
+       ahead of the playback `PLAYBACK_PRIORITY`.
+
+     - Jobs with the same priority take turns: A job that was crunching for
+       `time_slice` seconds goes after the jobs that are waiting for their
+       turn.
+
+     - No job starves: Every `starvation_time` seconds that a job is waiting
+       raise its priority by one, until it gets a turn.
+
+    A job whose turn is over is paused by pausing its cruncher in place, which
+    happens between states, and it's resumed later by resuming the cruncher.
+    Crunchers that can't be paused, (see `BaseCruncher.pausable`,) are retired
+    instead, and a new cruncher starts from the job's node when the job gets
+    another turn.
+
+    The crunching manager asks the scheduler which jobs should crunch on every
+    `.sync_crunchers`.
+    '''
+
+    def __init__(self, max_crunchers=None, time_slice=1.0,
+                 starvation_time=10.0):
+
+        self.max_crunchers = max_crunchers if max_crunchers is not None \
+                             else _get_n_cores()
+        '''
+        The maximal number of crunchers that may crunch at the same time.
+
+        Set this to `None` to let every job have a cruncher. The default is
+        the number of cores.
+        '''
+
+        self.time_slice = time_slice
+        '''Seconds that a job crunches before equal jobs get a turn.'''
+
+        self.starvation_time = starvation_time
+        '''Seconds of waiting after which a job's priority is raised by one.'''
+
+        self._turn_start_times = {}
+        '''Times at which the crunching jobs started their current turn.'''
+
+        self._turn_priorities = {}
+        '''The priorities that the crunching jobs started their turn with.'''
+
+        self._waiting_start_times = {}
+        '''Times at which the waiting jobs started waiting.'''
+
+        self._last_turn_start_times = {}
+        '''Times at which jobs started their last turn, for taking turns.'''
+
+
+    def get_priority(self, job, now=None):
+        '''
+        Get the priority that `job` is scheduled with.
+
+        This is the job's `.priority`, raised by one for every
+        `starvation_time` seconds that it's been waiting. A crunching job keeps
+        the priority that it started its turn with.
+        '''
+        if job in self._turn_priorities:
+            return self._turn_priorities[job]
+        if now is None:
+            now = time.time()
+        waiting_time = now - self._waiting_start_times.get(job, now)
+        return job.priority + int(waiting_time // self.starvation_time)
+
+
+    def select_jobs(self, jobs, crunching_jobs, now=None):
+        '''
+        Choose which of `jobs` should crunch now.
+
+        `jobs` are the jobs that want to crunch, and `crunching_jobs` are the
+        jobs that have crunchers now. Returns a set of jobs.
+        '''
+        if now is None:
+            now = time.time()
+        self._forget_other_jobs(jobs)
+        for job in jobs:
+            if job not in crunching_jobs:
+                self._waiting_start_times.setdefault(job, now)
+
+        def is_in_turn(job):
+            return job in crunching_jobs and job in self._turn_start_times and\
+                   now - self._turn_start_times[job] < self.time_slice
+
+        def sort_key(job):
+            in_turn = is_in_turn(job)
+            if not in_turn:
+                # The job's turn is over, so it'll be scheduled with its own
+                # priority:
+                self._turn_priorities.pop(job, None)
+            return (-self.get_priority(job, now), not in_turn,
+                    self._last_turn_start_times.get(job, -1))
+
+        sorted_jobs = sorted(jobs, key=sort_key)
+        if self.max_crunchers is not None:
+            sorted_jobs = sorted_jobs[:self.max_crunchers]
+        selected_jobs = set(sorted_jobs)
+
+        for job in jobs:
+            if job in selected_jobs:
+                if not is_in_turn(job):
+                    self._turn_priorities[job] = self.get_priority(job, now)
+                    self._turn_start_times[job] = now
+                    self._last_turn_start_times[job] = now
+                    self._waiting_start_times.pop(job, None)
+            else:
+                self._turn_start_times.pop(job, None)
+                self._turn_priorities.pop(job, None)
+                self._waiting_start_times.setdefault(job, now)
+        return selected_jobs
+
+
+    def _forget_other_jobs(self, jobs):
+        '''Forget everything about jobs that aren't in `jobs`.'''
+        jobs = set(jobs)
+        for times in (self._turn_start_times, self._turn_priorities,
+                      self._waiting_start_times, self._last_turn_start_times):
+            for job in times.keys():
+                if job not in jobs:
+                    del times[job]
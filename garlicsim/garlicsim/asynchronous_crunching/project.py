@@ -9,6 +9,8 @@ See its documentation for more information.
 
 from __future__ import with_statement
 
+import os
+
 from garlicsim.general_misc import cute_iter_tools
 import garlicsim.general_misc.read_write_lock
 from garlicsim.general_misc.infinity import infinity
@@ -22,6 +24,7 @@ import garlicsim.misc.step_profile
 
 from .crunching_manager import CrunchingManager
 from .job import Job
+from .job_scheduler import PATH_PRIORITY
 from .crunching_profile import CrunchingProfile
 
 
@@ -87,6 +90,30 @@ class Project(object):
         
         self.default_step_function = self.simpack_grokker.default_step_function
         '''The step function that we use by default.'''
+        
+        self.remote_workers = [
+            address for address in
+            os.environ.get('GARLICSIM_REMOTE_WORKERS', '').split(',')
+            if address.strip()
+        ]
+        '''
+        Addresses of the workers that `RemoteCruncher` may crunch on.
+        
+        Each address is either a `(host, port)` tuple or a `'host:port'`
+        string. It's initialized from the `GARLICSIM_REMOTE_WORKERS`
+        environment variable, which is a comma-separated list of addresses
+        like `'host1:7347,host2:7347'`. See documentation of `RemoteCruncher`
+        for more details.
+        '''
+        
+        self.remote_authkey = os.environ.get('GARLICSIM_REMOTE_AUTHKEY')
+        '''
+        The secret that the workers in `.remote_workers` know.
+        
+        `RemoteCruncher` can't connect to them without it. It's initialized
+        from the `GARLICSIM_REMOTE_AUTHKEY` environment variable, which the
+        workers read too.
+        '''
     
 
     def create_root(self, *args, **kwargs):
@@ -132,6 +159,8 @@ class Project(object):
         a clock buffer of at least `clock_buffer` after `node`. If there isn't,
         the leaves of `node` will be crunched until there's a buffer of
         `clock_buffer` between `node` and each of the leaves.
+        
+        Returns a list of the jobs that will do the crunching.
         '''
         leaves_dict = node.get_all_leaves(max_clock_distance=clock_buffer)
         new_clock_target = node.state.clock + clock_buffer
@@ -140,6 +169,8 @@ class Project(object):
             if leaf.ends: # todo: Not every end should count.
                 del leaves_dict[leaf]
         
+        jobs = []
+        
         for item in leaves_dict.items():
 
             leaf = item[0]
@@ -152,11 +183,14 @@ class Project(object):
                 crunching_profile = CrunchingProfile(new_clock_target,
                                                      step_profile)
                 job = Job(leaf, crunching_profile)
-                self.crunching_manager.jobs.append(job)
+                jobs.append(self.crunching_manager.add_job(job))
                 continue
             
             for job in jobs_of_leaf:
                 job.crunching_profile.raise_clock_target(new_clock_target)
+                jobs.append(job)
+                
+        return jobs
             
     
     def ensure_buffer_on_path(self, node, path, clock_buffer=0):
@@ -167,6 +201,9 @@ class Project(object):
         buffer of at least `clock_buffer` after `node`. If there isn't, the
         leaf at the end of the path will be crunched until the buffer is big
         enough.
+        
+        The job gets at least `PATH_PRIORITY`, so it's crunched before
+        background jobs. Returns the job, or `None` if the path ends.
         '''
         
         leaf = path.get_last_node(head=node)
@@ -183,13 +220,14 @@ class Project(object):
             # therefore the most recent one, will be the most wanted by the
             # user.
             job.crunching_profile.raise_clock_target(new_clock_target)
+            job.priority = max(job.priority, PATH_PRIORITY)
             return job
         else:
             step_profile = leaf.step_profile or self.build_step_profile()
             crunching_profile = CrunchingProfile(new_clock_target,
                                                  step_profile)
-            job = Job(leaf, crunching_profile)
-            self.crunching_manager.jobs.append(job)
+            job = Job(leaf, crunching_profile, priority=PATH_PRIORITY)
+            self.crunching_manager.add_job(job)
             return job
 
         
@@ -223,7 +261,7 @@ class Project(object):
         to the step function. You may pass a `StepProfile` yourself and it will
         be noticed and used.
         
-        Returns the job.
+        Returns the job, which you may `.wait` for.
         '''
         
         # todo: Inputting `clock_buffer=None` should produce infinitesimal
@@ -237,7 +275,7 @@ class Project(object):
         
         job = Job(node, crunching_profile)
         
-        self.crunching_manager.jobs.append(job)
+        self.crunching_manager.add_job(job)
         
         return job
     
@@ -254,8 +292,129 @@ class Project(object):
         process.
         '''        
         return self.crunching_manager.sync_crunchers()
+
+
+    def start_autosync(self, min_interval=0.001, max_interval=0.5):
+        '''
+        Start syncing the crunchers automatically from a background thread.
+        
+        This saves you from calling `.sync_crunchers` repeatedly; you can just
+        `.wait` for the jobs returned by `.begin_crunching` or
+        `.ensure_buffer`. While autosync is on, the tree changes in the
+        background, so hold `.tree.lock.read` when reading from it.
+        
+        See documentation of `CrunchingManager.start_autosync` for more
+        details.
+        '''
+        self.crunching_manager.start_autosync(min_interval, max_interval)
+        
+        
+    def stop_autosync(self):
+        '''Stop syncing the crunchers automatically.'''
+        self.crunching_manager.stop_autosync()
+        
+        
+    def get_crunching_telemetry(self):
+        '''
+        Get performance counters for the crunchers that are currently working.
+
+        Returns a dict mapping each job that is being crunched to the
+        `CruncherTelemetry` of its cruncher. The telemetry includes states per
+        second, step time distribution, work queue depth, time blocked on a
+        full work queue, tree lock times and (for `ProcessCruncher`) pickled
+        bytes.
+        '''
+        return self.crunching_manager.get_telemetry()
+
+
+    def set_crunching_profiling(self, profiling=True):
+        '''
+        Turn profiling of the step function on or off for all crunchers.
+
+        While profiling is on, every cruncher, whether it's a thread or a
+        process, profiles its step iterator in sampled windows and sends back
+        the profiling data. Get the aggregated data with
+        `.get_crunching_profile_stats`.
+        '''
+        self.crunching_manager.set_profiling(profiling)
+
+
+    def get_crunching_profile_stats(self, step_profile=None):
+        '''
+        Get the profiling data collected from the crunchers.
+
+        Returns a `pstats.Stats` object. If `step_profile` is given, returns
+        only the data collected while crunching with that step profile.
+        Returns `None` if no profiling data was collected.
+        '''
+        return self.crunching_manager.get_profile_stats(step_profile)
+
+
+    @with_tree_lock
+    def enable_checkpointing(self, interval=100, cache_size=None):
+        '''
+        Keep full states in the tree only at checkpoints, to save memory.
+
+        Only every `interval`-th node keeps its state, (along with forks,
+        leaves, touched nodes and nodes crunched with step profiles that aren't
+        deterministic,) and the other states are recomputed when accessed. See
+        documentation of `Tree.enable_checkpointing` for more details.
+
+        Returns the checkpointer.
+        '''
+        return self.tree.enable_checkpointing(self.simpack_grokker, interval,
+                                              cache_size)
+
+
+    @with_tree_lock
+    def enable_scalar_columns(self, compute_in_crunchers=False):
+        '''
+        Keep the values of the simpack's scalar functions in columns.
+        
+        The values of the simpack's `SCALAR_STATE_FUNCTIONS` and
+        `SCALAR_HISTORY_FUNCTIONS` are computed for every node in the tree, and
+        kept in arrays, so you can get them for a range of clock readings on a
+        path with `project.tree.scalar_columns.get_values`. See documentation
+        of `ScalarColumns` for more details.
+        
+        If `compute_in_crunchers=True`, the crunchers evaluate the scalar state
+        functions on the states they produce, so the work is done in their
+        threads or processes instead of in `.sync_crunchers`.
+        
+        Returns the `ScalarColumns`.
+        '''
+        settings = self.simpack_grokker.settings
+        scalar_columns = self.tree.enable_scalar_columns(
+            settings.SCALAR_STATE_FUNCTIONS,
+            settings.SCALAR_HISTORY_FUNCTIONS
+        )
+        scalar_columns.compute_in_crunchers = compute_in_crunchers
+        if compute_in_crunchers:
+            for job in self.crunching_manager.jobs:
+                job.crunching_profile.scalar_functions = \
+                    scalar_columns.state_functions
+        return scalar_columns
     
     
+    @with_tree_lock
+    def enable_state_interning(self):
+        '''
+        Make natural nodes with identical states share a single state object.
+        
+        This saves memory when the same states are crunched more than once,
+        like when forking a node several times with the same deterministic
+        step profile. States are fingerprinted with the simpack's
+        `STATE_FINGERPRINT_FUNCTION`, or with a structural hash if it doesn't
+        have one. See documentation of `StateInterner` for more details.
+        
+        Returns the `StateInterner`, which reports the hit rate and the memory
+        saved.
+        '''
+        return self.tree.enable_state_interning(
+            self.simpack_grokker.settings.STATE_FINGERPRINT_FUNCTION
+        )
+
+    
     @with_tree_lock
     def simulate(self, node, iterations=1, *args, **kwargs):
         '''
@@ -508,6 +667,11 @@ class Project(object):
         del project_vars['crunching_manager']
         del project_vars['simpack_grokker']
         
+        # The remote workers and their secret belong to the machine, so they
+        # aren't saved; the loading machine's environment gives them again:
+        del project_vars['remote_workers']
+        del project_vars['remote_authkey']
+        
         project_vars['___cruncher_type_of_crunching_manager'] = \
             self.crunching_manager.cruncher_type
         
@@ -515,6 +679,9 @@ class Project(object):
     
     
     def __setstate__(self, project_vars):
+        project_vars = dict(project_vars)
+        project_vars.pop('remote_workers', None)
+        project_vars.pop('remote_authkey', None)
         self.__init__(project_vars["simpack"])
         self.__dict__.update(project_vars)
         self.crunching_manager.cruncher_type = \
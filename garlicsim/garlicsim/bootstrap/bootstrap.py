@@ -8,6 +8,7 @@ It checks all prerequisites are installed.
 '''
 
 import sys
+import os
 
 ### Confirming correct Python version: ########################################
 #                                                                             #
@@ -24,6 +25,21 @@ if sys.version_info[1] <= 4:
 frozen = getattr(sys, 'frozen', None)
 
 
+SKIP_PREREQUISITE_CHECKS_VARIABLE = 'GARLICSIM_SKIP_PREREQUISITE_CHECKS'
+'''
+Name of an environment variable which, when set, skips the prerequisite checks.
+
+Checking for `distribute` means importing `pkg_resources`, which takes a large
+part of `garlicsim`'s import time. We don't set this variable in our own
+environment; `ProcessCruncher` sets it only for the worker processes that it
+starts, which run our interpreter, so on platforms that don't fork they won't
+check again. You may also set it yourself to skip the checks altogether.
+'''
+
+prerequisites_checked = False
+'''Flag saying whether the prerequisite checks passed in this process.'''
+
+
 def __check_prerequisites():
     '''
     Check that all modules required for `garlicsim` are installed.
@@ -86,7 +102,11 @@ def __check_problematic_psyco_version():
                           "you may want to avoid using it. Psyco version 1.6 "
                           "is fine and recommended.")
 
-__modules_list = __check_prerequisites()
+if os.environ.get(SKIP_PREREQUISITE_CHECKS_VARIABLE):
+    __modules_list = []
+else:
+    __modules_list = __check_prerequisites()
+    prerequisites_checked = True
 
 __check_problematic_psyco_version()
 
@@ -24,11 +24,15 @@ from .node_range import NodeRange
 from .node_selection import NodeSelection
 
 from .tree import Tree, TreeError
+from .checkpointer import Checkpointer
+from .scalar_columns import ScalarColumns
+from .state_interner import StateInterner
 
 from .path import Path, PathError, PathLookupError, PathOutOfRangeError
 
 
 __all__ = ['TreeMember', 'State', 'Tree', 'Path', 'Node', 'Block', 'End',
-           'NodeRange', 'NodeSelection'] + \
+           'NodeRange', 'NodeSelection', 'Checkpointer', 'ScalarColumns',
+           'StateInterner'] + \
           ['BlockError', 'PathError', 'PathLookupError', 'PathOutOfRangeError',
             'TreeError', 'NodeError']
\ No newline at end of file
@@ -51,6 +51,8 @@ class Block(TreeMember):
     # todo: Possibly add a `children` property that will get from the last
     # node. Will simplify a lot of code. (Possibly `parent` too.)
     
+    __slots__ = ('alive', 'step_profile', '__node_list', '__weakref__')
+    
     def __init__(self, node_list):
         '''Construct a block from the members of `node_list`.'''
         
@@ -405,6 +407,22 @@ class Block(TreeMember):
         return self[0].get_root()
 
     
+    def __getstate__(self):
+        # Blocks have no `__dict__`, but we pickle them as if they had one, so
+        # blocks pickled before they got `__slots__` can still be unpickled.
+        return {
+            'alive': self.alive,
+            'step_profile': self.step_profile,
+            '_Block__node_list': self.__node_list,
+        }
+    
+    
+    def __setstate__(self, block_state):
+        self.alive = block_state['alive']
+        self.step_profile = block_state['step_profile']
+        self.__node_list = block_state['_Block__node_list']
+
+    
     def __repr__(self):
         '''
         Get a string representation of the block.
@@ -0,0 +1,232 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `Checkpointer` class.
+
+See its documentation for more information.
+'''
+
+from __future__ import with_statement
+
+import threading
+
+from garlicsim.general_misc.nifty_collections import OrderedDict
+
+import garlicsim.misc
+from garlicsim.misc.settings_constants import DETERMINISTIC
+
+
+__all__ = ['Checkpointer']
+
+
+class Checkpointer(object):
+    '''
+    Saves memory in a tree by keeping full states only at checkpoints.
+
+    When a simulation is deterministic, every state can be recreated exactly by
+    crunching from an ancestor. So instead of keeping the states of all nodes,
+    a tree with a checkpointer keeps states only in these nodes:
+
+     - Every `interval`-th node on a timeline,
+     - Touched nodes, (including roots,)
+     - Forks,
+     - Leaves,
+     - Nodes whose step profile isn't `DETERMINISTIC` according to the
+       simpack's `DETERMINISM_FUNCTION`,
+     - Nodes whose number of steps from their parent is unknown. (See
+       `Node.stride`.)
+
+    The states of all other nodes are dropped. When a dropped state is accessed
+    as `node.state`, it's recomputed by crunching from the nearest node above
+    it that has a state, doing `.stride` steps for every node on the way. The
+    recomputed states are kept in a small LRU cache, so going over a path node
+    by node crunches each state only once.
+
+    History-dependent simpacks can't be checkpointed, because their states
+    can't be recreated from a single ancestor state.
+
+    Usually you'd create a checkpointer with `Tree.enable_checkpointing` or
+    `Project.enable_checkpointing` rather than directly.
+    '''
+
+    def __init__(self, simpack_grokker, interval=100, cache_size=None):
+
+        if simpack_grokker.history_dependent:
+            raise garlicsim.misc.GarlicSimException(
+                "Can't use checkpointing with the `%s` simpack, because it's "
+                "history-dependent." % simpack_grokker.simpack.__name__
+            )
+        if interval < 1:
+            raise garlicsim.misc.GarlicSimException(
+                'The checkpoint interval must be at least 1, but you gave '
+                '%s.' % interval
+            )
+
+        self.simpack_grokker = simpack_grokker
+        '''The simpack grokker we use to recompute states.'''
+
+        self.interval = interval
+        '''Every `interval`-th node on a timeline keeps its state.'''
+
+        self.cache_size = cache_size if cache_size is not None \
+                          else 2 * interval
+        '''The maximum number of recomputed states to keep in the cache.'''
+
+        self.cache = OrderedDict()
+        '''Recently recomputed states, by node, the oldest first.'''
+
+        self._cache_lock = threading.Lock()
+        '''
+        Lock guarding `.cache`.
+
+        States may be read by several threads at once, (under the tree's read
+        lock,) and each of them may change the order of the cache. We don't
+        hold this lock while crunching.
+        '''
+
+        self.n_recomputed_states = 0
+        '''The number of states that we recomputed so far.'''
+
+        self._distances = {}
+        '''
+        How many nodes each leaf is away from the nearest checkpoint above it.
+
+        We keep this only for leaves, which are where new nodes are added. A
+        checkpoint is 0 nodes away from itself.
+        '''
+
+        self._determinism_by_step_profile = {}
+        '''Cache of whether each step profile we've seen is deterministic.'''
+
+
+    def _is_deterministic(self, step_profile):
+        '''Return whether `step_profile` is `DETERMINISTIC`.'''
+        try:
+            return self._determinism_by_step_profile[step_profile]
+        except KeyError:
+            determinism = self.simpack_grokker.settings.\
+                DETERMINISM_FUNCTION(step_profile)
+            is_deterministic = (determinism is DETERMINISTIC)
+            self._determinism_by_step_profile[step_profile] = \
+                is_deterministic
+            return is_deterministic
+
+
+    def node_added(self, node):
+        '''
+        Process a node that was just added to the tree.
+
+        This may drop the state of the node's parent.
+        '''
+        parent = node.parent
+        if parent is None:
+            self._distances[node] = 0
+            return
+
+        if len(parent.children) > 1:
+            # The parent just became a fork, so it gets to keep its state:
+            self.pin(parent)
+            self._distances[node] = 1
+            return
+
+        # Nodes we don't know, like nodes that were added before checkpointing
+        # was enabled, count as checkpoints:
+        parent_distance = self._distances.pop(parent, 0)
+
+        if parent_distance == 0 or parent_distance >= self.interval or \
+           parent.touched or parent.step_profile is None or \
+           parent.stride is None or \
+           not self._is_deterministic(parent.step_profile):
+            # The parent is a checkpoint, so the count starts over from it.
+            self._distances[node] = 1
+        else:
+            self._distances[node] = parent_distance + 1
+            parent.drop_state()
+
+
+    def pin(self, node):
+        '''Make sure `node` keeps its state, recomputing it if needed.'''
+        if not node.has_state_in_memory():
+            node.state = self.get_state(node)
+
+
+    def get_state(self, node):
+        '''
+        Get the state of a node whose state was dropped, recomputing it.
+
+        The state is crunched from the nearest node above `node` that has a
+        state, and the states on the way are put in the cache.
+
+        This may be called by several threads at once.
+        '''
+        cache = self.cache
+        with self._cache_lock:
+            try:
+                state = cache[node]
+            except KeyError:
+                pass
+            else:
+                cache.move_to_end(node)
+                return state
+
+            nodes_to_recompute = []
+            current_node = node
+            while True:
+                if current_node.has_state_in_memory():
+                    state = current_node.state
+                    break
+                if current_node in cache:
+                    state = cache[current_node]
+                    break
+                nodes_to_recompute.append(current_node)
+                current_node = current_node.parent
+                assert current_node is not None
+
+        step_profile = None
+        for node_to_recompute in reversed(nodes_to_recompute):
+            if node_to_recompute.step_profile != step_profile:
+                step_profile = node_to_recompute.step_profile
+                step_iterator = self.simpack_grokker.get_step_iterator(
+                    state,
+                    step_profile
+                )
+            stride = node_to_recompute.stride
+            if stride == 1:
+                state = step_iterator.next()
+            else:
+                # The node was crunched with a stride, so it's several steps
+                # after its parent:
+                assert stride is not None
+                state = step_iterator.next_many(stride)
+            with self._cache_lock:
+                self.n_recomputed_states += 1
+                cache[node_to_recompute] = state
+                while len(cache) > self.cache_size:
+                    cache.popitem(last=False)
+
+        return state
+
+
+    def forget_node(self, node):
+        '''Forget everything we know about a node that was deleted.'''
+        self._distances.pop(node, None)
+        with self._cache_lock:
+            self.cache.pop(node, None)
+
+
+    def __getstate__(self):
+        my_dict = dict(self.__dict__)
+        # A simpack grokker can't be pickled, so we pickle only the simpack and
+        # create a new simpack grokker when unpickling:
+        my_dict['simpack_grokker'] = self.simpack_grokker.simpack
+        my_dict['cache'] = OrderedDict()
+        del my_dict['_cache_lock']
+        return my_dict
+
+
+    def __setstate__(self, pickled_checkpointer_state):
+        self.__dict__.update(pickled_checkpointer_state)
+        self._cache_lock = threading.Lock()
+        self.simpack_grokker = \
+            garlicsim.misc.SimpackGrokker(self.simpack_grokker)
@@ -42,8 +42,16 @@ class Node(TreeMember):
     '''
     # todo: Maybe node should not reference tree?
     
+    __slots__ = ('tree', 'state', 'parent', 'step_profile', 'stride',
+                 'touched', 'block', 'still_in_editing', '_children',
+                 '_derived_nodes', '_ends', '_depth', '_jump', '__weakref__')
+    # A tree may have millions of nodes, so we keep them small: Nodes have no
+    # `__dict__`, and their `.children`, `.derived_nodes` and `.ends` lists
+    # are created only when they're first used. (Most nodes have no derived
+    # nodes and no ends, and leaves have no children.)
+    
     def __init__(self, tree, state, parent=None, step_profile=None,
-                 touched=False):
+                 touched=False, stride=1):
         '''
         Construct the node.
         
@@ -52,14 +60,20 @@ class Node(TreeMember):
         `None` for a root. `step_profile` is the step profile with which the
         state was crunched, which may be None for a state that was created from
         scratch. `touched` is whether the state was modified/created from
-        scratch, in contrast to having been produced by crunching.
+        scratch, in contrast to having been produced by crunching. `stride` is
+        the number of steps from the parent's state to this node's state.
         '''
         
         self.tree = tree
         '''The tree in which this node resides.'''
         
         self.state = state
-        '''The state contained in the node.'''
+        '''
+        The state contained in the node.
+        
+        If the tree has a checkpointer, it may drop the state from memory, and
+        then it will be recomputed when accessed.
+        '''
         
         self.parent = parent
         '''The parent node of this node.'''
@@ -76,42 +90,179 @@ class Node(TreeMember):
         self.touched = touched
         '''Says whether the node is a touched node.'''
         
+        self.stride = stride
+        '''
+        The number of steps from the parent's state to this node's state.
+        
+        It's bigger than 1 for nodes that were crunched with a
+        `CrunchingProfile` with a `.stride`. It's `None` if the number of steps
+        is unknown, which happens for a node whose state was the last one
+        before the simulation ended in the middle of a stride.
+        '''
+        
         self.block = None
         '''
         A node may be a member of a block. See class `Block` for more details.
         '''
 
-        self.children = []
+        self.still_in_editing = False
         '''
+        A flag that is raised for a node which is "still in editing".
+        
+        This means that its state is still being edited and was not yet
+        finalized, thus no crunching should be made from the node until it is
+        finalized.
+        '''
+        
+        self._children = None
+        self._derived_nodes = None
+        self._ends = None
+        # These are created lazily, see the properties below.
+        
+        self._depth = None
+        self._jump = None
+        # The ancestry index, see `._index_ancestry`.
+        
+        
+    def _get_children(self):
+        if self._children is None:
+            self._children = []
+        return self._children
+    
+    def _set_children(self, children):
+        self._children = children
+        
+    children = property(
+        _get_children,
+        _set_children,
+        doc='''
         A list of:
             1. Nodes whose states were produced by simulation from this node.
             2. Nodes who were "created by editing" from one of the nodes in the
                aforementioned set.
         '''
-
-        self.derived_nodes = []
-        '''
+    )
+    
+    
+    def _get_derived_nodes(self):
+        if self._derived_nodes is None:
+            self._derived_nodes = []
+        return self._derived_nodes
+    
+    def _set_derived_nodes(self, derived_nodes):
+        self._derived_nodes = derived_nodes
+        
+    derived_nodes = property(
+        _get_derived_nodes,
+        _set_derived_nodes,
+        doc='''
         List of nodes who were created by editing from this node.
         
         These nodes should have the same parent as this node.
         '''
-
-        self.still_in_editing = False
+    )
+    
+    
+    def _get_ends(self):
+        if self._ends is None:
+            self._ends = []
+        return self._ends
+    
+    def _set_ends(self, ends):
+        self._ends = ends
+        
+    ends = property(
+        _get_ends,
+        _set_ends,
+        doc='''
+        The ends whose parent is this node.
+        
+        This means, world ends that were arrived to on a timeline terminating
+        with this node.
         '''
-        A flag that is raised for a node which is "still in editing".
+    )
+    
+    
+    def has_children(self):
+        '''
+        Return whether the node has any children.
         
-        This means that its state is still being edited and was not yet
-        finalized, thus no crunching should be made from the node until it is
-        finalized.
+        Unlike `bool(node.children)`, this doesn't create a children list for a
+        node that doesn't have one yet.
+        '''
+        return bool(self._children)
+    
+    
+    def _index_ancestry(self):
         '''
+        Compute the ancestry index of this node, and of ancestors lacking it.
+        
+        The ancestry index of a node is its depth, (the number of generations
+        between it and its root,) and a jump pointer to one of its ancestors.
+        The jump pointers are arranged so that any ancestor can be reached in
+        a logarithmic number of jumps and steps to a parent, while each node
+        keeps only a single pointer. (This is the scheme from Myers' "An
+        applicative random-access stack".)
         
-        self.ends = []
+        A node that was unpickled or whose root changed has no index, and it
+        gets one here when it's first needed.
         '''
-        The ends whose parent is this node.
+        unindexed_nodes = []
+        node = self
+        while node is not None and node._depth is None:
+            unindexed_nodes.append(node)
+            node = node.parent
         
-        This means, world ends that were arrived to on a timeline terminating
-        with this node.
+        for node in reversed(unindexed_nodes):
+            parent = node.parent
+            if parent is None:
+                node._depth = 0
+                node._jump = node
+                continue
+            node._depth = parent._depth + 1
+            jump = parent._jump
+            if parent._depth - jump._depth == jump._depth - jump._jump._depth:
+                node._jump = jump._jump
+            else:
+                node._jump = parent
+                
+                
+    def _forget_ancestry(self):
+        '''Forget the ancestry index of this node and all its descendents.'''
+        nodes = [self]
+        while nodes:
+            node = nodes.pop()
+            node._depth = node._jump = None
+            if node._children:
+                nodes += node._children
+                
+                
+    def _get_depth(self):
+        if self._depth is None:
+            self._index_ancestry()
+        return self._depth
+    
+    depth = property(
+        _get_depth,
+        doc='''
+        The number of generations between this node and its root.
+        
+        A root has a depth of 0.
         '''
+    )
+    
+    
+    def _get_ancestor_at_depth(self, depth):
+        '''Get the ancestor of this node which has the given depth.'''
+        if self._depth is None:
+            self._index_ancestry()
+        node = self
+        while node._depth > depth:
+            if node._jump._depth >= depth:
+                node = node._jump
+            else:
+                node = node.parent
+        return node
   
         
     def __len__(self):
@@ -119,6 +270,75 @@ class Node(TreeMember):
         return 1
 
     
+    def __getattr__(self, name):
+        # This is called only for attributes that weren't found the usual way.
+        # A node's `.state` is missing only if the tree's checkpointer dropped
+        # it, so we ask the checkpointer to recompute it.
+        if name == 'state':
+            try:
+                tree = object.__getattribute__(self, 'tree')
+            except AttributeError: # Still being constructed or unpickled
+                tree = None
+            if tree is not None and tree.checkpointer is not None:
+                return tree.checkpointer.get_state(self)
+        raise AttributeError("'%s' object has no attribute '%s'" %
+                             (type(self).__name__, name))
+    
+    
+    def has_state_in_memory(self):
+        '''
+        Return whether the node's state is kept in memory.
+        
+        This is `False` only if the tree's checkpointer dropped the state, in
+        which case accessing `.state` will recompute it.
+        '''
+        try:
+            object.__getattribute__(self, 'state')
+        except AttributeError:
+            return False
+        else:
+            return True
+    
+    
+    def drop_state(self):
+        '''
+        Drop the node's state from memory, to be recomputed when accessed.
+        
+        This is meant to be used only by the tree's checkpointer.
+        '''
+        try:
+            del self.state
+        except AttributeError:
+            pass
+
+    
+    def __getstate__(self):
+        # Nodes have no `__dict__`, but we pickle them as if they had one, so
+        # nodes pickled before they got `__slots__` can still be unpickled.
+        node_state = {}
+        for name in ('tree', 'state', 'parent', 'step_profile', 'stride',
+                     'touched', 'block', 'still_in_editing'):
+            try:
+                node_state[name] = object.__getattribute__(self, name)
+            except AttributeError: # The state was dropped by a checkpointer.
+                pass
+        node_state['children'] = self._children or []
+        node_state['derived_nodes'] = self._derived_nodes or []
+        node_state['ends'] = self._ends or []
+        return node_state
+    
+    
+    def __setstate__(self, node_state):
+        self._children = self._derived_nodes = self._ends = None
+        self._depth = self._jump = None
+        self.still_in_editing = False
+        self.stride = 1 # Nodes pickled before they had strides.
+        for name, value in node_state.iteritems():
+            if name in ('children', 'derived_nodes', 'ends') and not value:
+                continue
+            setattr(self, name, value)
+        
+        
     def finalize(self):
         '''
         Finalize the node, assuming it's in currectly in editing mode.
@@ -263,7 +483,7 @@ class Node(TreeMember):
                clock_distance > max_clock_distance:
                 continue
             
-            kids = node.children
+            kids = node._children
             
             if not kids:
                 # We have a leaf!
@@ -307,52 +527,28 @@ class Node(TreeMember):
         method will behave if it was asked for too many generations back, and
         not enough existed. If `round` is `True`, it will return the root. If
         `round` is `False`, it will raise a `NodeLookupError`.
+        
+        This takes logarithmic time in `generations`.
         '''
 
         assert generations >= 0
         if generations == 0:
             return self
-        if generations == 1:
-            if self.parent:
-                return self.parent
-            else: # self.parent is None
-                if round:
-                    return self
-                else: # round is False
-                    raise NodeLookupError("You asked for the node's parent, "
-                                          "but it's a root.") 
-                
-        block = self.block
-        if block:
-            our_index = block.index(self)
-            wanted_index = our_index - generations
-            if wanted_index >= 0:
-                return block[wanted_index]
-            else: # wanted_index < 0
-                first_node = block[0]
-                parent_of_first = first_node.parent
-                if parent_of_first is None:
-                    if round:
-                        return first_node
-                    else: # round is False
-                        raise NodeLookupError(
-                            "You asked for too many generations back. This "
-                            "node's ancestry line doesn't go back that far."
-                        )
-                
-                return parent_of_first.get_ancestor(-wanted_index-1,
-                                                    round=round)
-        
-        assert self.block is None
-        if self.parent:
-            return self.parent.get_ancestor(generations - 1, round)
+        if generations == 1 and self.parent is not None:
+            return self.parent
+        
+        wanted_depth = self.depth - generations
+        if wanted_depth >= 0:
+            return self._get_ancestor_at_depth(wanted_depth)
+        elif round:
+            return self._get_ancestor_at_depth(0)
+        elif generations == 1:
+            raise NodeLookupError("You asked for the node's parent, but it's "
+                                  "a root.")
         else:
-            if round:
-                return self
-            else: # round is False
-                raise NodeLookupError("You asked for too many generations "
-                                      "back. This node's ancestry line "
-                                      "doesn't go back that far.")
+            raise NodeLookupError("You asked for too many generations back. "
+                                  "This node's ancestry line doesn't go back "
+                                  "that far.")
 
             
     def get_root(self):
@@ -362,12 +558,32 @@ class Node(TreeMember):
         This means the node which is the parent of the parent of the parent
         of... the parent of this node.
         '''
-        lowest = self.block[0] if self.block else self
-        while lowest.parent is not None:
-            lowest = lowest.parent
-            if lowest.block:
-                lowest = lowest.block[0]
-        return lowest
+        return self._get_ancestor_at_depth(0)
+    
+    
+    def get_common_ancestor(self, node):
+        '''
+        Get the lowest common ancestor of this node and `node`.
+        
+        This is the deepest node that is an ancestor of both nodes, where each
+        node counts as an ancestor of itself. Returns `None` if the nodes have
+        different roots.
+        
+        This takes logarithmic time in the depth of the nodes.
+        '''
+        depth = min(self.depth, node.depth)
+        first = self._get_ancestor_at_depth(depth)
+        second = node._get_ancestor_at_depth(depth)
+        # Nodes at the same depth have jumps to the same depth, so we can jump
+        # both nodes together as long as they don't jump to the same place:
+        while first is not second:
+            if first.parent is None: # The nodes have different roots.
+                return None
+            if first._jump is not second._jump:
+                first, second = first._jump, second._jump
+            else:
+                first, second = first.parent, second.parent
+        return first
     
     
     def is_last_on_block(self):
@@ -408,7 +624,7 @@ class Node(TreeMember):
             address_tools.describe(type(self), shorten=True),
             ' with clock %s' % self.state.clock if hasattr(self.state, 'clock') else '',
             'root, ' if (self.parent is None) else '',
-            'leaf, ' if (len(self.children) == 0) else '',
+            'leaf, ' if not self.has_children() else '',
             'touched' if self.touched else 'untouched',
             'blockful' if self.block else 'blockless',
             'crunched with %s, ' % self.step_profile.__repr__(short_form=True)
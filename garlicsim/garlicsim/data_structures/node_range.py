@@ -16,7 +16,14 @@ from .block import Block
 
 
 class NodeRange(object):
-    '''A consecutive range of nodes.'''
+    '''
+    A consecutive range of nodes.
+    
+    A node range is the tail node with all its ancestors up to the head node,
+    so it's determined by the tail and the depth of the head. Using the
+    ancestry index of nodes, checking whether a node is in the range takes
+    logarithmic time.
+    '''
 
     def __init__(self, head, tail):
         '''
@@ -33,6 +40,16 @@ class NodeRange(object):
         self.tail = tail
         '''The node or block in which this range ends.'''
     
+    
+    def get_head_node(self):
+        '''Get the first node in the range.'''
+        return self.head if isinstance(self.head, Node) else self.head[0]
+    
+    
+    def get_tail_node(self):
+        '''Get the last node in the range.'''
+        return self.tail if isinstance(self.tail, Node) else self.tail[-1]
+    
         
     def make_path(self):
         '''Make a path that goes through this node range.'''
@@ -48,8 +65,10 @@ class NodeRange(object):
         This checks that the tail node/block is a descendent of the head
         node/block.
         '''
-        path = self.make_path()
-        assert (self.head in path.__iter__(tail=self.tail))
+        head_node = self.get_head_node()
+        tail_node = self.get_tail_node()
+        assert head_node.depth <= tail_node.depth
+        assert tail_node._get_ancestor_at_depth(head_node.depth) is head_node
         
         
     def __iter__(self):
@@ -66,10 +85,20 @@ class NodeRange(object):
 
     
     def __contains__(self, node):
-        '''Return whether `node` is in this node range.'''
-        # todo: can do blocks?
-        path = self.make_path()
-        return path.__contains__(node, head=self.head, tail=self.tail)
+        '''
+        Return whether `node` is in this node range.
+        
+        `node` may also be a block, in which case we check whether all its
+        nodes are in the node range.
+        '''
+        if isinstance(node, Block):
+            return (node[0] in self) and (node[-1] in self)
+        if not isinstance(node, Node):
+            return False
+        head_depth = self.get_head_node().depth
+        tail_node = self.get_tail_node()
+        return head_depth <= node.depth <= tail_node.depth and \
+               tail_node._get_ancestor_at_depth(node.depth) is node
 
     
     def clone_with_blocks_dissolved(self):
@@ -99,12 +128,28 @@ class NodeRange(object):
         This returns every node which is (a) a child of a node in this node
         range and (b) not in this node range itself.
         '''
+        head_node = self.get_head_node()
         outside_children = []
-        for thing in self.iterate_blockwise():
-            candidate = thing if isinstance(thing, Node) else thing[-1]
-            outside_children += [child for child in candidate.children if child
-                                 not in self]
-        return outside_children
+        # We go up from the tail, collecting the children of each node except
+        # the one we came from. Nodes in the middle of a block have only one
+        # child, so we skip over them.
+        node = self.get_tail_node()
+        inside_child = None
+        while True:
+            outside_children[0:0] = [child for child in node.children if
+                                     child is not inside_child]
+            if node is head_node:
+                return outside_children
+            block = node.block
+            if block is not None and node is not block[0]:
+                if head_node.block is block:
+                    first_node = head_node
+                else:
+                    first_node = block[0]
+                if first_node is not node.parent:
+                    node = block[first_node.depth - block[0].depth + 1]
+            inside_child = node
+            node = node.parent
 
     
     def copy(self):
@@ -7,8 +7,7 @@ This module defines the `NodeSelection` class.
 See its documentation for more info.
 '''
 
-from garlicsim.misc import GarlicSimException
-from garlicsim.general_misc import sequence_tools
+import sys
 
 from .node import Node
 from .node_range import NodeRange
@@ -17,112 +16,262 @@ from .node_range import NodeRange
 __all__ = ['NodeSelection']
 
 
-class CompletelyCompact(GarlicSimException):
-    '''The NodeSelection is already completely compact.'''
-    
+def _compare_in_preorder(first, second):
+    '''
+    Compare two nodes by their order in a depth-first walk over the tree.
+
+    A node comes before its descendents, and the descendents of a node's
+    earlier child come before the descendents of its later child. Nodes on
+    different roots are compared by the order of their roots in the tree.
+    '''
+    if first is second:
+        return 0
+    common_ancestor = first.get_common_ancestor(second)
+    if common_ancestor is None:
+        roots = first.tree.roots
+        return cmp(roots.index(first.get_root()),
+                   roots.index(second.get_root()))
+    if common_ancestor is first:
+        return -1
+    if common_ancestor is second:
+        return 1
+    depth = common_ancestor.depth + 1
+    children = common_ancestor.children
+    return cmp(children.index(first._get_ancestor_at_depth(depth)),
+               children.index(second._get_ancestor_at_depth(depth)))
+
+
+def _is_ancestor(ancestor, node):
+    '''Return whether `ancestor` is `node` or one of its ancestors.'''
+    return ancestor.depth <= node.depth and \
+           node._get_ancestor_at_depth(ancestor.depth) is ancestor
+
+
+def _make_virtual_tree(nodes):
+    '''
+    Make the virtual tree of `nodes`.
+
+    The virtual tree contains `nodes` and the common ancestors of every two of
+    them, and a node's parent in it is its nearest ancestor in it. It has fewer
+    than twice as many nodes as `nodes`, and it takes O(r log r) comparisons to
+    make.
+
+    Returns a tuple `(virtual_nodes, virtual_parents)`, where `virtual_nodes`
+    is a list of the nodes in depth-first order and `virtual_parents` is a
+    dict mapping each node to its parent in the virtual tree, or `None`.
+    '''
+    nodes = sorted(set(nodes), cmp=_compare_in_preorder)
+    # The common ancestors of adjacent nodes in depth-first order are all the
+    # common ancestors we need:
+    common_ancestors = [first.get_common_ancestor(second) for (first, second)
+                        in zip(nodes, nodes[1:])]
+    virtual_nodes = sorted(
+        set(nodes) | set(common_ancestors) - set([None]),
+        cmp=_compare_in_preorder
+    )
+
+    virtual_parents = {}
+    stack = []
+    for node in virtual_nodes:
+        while stack and not _is_ancestor(stack[-1], node):
+            stack.pop()
+        virtual_parents[node] = stack[-1] if stack else None
+        stack.append(node)
+
+    return (virtual_nodes, virtual_parents)
+
+
+def _get_min_head_depths(ranges, virtual_nodes, virtual_parents):
+    '''
+    Get the minimal depth that ranges reach up to from each virtual node.
+
+    Returns a dict mapping each virtual node to the minimal depth of the heads
+    of `ranges` whose tails are the node or its descendents. This is how far up
+    the ranges cover the line of ancestors going up from the node.
+    '''
+    # Nodes with no ranges under them get a depth bigger than any node's:
+    min_head_depths = dict.fromkeys(virtual_nodes, sys.maxint)
+    for node_range in ranges:
+        tail_node = node_range.get_tail_node()
+        min_head_depths[tail_node] = min(min_head_depths[tail_node],
+                                         node_range.get_head_node().depth)
+    for node in reversed(virtual_nodes):
+        parent = virtual_parents[node]
+        if parent is not None:
+            min_head_depths[parent] = min(min_head_depths[parent],
+                                          min_head_depths[node])
+    return min_head_depths
+
+
+def _make_canonical_ranges(virtual_nodes, virtual_parents, min_head_depths):
+    '''
+    Make the canonical list of node ranges covering the given nodes.
+
+    The nodes are specified by `min_head_depths`: On the line going up from
+    each virtual node to its virtual parent, all the nodes with depth of at
+    least `min_head_depths[node]` are covered.
+
+    The ranges we make are the fewest possible, each one ending in a node that
+    has no covered children. Where a covered node has several covered
+    children, the range continues to the first one.
+    '''
+    ranges = []
+    ranges_by_tail = {}
+    for node in virtual_nodes:
+        min_head_depth = min_head_depths[node]
+        if min_head_depth > node.depth:
+            continue
+        parent = virtual_parents[node]
+        if parent is not None and min_head_depth <= parent.depth + 1 and \
+           parent in ranges_by_tail:
+            # The range covering `parent` continues down to `node`:
+            node_range = ranges_by_tail.pop(parent)
+            node_range.tail = node
+        else:
+            head_depth = min_head_depth if parent is None else \
+                         max(min_head_depth, parent.depth + 1)
+            node_range = NodeRange(node._get_ancestor_at_depth(head_depth),
+                                   node)
+            ranges.append(node_range)
+        ranges_by_tail[node] = node_range
+    return ranges
+
 
 class NodeSelection(object):
     '''
     A selection of nodes.
-    
+
     A `NodeSelection` could be described as a "set" of nodes, though the nodes
     are not specified one by one, but as a collection of node ranges.
+
+    Every selection has a canonical form, which `.compact` puts it in: The
+    fewest node ranges that contain exactly the selected nodes, chosen
+    deterministically. Compacting, union, intersection and comparison all work
+    on the ranges without going over their nodes, taking O(r log r) node
+    comparisons for r ranges, each of which is logarithmic in the depth of the
+    nodes.
     '''
-    
+
     def __init__(self, ranges=()):
         '''
         Construct the `NodeSelection`.
-        
+
         `ranges` is a list of node ranges that this selection will be made of.
         '''
         self.ranges = [ranges] if isinstance(ranges, NodeRange) else \
                       list(ranges)
-        
+
+
     def compact(self):
         '''
         Compact the `NodeSelection`.
-        
+
         This'll make it use the minimum number of node ranges while still
-        containing exactly the same nodes.
+        containing exactly the same nodes. The resulting ranges are the
+        canonical form of the selection, so two selections with the same nodes
+        get the same ranges.
         '''
         for node_range in self.ranges:
             node_range._sanity_check()
-        
-        try:
-            while True:
-                self.__partially_compact()
-        except CompletelyCompact:
-            return
-            
-        
-    def __partially_compact(self):
-        '''Try to make the NodeSelection a bit more compact.'''
-        # todo: consider defining a canonic decomposition of a node selection
-        # to node ranges. This will make a few things easier, like checking
-        # equality.
-        first, second = None, None
-        for (r1, r2) in sequence_tools.combinations(self.ranges, 2):
-            if r1.head in r2:
-                second, first = r1, r2
-                break
-            elif r2.head in r1:
-                first, second = r1, r2
-                break
-            else:
-                pass
-        if first is not None and second is not None:
-            if second.tail in first:
-                pass
-            else: # second.tail not in first
-                for current in second:
-                    if current not in first:
-                        break
-                if current.parent is first.tail:
-                    self.ranges.remove(first)
-                    new_range = NodeRange(head=first.head, tail=second.tail)
-                else:
-                    new_range = NodeRange(head=current, tail=second.tail)
-                self.ranges.append(new_range)
-              
-            self.ranges.remove(second)
-            return
-        else:
-            raise CompletelyCompact
+        self.ranges = self.__get_canonical_ranges(self.ranges)
+
+
+    @staticmethod
+    def __get_canonical_ranges(ranges):
+        '''Get the canonical ranges for the union of `ranges`.'''
+        (virtual_nodes, virtual_parents) = _make_virtual_tree(
+            node_range.get_tail_node() for node_range in ranges
+        )
+        min_head_depths = _get_min_head_depths(ranges, virtual_nodes,
+                                               virtual_parents)
+        return _make_canonical_ranges(virtual_nodes, virtual_parents,
+                                      min_head_depths)
+
 
-        
     def __iter__(self):
         '''Iterate over the nodes that are members of this `NodeSelection`.'''
         for node_range in self.ranges:
             for node in node_range:
                 yield node
 
-                
+
+    def __contains__(self, node):
+        '''Return whether `node` is a member of this `NodeSelection`.'''
+        for node_range in self.ranges:
+            if node in node_range:
+                return True
+        return False
+
+
     def __or__(self, other):
         '''Perform union between two `NodeSelections` and return the result.'''
         assert isinstance(other, NodeSelection)
-        return NodeSelection(self.ranges + other.ranges)
-    
-    
+        return NodeSelection(
+            self.__get_canonical_ranges(self.ranges + other.ranges)
+        )
+
+
     def __ror__(self, other):
         return self.__or__(other)
 
-    
+
+    def __and__(self, other):
+        '''
+        Perform intersection between two `NodeSelections`.
+
+        Returns the result, in canonical form.
+        '''
+        assert isinstance(other, NodeSelection)
+        (virtual_nodes, virtual_parents) = _make_virtual_tree(
+            node_range.get_tail_node() for node_range in
+            self.ranges + other.ranges
+        )
+        # On each line between virtual nodes, each selection covers the nodes
+        # from the bottom up to some depth, so the intersection covers the
+        # nodes up to the deeper of the two depths:
+        our_min_head_depths, other_min_head_depths = [
+            _get_min_head_depths(ranges, virtual_nodes, virtual_parents)
+            for ranges in (self.ranges, other.ranges)
+        ]
+        min_head_depths = dict(
+            (node, max(our_min_head_depths[node],
+                       other_min_head_depths[node]))
+            for node in virtual_nodes
+        )
+        return NodeSelection(_make_canonical_ranges(
+            virtual_nodes, virtual_parents, min_head_depths
+        ))
+
+
+    def __rand__(self, other):
+        return self.__and__(other)
+
+
     def __eq__(self, other):
-        # Currently horribly inefficient
         if not isinstance(other, NodeSelection):
             return False # todo: should be NotImplemented?
-        return set(self) == set(other)
+        get_canonical_ranges = self.__get_canonical_ranges
+        return set(
+            (node_range.head, node_range.tail) for node_range in
+            get_canonical_ranges(self.ranges)
+        ) == set(
+            (node_range.head, node_range.tail) for node_range in
+            get_canonical_ranges(other.ranges)
+        )
+
 
-    
     def __req__(self, other):
         return self.__eq__(other)
 
-    
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+
     def copy(self):
         '''Shallow-copy the `NodeSelection`.'''
         klass = type(self)
         return klass((node_range.copy() for node_range in self.ranges))
-    
+
     __copy__ = copy
-    
-    
\ No newline at end of file
+
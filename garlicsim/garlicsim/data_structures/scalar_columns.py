@@ -0,0 +1,299 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `ScalarColumns` class.
+
+See its documentation for more information.
+'''
+
+import array
+import bisect
+
+# In bottom of file:
+# `from .path import PathOutOfRangeError`
+
+
+__all__ = ['ScalarColumns']
+
+
+nan = 1e400 * 0
+# Python 2.5 doesn't have `float('nan')`, so we multiply infinity by zero.
+
+
+SCALAR_VALUES_ATTRIBUTE_NAME = '_garlicsim_scalar_values'
+'''
+Name of the attribute in which crunchers put precomputed scalar values.
+
+A cruncher that was asked to evaluate the scalar state functions puts their
+values on the state in this attribute, and `ScalarColumns` takes them from
+there, (deleting the attribute,) instead of computing them again.
+'''
+
+
+def attach_scalar_values(state, scalar_state_functions):
+    '''Evaluate the functions on `state` and put the values on it.'''
+    setattr(state, SCALAR_VALUES_ATTRIBUTE_NAME,
+            tuple(function(state) for function in scalar_state_functions))
+
+
+class _Segment(object):
+    '''
+    A succession of nodes on which no forks happen, with a column per function.
+
+    Every node in a segment, except the last one, has exactly one child, which
+    is the next node in the segment.
+    '''
+
+    def __init__(self, first_node, n_columns):
+
+        self.first_node = first_node
+        '''The first node in the segment.'''
+
+        self.last_node = first_node
+        '''The last node in the segment.'''
+
+        self.clocks = array.array('d')
+        '''The clock readings of the nodes in the segment.'''
+
+        self.columns = [array.array('d') for i in xrange(n_columns)]
+        '''The values of the functions on the nodes, a column per function.'''
+
+
+class ScalarColumns(object):
+    '''
+    Keeps the values of scalar functions on all the nodes in a tree.
+
+    The values are kept in columns: The tree is divided into segments of nodes
+    that have no forks, and each segment holds an `array` of floats per
+    function, filled as nodes are added. This takes 8 bytes per value, and
+    getting the values between two clock readings on a path takes logarithmic
+    time plus the length of the output.
+
+    Scalar state functions are called with the state of each node. Scalar
+    history functions are called with the node, as `history_cache` expects. A
+    function that returns `None` gets stored as `nan`. The values of a touched
+    node are computed only when they're needed, since it may still be edited
+    after it's added.
+
+    Crunchers can evaluate the scalar state functions themselves, see
+    `Project.enable_scalar_columns`.
+
+    Usually you'd create `ScalarColumns` with `Tree.enable_scalar_columns` or
+    `Project.enable_scalar_columns` rather than directly.
+    '''
+
+    def __init__(self, state_functions=(), history_functions=()):
+
+        self.state_functions = tuple(state_functions)
+        '''The scalar state functions that we keep columns for.'''
+
+        self.history_functions = tuple(history_functions)
+        '''The scalar history functions that we keep columns for.'''
+
+        self.functions = self.state_functions + self.history_functions
+        '''All the functions that we keep columns for, in column order.'''
+
+        self.compute_in_crunchers = False
+        '''
+        Flag saying whether crunchers should evaluate the state functions.
+        
+        If it's set, the crunchers put the values of the scalar state
+        functions on the states they produce, and we take them from there.
+        '''
+
+        self._segments_by_first_node = {}
+        '''The segments, by their first nodes.'''
+
+        self._segments_by_last_node = {}
+        '''The segments, by their last nodes.'''
+
+        self._touched_nodes = set()
+        '''
+        Touched nodes whose values we didn't compute yet.
+        
+        A touched node may still be edited after it's added, so we compute its
+        values only when they're needed, after it was finalized.
+        '''
+
+
+    def _get_values(self, node):
+        '''Get the values of all our functions on `node`.'''
+        state = node.state
+        state_values = getattr(state, SCALAR_VALUES_ATTRIBUTE_NAME, None)
+        if state_values is not None:
+            delattr(state, SCALAR_VALUES_ATTRIBUTE_NAME)
+        if state_values is None or \
+           len(state_values) != len(self.state_functions):
+            state_values = [function(state) for function in
+                            self.state_functions]
+        values = list(state_values) + \
+                 [function(node) for function in self.history_functions]
+        return [(nan if value is None else value) for value in values]
+
+
+    def _append_to_segment(self, segment, node):
+        '''Append a node with its clock and values to a segment.'''
+        segment.clocks.append(node.state.clock)
+        if node.touched:
+            self._touched_nodes.add(node)
+            values = [nan] * len(self.functions)
+        else:
+            values = self._get_values(node)
+        for column, value in zip(segment.columns, values):
+            column.append(value)
+
+
+    def node_added(self, node):
+        '''Process a node that was just added to the tree.'''
+        parent = node.parent
+        if parent is not None:
+            if parent in self._touched_nodes:
+                self._update_touched_node(parent)
+            segment = self._segments_by_last_node.get(parent)
+            if segment is not None and len(parent.children) == 1:
+                del self._segments_by_last_node[parent]
+                segment.last_node = node
+                self._segments_by_last_node[node] = segment
+                self._append_to_segment(segment, node)
+                return
+            if len(parent.children) >= 2:
+                self._split_after(parent)
+
+        segment = _Segment(node, len(self.functions))
+        self._segments_by_first_node[node] = segment
+        self._segments_by_last_node[node] = segment
+        self._append_to_segment(segment, node)
+
+
+    def _split_after(self, node):
+        '''
+        Make `node` the last node in its segment, splitting it if needed.
+
+        This is called when `node` becomes a fork, and when its child is about
+        to become a root.
+        '''
+        if node in self._segments_by_last_node:
+            return
+        first_node = node
+        index = 0
+        while first_node not in self._segments_by_first_node:
+            first_node = first_node.parent
+            if first_node is None:
+                return # The node isn't in any segment.
+            index += 1
+        segment = self._segments_by_first_node[first_node]
+
+        # The fork's first child is the one that continued the segment, since
+        # the rest were added after it:
+        new_segment = _Segment(node.children[0], 0)
+        new_segment.last_node = segment.last_node
+        new_segment.clocks = segment.clocks[index+1:]
+        del segment.clocks[index+1:]
+        for column in segment.columns:
+            new_segment.columns.append(column[index+1:])
+            del column[index+1:]
+        segment.last_node = node
+
+        self._segments_by_first_node[new_segment.first_node] = new_segment
+        self._segments_by_last_node[new_segment.last_node] = new_segment
+        self._segments_by_last_node[node] = segment
+
+
+    def node_range_deleted(self, head_node, tail_node, deleted_nodes):
+        '''
+        Process the deletion of a node range from the tree.
+
+        This is called after the range was cut off from its parent, with the
+        first and last nodes of the range and a set of all of its nodes. Only
+        the segments that the range touches are changed.
+        '''
+        # The tail's child, if it has one, is going to be a root, so it must
+        # start a segment. (The other outside children already start
+        # segments, because their parents are forks.)
+        self._split_after(tail_node)
+
+        parent = head_node.parent
+        if parent is not None and \
+           head_node not in self._segments_by_first_node:
+            # The range starts in the middle of a segment, so we cut the
+            # segment after the range's parent:
+            first_node = parent
+            index = 0
+            while first_node not in self._segments_by_first_node:
+                first_node = first_node.parent
+                index += 1
+            segment = self._segments_by_first_node[first_node]
+            del self._segments_by_last_node[segment.last_node]
+            del segment.clocks[index+1:]
+            for column in segment.columns:
+                del column[index+1:]
+            segment.last_node = parent
+            self._segments_by_last_node[parent] = segment
+
+        # Now every other segment is either inside the range or outside it:
+        for node in deleted_nodes:
+            segment = self._segments_by_first_node.pop(node, None)
+            if segment is not None:
+                del self._segments_by_last_node[segment.last_node]
+        self._touched_nodes -= deleted_nodes
+
+
+    def _update_touched_node(self, node):
+        '''Compute the values of a touched node, if it was finalized.'''
+        if node.still_in_editing:
+            return
+        self._touched_nodes.discard(node)
+        segment = self._segments_by_first_node[node]
+        segment.clocks[0] = node.state.clock
+        for column, value in zip(segment.columns, self._get_values(node)):
+            column[0] = value
+
+
+    def get_values(self, function, path, start_clock=None, end_clock=None):
+        '''
+        Get the values of a scalar function on a path.
+
+        If `start_clock` or `end_clock` are specified, only nodes with clock
+        readings between them, inclusive, are included.
+
+        Returns a tuple `(clocks, values)` of two `array`s of floats.
+        '''
+        index = self.functions.index(function)
+
+        clocks = array.array('d')
+        values = array.array('d')
+        node = path.root
+        while node is not None:
+            if node in self._touched_nodes:
+                self._update_touched_node(node)
+            segment = self._segments_by_first_node[node]
+            segment_clocks = segment.clocks
+            if end_clock is not None and segment_clocks[0] > end_clock:
+                break
+            if start_clock is None or segment_clocks[-1] >= start_clock:
+                start = 0 if start_clock is None else \
+                        bisect.bisect_left(segment_clocks, start_clock)
+                end = len(segment_clocks) if end_clock is None else \
+                      bisect.bisect_right(segment_clocks, end_clock)
+                clocks.extend(segment_clocks[start:end])
+                values.extend(segment.columns[index][start:end])
+            try:
+                node = path.next_node(segment.last_node)
+            except PathOutOfRangeError:
+                node = None
+
+        return (clocks, values)
+
+
+    def rebuild(self, tree):
+        '''Forget all the columns and compute them again from `tree`.'''
+        self._segments_by_first_node = {}
+        self._segments_by_last_node = {}
+        self._touched_nodes = set()
+        # A node is always added to `tree.nodes` after its parent:
+        for node in tree.nodes:
+            self.node_added(node)
+
+
+from .path import PathOutOfRangeError
@@ -0,0 +1,211 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `StateInterner` class.
+
+See its documentation for more information.
+'''
+
+import cPickle
+import hashlib
+import weakref
+
+# In bottom of file:
+# `from .scalar_columns import SCALAR_VALUES_ATTRIBUTE_NAME`
+
+
+__all__ = ['StateInterner']
+
+
+def _is_weakrefable(thing):
+    '''Return whether we can make a weak reference to `thing`.'''
+    try:
+        weakref.ref(thing)
+    except TypeError:
+        return False
+    else:
+        return True
+
+
+class StateInterner(object):
+    '''
+    Makes identical states in a tree share a single object, to save memory.
+
+    Forking a node several times with the same deterministic step profile, or
+    recrunching a timeline, produces states that are identical to states that
+    are already in the tree. When a natural node is added to a tree with a
+    state interner, its state is fingerprinted, and if there's already a state
+    with the same fingerprint in memory, the node gets that state instead of
+    its own.
+
+    The fingerprint is made by the simpack's `STATE_FINGERPRINT_FUNCTION` if it
+    has one, which should return a string or another hashable object that's
+    equal for states that are identical. Since fingerprint functions often
+    ignore the clock, we pair their fingerprint with the state's `.clock`, so
+    a state is never replaced with a state that has a different clock.
+    Otherwise the fingerprint is a structural hash: A SHA-1 digest of the
+    pickled attributes of the state, including `.clock`.
+
+    With a structural hash, we also intern the attributes of the state
+    separately, excluding `.clock`. This way states that are identical except
+    for their clock, like repeating states of an oscillating simulation, share
+    their attributes though they can't share a state object. Only attributes
+    that can be weakly referenced are interned, (like instances of your own
+    classes, but not lists or ints.)
+
+    Touched nodes are never interned, since they might still be edited; this
+    is why `Tree.fork_to_edit` always gets a private copy of the state. Since
+    interned states are shared by several nodes, never change the state of a
+    natural node after it was added to the tree.
+
+    The interning tables keep only weak references, so they don't keep alive
+    states that were deleted from the tree.
+
+    Usually you'd create a `StateInterner` with `Tree.enable_state_interning`
+    or `Project.enable_state_interning` rather than directly.
+    '''
+
+    def __init__(self, fingerprint_function=None):
+
+        self.fingerprint_function = fingerprint_function
+        '''
+        Function that makes a fingerprint of a state.
+
+        If it's `None`, we use a structural hash.
+        '''
+
+        self.n_states = 0
+        '''The number of states that we tried to intern.'''
+
+        self.n_state_hits = 0
+        '''The number of states that were replaced by an identical state.'''
+
+        self.n_attribute_hits = 0
+        '''
+        The number of attributes that were replaced by an identical attribute.
+
+        Attributes of states that were replaced by an identical state aren't
+        counted.
+        '''
+
+        self.bytes_saved = 0
+        '''
+        An estimate of how many bytes of memory we saved.
+
+        This is the total size of the pickles of the states and attributes
+        that we replaced.
+        '''
+
+        self._states = weakref.WeakValueDictionary()
+        '''The interned states, by fingerprint.'''
+
+        self._attributes = weakref.WeakValueDictionary()
+        '''The interned attributes, by the digest of their pickle.'''
+
+
+    def get_hit_rate(self):
+        '''
+        Get the portion of states that were replaced by an identical state.
+
+        Returns a float between 0 and 1.
+        '''
+        if not self.n_states:
+            return 0.
+        return self.n_state_hits / float(self.n_states)
+
+
+    def node_added(self, node):
+        '''
+        Process a node that was just added to the tree.
+
+        If it's a natural node, its state may be replaced with an identical
+        state.
+        '''
+        if node.touched or not node.has_state_in_memory():
+            return
+        state = node.state
+        if not _is_weakrefable(state):
+            return
+        self.n_states += 1
+
+        if self.fingerprint_function is not None:
+            fingerprint = (getattr(state, 'clock', None),
+                           self.fingerprint_function(state))
+            size = None
+            attribute_digests = None
+        else:
+            (fingerprint, size, attribute_digests) = \
+                self._get_structural_fingerprint(state)
+
+        interned_state = self._states.get(fingerprint)
+        if interned_state is not None:
+            self.n_state_hits += 1
+            self.bytes_saved += size if size is not None else \
+                                len(cPickle.dumps(state, 2))
+            node.state = interned_state
+            return
+
+        self._states[fingerprint] = state
+        if attribute_digests is not None:
+            self._intern_attributes(state, attribute_digests)
+
+
+    def _get_structural_fingerprint(self, state):
+        '''
+        Get the structural fingerprint of `state`.
+
+        Returns a tuple `(fingerprint, size, attribute_digests)`, where `size`
+        is the total size of the pickles of the state's attributes and
+        `attribute_digests` maps each attribute name, except for `'clock'`, to
+        a tuple `(digest, size)` of the attribute's pickle.
+        '''
+        attribute_digests = {}
+        items = []
+        size = 0
+        for (name, value) in sorted(vars(state).iteritems()):
+            if name == SCALAR_VALUES_ATTRIBUTE_NAME:
+                continue
+            pickled_value = cPickle.dumps(value, 2)
+            digest = hashlib.sha1(pickled_value).digest()
+            items.append((name, digest))
+            size += len(pickled_value)
+            if name != 'clock':
+                attribute_digests[name] = (digest, len(pickled_value))
+        fingerprint = hashlib.sha1(
+            cPickle.dumps((type(state), items), 2)
+        ).digest()
+        return (fingerprint, size, attribute_digests)
+
+
+    def _intern_attributes(self, state, attribute_digests):
+        '''Replace the attributes of `state` with identical attributes.'''
+        for (name, (digest, size)) in attribute_digests.iteritems():
+            value = getattr(state, name)
+            if not _is_weakrefable(value):
+                continue
+            interned_value = self._attributes.get(digest)
+            if interned_value is None:
+                self._attributes[digest] = value
+            elif interned_value is not value:
+                self.n_attribute_hits += 1
+                self.bytes_saved += size
+                setattr(state, name, interned_value)
+
+
+    def __getstate__(self):
+        my_dict = dict(self.__dict__)
+        # Weak dictionaries can't be pickled, and the states in the tree are
+        # shared in the pickle anyway:
+        del my_dict['_states']
+        del my_dict['_attributes']
+        return my_dict
+
+
+    def __setstate__(self, pickled_state_interner_state):
+        self.__dict__.update(pickled_state_interner_state)
+        self._states = weakref.WeakValueDictionary()
+        self._attributes = weakref.WeakValueDictionary()
+
+
+from .scalar_columns import SCALAR_VALUES_ATTRIBUTE_NAME
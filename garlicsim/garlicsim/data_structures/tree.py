@@ -20,6 +20,9 @@ from garlicsim.misc import GarlicSimException
 # `from .node import Node`
 # `from .block import Block`
 # `from .end import End`
+# `from .checkpointer import Checkpointer`
+# `from .scalar_columns import ScalarColumns`
+# `from .state_interner import StateInterner`
 
 
 __all__ = ["Tree", "TreeError"]
@@ -64,6 +67,101 @@ class Tree(object):
         require reading from the tree in the same time that `.sync_crunchers`
         could potentially be writing to it.
         '''
+        
+        self.checkpointer = None
+        '''
+        The checkpointer that drops and recomputes states to save memory.
+        
+        This is `None` unless you called `.enable_checkpointing`.
+        '''
+        
+        self.scalar_columns = None
+        '''
+        Columns of the values of scalar functions on the nodes.
+        
+        This is `None` unless you called `.enable_scalar_columns`.
+        '''
+        
+        self.state_interner = None
+        '''
+        The state interner that makes identical states share one object.
+        
+        This is `None` unless you called `.enable_state_interning`.
+        '''
+
+        
+    def enable_checkpointing(self, simpack_grokker, interval=100,
+                             cache_size=None):
+        '''
+        Keep full states only at checkpoints, to save memory.
+        
+        From now on, only every `interval`-th node on a timeline keeps its
+        state, along with forks, leaves, touched nodes and nodes crunched with
+        step profiles that aren't deterministic. The states of other nodes are
+        recomputed when accessed. `cache_size` is the number of recomputed
+        states that are kept; the default is `2 * interval`.
+        
+        This works only for simpacks that aren't history-dependent. See
+        documentation of `Checkpointer` for more details.
+        
+        Returns the checkpointer.
+        '''
+        self.checkpointer = Checkpointer(simpack_grokker, interval, cache_size)
+        return self.checkpointer
+    
+    
+    def disable_checkpointing(self):
+        '''Stop dropping states, and bring back all the dropped states.'''
+        checkpointer = self.checkpointer
+        if checkpointer is None:
+            return
+        for node in self.nodes:
+            checkpointer.pin(node)
+        self.checkpointer = None
+
+        
+    def enable_scalar_columns(self, state_functions=(), history_functions=()):
+        '''
+        Keep the values of scalar functions on all nodes in columns.
+        
+        `state_functions` are called with the state of each node, and
+        `history_functions` are called with the node. The values are computed
+        for all the existing nodes, and then for every node when it's added.
+        See documentation of `ScalarColumns` for more details.
+        
+        Returns the `ScalarColumns`.
+        '''
+        self.scalar_columns = ScalarColumns(state_functions, history_functions)
+        self.scalar_columns.rebuild(self)
+        return self.scalar_columns
+    
+    
+    def disable_scalar_columns(self):
+        '''Stop keeping the values of scalar functions on the nodes.'''
+        self.scalar_columns = None
+        
+        
+    def enable_state_interning(self, fingerprint_function=None):
+        '''
+        Make natural nodes with identical states share a single state object.
+        
+        `fingerprint_function` takes a state and returns a hashable
+        fingerprint that's equal for identical states; if it's `None`, a
+        structural hash of the state's attributes is used. The states of the
+        existing natural nodes are interned too. See documentation of
+        `StateInterner` for more details.
+        
+        Returns the `StateInterner`.
+        '''
+        self.state_interner = StateInterner(fingerprint_function)
+        for node in self.nodes:
+            self.state_interner.node_added(node)
+        return self.state_interner
+    
+    
+    def disable_state_interning(self):
+        '''Stop interning the states of new nodes.'''
+        self.state_interner = None
 
         
     def fork_to_edit(self, template_node):
@@ -92,19 +190,31 @@ class Tree(object):
 
 
     def add_state(self, state, parent=None, step_profile=None,
-                  template_node=None):
+                  template_node=None, stride=1):
         '''
         Wrap `state` in a node and add to the tree.
         
+        `stride` is the number of steps from the parent's state to `state`, or
+        `None` if it's unknown.
+        
         Returns the node.
         '''
         touched = (parent is None) or (template_node is not None)
         
+        if parent is not None and step_profile == parent.step_profile:
+            # Most nodes have the same step profile as their parent, so we let
+            # them share a single step profile object instead of copying it for
+            # each node:
+            step_profile = parent.step_profile
+        else:
+            step_profile = copy.copy(step_profile)
+        
         my_node = Node(
             self,
             state,
-            step_profile=copy.copy(step_profile),
-            touched=touched
+            step_profile=step_profile,
+            touched=touched,
+            stride=stride
         )
         
         self.__add_node(my_node, parent, template_node)
@@ -134,7 +244,7 @@ class Tree(object):
 
         if parent:
             if not hasattr(node.state, 'clock'):
-                node.state.clock = parent.state.clock + 1
+                node.state.clock = parent.state.clock + (node.stride or 1)
 
             node.parent = parent
             parent.children.append(node)
@@ -168,7 +278,19 @@ class Tree(object):
             if not hasattr(node.state, "clock"):
                 node.state.clock = 0
             self.roots.append(node)
-            return node
+            
+        node._index_ancestry()
+        
+        if self.state_interner is not None:
+            self.state_interner.node_added(node)
+            
+        if self.scalar_columns is not None:
+            self.scalar_columns.node_added(node)
+            
+        if self.checkpointer is not None:
+            self.checkpointer.node_added(node)
+            
+        return node
 
     
     def make_end(self, node, step_profile):
@@ -240,6 +362,8 @@ class Tree(object):
         Delete a node selection from the tree.
         
         Any nodes that will be orphaned by this deletion will become roots.
+        
+        The selection is compacted first, so its ranges don't overlap.
         '''
                 
         stitch = False
@@ -278,9 +402,19 @@ class Tree(object):
             big_parent.children.remove(head_node)
         
         outside_children = node_range.get_outside_children()
+        
+        checkpointer = self.checkpointer
+        if checkpointer is not None:
+            # The outside children will become roots, so they can't be
+            # recomputed from their parents anymore:
+            for node in outside_children:
+                checkpointer.pin(node)
+            for node in node_range:
+                checkpointer.forget_node(node)
             
-        for node in node_range:
-            self.nodes.remove(node)
+        deleted_nodes = set(node_range)
+        self.nodes[:] = [node for node in self.nodes if node not in
+                         deleted_nodes]
 
         current_block = None
         last_block_change = None
@@ -299,8 +433,13 @@ class Tree(object):
         parent_to_use = big_parent if (stitch is True) else None
         for node in outside_children:
             node.parent = parent_to_use
+            node._forget_ancestry()
             if parent_to_use is None:
                 self.roots.append(node)
+                
+        if self.scalar_columns is not None:
+            self.scalar_columns.node_range_deleted(head_node, tail_node,
+                                                   deleted_nodes)
         
     
     
@@ -346,3 +485,6 @@ class Tree(object):
 from .node import Node
 from .block import Block
 from .end import End
+from .checkpointer import Checkpointer
+from .scalar_columns import ScalarColumns
+from .state_interner import StateInterner
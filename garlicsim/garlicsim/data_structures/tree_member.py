@@ -20,6 +20,8 @@ class TreeMember(object):
     # todo: add .step_profile as abstract
     
     __metaclass__ = abc.ABCMeta
+    
+    __slots__ = ()
   
     @abc.abstractmethod
     def __len__(self):
@@ -6,16 +6,22 @@ Defines the `cache` decorator.
 
 See its documentation for more details.
 '''
-# todo: examine thread-safety
 
-import functools
+from __future__ import with_statement
+
+import threading
 
 from garlicsim.general_misc import decorator_tools
 
-from garlicsim.general_misc.sleek_refs import SleekCallArgs
 from garlicsim.general_misc.infinity import infinity
-from garlicsim.general_misc import misc_tools
 from garlicsim.general_misc.nifty_collections import OrderedDict
+from garlicsim.general_misc.third_party.namedtuple import namedtuple
+
+from .call_args_keyer import CallArgsKeyer
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses max_size current_size')
+'''Statistics of a cached function, as returned by its `cache_info`.'''
 
 
 @decorator_tools.helpful_decorator_builder
@@ -42,61 +48,96 @@ def cache(max_size=infinity):
     but if you ever want to use non-weakreffable arguments you are still able
     to. (Assuming you don't mind the memory leaks.)
     
+    The function's signature is analyzed once, when it's decorated, so calls
+    with simple arguments like numbers, strings and weakreffable objects are
+    cheap to look up. (See documentation of `CallArgsKeyer` for more details.)
+    
     You may optionally specify a `max_size` for maximum number of cached
     results to store; old entries are thrown away according to a
     least-recently-used alogrithm. (Often abbreivated LRU.)
+    
+    The cached function has a `cache_clear` method that deletes all saved
+    results, and a `cache_info` method that returns a `CacheInfo` with the
+    number of cache hits and misses, the maximum size and the current size.
     '''
-    # todo idea: figure how how complex the function's argspec is, and then
-    # compile a function accordingly, so functions with a simple argspec won't
-    # have to go through so much shit. update: probably it will help only for
-    # completely argumentless function. so do one for those.
 
     def decorator(function):
         
         # In case we're being given a function that is already cached:
         if getattr(function, 'is_cached', False): return function
         
+        lock = threading.Lock()
+        
         if max_size == infinity:
             
             cache_dict = {}
+            keyer = CallArgsKeyer(cache_dict, function)
 
             def cached(function, *args, **kwargs):
-                sleek_call_args = \
-                    SleekCallArgs(cache_dict, function, *args, **kwargs)
+                if keyer.pending_removals:
+                    with lock:
+                        keyer.remove_dead_keys()
+                key = keyer.get_key(args, kwargs)
                 try:
-                    return cached._cache[sleek_call_args]
+                    value = cache_dict[key]
                 except KeyError:
-                    cached._cache[sleek_call_args] = value = \
-                          function(*args, **kwargs)
+                    value = function(*args, **kwargs)
+                    with lock:
+                        cache_dict[keyer.finalize_key(key)] = value
+                        cached._misses += 1
+                    return value
+                else:
+                    with lock:
+                        cached._hits += 1
                     return value
     
         else: # max_size < infinity
             
             cache_dict = OrderedDict()
+            keyer = CallArgsKeyer(cache_dict, function)
             
             def cached(function, *args, **kwargs):
-                sleek_call_args = \
-                    SleekCallArgs(cache_dict, function, *args, **kwargs)
-                try:
-                    result = cached._cache[sleek_call_args]
-                    cached._cache.move_to_end(sleek_call_args)
-                    return result
-                except KeyError:
-                    cached._cache[sleek_call_args] = value = \
-                        function(*args, **kwargs)
-                    if len(cached._cache) > max_size:
-                        cached._cache.popitem(last=False)
-                    return value
+                if keyer.pending_removals:
+                    with lock:
+                        keyer.remove_dead_keys()
+                key = keyer.get_key(args, kwargs)
+                with lock:
+                    try:
+                        value = cache_dict[key]
+                    except KeyError:
+                        pass
+                    else:
+                        cache_dict.move_to_end(key)
+                        cached._hits += 1
+                        return value
+                value = function(*args, **kwargs)
+                with lock:
+                    if key not in cache_dict:
+                        cache_dict[keyer.finalize_key(key)] = value
+                        while len(cache_dict) > max_size:
+                            cache_dict.popitem(last=False)
+                    cached._misses += 1
+                return value
                     
         cached._cache = cache_dict
+        cached._hits = cached._misses = 0
         
         result = decorator_tools.decorator(cached, function)
         
         def cache_clear():
             '''Clear the cache, deleting all saved results.'''
-            cached._cache.clear()    
+            with lock:
+                cached._cache.clear()
+                cached._hits = cached._misses = 0
         result.cache_clear = cache_clear
         
+        def cache_info():
+            '''Get a `CacheInfo` with statistics about the cache.'''
+            with lock:
+                return CacheInfo(cached._hits, cached._misses, max_size,
+                                 len(cached._cache))
+        result.cache_info = cache_info
+        
         result.is_cached = True
         
         return result
@@ -7,7 +7,7 @@ Defines the `CachedType` metaclass.
 See its documentation for more details.
 '''
 
-from garlicsim.general_misc.sleek_refs import SleekCallArgs
+from .call_args_keyer import CallArgsKeyer
 
 
 class SelfPlaceholder(object):
@@ -47,19 +47,26 @@ class CachedType(type):
     def __new__(mcls, *args, **kwargs):
         result = super(CachedType, mcls).__new__(mcls, *args, **kwargs)
         result.__cache = {}
+        result.__keyer = None
         return result
 
     
     def __call__(cls, *args, **kwargs):
-        sleek_call_args = SleekCallArgs(
-            cls.__cache,
-            cls.__init__,
-            *((SelfPlaceholder,) + args),
-            **kwargs
-        )
+        keyer = cls.__keyer
+        if keyer is None or keyer.function != cls.__init__:
+            # We analyze `__init__` lazily, because it might be changed after
+            # the class is created.
+            cls.__keyer = keyer = CallArgsKeyer(
+                cls.__cache,
+                cls.__init__,
+                self_placeholder=SelfPlaceholder
+            )
+        if keyer.pending_removals:
+            keyer.remove_dead_keys()
+        key = keyer.get_key(args, kwargs)
         try:
-            return cls.__cache[sleek_call_args]
+            return cls.__cache[key]
         except KeyError:
-            cls.__cache[sleek_call_args] = value = \
+            cls.__cache[keyer.finalize_key(key)] = value = \
                 super(CachedType, cls).__call__(*args, **kwargs)
             return value
@@ -0,0 +1,324 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+Defines the `CallArgsKeyer` class.
+
+See its documentation for more details.
+'''
+
+import weakref
+import types
+
+from garlicsim.general_misc import cute_inspect
+from garlicsim.general_misc.sleek_refs import SleekCallArgs
+
+
+__all__ = ['CallArgsKeyer']
+
+
+_atomic_types = frozenset((types.NoneType, bool, int, long, float, complex,
+                           str, unicode))
+'''
+Types of hashable, non-weakreffable values that may be used as keys directly.
+
+We use exact types rather than `isinstance`, because subclasses of these may
+be weakreffable and may override `__eq__` and `__hash__`.
+'''
+
+_container_types = frozenset((tuple, frozenset))
+'''Types of hashable containers that may be used directly if their items can.'''
+
+
+def _is_atomic(value):
+    '''Return whether `value` may be put in a key as-is, without leaking.'''
+    value_type = type(value)
+    if value_type in _atomic_types:
+        return True
+    elif value_type in _container_types:
+        for item in value:
+            if not _is_atomic(item):
+                return False
+        return True
+    else:
+        return False
+
+
+class _Missing(object):
+    '''Placeholder for an argument that wasn't given.'''
+
+
+class _StarKwargsMarker(object):
+    '''Marker separating the star-kwargs from the other arguments in a key.'''
+
+
+class _WeakKeyTuple(tuple):
+    '''A key `tuple` that contains `_WeakKey` items.'''
+
+
+class _WeakKey(object):
+    '''
+    Weak reference to an argument, which may be used as part of a key.
+
+    It's hashed like the referenced object, and compared by comparing the
+    referenced objects. After the referenced object dies, it's equal only to
+    itself.
+    '''
+
+    __slots__ = ('ref', 'hash', '__weakref__')
+
+    def __init__(self, thing, callback=None):
+        self.ref = weakref.ref(thing, callback)
+        '''The weak reference to the argument.'''
+        self.hash = hash(thing)
+        '''The hash of the argument.'''
+
+
+    def __hash__(self):
+        return self.hash
+
+
+    def __eq__(self, other):
+        if type(other) is not _WeakKey:
+            return NotImplemented
+        thing = self.ref()
+        if thing is None:
+            return self is other
+        other_thing = other.ref()
+        if other_thing is None:
+            return False
+        return thing is other_thing or thing == other_thing
+
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+
+class CallArgsKeyer(object):
+    '''
+    Builds dictionary keys for calls of a function, identifying call args.
+
+    "Call args" is a mapping of which function arguments get which values.
+    For example, for a function:
+
+        def f(a, b=2):
+            pass
+
+    The calls `f(1)`, `f(1, 2)` and `f(b=2, a=1)` all share the same call args,
+    and will get equal keys.
+
+    This does the job of `SleekCallArgs`, only faster: The function's argspec
+    is analyzed once when the keyer is created, and then every call is
+    normalized into a flat `tuple` of argument values. If all the values are
+    hashable, non-weakreffable objects like numbers and strings, that `tuple`
+    is the key. Hashable weakreffable values, like `self` in a method, are
+    wrapped in weakrefs, and keys stored with `finalize_key` are removed from
+    `containing_dict` once one of their arguments dies. (The removals are
+    queued in `.pending_removals`; call `remove_dead_keys` to carry them out.)
+    For all other values, like `list` objects, we fall back to `SleekCallArgs`.
+
+    If `self_placeholder` is given, the function's first argument is treated as
+    bound, and the placeholder is used for it when falling back to
+    `SleekCallArgs`.
+    '''
+
+    def __init__(self, containing_dict, function, self_placeholder=None):
+
+        self.containing_dict = containing_dict
+        '''The `dict` in which the keys will be stored.'''
+
+        self.function = function
+        '''The function for whose calls we build keys.'''
+
+        self.self_placeholder = self_placeholder
+        '''Placeholder for the function's bound first argument, if any.'''
+
+        self.pending_removals = []
+        '''Stored keys whose arguments died, which should be removed.'''
+
+        self._normalize = self._build_normalizer()
+
+
+    def _build_normalizer(self):
+        '''
+        Build a function that normalizes call arguments into a `tuple`.
+
+        The returned function takes `args` and `kwargs`, and returns `None` if
+        it can't handle them, (for example if they don't match the function's
+        signature,) in which case `SleekCallArgs` should be used.
+        '''
+        try:
+            args_spec = cute_inspect.getargspec(self.function)
+        except TypeError:
+            return lambda args, kwargs: None
+
+        arg_names = list(args_spec.args)
+        star_args_name = args_spec.varargs
+        star_kwargs_name = args_spec.keywords
+        defaults = args_spec.defaults or ()
+
+        if self.self_placeholder is not None:
+            if not arg_names:
+                return lambda args, kwargs: None
+            del arg_names[0]
+            defaults = defaults[-len(arg_names):] if arg_names else ()
+
+        if [arg_name for arg_name in arg_names if
+            not isinstance(arg_name, basestring)]:
+            # The function uses tuple unpacking in its signature, we don't
+            # handle that.
+            return lambda args, kwargs: None
+
+        n_args = len(arg_names)
+        n_required_args = n_args - len(defaults)
+        arg_indices = dict(
+            (arg_name, i) for (i, arg_name) in enumerate(arg_names)
+        )
+
+        def normalize(args, kwargs):
+            n_given_args = len(args)
+
+            if not kwargs:
+                if n_given_args == n_args:
+                    return args
+                elif n_required_args <= n_given_args < n_args:
+                    return args + defaults[n_given_args - n_required_args:]
+                elif n_given_args > n_args and star_args_name:
+                    return args
+                else:
+                    return None
+
+            if n_given_args > n_args:
+                if not star_args_name:
+                    return None
+                values = list(args[:n_args])
+                star_args = args[n_args:]
+            else:
+                values = list(args) + [_Missing] * (n_args - n_given_args)
+                star_args = ()
+
+            star_kwargs = None
+            for (name, value) in kwargs.iteritems():
+                index = arg_indices.get(name)
+                if index is None:
+                    if not star_kwargs_name:
+                        return None
+                    if star_kwargs is None:
+                        star_kwargs = []
+                    star_kwargs.append((name, value))
+                elif index < n_given_args:
+                    return None
+                else:
+                    values[index] = value
+
+            for index in xrange(n_given_args, n_args):
+                if values[index] is _Missing:
+                    if index < n_required_args:
+                        return None
+                    values[index] = defaults[index - n_required_args]
+
+            values.extend(star_args)
+            if star_kwargs:
+                star_kwargs.sort()
+                values.append(_StarKwargsMarker)
+                for (name, value) in star_kwargs:
+                    values.append(name)
+                    values.append(value)
+            return tuple(values)
+
+        return normalize
+
+
+    def get_key(self, args, kwargs):
+        '''
+        Get a key for calling the function with `*args` and `**kwargs`.
+
+        The key may be used to look up the call in `containing_dict`. Before
+        storing a new item in `containing_dict`, pass the key through
+        `finalize_key`.
+
+        Keep a reference to the arguments until the key is stored; otherwise
+        the key might be invalid by the time it's stored.
+        '''
+        values = self._normalize(args, kwargs)
+        if values is None:
+            return self._get_sleek_call_args(args, kwargs)
+
+        weak_indices = None
+        for (i, value) in enumerate(values):
+            value_type = type(value)
+            if value_type in _atomic_types or value is _StarKwargsMarker or \
+               (value_type in _container_types and _is_atomic(value)):
+                continue
+            elif value_type.__weakrefoffset__:
+                if weak_indices is None:
+                    weak_indices = []
+                weak_indices.append(i)
+            else:
+                return self._get_sleek_call_args(args, kwargs)
+
+        if weak_indices is None:
+            return values
+
+        values = list(values)
+        try:
+            for i in weak_indices:
+                values[i] = _WeakKey(values[i])
+        except TypeError:
+            # Unhashable argument
+            return self._get_sleek_call_args(args, kwargs)
+        return _WeakKeyTuple(values)
+
+
+    def finalize_key(self, key):
+        '''
+        Prepare a key for being stored in `containing_dict`.
+
+        The returned key will be removed from `containing_dict` when one of its
+        weakreffed arguments dies.
+        '''
+        if type(key) is not _WeakKeyTuple:
+            return key
+
+        pending_removals = self.pending_removals
+        key_holder = []
+        def callback(_):
+            pending_removals.append(key_holder[0])
+
+        values = []
+        for value in key:
+            if type(value) is _WeakKey:
+                thing = value.ref()
+                if thing is None:
+                    # The argument already died; we'll store a key that can't
+                    # be found again.
+                    values.append(value)
+                else:
+                    values.append(_WeakKey(thing, callback))
+            else:
+                values.append(value)
+        finalized_key = _WeakKeyTuple(values)
+        key_holder.append(finalized_key)
+        return finalized_key
+
+
+    def remove_dead_keys(self):
+        '''Remove keys whose arguments died from `containing_dict`.'''
+        pending_removals = self.pending_removals
+        while pending_removals:
+            key = pending_removals.pop()
+            try:
+                del self.containing_dict[key]
+            except KeyError:
+                pass
+
+
+    def _get_sleek_call_args(self, args, kwargs):
+        '''Get a `SleekCallArgs` key for the call, the slow way.'''
+        if self.self_placeholder is not None:
+            args = (self.self_placeholder,) + args
+        return SleekCallArgs(self.containing_dict, self.function, *args,
+                             **kwargs)
@@ -19,11 +19,15 @@ class ChangeTracker(object):
     To register an object, use `.check_in(obj)`. It will return `True`. Every
     time `.check_in` will be called with the same object, it will return
     whether the object changed since the last time it was checked in.
+    
+    Objects that have an integer `.version` attribute, which they increment
+    whenever they're modified, are tracked by that version. Other objects are
+    tracked by pickling them and comparing the pickles, which is much slower.
     '''
     
     def __init__(self):
         self.library = WeakKeyIdentityDict()
-        '''dictoid mapping from objects to their last pickle value.'''
+        '''dictoid mapping from objects to their last fingerprint.'''
         
         
     def check_in(self, thing):
@@ -35,21 +39,36 @@ class ChangeTracker(object):
         whether the object changed since the last time it was checked in.
         '''
         
-        new_pickle = cPickle.dumps(thing, 2)
+        new_fingerprint = self._get_fingerprint(thing)
         
         if thing not in self.library:
-            self.library[thing] = new_pickle
+            self.library[thing] = new_fingerprint
             return True
         
         # thing in self.library
         
-        previous_pickle = self.library[thing]
-        if previous_pickle == new_pickle:
+        previous_fingerprint = self.library[thing]
+        if previous_fingerprint == new_fingerprint:
             return False
         else:
-            self.library[thing] = new_pickle
+            self.library[thing] = new_fingerprint
             return True
     
+    
+    @staticmethod
+    def _get_fingerprint(thing):
+        '''
+        Get a value that changes whenever `thing` changes.
+        
+        This is `thing`'s version if it has one, otherwise its pickle.
+        '''
+        version = getattr(thing, 'version', None)
+        if isinstance(version, (int, long)) and \
+           not isinstance(version, bool):
+            return (version,)
+        else:
+            return cPickle.dumps(thing, 2)
+    
         
     def __contains__(self, thing):
         '''Return whether `thing` is tracked.'''
@@ -4,8 +4,10 @@
 '''
 Defines `profile_ready`, a decorator for flexibly profiling a function..
 
-See its documentation for more details.
+See its documentation for more details. Also defines `SamplingProfiler`, for
+profiling a tight loop in sampled windows.
 '''
 
 from . import base_profile
-from .cute_profile import profile_ready
\ No newline at end of file
+from .cute_profile import profile_ready
+from .sampling_profiler import SamplingProfiler, make_stats, add_stats
@@ -0,0 +1,121 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+Defines the `SamplingProfiler` class and the `make_stats` function.
+
+See their documentation for more details.
+'''
+
+import pstats
+
+from . import base_profile
+
+
+class SamplingProfiler(object):
+    '''
+    Profiler that samples a repeated operation in windows.
+
+    Profiling every single call of a tight loop makes the loop much slower,
+    which distorts the results. `SamplingProfiler` profiles the operation only
+    in `window_size` out of every `window_size * period` calls. The collected
+    data is handed out once per window as a raw stats `dict`, which is
+    pickleable, so it could be sent to another process and merged with data
+    from other profilers using `make_stats`.
+
+    Usage:
+
+        sampling_profiler = SamplingProfiler()
+        while True:
+            sampling_profiler.before_call()
+            do_something()
+            stats_dict = sampling_profiler.after_call()
+            if stats_dict is not None:
+                send_somewhere(stats_dict)
+
+    '''
+
+    def __init__(self, window_size=50, period=4):
+
+        assert window_size >= 1 and period >= 1
+
+        self.window_size = window_size
+        '''The number of consecutive calls that are profiled in a window.'''
+
+        self.period = period
+        '''Only one window out of `period` windows is profiled.'''
+
+        self.call_counter = 0
+        '''Position of the current call within the period.'''
+
+        self.profile = None
+        '''The `Profile` object for the current window, if there's one.'''
+
+
+    def before_call(self):
+        '''Start profiling, if we're in a profiled window. Call before op.'''
+        if self.call_counter < self.window_size:
+            if self.profile is None:
+                self.profile = base_profile.Profile()
+            self.profile.enable()
+
+
+    def after_call(self):
+        '''
+        Stop profiling, if we're in a profiled window. Call after the op.
+
+        Returns a raw stats `dict` if a window was just completed, otherwise
+        returns `None`.
+        '''
+        result = None
+        if self.call_counter < self.window_size:
+            self.profile.disable()
+            if self.call_counter == self.window_size - 1:
+                result = self.flush()
+        self.call_counter += 1
+        if self.call_counter >= self.window_size * self.period:
+            self.call_counter = 0
+        return result
+
+
+    def flush(self):
+        '''
+        Get the raw stats `dict` of the current window and start a new one.
+
+        Returns `None` if nothing was profiled in the current window.
+        '''
+        profile = self.profile
+        if profile is None:
+            return None
+        self.profile = None
+        profile.create_stats()
+        return profile.stats or None
+
+
+class _RawStats(object):
+    '''Wrapper for a raw stats `dict` that `pstats.Stats` can load.'''
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def make_stats(*stats_dicts):
+    '''
+    Merge raw stats `dict`s into a single `pstats.Stats` object.
+
+    The raw stats `dict`s are the ones handed out by `SamplingProfiler`. You
+    can add more of them to the resulting object using `add_stats`.
+    '''
+    assert stats_dicts
+    stats = pstats.Stats(_RawStats(dict(stats_dicts[0])))
+    add_stats(stats, *stats_dicts[1:])
+    return stats
+
+
+def add_stats(stats, *stats_dicts):
+    '''Add raw stats `dict`s to the `pstats.Stats` object `stats`.'''
+    for stats_dict in stats_dicts:
+        stats.add(_RawStats(stats_dict))
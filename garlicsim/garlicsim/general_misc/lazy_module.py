@@ -0,0 +1,85 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+Defines the `LazyModule` class and the `make_module_lazy` function.
+
+See their documentation for more information.
+'''
+
+import sys
+import imp
+import types
+
+
+__all__ = ['LazyModule', 'make_module_lazy']
+
+
+class LazyModule(types.ModuleType):
+    '''
+    A package that imports its subpackages on first attribute access.
+
+    Accessing `package.submodule` imports `submodule` if it wasn't imported
+    yet. In addition, `lazy_attributes` maps names of attributes to the names of
+    modules that define them; the first time such an attribute is accessed, its
+    module is imported and the attribute is copied from it.
+
+    Usually you'd use `make_module_lazy` rather than creating it directly.
+    '''
+
+    def __init__(self, name, lazy_attributes=None, doc=None):
+        types.ModuleType.__init__(self, name, doc)
+        self._lazy_attributes = lazy_attributes or {}
+
+
+    def __getattr__(self, name):
+        # This is called only for attributes that are missing from our
+        # `__dict__`. After we get an attribute we put it in our `__dict__`, so
+        # later accesses won't reach here.
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        module_name = self._lazy_attributes.get(name)
+        if module_name is not None:
+            __import__(module_name)
+            value = getattr(sys.modules[module_name], name)
+        else:
+            try:
+                imp.find_module(name, self.__dict__.get('__path__', []))
+            except ImportError:
+                raise AttributeError("'%s' module has no attribute '%s'" %
+                                     (self.__name__, name))
+            submodule_name = '%s.%s' % (self.__name__, name)
+            __import__(submodule_name)
+            value = sys.modules[submodule_name]
+
+        setattr(self, name, value)
+        return value
+
+
+def make_module_lazy(module_name, lazy_attributes=None):
+    '''
+    Replace an imported package with a `LazyModule` with the same contents.
+
+    Call this at the end of the package's `__init__.py`, like this:
+
+        make_module_lazy(__name__, {'Project': 'garlicsim.project'})
+
+    Modules that import the package afterwards will get the `LazyModule`.
+    Since Python 2 modules can't have a `__getattr__`, this is the only way
+    to import things on first attribute access.
+
+    Returns the `LazyModule`.
+    '''
+    module = sys.modules[module_name]
+    lazy_module = LazyModule(module_name, lazy_attributes, module.__doc__)
+    lazy_module.__dict__.update(module.__dict__)
+
+    # The functions defined in the original module use its `__dict__` as their
+    # globals, and Python 2 clears that `__dict__` when the module dies, so we
+    # keep it alive:
+    lazy_module._original_module = module
+
+    sys.modules[module_name] = lazy_module
+    return lazy_module
+
@@ -10,8 +10,6 @@ import copy_reg
 import types
 import __builtin__
 
-from garlicsim.general_misc import import_tools
-
 
 ###############################################################################
 
@@ -37,6 +35,7 @@ copy_reg.pickle(types.MethodType, reduce_method)
 
 def reduce_module(module):
     '''Reducer for modules.'''
+    from garlicsim.general_misc import import_tools
     return (import_tools.normal_import, (module.__name__,))
 
 copy_reg.pickle(types.ModuleType, reduce_module)
@@ -10,4 +10,5 @@ See documentation of `Persistent` and `CrossProcessPersistent` for more info.
 from .persistent import Persistent
 from .cross_process_persistent import CrossProcessPersistent
 from .personality import Personality
-from .copy_modes import DontCopyPersistent
\ No newline at end of file
+from .copy_modes import DontCopyPersistent
+from .channel_pickling import ChannelPickler, ChannelUnpickler
\ No newline at end of file
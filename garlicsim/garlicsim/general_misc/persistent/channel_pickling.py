@@ -0,0 +1,143 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+Defines the `ChannelPickler` and `ChannelUnpickler` classes.
+
+See their documentation for more information.
+'''
+
+import cPickle
+import cStringIO
+
+from .cross_process_persistent import CrossProcessPersistent
+
+
+__all__ = ['ChannelPickler', 'ChannelUnpickler']
+
+
+class ChannelPickler(object):
+    '''
+    Pickler for the sending end of a channel, sending persistents only once.
+
+    A channel is a one-way stream of messages between two processes, like a
+    `multiprocessing.Queue` that is written by one process and read by one
+    other process. Pickle messages with `.dumps`, send the resulting strings
+    over the channel, and unpickle them on the other end with a single
+    `ChannelUnpickler`.
+
+    The first time a `CrossProcessPersistent` object is sent over the channel,
+    it's pickled in full. Every later time, only its uuid is sent, and the
+    `ChannelUnpickler` resolves it to the copy it received the first time.
+    Since `CrossProcessPersistent` objects are read-only, that copy never gets
+    stale.
+
+    The pickler and the unpickler must be used in pairs, and live as long as the
+    channel does: The unpickler keeps every persistent it received alive, so
+    that the pickler could refer to it later. To free that memory, drop both of
+    them and start a new channel.
+    '''
+
+    def __init__(self):
+
+        self.sent_uuids = set()
+        '''The uuids of the persistents already sent in full.'''
+
+        self._newly_sent_uuids = None
+        '''
+        The uuids of the persistents sent in full in the current message.
+
+        These are added to `.sent_uuids` only if the message is pickled
+        successfully, because otherwise it won't be sent.
+        '''
+
+        self._uuids_in_progress = set()
+        '''The uuids of the persistents that we're pickling in full right now.'''
+
+
+    def dumps(self, thing):
+        '''Pickle `thing` into a string to be sent over the channel.'''
+        is_outermost = self._newly_sent_uuids is None
+        if is_outermost:
+            self._newly_sent_uuids = set()
+        try:
+            string_io = cStringIO.StringIO()
+            pickler = cPickle.Pickler(string_io, 2)
+            # `inst_persistent_id` is called only for instances of non-builtin
+            # types, so numbers, strings and containers don't cost us a call:
+            pickler.inst_persistent_id = self._get_persistent_id
+            pickler.dump(thing)
+            if is_outermost:
+                self.sent_uuids.update(self._newly_sent_uuids)
+            return string_io.getvalue()
+        finally:
+            if is_outermost:
+                self._newly_sent_uuids = None
+
+
+    def _get_persistent_id(self, thing):
+        '''
+        Get the persistent ID for `thing`, or `None` to pickle it normally.
+
+        For a persistent that was already sent, that's its uuid. For a new
+        persistent, that's its uuid and a pickle of it.
+        '''
+        if not isinstance(thing, CrossProcessPersistent):
+            return None
+        uuid_bytes = thing._CrossProcessPersistent__uuid.bytes
+        if uuid_bytes in self.sent_uuids or \
+           uuid_bytes in self._newly_sent_uuids:
+            return uuid_bytes
+        elif uuid_bytes in self._uuids_in_progress:
+            # The persistent refers to itself; the inner reference gets pickled
+            # normally.
+            return None
+        self._uuids_in_progress.add(uuid_bytes)
+        try:
+            pickled_thing = self.dumps(thing)
+        finally:
+            self._uuids_in_progress.remove(uuid_bytes)
+        self._newly_sent_uuids.add(uuid_bytes)
+        return (uuid_bytes, pickled_thing)
+
+
+class ChannelUnpickler(object):
+    '''
+    Unpickler for the receiving end of a channel.
+
+    See documentation of `ChannelPickler` for more information.
+    '''
+
+    def __init__(self):
+
+        self.received_persistents = {}
+        '''
+        `dict` mapping uuids to the persistents we received.
+
+        (The uuids are given as bytes.)
+        '''
+
+
+    def loads(self, string):
+        '''Unpickle a string that was received from the channel.'''
+        unpickler = cPickle.Unpickler(cStringIO.StringIO(string))
+        unpickler.persistent_load = self._persistent_load
+        return unpickler.load()
+
+
+    def _persistent_load(self, persistent_id):
+        '''Get the persistent referred to by `persistent_id`.'''
+        if isinstance(persistent_id, tuple):
+            (uuid_bytes, pickled_thing) = persistent_id
+            thing = self.received_persistents[uuid_bytes] = \
+                self.loads(pickled_thing)
+            return thing
+        try:
+            return self.received_persistents[persistent_id]
+        except KeyError:
+            raise cPickle.UnpicklingError(
+                "Got a reference to a persistent that wasn't received on this "
+                "channel. Make sure you're using one `ChannelUnpickler` for "
+                "every `ChannelPickler`."
+            )
+
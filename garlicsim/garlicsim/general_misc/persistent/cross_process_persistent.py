@@ -13,7 +13,6 @@ Note: This module is still experimental.
 todo: need to lock library to avoid thread trouble?
 '''
 
-import uuid
 import weakref
 
 from garlicsim.general_misc import caching
@@ -89,6 +88,9 @@ class CrossProcessPersistent(Persistent):
                 return thing
                 
         else: # The object is being created
+            import uuid
+            # (Imported here because importing `uuid` is slow, and most
+            # programs that import `garlicsim` never create one of these.)
             thing = super(CrossProcessPersistent, cls).__new__(cls)
             new_uuid = uuid.uuid4()
             thing._CrossProcessPersistent__uuid = new_uuid
@@ -143,6 +145,7 @@ class CrossProcessPersistent(Persistent):
             memo[id(self)] = self
             return self
         else:
+            import uuid
             new_copy = copy_tools.deepcopy_as_simple_object(self, memo)
             new_copy._Persistent__uuid = uuid.uuid4()
             try:
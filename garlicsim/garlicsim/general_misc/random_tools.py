@@ -6,10 +6,14 @@
 import random
 
 
-def random_partition(sequence, partition_size, allow_reminder=False):
+def random_partition(sequence, partition_size, allow_reminder=False,
+                     random_=random):
     '''
     Randomly partition `sequence` into partitions of size `partition_size`.
     
+    `random_` is the `random.Random` instance to use; by default it's the
+    `random` module's global one.
+    
     Example:
     
         >>> random_partition([0, 1, 2, 3, 4, 5], 2)
@@ -23,7 +27,7 @@ def random_partition(sequence, partition_size, allow_reminder=False):
                         "reminder of %s left." % \
                         (len(sequence) % partition_size))
     
-    shuffled_sequence = shuffled(sequence)
+    shuffled_sequence = shuffled(sequence, random_)
 
     subsequences = [shuffled_sequence[i::partition_size] for i in
                     xrange(partition_size)]
@@ -31,10 +35,13 @@ def random_partition(sequence, partition_size, allow_reminder=False):
     return zip(*subsequences)
 
 
-def shuffled(sequence):
+def shuffled(sequence, random_=random):
     '''
     Return a list with all the items from `sequence` shuffled.
     
+    `random_` is the `random.Random` instance to use; by default it's the
+    `random` module's global one.
+    
     Example:
     
         >>> random_tools.shuffled([0, 1, 2, 3, 4, 5])
@@ -42,5 +49,5 @@ def shuffled(sequence):
         
     '''
     sequence_copy = sequence[:]
-    random.shuffle(sequence_copy)
+    random_.shuffle(sequence_copy)
     return sequence_copy
\ No newline at end of file
@@ -4,9 +4,11 @@
 '''
 See documentation of class `ReadWriteLock` defined in this module.
 '''
-# todo: organize.
 
-from . import original_read_write_lock
+from __future__ import with_statement
+
+import threading
+import time
 
 
 __all__ = ['ReadWriteLock']
@@ -21,18 +23,48 @@ class ContextManager(object):
     def __exit__(self, *args, **kwargs):
         self.lock.release()
 
-        
-class ReadWriteLock(original_read_write_lock.ReadWriteLock):
+
+class _ThreadState(threading.local):
+    '''The locks that the current thread holds. Thread-local.'''
+
+    read_depth = 0
+    '''How many times the current thread acquired the lock for reading.'''
+
+    write_depth = 0
+    '''
+    How many times the current thread acquired the lock while being a writer.
+    '''
+
+
+class ReadWriteLock(object):
     '''
-    A ReadWriteLock subclassed from a different ReadWriteLock class defined
-    in the module original_read_write_lock.py, (See the documentation of the
-    original class for more details.)
-    
-    This subclass adds two context managers, one for reading and one for
-    writing.
-    
+    A lock that may be held by many readers or by a single writer.
+
+    Multiple threads may simultaneously hold a read lock, while only a single
+    thread may hold a write lock at the same point of time. When a read lock is
+    requested while a write lock is held, the reader is blocked; when a write
+    lock is requested while another write lock is held or there are read locks,
+    the writer is blocked.
+
+    Writers are preferred: If there are writers waiting, threads that already
+    hold a read lock may acquire it again, but new readers block until all
+    the waiting writers got their turn. This means that writers that arrive
+    together are served in one batch, before the readers resume.
+
+    Both kinds of locks are reentrant, and a writer may acquire read locks.
+    A reader may request a write lock, and it will be granted without giving up
+    its read locks first, but only one thread may perform this kind of lock
+    upgrade, as a deadlock would otherwise occur. (A `ValueError` is raised in
+    that case.) After the upgrade the thread holds a full write lock until it
+    releases all of its locks.
+
+    Each thread keeps its own lock depths, so acquiring a lock that the thread
+    already holds doesn't touch any shared state and is very cheap; this is
+    important for read-mostly users which acquire the lock in nested calls.
+    Only the outermost acquire and release take the internal mutex.
+
     Usage:
-    
+
     lock = ReadWriteLock()
     with lock.read:
         pass #perform read operations here
@@ -40,7 +72,190 @@ class ReadWriteLock(original_read_write_lock.ReadWriteLock):
         pass #perform write operations here
     '''
     # todo: rename from acquireRead style to acquire_read style
-    def __init__(self, *args, **kwargs):
-        original_read_write_lock.ReadWriteLock.__init__(self, *args, **kwargs)
+
+    def __init__(self):
+
+        self._mutex = threading.Lock()
+        '''Mutex guarding the shared state of the lock.'''
+
+        self._condition = threading.Condition(self._mutex)
+        '''Condition used to signal waiting threads of a change.'''
+
+        self._thread_state = _ThreadState()
+        '''The lock depths of the current thread.'''
+
+        self._n_readers = 0
+        '''The number of threads that currently hold a read lock.'''
+
+        self._has_writer = False
+        '''Flag saying whether some thread currently holds the write lock.'''
+
+        self._n_pending_writers = 0
+        '''The number of threads waiting to acquire the write lock.'''
+
+        self._has_upgrading_writer = False
+        '''Flag saying whether a reader is waiting to upgrade to a writer.'''
+
+        self._n_waiters = 0
+        '''The number of threads waiting on `._condition`.'''
+
         self.read = ContextManager(self, self.acquireRead)
-        self.write = ContextManager(self, self.acquireWrite)
\ No newline at end of file
+        '''Context manager for holding the lock for reading.'''
+
+        self.write = ContextManager(self, self.acquireWrite)
+        '''Context manager for holding the lock for writing.'''
+
+
+    def acquireRead(self, timeout=None):
+        '''
+        Acquire a read lock for the current thread.
+
+        Waits at most `timeout` seconds, or does a non-blocking check in case
+        `timeout` is <= 0. In case `timeout` is `None`, blocks until the lock
+        request can be serviced. In case the timeout expires before the lock
+        could be serviced, a `RuntimeError` is raised.
+        '''
+        thread_state = self._thread_state
+        if thread_state.write_depth:
+            # If we are the writer, grant a new read lock, always.
+            thread_state.write_depth += 1
+            return
+        if thread_state.read_depth:
+            # We're already a reader, so no writer could've come in.
+            thread_state.read_depth += 1
+            return
+
+        with self._mutex:
+            if self._has_writer or self._n_pending_writers or \
+               self._has_upgrading_writer:
+                self._wait(
+                    lambda: not (self._has_writer or self._n_pending_writers or
+                                 self._has_upgrading_writer),
+                    timeout,
+                    'Acquiring read lock timed out'
+                )
+            self._n_readers += 1
+        thread_state.read_depth = 1
+
+
+    def acquireWrite(self, timeout=None):
+        '''
+        Acquire a write lock for the current thread.
+
+        Waits at most `timeout` seconds, or does a non-blocking check in case
+        `timeout` is <= 0. In case `timeout` is `None`, blocks until the lock
+        request can be serviced. In case the timeout expires before the lock
+        could be serviced, a `RuntimeError` is raised.
+
+        In case the write lock cannot be serviced because another reader is
+        already waiting to upgrade, a `ValueError` is raised.
+        '''
+        thread_state = self._thread_state
+        if thread_state.write_depth:
+            # If we are the writer, grant a new write lock, always.
+            thread_state.write_depth += 1
+            return
+
+        if thread_state.read_depth:
+            # We are a reader; we get the upgrading writer slot.
+            with self._mutex:
+                if self._has_upgrading_writer:
+                    raise ValueError('Inevitable dead lock, denying write '
+                                     'lock')
+                self._has_upgrading_writer = True
+                self._n_readers -= 1
+                try:
+                    self._wait(lambda: not self._n_readers, timeout,
+                               'Acquiring write lock timed out')
+                except RuntimeError:
+                    self._n_readers += 1
+                    self._has_upgrading_writer = False
+                    self._notify()
+                    raise
+                self._has_upgrading_writer = False
+                self._has_writer = True
+            thread_state.write_depth = thread_state.read_depth + 1
+            thread_state.read_depth = 0
+            return
+
+        with self._mutex:
+            self._n_pending_writers += 1
+            try:
+                # The upgrading writer gets precedence, because it presumes it
+                # will get the write lock directly from its read lock.
+                self._wait(
+                    lambda: not (self._n_readers or self._has_writer or
+                                 self._has_upgrading_writer),
+                    timeout,
+                    'Acquiring write lock timed out'
+                )
+            except RuntimeError:
+                self._n_pending_writers -= 1
+                self._notify()
+                raise
+            self._n_pending_writers -= 1
+            self._has_writer = True
+        thread_state.write_depth = 1
+
+
+    def release(self):
+        '''
+        Release the currently held lock.
+
+        In case the current thread holds no lock, a `ValueError` is raised.
+        '''
+        thread_state = self._thread_state
+        if thread_state.write_depth:
+            thread_state.write_depth -= 1
+            if not thread_state.write_depth:
+                with self._mutex:
+                    self._has_writer = False
+                    self._notify()
+        elif thread_state.read_depth:
+            thread_state.read_depth -= 1
+            if not thread_state.read_depth:
+                with self._mutex:
+                    self._n_readers -= 1
+                    if not self._n_readers:
+                        self._notify()
+        else:
+            raise ValueError('Trying to release unheld lock')
+
+
+    def is_held(self):
+        '''Return whether the current thread holds the lock, in any mode.'''
+        thread_state = self._thread_state
+        return bool(thread_state.read_depth or thread_state.write_depth)
+
+
+    def _wait(self, predicate, timeout, timeout_message):
+        '''
+        Wait on the condition until `predicate()` is true.
+
+        Must be called with `._mutex` held. Raises `RuntimeError` with
+        `timeout_message` if `timeout` expired.
+        '''
+        if timeout is not None:
+            end_time = time.time() + timeout
+        self._n_waiters += 1
+        try:
+            while not predicate():
+                if timeout is not None:
+                    remaining = end_time - time.time()
+                    if remaining <= 0:
+                        raise RuntimeError(timeout_message)
+                    self._condition.wait(remaining)
+                else:
+                    self._condition.wait()
+        finally:
+            self._n_waiters -= 1
+
+
+    def _notify(self):
+        '''
+        Wake up all waiting threads, if there are any.
+
+        Must be called with `._mutex` held.
+        '''
+        if self._n_waiters:
+            self._condition.notifyAll()
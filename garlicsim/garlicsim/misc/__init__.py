@@ -11,9 +11,11 @@ These objects are important enough to be defined near the root of the
 
 from . import state_deepcopy
 from .exceptions import (InvalidSimpack, SimpackError, GarlicSimWarning,
-                         GarlicSimException, WorldEnded)
+                         GarlicSimException, WorldEnded, HistoryLookbackError)
 from .auto_clock_generator import AutoClockGenerator
+from .random_stream import RandomStream
 from .base_history_browser import BaseHistoryBrowser
+from .history_window import HistoryWindow
 from .base_step_iterator import BaseStepIterator
 from . import step_iterators
 from .step_profile import StepProfile
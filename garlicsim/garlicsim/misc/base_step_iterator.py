@@ -11,6 +11,7 @@ import copy
 
 from garlicsim.general_misc.third_party import abc
 from garlicsim.general_misc.third_party.abcs_collection import Iterator
+from garlicsim.general_misc import cute_iter_tools
 
 import garlicsim
 
@@ -39,4 +40,19 @@ class BaseStepIterator(Iterator, object):
     @abc.abstractmethod
     def next(self):
         '''Crunch the next state.'''
-        
\ No newline at end of file
+
+
+    def next_many(self, n):
+        '''
+        Crunch `n` states ahead, returning only the last one.
+        
+        Step iterators whose step function has a multi-step variant override
+        this to use it, which saves creating the states in between.
+        
+        If the simulation ends before `n` steps, `WorldEnded` is raised, and the
+        last state is left as `.current_state`.
+        '''
+        assert n >= 1
+        for state in cute_iter_tools.shorten(self, n):
+            pass
+        return state
@@ -21,6 +21,9 @@ class SimpackError(GarlicSimException):
     
 class WorldEnded(GarlicSimException):
     '''The simulation has ended.'''
+    
+class HistoryLookbackError(SimpackError):
+    '''A step function looked further back in history than it declared.'''
 
     
 del CuteException
\ No newline at end of file
@@ -0,0 +1,101 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `HistoryWindow` class.
+
+See its documentation for more info.
+'''
+
+import collections
+
+
+__all__ = ['HistoryWindow']
+
+
+class HistoryWindow(object):
+    '''
+    A sliding window over the last states of a timeline.
+
+    States are added to the window's end with `.append`, and old states are
+    dropped from its start, so it keeps only the states within
+    `max_lookback_clock` clock time or `max_lookback_steps` steps of the last
+    state. Both adding and dropping a state are O(1).
+
+    The window also keeps the newest state which is just beyond the lookback,
+    so a search for a clock reading exactly `max_lookback_clock` before the last
+    state will find a state on either side of it.
+
+    If both `max_lookback_clock` and `max_lookback_steps` are `None`, no state
+    is ever dropped.
+    '''
+
+    def __init__(self, max_lookback_clock=None, max_lookback_steps=None):
+
+        self.max_lookback_clock = max_lookback_clock
+        '''
+        How much clock time before the last state we need to keep states for.
+
+        May be `None`, in which case we don't drop states by clock.
+        '''
+
+        self.max_lookback_steps = max_lookback_steps
+        '''
+        How many states before the last one we need to keep.
+
+        May be `None`, in which case we don't drop states by steps.
+        '''
+
+        self.states = collections.deque()
+        '''The states in the window, oldest first.'''
+
+        self.n_dropped_states = 0
+        '''The number of states that were dropped from the window's start.'''
+
+
+    def append(self, state):
+        '''Add a state to the end of the window, dropping old states.'''
+        states = self.states
+        states.append(state)
+
+        max_lookback_clock = self.max_lookback_clock
+        max_lookback_steps = self.max_lookback_steps
+        if max_lookback_clock is None and max_lookback_steps is None:
+            return
+
+        # If only one of the lookbacks was specified, the other one shouldn't
+        # keep any states:
+        if max_lookback_steps is None:
+            max_lookback_steps = 0
+        if max_lookback_clock is None:
+            oldest_clock_to_keep = state.clock
+        else:
+            oldest_clock_to_keep = state.clock - max_lookback_clock
+
+        while len(states) > max_lookback_steps + 1 and \
+              states[1].clock <= oldest_clock_to_keep:
+            states.popleft()
+            self.n_dropped_states += 1
+
+
+    def __len__(self):
+        '''Get the number of states currently in the window.'''
+        return len(self.states)
+
+
+    def __getitem__(self, index):
+        '''Get a state by its position in the window.'''
+        return self.states[index]
+
+
+    def __iter__(self):
+        return iter(self.states)
+
+
+    def __repr__(self):
+        return '<%s.%s with %s states, %s dropped>' % (
+            type(self).__module__,
+            type(self).__name__,
+            len(self.states),
+            self.n_dropped_states
+        )
@@ -0,0 +1,245 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `RandomStream` class.
+
+See its documentation for more info.
+'''
+
+import array
+import hashlib
+import math
+import os
+import random
+import struct
+
+
+__all__ = ['RandomStream']
+
+
+_block_struct = struct.Struct('!8Q')
+
+_index_struct = struct.Struct('!Q')
+
+_block_size = 8
+'''The number of draws that we make from every hash.'''
+
+_float_factor = 2.0 ** -53
+
+_Random = random.Random
+
+
+class RandomStream(object):
+    '''
+    A counter-based random generator that travels with the simulation state.
+
+    The `random` module has one global generator, so a simulation that uses it
+    produces different states when crunched in a different process, and its
+    states can't be recomputed from their parents. A `RandomStream` is a pure
+    function of its `.key` and its `.counter`: Draw number `n` is made from a
+    hash of the key and `n`, and the stream keeps nothing else. Put a stream
+    on your state, draw from it in your step function, and it'll be copied,
+    pickled and sent to crunchers along with the state, producing the same
+    draws in every cruncher type.
+
+    `RandomStream` has the methods of `random.Random`, like `choice`,
+    `shuffle` and `expovariate`, but not its Mersenne Twister state, which
+    would be copied with every state. In addition, `uniforms` and
+    `exponentials` make many draws in one call, returning an `array` of floats,
+    for step functions that handle a whole step's randomness at once.
+
+    A step function that makes a new state should give it
+    `old_state.random_stream.get_child()`, which is keyed by the lineage of
+    the state: The root's seed and the number of steps from it. A step
+    function that modifies a state in place may simply keep drawing from the
+    state's stream.
+    '''
+
+    __slots__ = ('key', 'counter', 'gauss_next', '_block_index', '_block')
+
+    def __init__(self, seed=None):
+        '''
+        Construct the stream.
+
+        `seed` may be any object with a stable `repr`, like a number or a
+        string. If it's `None`, a random seed is used.
+        '''
+        self.seed(seed)
+
+
+    def seed(self, seed=None):
+        '''Start the stream again from `seed`.'''
+        if seed is None:
+            seed = os.urandom(20)
+        self._set_key(hashlib.sha1(repr(seed)).digest())
+
+
+    def _set_key(self, key, counter=0):
+        '''Set the key and counter of the stream.'''
+
+        self.key = key
+        '''The key from which the draws are made, a string of bytes.'''
+
+        self.counter = counter
+        '''The index of the next draw.'''
+
+        self.gauss_next = None
+
+        self._block_index = None
+        self._block = None
+
+
+    def get_child(self, *labels):
+        '''
+        Get a new stream keyed by this stream's key and `labels`.
+
+        Use this to give a new stream to a child state. The child stream
+        doesn't depend on the draws made from this stream. Give different
+        `labels` to get different streams for different children.
+        '''
+        child = RandomStream.__new__(RandomStream)
+        child._set_key(hashlib.sha1(repr((self.key, labels))).digest())
+        return child
+
+
+    def _get_block(self, block_index):
+        '''Get the 64-bit words for the draws in block number `block_index`.'''
+        return _block_struct.unpack(
+            hashlib.sha512(self.key +
+                           _index_struct.pack(block_index)).digest()
+        )
+
+
+    def _get_word(self):
+        '''Make one draw, getting a 64-bit word.'''
+        (block_index, offset) = divmod(self.counter, _block_size)
+        if block_index != self._block_index:
+            self._block = self._get_block(block_index)
+            self._block_index = block_index
+        self.counter += 1
+        return self._block[offset]
+
+
+    def random(self):
+        '''Get the next random float in the range [0.0, 1.0).'''
+        return (self._get_word() >> 11) * _float_factor
+
+
+    def getrandbits(self, k):
+        '''Get a long int with `k` random bits.'''
+        if k <= 0:
+            raise ValueError('Number of bits must be greater than zero')
+        n_words = (k + 63) // 64
+        result = 0L
+        for i in xrange(n_words):
+            result = (result << 64) | self._get_word()
+        return result >> (n_words * 64 - k)
+
+
+    # These methods of `random.Random` need nothing but `random`,
+    # `getrandbits` and `gauss_next`:
+    _randbelow = _Random._randbelow.im_func
+    randrange = _Random.randrange.im_func
+    randint = _Random.randint.im_func
+    choice = _Random.choice.im_func
+    sample = _Random.sample.im_func
+    uniform = _Random.uniform.im_func
+    expovariate = _Random.expovariate.im_func
+    normalvariate = _Random.normalvariate.im_func
+    lognormvariate = _Random.lognormvariate.im_func
+    gauss = _Random.gauss.im_func
+    gammavariate = _Random.gammavariate.im_func
+    betavariate = _Random.betavariate.im_func
+    paretovariate = _Random.paretovariate.im_func
+    weibullvariate = _Random.weibullvariate.im_func
+    vonmisesvariate = _Random.vonmisesvariate.im_func
+
+
+    def uniforms(self, n):
+        '''
+        Get an `array` of the next `n` random floats in the range [0.0, 1.0).
+
+        These are the same floats that `n` calls to `random` would return.
+        '''
+        counter = self.counter
+        (first_block_index, first_offset) = divmod(counter, _block_size)
+        last_block_index = (counter + n - 1) // _block_size
+        words = []
+        for block_index in xrange(first_block_index, last_block_index + 1):
+            if block_index == self._block_index:
+                words.extend(self._block)
+            else:
+                words.extend(self._get_block(block_index))
+        words = words[first_offset:first_offset + n]
+        self.counter = counter + n
+        return array.array('d', [(word >> 11) * _float_factor for word in
+                                 words])
+
+
+    def exponentials(self, n, mean=1.0):
+        '''
+        Get an `array` of `n` random floats from an exponential distribution.
+
+        `mean` is the mean of the distribution, i.e. one over the rate
+        parameter of `expovariate`.
+        '''
+        log = math.log
+        return array.array('d', [-mean * log(1.0 - uniform) for uniform in
+                                 self.uniforms(n)])
+
+
+    def shuffle(self, x, random=None, int=int):
+        '''
+        Shuffle the list `x` in place.
+
+        This draws all the randomness that it needs in one call to `uniforms`,
+        and shuffles just like `random.Random.shuffle`.
+        '''
+        if random is not None:
+            return _Random.shuffle.im_func(self, x, random)
+        uniforms = self.uniforms(max(len(x) - 1, 0))
+        for (i, uniform) in zip(reversed(xrange(1, len(x))), uniforms):
+            j = int(uniform * (i + 1))
+            x[i], x[j] = x[j], x[i]
+
+
+    def jumpahead(self, n):
+        '''Skip the next `n` draws.'''
+        self.counter += n
+
+
+    def getstate(self):
+        '''Get the state of the stream, for `setstate`.'''
+        return (self.key, self.counter, self.gauss_next)
+
+
+    def setstate(self, state):
+        '''Restore the state of the stream from `getstate`.'''
+        (key, counter, gauss_next) = state
+        self._set_key(key, counter)
+        self.gauss_next = gauss_next
+
+
+    # Copies and unpickled streams are restored straight from `getstate`,
+    # without seeding:
+    __getstate__ = getstate
+    __setstate__ = setstate
+
+
+    def __eq__(self, other):
+        return isinstance(other, RandomStream) and \
+               self.getstate() == other.getstate()
+
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+
+    def __repr__(self):
+        return '<%s.%s with key %s at draw %s>' % (
+            type(self).__module__,
+            type(self).__name__,
+            self.key.encode('hex')[:8],
+            self.counter
+        )
@@ -47,13 +47,37 @@ class Settings(object):
         profile is deterministic.
         '''
 
+        self.MAX_LOOKBACK_CLOCK = None
+        '''
+        How far back in clock time the history step function may look.
+        
+        If a history-dependent simpack says that its step function never asks
+        for states older than this much clock time before the last state, then
+        synchronous simulations keep only the states in that window instead of
+        the whole timeline, and `ThreadCruncher` serves history requests from
+        such a window without looking at the tree.
+        
+        `None` means the step function may look at any point in history.
+        '''
+        
+        self.MAX_LOOKBACK_STEPS = None
+        '''
+        How many states back the history step function may look.
+        
+        Like `MAX_LOOKBACK_CLOCK`, except it's measured in states rather than
+        clock time. If you specify both, states are kept if either of them
+        needs them.
+        '''
+
         self.SCALAR_STATE_FUNCTIONS = []
         '''
         List of scalar state functions given by the simpack.
         
         A scalar state function is a function from a state to a real number.
         It's recommended to decorate these with
-        `garlicsim.general_misc.caching.cache`
+        `garlicsim.general_misc.caching.cache`. Use
+        `Project.enable_scalar_columns` to have their values kept in columns
+        for all nodes.
         '''
         
         self.SCALAR_HISTORY_FUNCTIONS = []
@@ -63,4 +87,18 @@ class Settings(object):
         A scalar history function is a function from a history browser to a
         real number. These should be decorated by
         `garlicsim.misc.cached.history_cache`.
+        '''
+        
+        self.STATE_FINGERPRINT_FUNCTION = None
+        '''
+        Function that makes a fingerprint of a state, for state interning.
+        
+        The function takes a state and returns a hashable object, (usually a
+        string,) that's equal for states that are identical, and different for
+        states that aren't. `Project.enable_state_interning` uses it to find
+        identical states that can share a single object. The function may
+        ignore the `.clock` of the state; only states with the same clock are
+        shared.
+        
+        `None` means a structural hash of the state's attributes is used.
         '''
\ No newline at end of file
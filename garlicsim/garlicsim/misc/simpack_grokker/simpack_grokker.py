@@ -22,7 +22,7 @@ from garlicsim.misc import step_iterators as step_iterators_module
 from . import misc
 
 from .settings import Settings
-from .step_type import StepType
+from .step_type import StepType, MULTI_STEP_SUFFIX
 from . import step_types
 
 
@@ -133,6 +133,32 @@ class SimpackGrokker(object):
         The default step function. Will be used if we don't specify another.
         '''
         
+        self.multi_step_functions = {}
+        '''
+        dict mapping step functions to their multi-step variants, if they have.
+        
+        The step iterators that we make get their multi-step functions from
+        here. See `MULTI_STEP_SUFFIX`.
+        '''
+        
+        for (name, method) in state_methods.iteritems():
+            if not name.endswith(MULTI_STEP_SUFFIX):
+                continue
+            step_function = \
+                state_methods.get(name[:-len(MULTI_STEP_SUFFIX)])
+            step_type = StepType.get_step_type(step_function)
+            if step_type is None:
+                continue
+            if not step_type.supports_multi_step:
+                raise InvalidSimpack("The `%s` simpack defines `%s`, but "
+                                     "multi-step variants are supported only "
+                                     "for simple and inplace step functions, "
+                                     "and `%s` is a %s." % \
+                                     (simpack.__name__.rsplit('.')[-1], name,
+                                      step_function.__name__,
+                                      step_type.verbose_name))
+            self.multi_step_functions[step_function] = method
+        
         
     def __init_analysis_settings(self):
         '''Analyze the simpack to produce a Settings object.'''
@@ -351,8 +377,16 @@ class SimpackGrokker(object):
         step_function = step_profile.step_function
         step_type = StepType.get_step_type(step_function)
         
-        return step_type.step_iterator_class(state_or_history_browser,
-                                             step_profile)
+        if step_type.supports_multi_step:
+            return step_type.step_iterator_class(
+                state_or_history_browser,
+                step_profile,
+                multi_step_function=\
+                    self.multi_step_functions.get(step_function)
+            )
+        else:
+            return step_type.step_iterator_class(state_or_history_browser,
+                                                 step_profile)
         
     
     def get_inplace_step_iterator(self, state, step_profile):
@@ -376,10 +410,15 @@ class SimpackGrokker(object):
                             "inplace step function, it's a %s." % 
                             step_type.verbose_name)
         
-        return step_type.inplace_step_iterator_class(
-            state,
-            step_profile
-        )
+        if step_type.supports_multi_step:
+            return step_type.inplace_step_iterator_class(
+                state,
+                step_profile,
+                multi_step_function=\
+                    self.multi_step_functions.get(step_function)
+            )
+        else:
+            return step_type.inplace_step_iterator_class(state, step_profile)
     
     
     def is_inplace_iterator_available(self, step_profile):
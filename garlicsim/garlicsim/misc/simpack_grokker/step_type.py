@@ -17,6 +17,28 @@ from garlicsim.general_misc import logic_tools
 from garlicsim.general_misc import caching
 
 
+MULTI_STEP_SUFFIX = '_many'
+'''
+Suffix that identifies the multi-step variant of a step function.
+
+A step function may be accompanied by a function with the same name plus this
+suffix, (for example, `inplace_step` may be accompanied by
+`inplace_step_many`,) which takes the state, a number of steps `n`, and then
+the same arguments as the step function. It does `n` steps at once, which can
+be much faster than calling the step function `n` times.
+
+A multi-step variant of a simple step function returns the state `n` steps
+later. If the simulation ends before that, it should raise `WorldEnded`. A
+multi-step variant of an inplace step function modifies the state in place; if
+the simulation ends before `n` steps, it should leave the state as the last
+state before the end and raise `WorldEnded`.
+
+Only step types with `.supports_multi_step` set may have multi-step variants.
+The simpack grokker finds them, in `SimpackGrokker.multi_step_functions`, and
+gives them to the step iterators.
+'''
+
+
 class StepType(abc.ABCMeta):
     '''
     A type of step function.
@@ -86,6 +108,11 @@ class StepType(abc.ABCMeta):
         if not callable(thing) or not hasattr(thing, '__name__'):
             return None
         
+        if thing.__name__.endswith(MULTI_STEP_SUFFIX):
+            # This is a multi-step variant of a step function, not a step
+            # function itself.
+            return None
+        
         step_types = BaseStep.__subclasses__()
         
         all_name_identifiers = [cls_.name_identifier for cls_ in step_types]        
@@ -141,4 +168,13 @@ class BaseStep(object):
     step_iterator_class = abc.abstractproperty()
     '''The step iterator class used for steps of this step type.'''    
     
+    
+    supports_multi_step = False
+    '''
+    Flag saying whether step functions of this type may have a multi-step
+    variant.
+    
+    See `MULTI_STEP_SUFFIX`.
+    '''
+    
     
\ No newline at end of file
@@ -17,6 +17,7 @@ class SimpleStep(BaseStep):
     step_iterator_class = step_iterators.StepIterator
     name_identifier = 'step'
     verbose_name = 'simple step function'
+    supports_multi_step = True
 
 
 class StepGenerator(BaseStep):
@@ -75,6 +76,7 @@ class InplaceStep(BaseStep):
     inplace_step_iterator_class = step_iterators.InplaceStepIterator
     name_identifier = 'inplace_step'
     verbose_name = 'inplace step function'
+    supports_multi_step = True
     
     
 class InplaceStepGenerator(BaseStep):
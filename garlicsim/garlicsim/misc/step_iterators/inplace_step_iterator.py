@@ -9,6 +9,8 @@ See its documentation for more information.
 
 import copy
 
+from garlicsim.general_misc.infinity import infinity
+
 import garlicsim
 from garlicsim.misc import BaseStepIterator, SimpackError, AutoClockGenerator
 
@@ -28,7 +30,7 @@ class InplaceStepIterator(BaseStepIterator):
     original step function doesn't change the `.clock` itself.
     '''
     
-    def __init__(self, state, step_profile):
+    def __init__(self, state, step_profile, multi_step_function=None):
         
         self.current_state = state
         '''
@@ -41,6 +43,13 @@ class InplaceStepIterator(BaseStepIterator):
         self.step_function = step_profile.step_function
         '''The step function that will perform step for us.'''
         
+        self.multi_step_function = multi_step_function
+        '''
+        The multi-step variant of the step function, if there is one.
+        
+        The simpack grokker gives it to us from its `.multi_step_functions`.
+        '''
+        
         self.step_profile = step_profile
         '''
         The step profile which contains the arguments given to step function.
@@ -69,4 +78,37 @@ class InplaceStepIterator(BaseStepIterator):
         If the step function didn't advance the state's clock, advance it by 1.
         '''
         state.clock = self.auto_clock_generator.make_clock(state)
+    
+    
+    def next_many(self, n):
+        '''
+        Crunch `n` states ahead, returning only the last one.
+        
+        If the step function has a multi-step variant, it's used to do all the
+        steps in one call.
         
+        If the simulation ends before `n` steps, `WorldEnded` is raised, and the
+        last state is left as `.current_state`.
+        '''
+        if self.multi_step_function is None or n == infinity:
+            return BaseStepIterator.next_many(self, n)
+        self._multi_step(self.current_state, n)
+        return self.current_state
+        
+        
+    def _multi_step(self, state, n):
+        '''
+        Do `n` steps on `state` in place using the multi-step function.
+        
+        If the multi-step function didn't advance the state's clock, advance it
+        by `n`.
+        '''
+        last_state_clock = self.auto_clock_generator.last_state_clock
+        return_value = self.multi_step_function(state, n,
+                                                *self.step_profile.args,
+                                                **self.step_profile.kwargs)
+        assert return_value is None
+        if getattr(state, 'clock', last_state_clock) == last_state_clock:
+            state.clock = last_state_clock + n
+        self.auto_clock_generator.last_state_clock = state.clock
+
@@ -7,6 +7,8 @@ This module defines the `StepIterator` class.
 See its documentation for more information.
 '''
 
+from garlicsim.general_misc.infinity import infinity
+
 import garlicsim
 from garlicsim.misc import BaseStepIterator, SimpackError, AutoClockGenerator
 
@@ -19,7 +21,7 @@ class StepIterator(BaseStepIterator):
     produced by the step function are missing them.
     '''
     
-    def __init__(self, state, step_profile):
+    def __init__(self, state, step_profile, multi_step_function=None):
         
         self.current_state = state
         '''
@@ -29,6 +31,13 @@ class StepIterator(BaseStepIterator):
         self.step_function = step_profile.step_function
         '''The step function that will produce states for us.'''
         
+        self.multi_step_function = multi_step_function
+        '''
+        The multi-step variant of the step function, if there is one.
+        
+        The simpack grokker gives it to us from its `.multi_step_functions`.
+        '''
+        
         self.step_profile = step_profile
         '''
         The step profile which contains the arguments given to step function.
@@ -47,6 +56,33 @@ class StepIterator(BaseStepIterator):
                                                 **self.step_profile.kwargs)
         self._auto_clock(self.current_state)
         return self.current_state
+    
+    
+    def next_many(self, n):
+        '''
+        Crunch `n` states ahead, returning only the last one.
+        
+        If the step function has a multi-step variant, it's used to skip the
+        states in between.
+        
+        If the simulation ends before `n` steps, `WorldEnded` is raised, and the
+        last state is left as `.current_state`.
+        '''
+        if self.multi_step_function is None or n == infinity:
+            return BaseStepIterator.next_many(self, n)
+        try:
+            new_state = self.multi_step_function(self.current_state, n,
+                                                 *self.step_profile.args,
+                                                 **self.step_profile.kwargs)
+        except garlicsim.misc.WorldEnded:
+            # We don't know how many steps were done before the end, so we go
+            # step by step:
+            return BaseStepIterator.next_many(self, n)
+        if not hasattr(new_state, 'clock'):
+            new_state.clock = self.auto_clock_generator.last_state_clock + n
+        self.auto_clock_generator.last_state_clock = new_state.clock
+        self.current_state = new_state
+        return new_state
                 
         
     def _auto_clock(self, state):
@@ -14,6 +14,7 @@ from garlicsim.general_misc import cute_iter_tools
 import garlicsim
 import garlicsim.misc
 from . import history_browser as history_browser_module # Avoiding name clash
+from .window_history_browser import WindowHistoryBrowser
 
 
 __all__ = ['iter_simulate']
@@ -31,7 +32,22 @@ def iter_simulate(state, iterations, *args, **kwargs):
     parameters and/or a specific step function to use. (You may specify a step
     function either as the first positional argument or the `step_function`
     keyword argument.) You may also pass in an existing step profile.
+    
+    Two keyword arguments are not passed to the step function:
+    
+    `stride` makes the generator yield only every `stride`-th state, i.e. the
+    states that are a multiple of `stride` steps away from the initial state.
+    With a non-history-dependent simpack, the states in between are not even
+    kept, and may be skipped by a multi-step function.
+    
+    `until` stops the simulation early. It may be either a clock reading, in
+    which case the simulation stops at the first yielded state whose clock
+    reached it, or a predicate that takes a state, in which case the simulation
+    stops at the first yielded state for which it returned `True`. You may pass
+    `iterations=infinity` if you want to rely only on `until`.
     '''
+    (stride, stop_condition) = _pop_recording_arguments(kwargs)
+    
     simpack_grokker = garlicsim.misc.SimpackGrokker.create_from_state(state)
     
     parse_arguments_to_step_profile = garlicsim.misc.StepProfile.build_parser(
@@ -46,40 +62,83 @@ def iter_simulate(state, iterations, *args, **kwargs):
                       
     if simpack_grokker.history_dependent:
         return _history_iter_simulate(simpack_grokker, state, iterations,
-                                      step_profile)
+                                      step_profile, stride, stop_condition)
     else: # It's a non-history-dependent simpack
         return _non_history_iter_simulate(simpack_grokker, state, iterations,
-                                          step_profile)
+                                          step_profile, stride, stop_condition)
 
+
+def _pop_recording_arguments(kwargs):
+    '''
+    Pop the `stride` and `until` arguments from `kwargs`.
     
-def _history_iter_simulate(simpack_grokker, state, iterations, step_profile):
+    Returns a tuple `(stride, stop_condition)`, where `stop_condition` is a
+    function that takes a state and says whether to stop the simulation.
+    '''
+    stride = kwargs.pop('stride', 1)
+    if not isinstance(stride, (int, long)) or stride < 1:
+        raise Exception('`stride` must be a positive integer, but you gave '
+                        '%s.' % (stride,))
+    
+    until = kwargs.pop('until', None)
+    if until is None:
+        stop_condition = lambda state: False
+    elif callable(until):
+        stop_condition = until
+    else:
+        stop_condition = lambda state: state.clock >= until
+        
+    return (stride, stop_condition)
+
+    
+def _history_iter_simulate(simpack_grokker, state, iterations, step_profile,
+                           stride=1, stop_condition=None):
     '''
     Simulate from the given state for the given number of iterations.
     
     (Internal function for history-dependent simulations only.)
 
     This returns a generator that yields all the states one-by-one, from the
-    initial state to the final one.
+    initial state to the final one. (Or every `stride`-th state, until
+    `stop_condition` returns `True`.)
+    
+    If the simpack declared a maximum lookback, only the recent states are
+    kept in a `WindowHistoryBrowser`. Otherwise all of them are kept in a tree.
     '''
     
-    tree = garlicsim.data_structures.Tree()
-    root = tree.add_state(state, parent=None)
-    path = root.make_containing_path()
-    history_browser = history_browser_module.HistoryBrowser(path)
+    window_history_browser = \
+        WindowHistoryBrowser.create_from_simpack_grokker(simpack_grokker, state)
+    if window_history_browser is not None:
+        history_browser = window_history_browser
+    else:
+        tree = garlicsim.data_structures.Tree()
+        current_node = root = tree.add_state(state, parent=None)
+        path = root.make_containing_path()
+        history_browser = history_browser_module.HistoryBrowser(path)
     
     iterator = simpack_grokker.get_step_iterator(history_browser, step_profile)
     finite_iterator = cute_iter_tools.shorten(iterator, iterations)
     
-    current_node = root
-    current_state = current_node.state
+    current_state = state
     
     yield current_state
+    if stop_condition and stop_condition(current_state):
+        raise StopIteration
     
     world_ended = False
     try:
-        for current_state in finite_iterator:
-            yield current_state
-            current_node = tree.add_state(current_state, parent=current_node)
+        for i, current_state in enumerate(finite_iterator):
+            if window_history_browser is not None:
+                window_history_browser.record_state(current_state)
+            else:
+                current_node = tree.add_state(current_state,
+                                              parent=current_node)
+            # The history browser must see every state, but we yield only
+            # every `stride`-th one:
+            if (i + 1) % stride == 0:
+                yield current_state
+                if stop_condition and stop_condition(current_state):
+                    break
     except garlicsim.misc.WorldEnded:
         world_ended = True
     
@@ -89,27 +148,60 @@ def _history_iter_simulate(simpack_grokker, state, iterations, step_profile):
     
 
 def _non_history_iter_simulate(simpack_grokker, state, iterations,
-                               step_profile):
+                               step_profile, stride=1, stop_condition=None,
+                               live=False):
     '''
     Simulate from the given state for the given number of iterations.
     
     (Internal function for non-history-dependent simulations only.)
 
     This returns a generator that yields all the states one-by-one, from the
-    initial state to the final one.
+    initial state to the final one. (Or every `stride`-th state, until
+    `stop_condition` returns `True`.)
+    
+    No tree is built; the states are taken directly from a step iterator. If
+    `live=True` and the step function is inplace, a single state is changed in
+    place and yielded over and over, which is good if you only want to read
+    some attributes from each state.
     '''
     
-    iterator = simpack_grokker.get_step_iterator(state, step_profile)
-    finite_iterator = cute_iter_tools.shorten(iterator, iterations)
+    # If we skip states, or if the caller doesn't keep the states, we can step
+    # in place and save a deepcopy on every step:
+    inplace = (live or stride > 1) and \
+        simpack_grokker.is_inplace_iterator_available(step_profile) is True
+    
+    if inplace:
+        iterator = simpack_grokker.get_inplace_step_iterator(
+            garlicsim.misc.state_deepcopy.state_deepcopy(state),
+            step_profile
+        )
+        copy_state = not live
+    else: # not inplace
+        iterator = simpack_grokker.get_step_iterator(state, step_profile)
+        copy_state = False
     
     current_state = state
     
     yield current_state
+    if stop_condition and stop_condition(current_state):
+        raise StopIteration
+    
+    steps_left = iterations
     
     world_ended = False
     try:
-        for current_state in finite_iterator:
+        while steps_left >= stride:
+            if stride == 1:
+                current_state = iterator.next()
+            else:
+                current_state = iterator.next_many(stride)
+            steps_left -= stride
+            if copy_state:
+                current_state = \
+                    garlicsim.misc.state_deepcopy.state_deepcopy(current_state)
             yield current_state
+            if stop_condition and stop_condition(current_state):
+                break
     except garlicsim.misc.WorldEnded:
         world_ended = True
 
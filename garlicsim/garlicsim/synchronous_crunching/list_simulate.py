@@ -9,11 +9,10 @@ See its documentation for more info.
 
 import copy
 
-from garlicsim.general_misc import cute_iter_tools
-
 import garlicsim
 import garlicsim.misc
-from . import history_browser as history_browser_module # Avoiding name clash
+from .iter_simulate import (_pop_recording_arguments, _history_iter_simulate,
+                           _non_history_iter_simulate)
 
 
 __all__ = ['list_simulate']
@@ -30,7 +29,26 @@ def list_simulate(state, iterations, *args, **kwargs):
     parameters and/or a specific step function to use. (You may specify a step
     function either as the first positional argument or the `step_function`
     keyword argument.) You may also pass in an existing step profile.
+    
+    A few keyword arguments are not passed to the step function:
+    
+    `stride` and `until` work like they do in `iter_simulate`: `stride` keeps
+    only every `stride`-th state, and `until` is a clock reading or a predicate
+    that stops the simulation early.
+    
+    `columns` is a sequence of names of state attributes. If it's given, then
+    instead of a list of states you get a dict mapping each name to a list of
+    that attribute's values, one for each state. The states themselves aren't
+    kept, and with an inplace step function they aren't even copied. (So the
+    attributes should have immutable values, like numbers.) For example:
+    
+        >>> garlicsim.list_simulate(state, 3, columns=['clock', 'x'])
+        {'clock': [0, 1, 2, 3], 'x': [0, 2, 4, 6]}
+        
     '''
+    (stride, stop_condition) = _pop_recording_arguments(kwargs)
+    columns = kwargs.pop('columns', None)
+    
     simpack_grokker = garlicsim.misc.SimpackGrokker.create_from_state(state)
     
     parse_arguments_to_step_profile = garlicsim.misc.StepProfile.build_parser(
@@ -43,76 +61,29 @@ def list_simulate(state, iterations, *args, **kwargs):
         state.clock = 0
                       
     if simpack_grokker.history_dependent:
-        return _history_list_simulate(simpack_grokker, state, iterations,
-                                      step_profile)
+        states = _history_iter_simulate(simpack_grokker, state, iterations,
+                                        step_profile, stride, stop_condition)
     else: # It's a non-history-dependent simpack
-        return _non_history_list_simulate(simpack_grokker, state, iterations,
-                                          step_profile)
-
-    
-def _history_list_simulate(simpack_grokker, state, iterations,
-                           step_profile):
-    '''
-    Simulate from the given state for the given number of iterations.
-
-    (Internal function for history-dependent simulations only.)    
-    
-    Returns a list that spans all the states, from the initial one given to
-    the final one.
-    '''
-    
-    tree = garlicsim.data_structures.Tree()
-    root = tree.add_state(state, parent=None)
-    path = root.make_containing_path()
-    history_browser = history_browser_module.HistoryBrowser(path)
-    
-    iterator = simpack_grokker.get_step_iterator(history_browser, step_profile)
-    finite_iterator = cute_iter_tools.shorten(iterator, iterations)
-    
-    current_node = root
-    current_state = current_node.state
-    
-    world_ended = False
-    try:
-        for current_state in finite_iterator:
-            current_node = tree.add_state(current_state, parent=current_node)
-    except garlicsim.misc.WorldEnded:
-        world_ended = True
-    
-    # Not doing anything with `world_ended` yet
+        states = _non_history_iter_simulate(
+            simpack_grokker, state, iterations, step_profile, stride,
+            stop_condition, live=(columns is not None)
+        )
         
-    return [node.state for node in path]
-
+    if columns is None:
+        return list(states)
+    else:
+        return _collect_columns(states, columns)
 
-def _non_history_list_simulate(simpack_grokker, state, iterations,
-                               step_profile):
-    '''
-    Simulate from the given state for the given number of iterations.
     
-    (Internal function for non-history-dependent simulations only.)
-    
-    Returns a list that spans all the states, from the initial one given to
-    the final one.
+def _collect_columns(states, columns):
     '''
-
-    tree = garlicsim.data_structures.Tree()
-    root = tree.add_state(state, parent=None)
-    path = root.make_containing_path()
-    
-    iterator = simpack_grokker.get_step_iterator(state, step_profile)
-    finite_iterator = cute_iter_tools.shorten(iterator, iterations)
-    
-    current_node = root
-    current_state = current_node.state
+    Collect the given attributes from all the states into lists.
     
-    world_ended = False
-    try:
-        for current_state in finite_iterator:
-            current_node = tree.add_state(current_state, parent=current_node)
-    except garlicsim.misc.WorldEnded:
-        world_ended = True
-
-    # Not doing anything with `world_ended` yet
-    
-    return [node.state for node in path]
-
+    Returns a dict mapping each attribute name to a list of its values.
+    '''
+    columns = tuple(columns)
+    lists = tuple([] for column in columns)
+    for state in states:
+        for column, list_ in zip(columns, lists):
+            list_.append(getattr(state, column))
+    return dict(zip(columns, lists))
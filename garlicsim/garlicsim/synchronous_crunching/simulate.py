@@ -15,6 +15,7 @@ from garlicsim.general_misc import cute_iter_tools
 import garlicsim
 import garlicsim.misc
 from . import history_browser as history_browser_module # Avoiding name clash
+from .window_history_browser import WindowHistoryBrowser
 
 __all__ = ['simulate']
 
@@ -59,6 +60,21 @@ def __history_simulate(simpack_grokker, state, iterations, step_profile):
     
     Returns the final state of the simulation.
     '''
+    
+    window_history_browser = \
+        WindowHistoryBrowser.create_from_simpack_grokker(simpack_grokker, state)
+    if window_history_browser is not None:
+        # The simpack declared how far back it looks, so we can keep just the
+        # recent states instead of the whole timeline.
+        iterator = simpack_grokker.get_step_iterator(window_history_browser,
+                                                     step_profile)
+        current_state = state
+        try:
+            for current_state in cute_iter_tools.shorten(iterator, iterations):
+                window_history_browser.record_state(current_state)
+        except garlicsim.misc.WorldEnded:
+            pass
+        return current_state
             
     tree = garlicsim.data_structures.Tree()
     root = tree.add_state(state, parent=None)
@@ -106,16 +122,14 @@ def __non_history_simulate(simpack_grokker, state, iterations, step_profile):
     else: # Inplace iterator is not available
         iterator = simpack_grokker.get_step_iterator(state, step_profile)
     
-    finite_iterator = cute_iter_tools.shorten(iterator, iterations)
-    current_state = state
+    if not iterations:
+        return state
     
+    # We don't need the states in between, so we let the iterator skip them
+    # if the simpack has a multi-step function:
     try:
-        for current_state in finite_iterator:
-            pass
+        final_state = iterator.next_many(iterations)
     except garlicsim.misc.WorldEnded:
-        pass    
-    
-    final_state = current_state
-    # Which is still here as the last value from the `for` loop.
+        final_state = iterator.current_state
     
     return final_state
\ No newline at end of file
@@ -0,0 +1,111 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `WindowHistoryBrowser` class.
+
+See its documentation for more info.
+'''
+
+import garlicsim.general_misc.binary_search as binary_search
+import garlicsim.misc
+
+
+__all__ = ['WindowHistoryBrowser']
+
+
+class WindowHistoryBrowser(garlicsim.misc.BaseHistoryBrowser):
+    '''
+    A history browser that keeps only the recent part of the timeline.
+
+    This is used for synchronously-crunched simulations of simpacks that
+    declare `MAX_LOOKBACK_CLOCK` or `MAX_LOOKBACK_STEPS` in their settings.
+    Instead of keeping every state in a tree, it keeps a `HistoryWindow` with
+    only the states that the step function may still ask for, so a long
+    simulation takes a constant amount of memory.
+
+    Positions in the timeline are still counted from the first state, but
+    asking for a state that was already dropped from the window raises
+    `HistoryLookbackError`.
+    '''
+
+    def __init__(self, state, max_lookback_clock=None,
+                 max_lookback_steps=None):
+
+        self.window = garlicsim.misc.HistoryWindow(max_lookback_clock,
+                                                   max_lookback_steps)
+        '''The window of recent states that we serve requests from.'''
+
+        self.window.append(state)
+
+
+    @staticmethod
+    def create_from_simpack_grokker(simpack_grokker, state):
+        '''
+        Create a window history browser according to the simpack's settings.
+
+        Returns `None` if the simpack didn't declare a maximum lookback.
+        '''
+        settings = simpack_grokker.settings
+        if settings.MAX_LOOKBACK_CLOCK is None and \
+           settings.MAX_LOOKBACK_STEPS is None:
+            return None
+        return WindowHistoryBrowser(state, settings.MAX_LOOKBACK_CLOCK,
+                                    settings.MAX_LOOKBACK_STEPS)
+
+
+    def record_state(self, state):
+        '''Record a state that was added to the end of the timeline.'''
+        self.window.append(state)
+
+
+    def get_last_state(self):
+        '''Get the last state in the timeline. Identical to __getitem__(-1).'''
+        return self.window.states[-1]
+
+
+    def __getitem__(self, index):
+        '''Get a state by its position in the timeline.'''
+        assert isinstance(index, int)
+        window = self.window
+        if index >= 0:
+            window_index = index - window.n_dropped_states
+            if window_index < 0:
+                raise garlicsim.misc.HistoryLookbackError(
+                    'State number %s was asked for, but it was dropped from '
+                    'the history window.' % index
+                )
+        else: # index < 0
+            window_index = index
+            if -index > len(window) and -index <= len(self):
+                raise garlicsim.misc.HistoryLookbackError(
+                    'State number %s was asked for, but it was dropped from '
+                    'the history window.' % index
+                )
+        return window.states[window_index]
+
+
+    def get_state_by_monotonic_function(self, function, value,
+                                        rounding=binary_search.CLOSEST):
+        '''
+        Get a state by specifying a measure function and a desired value.
+
+        The function must be a monotonic rising function on the timeline.
+
+        See documentation of `binary_search.roundings` for details about
+        rounding options.
+        '''
+        assert issubclass(rounding, binary_search.Rounding)
+        states = self.window.states
+        if self.window.n_dropped_states and function(states[0]) > value:
+            raise garlicsim.misc.HistoryLookbackError(
+                'A state with a value of %s was asked for, but all the states '
+                'before %s were dropped from the history window.' %
+                (value, function(states[0]))
+            )
+        return binary_search.binary_search(states, function, value, rounding)
+
+
+    def __len__(self):
+        '''Get the length of the timeline in nodes.'''
+        return self.window.n_dropped_states + len(self.window)
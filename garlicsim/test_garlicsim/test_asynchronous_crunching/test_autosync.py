@@ -0,0 +1,71 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for autosync and for using jobs as futures.'''
+
+from __future__ import with_statement
+
+import garlicsim
+
+from .simpacks import simpack
+
+
+def test_autosync():
+    '''Test that the autosync thread finishes jobs without our help.'''
+    cruncher_types = garlicsim.Project(simpack).crunching_manager.\
+        get_available_cruncher_types()
+    for cruncher_type in cruncher_types:
+        yield check_autosync, cruncher_type
+        
+        
+def check_autosync(cruncher_type):
+    
+    project = garlicsim.Project(simpack)
+    project.crunching_manager.cruncher_type = cruncher_type
+    root = project.root_this_state(simpack.State.create_root())
+    project.start_autosync()
+    try:
+        assert project.crunching_manager.is_autosyncing()
+        
+        finished_jobs = []
+        job = project.begin_crunching(root, 300)
+        job.add_done_callback(finished_jobs.append)
+        assert job.get_progress() < 1
+        assert job.wait(timeout=60)
+        assert finished_jobs == [job]
+        assert job.get_progress() == 1
+        with project.tree.lock.read:
+            assert job.node.state.clock >= 300
+        
+        (other_job,) = project.ensure_buffer(root, 500)
+        assert other_job.node is job.node
+        assert other_job.wait(timeout=60)
+        
+        # Adding a callback to a finished job calls it right away:
+        other_job.add_done_callback(finished_jobs.append)
+        assert finished_jobs == [job, other_job]
+        
+    finally:
+        project.stop_autosync()
+    assert not project.crunching_manager.is_autosyncing()
+    
+
+def test_wait_without_autosync():
+    '''Test that waiting on a job syncs the crunchers if needed.'''
+    project = garlicsim.Project(simpack)
+    root = project.root_this_state(simpack.State.create_root())
+    job = project.begin_crunching(root, 50)
+    assert not job.finished
+    assert job.wait()
+    assert job.node.state.clock >= 50
+    assert not project.crunching_manager.jobs
+    
+    # A timeout that's too short for finishing the job:
+    job = project.begin_crunching(job.node, 10 ** 9)
+    assert not job.wait(timeout=0.1)
+    assert 0 <= job.get_progress() < 1
+    project.crunching_manager.jobs.remove(job)
+    project.sync_crunchers()
+    # The job was cancelled, so it's finished even though it's not done:
+    assert job.finished
+    assert not job.is_done()
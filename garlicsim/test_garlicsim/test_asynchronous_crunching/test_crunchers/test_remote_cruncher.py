@@ -0,0 +1,324 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for `RemoteCruncher` and its workers.'''
+
+from __future__ import with_statement
+
+import cPickle
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+from garlicsim.general_misc import cute_testing
+from garlicsim.general_misc.temp_value_setters import TempValueSetter
+from garlicsim.general_misc.infinity import infinity
+
+import garlicsim
+from garlicsim.asynchronous_crunching.crunchers import RemoteCruncher
+from garlicsim.asynchronous_crunching.crunchers.remote_cruncher import Worker
+from garlicsim.asynchronous_crunching.crunchers.remote_cruncher.protocol \
+     import Connection, ConnectionLost, AuthenticationError
+
+from ...test_data_structures import deterministic_simpack
+from ..simpacks import history_dependent_simpack
+from ..test_endable.simpacks import simpack as endable_simpack
+
+
+_authkey = 'garlic secret'
+
+
+def _make_worker(simpack):
+    return Worker(_authkey, [simpack.__name__], port=0).start()
+
+
+def _make_project(simpack, workers):
+    project = garlicsim.Project(simpack)
+    project.remote_workers = [worker.address for worker in workers]
+    project.remote_authkey = _authkey
+    project.crunching_manager.cruncher_type = RemoteCruncher
+    return project
+
+
+def test_crunching():
+    '''Test crunching on a worker, and updating the crunching profile.'''
+    worker = _make_worker(deterministic_simpack)
+    try:
+        project = _make_project(deterministic_simpack, [worker])
+        root = project.root_this_state(
+            deterministic_simpack.State.create_root()
+        )
+        job = project.begin_crunching(root, 50)
+        assert job.wait(timeout=30)
+        path = root.make_containing_path()
+        assert [state.x for state in path.states()][:51] == range(51)
+        assert worker.n_sessions == 1
+
+        # A job with a changing clock target:
+        leaf = path[-1]
+        job = project.begin_crunching(leaf, 20, increment=2)
+        project.sync_crunchers()
+        (cruncher,) = project.crunching_manager.crunchers.values()
+        assert cruncher.worker_address == worker.address or \
+               cruncher.worker_address is None
+        job.crunching_profile.raise_clock_target(job.node.state.clock + 100)
+        assert job.wait(timeout=30)
+        assert job.node.state.clock >= leaf.state.clock + 100
+        assert job.node.state.x == \
+               leaf.state.x + 2 * (job.node.state.clock - leaf.state.clock)
+        telemetry = cruncher.collect_telemetry()
+        assert telemetry.pickled_bytes > 0
+        assert telemetry.n_states > 0
+    finally:
+        worker.stop()
+
+
+def test_end():
+    '''Test that a simulation end on the worker makes an end in the tree.'''
+    worker = _make_worker(endable_simpack)
+    try:
+        project = _make_project(endable_simpack, [worker])
+        root = project.root_this_state(
+            endable_simpack.State.create_root()
+        )
+        job = project.begin_crunching(root, infinity)
+        assert job.wait(timeout=30)
+        assert job.resulted_in_end
+        (leaf,) = root.get_all_leaves().keys()
+        assert leaf.ends
+    finally:
+        worker.stop()
+
+
+def test_reconnecting():
+    '''Test that the cruncher moves to another worker when it loses one.'''
+    workers = [_make_worker(deterministic_simpack) for i in range(2)]
+    try:
+        project = _make_project(deterministic_simpack, workers)
+        root = project.root_this_state(
+            deterministic_simpack.State.create_root()
+        )
+        job = project.begin_crunching(root, infinity)
+        project.sync_crunchers()
+        (cruncher,) = project.crunching_manager.crunchers.values()
+        while cruncher.worker_address is None:
+            time.sleep(0.01)
+        (first_worker,) = [worker for worker in workers if
+                           worker.address == cruncher.worker_address]
+        first_worker.stop()
+        while cruncher.n_reconnections == 0:
+            time.sleep(0.01)
+            project.sync_crunchers()
+        while cruncher.worker_address == first_worker.address:
+            time.sleep(0.01)
+
+        job.crunching_profile.clock_target = job.node.state.clock + 300
+        assert job.wait(timeout=30)
+        assert cruncher.n_reconnections == 1
+        path = root.make_containing_path()
+        assert [state.x for state in path.states()] == \
+               range(len(path))
+    finally:
+        for worker in workers:
+            worker.stop()
+
+
+def test_retiring():
+    '''Test that the worker stops crunching when the cruncher retires.'''
+    worker = _make_worker(deterministic_simpack)
+    try:
+        project = _make_project(deterministic_simpack, [worker])
+        root = project.root_this_state(
+            deterministic_simpack.State.create_root()
+        )
+        project.begin_crunching(root, infinity)
+        project.sync_crunchers()
+        (cruncher,) = project.crunching_manager.crunchers.values()
+        del project.crunching_manager.jobs[:]
+        project.sync_crunchers()
+        cruncher.join(30)
+        assert not cruncher.is_alive()
+        for i in range(3000):
+            if not worker.sessions:
+                break
+            time.sleep(0.01)
+        assert not worker.sessions
+    finally:
+        worker.stop()
+
+
+def test_errors():
+    '''Test that a cruncher's fatal error finishes its job with the error.'''
+    worker = Worker(_authkey, [], port=0).start()
+    try:
+        project = _make_project(deterministic_simpack, [worker])
+        root = project.root_this_state(
+            deterministic_simpack.State.create_root()
+        )
+        job = project.begin_crunching(root, 50)
+        assert job.wait(timeout=30)
+        assert "isn't allowed" in job.error
+        assert not job.is_done()
+        assert not project.crunching_manager.jobs
+        assert worker.n_sessions == 1
+    finally:
+        worker.stop()
+        
+    worker = _make_worker(deterministic_simpack)
+    try:
+        project = _make_project(deterministic_simpack, [worker])
+        project.remote_authkey = 'wrong secret'
+        root = project.root_this_state(
+            deterministic_simpack.State.create_root()
+        )
+        job = project.begin_crunching(root, 50)
+        assert job.wait(timeout=30)
+        assert job.error.startswith('AuthenticationError')
+        assert not project.crunching_manager.jobs
+    finally:
+        worker.stop()
+
+
+def test_availability():
+    '''Test when `RemoteCruncher` can be used.'''
+    simpack_grokker = \
+        garlicsim.misc.SimpackGrokker(history_dependent_simpack)
+    assert not RemoteCruncher.can_be_used_with_simpack_grokker(
+        simpack_grokker
+    )
+    assert RemoteCruncher.can_be_used_with_simpack_grokker(
+        garlicsim.misc.SimpackGrokker(deterministic_simpack)
+    )
+    with TempValueSetter((os.environ, 'GARLICSIM_REMOTE_WORKERS'),
+                         'host1:7347, host2'):
+        project = garlicsim.Project(deterministic_simpack)
+    assert project.remote_workers == ['host1:7347', ' host2']
+    crunching_manager = project.crunching_manager
+    project.remote_authkey = _authkey
+    assert RemoteCruncher in crunching_manager.get_available_cruncher_types()
+    project.remote_workers = []
+    assert RemoteCruncher not in \
+           crunching_manager.get_available_cruncher_types()
+    assert not crunching_manager.get_cruncher_types_availability()[
+        RemoteCruncher
+    ]
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    crunching_profile = garlicsim.asynchronous_crunching.CrunchingProfile(
+        10, project.build_step_profile()
+    )
+    with cute_testing.RaiseAssertor(garlicsim.misc.GarlicSimException):
+        RemoteCruncher(project.crunching_manager, root.state,
+                       crunching_profile)
+    project.remote_workers = ['localhost']
+    project.remote_authkey = None
+    assert RemoteCruncher not in \
+           crunching_manager.get_available_cruncher_types()
+    with cute_testing.RaiseAssertor(garlicsim.misc.GarlicSimException):
+        RemoteCruncher(project.crunching_manager, root.state,
+                       crunching_profile)
+
+
+def test_pickling_project():
+    '''Test that a saved project doesn't keep the workers and the authkey.'''
+    project = garlicsim.Project(deterministic_simpack)
+    project.root_this_state(deterministic_simpack.State.create_root())
+    project.remote_workers = ['host1:7347']
+    project.remote_authkey = _authkey
+    pickled_project = cPickle.dumps(project, 2)
+    assert _authkey not in pickled_project
+    assert 'host1' not in pickled_project
+    with TempValueSetter((os.environ, 'GARLICSIM_REMOTE_WORKERS'),
+                         'host2:7347'):
+        with TempValueSetter((os.environ, 'GARLICSIM_REMOTE_AUTHKEY'),
+                             'other secret'):
+            loaded_project = cPickle.loads(pickled_project)
+    assert loaded_project.remote_workers == ['host2:7347']
+    assert loaded_project.remote_authkey == 'other secret'
+    assert len(loaded_project.tree.nodes) == 1
+
+
+_unpickled_exploits = []
+
+
+def _unpickle_exploit():
+    _unpickled_exploits.append(None)
+
+
+class _Exploit(object):
+    '''Object that would add itself to `_unpickled_exploits` if unpickled.'''
+    def __reduce__(self):
+        return (_unpickle_exploit, ())
+
+
+def test_authentication():
+    '''Test that the worker only serves crunchers that know the authkey.'''
+    worker = _make_worker(deterministic_simpack)
+    try:
+        with cute_testing.RaiseAssertor(AuthenticationError):
+            Connection.connect(worker.address, 'wrong secret')
+
+        # A peer that skips the handshake can't get the worker to unpickle:
+        socket_ = socket.socket()
+        socket_.connect(worker.address)
+        pickled_exploit = cPickle.dumps(('crunch', _Exploit()), 2)
+        socket_.sendall(struct.pack('!I', len(pickled_exploit)) +
+                        '\0' * 20 + pickled_exploit)
+        socket_.settimeout(30)
+        try:
+            while socket_.recv(4096):
+                pass
+        except socket.error:
+            pass # The worker may reset the connection.
+        socket_.close()
+        assert not _unpickled_exploits
+
+        # The simpacks that the worker crunches are limited:
+        connection = Connection.connect(worker.address, _authkey)
+        connection.send(('crunch', 'this', None, None))
+        (kind, text) = connection.receive()
+        assert kind == 'error'
+        assert "isn't allowed" in text
+        connection.close()
+        assert 'this' not in sys.modules
+    finally:
+        worker.stop()
+
+
+def test_big_messages():
+    '''Test sending messages that arrive in many chunks.'''
+    listening_socket = socket.socket()
+    listening_socket.bind(('localhost', 0))
+    listening_socket.listen(1)
+    connections = []
+    def accept():
+        connection = Connection(listening_socket.accept()[0], _authkey)
+        connection.authenticate('worker')
+        connections.append(connection)
+    thread = threading.Thread(target=accept)
+    thread.start()
+    connection = Connection.connect(listening_socket.getsockname(), _authkey)
+    thread.join()
+    (other_connection,) = connections
+
+    big_string = 'garlic' * 200000
+    sending_thread = threading.Thread(
+        target=lambda: [connection.send(message) for message in
+                        (('state', big_string), ('heartbeat',),
+                         ('state', big_string[::-1]))]
+    )
+    sending_thread.start()
+    assert other_connection.receive() == ('state', big_string)
+    assert other_connection.receive() == ('heartbeat',)
+    assert other_connection.receive() == ('state', big_string[::-1])
+    sending_thread.join()
+
+    with cute_testing.RaiseAssertor(ConnectionLost):
+        other_connection.receive(timeout=0.1)
+    connection.close()
+    with cute_testing.RaiseAssertor(ConnectionLost):
+        other_connection.receive()
+    other_connection.close()
+    listening_socket.close()
@@ -63,8 +63,8 @@ def test_endable():
 
         test_garlicsim.verify_simpack_settings(simpack)
         
-        cruncher_types = \
-            garlicsim.misc.SimpackGrokker(simpack).available_cruncher_types
+        cruncher_types = garlicsim.Project(simpack).crunching_manager.\
+            get_available_cruncher_types()
         
         for cruncher_type in cruncher_types:
             yield check, simpack, cruncher_type
@@ -151,7 +151,7 @@ def check(simpack, cruncher_type):
         
     project.crunching_manager.cruncher_type = cruncher_type
     
-    assert project.tree.lock._ReadWriteLock__writer is None
+    assert not project.tree.lock._has_writer
     
     root = project.root_this_state(state)
     
@@ -267,7 +267,7 @@ def check(simpack, cruncher_type):
     assert new_node is node_1
     assert len(project.tree.nodes) == 11
     
-    assert project.tree.lock._ReadWriteLock__writer is None
+    assert not project.tree.lock._has_writer
     
     new_node = iterator.next()
     assert new_node is not node_1
@@ -277,7 +277,7 @@ def check(simpack, cruncher_type):
     bunch_of_new_nodes = tuple(iterator)
     consecutive_pairs = cute_iter_tools.consecutive_pairs(bunch_of_new_nodes)
     for parent_node, kid_node in consecutive_pairs:
-        assert project.tree.lock._ReadWriteLock__writer is None
+        assert not project.tree.lock._has_writer
         assert isinstance(parent_node, garlicsim.data_structures.Node)
         assert isinstance(kid_node, garlicsim.data_structures.Node)
         assert parent_node.children == [kid_node]
@@ -38,8 +38,8 @@ def test():
     
     for simpack in simpacks:
         
-        cruncher_types = \
-            garlicsim.misc.SimpackGrokker(simpack).available_cruncher_types
+        cruncher_types = garlicsim.Project(simpack).crunching_manager.\
+            get_available_cruncher_types()
         
         for cruncher_type in cruncher_types:
             yield check, simpack, cruncher_type
@@ -100,7 +100,7 @@ def check(simpack, cruncher_type):
     
     project.crunching_manager.cruncher_type = cruncher_type
     
-    assert project.tree.lock._ReadWriteLock__writer is None
+    assert not project.tree.lock._has_writer
     
     root = project.root_this_state(state)
     
@@ -213,7 +213,7 @@ def check(simpack, cruncher_type):
     assert len(project.tree.nodes) == x + y + 4 + total_nodes_added
     assert len(project.tree.all_possible_paths()) == 3
     
-    assert project.tree.lock._ReadWriteLock__writer is None
+    assert not project.tree.lock._has_writer
     
     two_paths = node_3.all_possible_paths()
     
@@ -258,18 +258,18 @@ def check(simpack, cruncher_type):
     
     
     
-    assert project.tree.lock._ReadWriteLock__writer is None
+    assert not project.tree.lock._has_writer
     
     number_of_nodes = len(project.tree.nodes)
     iterator = project.iter_simulate(plain_root, 5)
     
-    assert project.tree.lock._ReadWriteLock__writer is None
+    assert not project.tree.lock._has_writer
     
     new_node = iterator.next()
     assert new_node is plain_root
     assert len(project.tree.nodes) == number_of_nodes
     
-    assert project.tree.lock._ReadWriteLock__writer is None
+    assert not project.tree.lock._has_writer
     
     new_node = iterator.next()
     assert new_node is not plain_root
@@ -279,7 +279,7 @@ def check(simpack, cruncher_type):
     bunch_of_new_nodes = tuple(iterator)
     consecutive_nodes = cute_iter_tools.consecutive_pairs(bunch_of_new_nodes)
     for parent_node, kid_node in consecutive_nodes:
-        assert project.tree.lock._ReadWriteLock__writer is None
+        assert not project.tree.lock._has_writer
         assert isinstance(parent_node, garlicsim.data_structures.Node)
         assert isinstance(kid_node, garlicsim.data_structures.Node)
         assert parent_node.children == [kid_node]
@@ -0,0 +1,77 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for `garlicsim.asynchronous_crunching.HistoryBrowser`.'''
+
+import Queue
+
+from garlicsim.general_misc import binary_search
+
+import garlicsim
+from garlicsim.asynchronous_crunching import (HistoryBrowser, Job,
+                                              CrunchingProfile,
+                                              CruncherTelemetry)
+
+from .simpacks import simpack
+
+
+class FakeCruncher(object):
+    '''A cruncher that we feed by hand.'''
+    def __init__(self, project):
+        self.project = project
+        self.work_queue = Queue.Queue()
+        self.telemetry = CruncherTelemetry()
+
+
+def check_history_browser(history_browser, states):
+    '''Check that `history_browser` shows exactly `states` as its timeline.'''
+    n_states = len(states)
+    assert len(history_browser) == n_states
+    for i in range(-n_states, n_states):
+        assert history_browser[i] is states[i]
+    assert history_browser.get_last_state() is states[-1]
+    get_state_from_timeline = history_browser.\
+        _HistoryBrowser__get_state_by_monotonic_function_from_timeline
+    for clock in (0, 3.5, n_states - 150.5, n_states - 2, n_states + 7,
+                  -7):
+        for rounding in (binary_search.CLOSEST, binary_search.LOW,
+                         binary_search.HIGH_OTHERWISE_LOW, binary_search.EXACT,
+                         binary_search.BOTH):
+            assert history_browser.get_state_by_clock(clock, rounding) == \
+                   get_state_from_timeline(lambda state: state.clock, clock,
+                                           rounding)
+
+
+def test():
+    '''Test that recent states and tree states form the same timeline.'''
+    project = garlicsim.Project(simpack)
+    root = project.root_this_state(simpack.State.create_root())
+    job = Job(root, CrunchingProfile(clock_target=1000,
+                                     step_profile=project.build_step_profile()))
+    cruncher = FakeCruncher(project)
+    project.crunching_manager.crunchers[job] = cruncher
+
+    history_browser = HistoryBrowser(cruncher)
+    history_browser.record_state(root.state)
+    states = [root.state]
+
+    # We fork the root, to make sure the path follows our node:
+    project.tree.add_state(simpack.State.create_root(), parent=root)
+
+    for i in range(1, 171):
+        state = simpack.State()
+        state.clock = i
+        states.append(state)
+        cruncher.work_queue.put(state)
+        history_browser.record_state(state)
+
+    check_history_browser(history_browser, states)
+
+    # Now we simulate the crunching manager taking work from the cruncher:
+    for i in range(150):
+        state = cruncher.work_queue.get()
+        job.node = project.tree.add_state(state, parent=job.node)
+
+    check_history_browser(history_browser, states)
+    assert len(history_browser.recent_states) == \
+           garlicsim.asynchronous_crunching.RECENT_STATES_BUFFER_SIZE
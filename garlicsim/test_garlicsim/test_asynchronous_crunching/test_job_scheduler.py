@@ -0,0 +1,108 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for `garlicsim.asynchronous_crunching.JobScheduler`.'''
+
+from garlicsim.general_misc.infinity import infinity
+
+import garlicsim
+from garlicsim.asynchronous_crunching import JobScheduler
+from garlicsim.asynchronous_crunching.job_scheduler import (PATH_PRIORITY,
+                                                            PLAYBACK_PRIORITY)
+
+from .simpacks import simpack
+
+
+class FakeJob(object):
+    def __init__(self, priority=0):
+        self.priority = priority
+
+
+def test_select_jobs():
+    '''Test priorities, taking turns and starvation protection.'''
+    scheduler = JobScheduler(max_crunchers=2, time_slice=1,
+                             starvation_time=10)
+    (background_1, background_2, background_3) = \
+        [FakeJob() for i in range(3)]
+    path_job = FakeJob(PATH_PRIORITY)
+    playback_job = FakeJob(PLAYBACK_PRIORITY)
+
+    jobs = [background_1, background_2, background_3, path_job]
+    crunching_jobs = scheduler.select_jobs(jobs, (), now=0)
+    assert crunching_jobs == set((path_job, background_1))
+
+    # Within the time slice, nothing changes:
+    assert scheduler.select_jobs(jobs, crunching_jobs, now=0.5) == \
+           crunching_jobs
+
+    # After the time slice, the background jobs take turns, while the path job
+    # keeps crunching:
+    crunching_jobs = scheduler.select_jobs(jobs, crunching_jobs, now=1.5)
+    assert crunching_jobs == set((path_job, background_2))
+    crunching_jobs = scheduler.select_jobs(jobs, crunching_jobs, now=3)
+    assert crunching_jobs == set((path_job, background_3))
+    crunching_jobs = scheduler.select_jobs(jobs, crunching_jobs, now=4.5)
+    assert crunching_jobs == set((path_job, background_1))
+
+    # A job with a higher priority doesn't wait for the time slice to end:
+    jobs.append(playback_job)
+    crunching_jobs = scheduler.select_jobs(jobs, crunching_jobs, now=4.6)
+    assert crunching_jobs == set((playback_job, path_job))
+
+    # The background jobs waited long enough to get a raised priority:
+    assert scheduler.get_priority(background_2, now=4.6) == 0
+    assert scheduler.get_priority(background_2, now=23.1) == \
+           PLAYBACK_PRIORITY
+    crunching_jobs = scheduler.select_jobs(jobs, crunching_jobs, now=23.1)
+    assert background_2 in crunching_jobs
+    # It keeps its raised priority for its whole turn:
+    assert scheduler.select_jobs(jobs, crunching_jobs, now=23.5) == \
+           crunching_jobs
+
+    # Removed jobs are forgotten:
+    scheduler.select_jobs([path_job], crunching_jobs, now=24)
+    assert background_2 not in scheduler._last_turn_start_times
+
+    scheduler.max_crunchers = None
+    assert scheduler.select_jobs(jobs, (), now=25) == set(jobs)
+
+
+def test_crunching_manager():
+    '''Test that the crunching manager doesn't exceed `max_crunchers`.'''
+    project = garlicsim.Project(simpack)
+    crunching_manager = project.crunching_manager
+    crunching_manager.scheduler.max_crunchers = 2
+    crunching_manager.scheduler.time_slice = 0
+    root = project.root_this_state(simpack.State.create_root())
+
+    jobs = [project.begin_crunching(root, 10) for i in range(4)]
+    other_root = project.root_this_state(simpack.State.create_root())
+    path_job = project.ensure_buffer_on_path(
+        other_root,
+        other_root.make_containing_path(),
+        infinity
+    )
+    assert path_job.priority == PATH_PRIORITY
+
+    all_crunchers = set()
+    for i in range(200):
+        project.sync_crunchers()
+        crunchers = crunching_manager.crunchers.values()
+        assert len([cruncher for cruncher in crunchers if
+                    not cruncher.paused]) <= 2
+        assert path_job in crunching_manager.crunchers
+        assert not crunching_manager.crunchers[path_job].paused
+        all_crunchers.update(crunchers)
+        if not [job for job in jobs if not job.finished]:
+            break
+    assert [job.finished for job in jobs] == [True] * 4
+    # Jobs whose turn was over had their crunchers paused rather than
+    # replaced:
+    assert len(all_crunchers) == 5
+    assert len(root.children) == 4
+    for job in jobs:
+        assert job.node.state.clock >= 10
+
+    crunching_manager.jobs.remove(path_job)
+    project.sync_crunchers()
+    assert not crunching_manager.crunchers
@@ -46,8 +46,8 @@ def test():
         
         test_garlicsim.verify_simpack_settings(simpack)
         
-        cruncher_types = \
-            garlicsim.misc.SimpackGrokker(simpack).available_cruncher_types
+        cruncher_types = garlicsim.Project(simpack).crunching_manager.\
+            get_available_cruncher_types()
         
         for cruncher_type in cruncher_types:
             yield check, simpack, cruncher_type
@@ -76,7 +76,7 @@ def check(simpack, cruncher_type):
         
     project.crunching_manager.cruncher_type = cruncher_type
     
-    assert project.tree.lock._ReadWriteLock__writer is None
+    assert not project.tree.lock._has_writer
     
     root = project.root_this_state(state)
 
@@ -208,6 +208,9 @@ def check(simpack, cruncher_type):
     ### Testing cruncher type switching: ######################################
     #                                                                         #
     
+    # Both jobs should get crunchers even on a machine with a single core:
+    project.crunching_manager.scheduler.max_crunchers = None
+    
     job_1 = project.begin_crunching(root, clock_buffer=infinity)
     job_2 = project.begin_crunching(root, clock_buffer=infinity)
     
@@ -0,0 +1,50 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for profiling the crunchers.'''
+
+import time
+import pstats
+
+from garlicsim.general_misc.infinity import infinity
+
+import garlicsim
+
+from .simpacks import simpack
+
+
+def test():
+    '''Test that profiling data is collected from all cruncher types.'''
+    cruncher_types = garlicsim.Project(simpack).crunching_manager.\
+        get_available_cruncher_types()
+    for cruncher_type in cruncher_types:
+        yield check, cruncher_type
+
+
+def check(cruncher_type):
+
+    project = garlicsim.Project(simpack)
+    project.crunching_manager.cruncher_type = cruncher_type
+    root = project.root_this_state(simpack.State.create_root())
+    
+    assert project.get_crunching_profile_stats() is None
+    
+    project.set_crunching_profiling(True)
+    job = project.begin_crunching(root, infinity)
+    step_profile = job.crunching_profile.step_profile
+
+    for i in range(100):
+        time.sleep(0.05)
+        project.sync_crunchers()
+        if project.get_crunching_profile_stats() is not None:
+            break
+        
+    stats = project.get_crunching_profile_stats()
+    assert isinstance(stats, pstats.Stats)
+    assert [key for key in stats.stats if key[2] == 'step']
+    assert project.get_crunching_profile_stats(step_profile).stats == \
+           stats.stats
+    
+    project.set_crunching_profiling(False)
+    project.crunching_manager.jobs.remove(job)
+    project.sync_crunchers()
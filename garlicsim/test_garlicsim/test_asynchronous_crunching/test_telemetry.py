@@ -0,0 +1,84 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for crunching telemetry.'''
+
+from __future__ import division
+
+import time
+
+from garlicsim.general_misc.infinity import infinity
+
+import garlicsim
+from garlicsim.asynchronous_crunching import CruncherTelemetry
+
+from .simpacks import simpack
+
+
+def test():
+    '''Test that crunchers report telemetry to the crunching manager.'''
+    cruncher_types = garlicsim.Project(simpack).crunching_manager.\
+        get_available_cruncher_types()
+    for cruncher_type in cruncher_types:
+        yield check, cruncher_type
+
+
+def check(cruncher_type):
+
+    project = garlicsim.Project(simpack)
+    project.crunching_manager.cruncher_type = cruncher_type
+    root = project.root_this_state(simpack.State.create_root())
+
+    assert project.get_crunching_telemetry() == {}
+
+    job = project.begin_crunching(root, infinity)
+
+    total_nodes_added = 0
+    while total_nodes_added < 10:
+        time.sleep(0.1)
+        total_nodes_added += project.sync_crunchers()
+    time.sleep(1.1 * garlicsim.asynchronous_crunching.\
+               TELEMETRY_REPORT_INTERVAL)
+    total_nodes_added += project.sync_crunchers()
+
+    telemetry_dict = project.get_crunching_telemetry()
+    assert telemetry_dict.keys() == [job]
+    (telemetry,) = telemetry_dict.values()
+    assert isinstance(telemetry, CruncherTelemetry)
+
+    assert telemetry.n_states >= total_nodes_added
+    assert telemetry.get_states_per_second() > 0
+    assert telemetry.min_step_time <= telemetry.get_mean_step_time() <= \
+           telemetry.max_step_time
+    assert sum(count for (low, high, count) in
+               telemetry.get_step_time_distribution()) == telemetry.n_states
+    assert 0 <= telemetry.queue_depth <= telemetry.queue_high_water_mark <= \
+           garlicsim.asynchronous_crunching.CRUNCHER_QUEUE_SIZE
+    assert telemetry.tree_lock_hold_time > 0
+    if cruncher_type is garlicsim.asynchronous_crunching.crunchers.\
+       ProcessCruncher:
+        assert telemetry.pickled_bytes > 0
+    else:
+        assert telemetry.pickled_bytes == 0
+
+    assert project.crunching_manager.tree_lock_hold_time > 0
+
+    project.crunching_manager.jobs.remove(job)
+    project.sync_crunchers()
+    assert project.get_crunching_telemetry() == {}
+
+
+def test_merge():
+    '''Test merging partial telemetry reports.'''
+    first, second = CruncherTelemetry(), CruncherTelemetry()
+    first.add_step(0, 0.25)
+    second.add_step(0, 0.5)
+    second.add_step(0, 0.5)
+    second.pickled_bytes = 30
+    first.merge(second)
+    assert first.n_states == 3
+    assert first.min_step_time == 0.25
+    assert first.max_step_time == 0.5
+    assert first.get_mean_pickled_size() == 10
+    assert first.get_step_time_distribution() == [(0.25, 0.5, 1),
+                                                  (0.5, 1, 2)]
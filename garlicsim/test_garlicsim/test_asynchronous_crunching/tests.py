@@ -43,8 +43,8 @@ def test():
         
         test_garlicsim.verify_simpack_settings(simpack)
         
-        cruncher_types = \
-            garlicsim.misc.SimpackGrokker(simpack).available_cruncher_types
+        cruncher_types = garlicsim.Project(simpack).crunching_manager.\
+            get_available_cruncher_types()
         
         for cruncher_type in cruncher_types:
             
@@ -103,7 +103,7 @@ def check(simpack, cruncher_type):
         
     project.crunching_manager.cruncher_type = cruncher_type
     
-    assert project.tree.lock._ReadWriteLock__writer is None
+    assert not project.tree.lock._has_writer
     
     root = project.root_this_state(state)
     
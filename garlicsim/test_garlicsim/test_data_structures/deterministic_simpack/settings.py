@@ -0,0 +1,7 @@
+from garlicsim.misc.settings_constants import DETERMINISTIC
+
+from .state import get_x_squared
+
+DETERMINISM_FUNCTION = lambda step_profile: DETERMINISTIC
+
+SCALAR_STATE_FUNCTIONS = [get_x_squared]
@@ -0,0 +1,18 @@
+import garlicsim.data_structures
+
+
+class State(garlicsim.data_structures.State):
+    
+    def __init__(self, x=0):
+        self.x = x
+
+    def step(self, increment=1):
+        return State(self.x + increment)
+
+    @staticmethod
+    def create_root():
+        return State()
+
+
+def get_x_squared(state):
+    return state.x ** 2
@@ -0,0 +1,142 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for `garlicsim.data_structures.Checkpointer`.'''
+
+from __future__ import with_statement
+
+import cPickle
+import sys
+import threading
+import time
+
+from garlicsim.general_misc import cute_testing
+
+import garlicsim
+
+from . import deterministic_simpack
+from ..test_synchronous_crunching import history_simpack
+
+
+def _count_states_in_memory(tree):
+    return len([node for node in tree.nodes if node.has_state_in_memory()])
+
+
+def test():
+    '''Test that states are dropped and recomputed correctly.'''
+    project = garlicsim.Project(deterministic_simpack)
+    checkpointer = project.enable_checkpointing(interval=10)
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    project.simulate(root, 95)
+    
+    # The root, every 10th node and the leaf:
+    assert _count_states_in_memory(project.tree) == 11
+    
+    path = root.make_containing_path()
+    assert [state.x for state in path.states()] == range(96)
+    # Every dropped state was recomputed only once:
+    assert checkpointer.n_recomputed_states == 96 - 11
+    # Scanning again recomputes again, since the cache is small:
+    assert [node.state.clock for node in path] == range(96)
+    assert checkpointer.n_recomputed_states == 2 * (96 - 11)
+    
+    # Forking from a node whose state was dropped:
+    node = path[45]
+    assert not node.has_state_in_memory()
+    fork = project.simulate(node, 2, increment=100)
+    assert node.has_state_in_memory()
+    assert fork.state.x == 245
+    assert path[46].state.x == 46
+    
+    
+def test_stride():
+    '''Test recomputing states that were crunched with a stride.'''
+    project = garlicsim.Project(deterministic_simpack)
+    checkpointer = project.enable_checkpointing(interval=5)
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    job = project.begin_crunching(root, 60)
+    job.crunching_profile.stride = 3
+    while project.crunching_manager.jobs:
+        project.sync_crunchers()
+        time.sleep(0.01)
+    (leaf,) = root.get_all_leaves().keys()
+    path = leaf.make_containing_path()
+    assert _count_states_in_memory(project.tree) < len(path)
+    
+    checkpointer.cache.clear()
+    assert [state.x for state in path.states()] == range(0, 61, 3)
+    assert [state.clock for state in path.states()] == range(0, 61, 3)
+    assert checkpointer.n_recomputed_states > 0
+    
+    
+def test_pickling():
+    '''Test pickling a project whose tree has dropped states.'''
+    project = garlicsim.Project(deterministic_simpack)
+    project.enable_checkpointing(interval=5)
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    project.simulate(root, 20)
+    
+    unpickled_project = cPickle.loads(cPickle.dumps(project, 2))
+    (unpickled_root,) = unpickled_project.tree.roots
+    path = unpickled_root.make_containing_path()
+    assert _count_states_in_memory(unpickled_project.tree) == 5
+    assert [state.x for state in path.states()] == range(21)
+    
+    
+def test_concurrent_reading():
+    '''Test that several threads can recompute states at the same time.'''
+    project = garlicsim.Project(deterministic_simpack)
+    project.enable_checkpointing(interval=20, cache_size=3)
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    project.simulate(root, 200)
+    path = root.make_containing_path()
+    
+    results = []
+    def read_states():
+        try:
+            with project.tree.lock.read:
+                for i in range(3):
+                    assert [state.x for state in path.states()] == range(201)
+        except Exception, exception:
+            results.append(exception)
+        else:
+            results.append(None)
+    
+    old_check_interval = sys.getcheckinterval()
+    sys.setcheckinterval(1)
+    try:
+        threads = [threading.Thread(target=read_states) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(60)
+    finally:
+        sys.setcheckinterval(old_check_interval)
+    assert results == [None] * 4
+    
+    
+def test_disabling():
+    '''Test that disabling checkpointing brings back all the states.'''
+    project = garlicsim.Project(deterministic_simpack)
+    project.enable_checkpointing(interval=3)
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    project.simulate(root, 10)
+    project.tree.disable_checkpointing()
+    assert _count_states_in_memory(project.tree) == 11
+    project.simulate(root.children[0], 10)
+    assert _count_states_in_memory(project.tree) == 21
+    
+    
+def test_undeterministic():
+    '''Test that nothing is dropped when the simulation isn't deterministic.'''
+    project = garlicsim.Project(history_simpack)
+    with cute_testing.RaiseAssertor(garlicsim.misc.GarlicSimException,
+                                    'history-dependent'):
+        project.enable_checkpointing()
+    
+    from ..test_synchronous_crunching import simpack
+    project = garlicsim.Project(simpack)
+    project.enable_checkpointing(interval=3)
+    root = project.root_this_state(simpack.State.create_root())
+    project.simulate(root, 10)
+    assert _count_states_in_memory(project.tree) == 11
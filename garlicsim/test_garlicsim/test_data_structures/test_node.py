@@ -0,0 +1,142 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for `Node` and `Block`.'''
+
+from __future__ import with_statement
+
+import sys
+import cPickle
+import weakref
+
+import garlicsim
+from garlicsim.general_misc import cute_testing
+from garlicsim.data_structures import Node, Block
+from garlicsim.data_structures.node import NodeLookupError
+
+from . import deterministic_simpack
+
+
+def _make_project():
+    project = garlicsim.Project(deterministic_simpack)
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    project.simulate(root, 10)
+    return project
+
+
+def test_compactness():
+    '''Test that nodes and blocks have no `__dict__` and share what they can.'''
+    project = _make_project()
+    (root,) = project.tree.roots
+    (leaf,) = root.get_all_leaves().keys()
+
+    for tree_member in (root, leaf, leaf.block):
+        assert not hasattr(tree_member, '__dict__')
+
+    # The leaf hasn't needed a children list yet:
+    assert leaf._children is None
+    assert not leaf.has_children()
+    assert leaf._ends is None and leaf._derived_nodes is None
+    assert leaf.children == []
+    assert leaf._children == []
+
+    # All the nodes in the block share one step profile object:
+    block = leaf.block
+    assert len(set(map(id, (node.step_profile for node in block)))) == 1
+    assert block.step_profile is leaf.step_profile
+
+    assert weakref.ref(leaf)() is leaf
+
+
+def test_pickling():
+    '''Test that nodes pickle and unpickle with all their attributes.'''
+    project = _make_project()
+    project.tree.add_state(deterministic_simpack.State.create_root())
+
+    for protocol in (0, 2):
+        unpickled_project = cPickle.loads(cPickle.dumps(project, protocol))
+        tree = unpickled_project.tree
+        root = tree.roots[0]
+        (leaf,) = root.get_all_leaves().keys()
+        assert leaf._children is None
+        assert [node.state.x for node in root.make_containing_path()] == \
+               range(11)
+        assert leaf.block.alive and len(leaf.block) == 10
+        assert leaf.tree is tree
+        assert not tree.roots[1].has_children()
+
+
+def test_old_pickle_format():
+    '''Test unpickling a node from a `__dict__` like old nodes had.'''
+    project = _make_project()
+    (root,) = project.tree.roots
+    node = Node.__new__(Node)
+    node.__setstate__({
+        'tree': project.tree,
+        'state': root.state,
+        'parent': None,
+        'step_profile': None,
+        'touched': True,
+        'block': None,
+        'children': [],
+        'derived_nodes': [],
+        'still_in_editing': False,
+        'ends': [],
+    })
+    assert node.state is root.state
+    assert node.touched
+    assert node._children is None
+    assert node.ends == []
+
+
+
+def test_ancestry():
+    '''Test getting ancestors on a long chain of blockless nodes.'''
+    project = garlicsim.Project(deterministic_simpack)
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    step_profiles = [project.build_step_profile(increment=increment) for
+                     increment in (1, 2)]
+    
+    # Alternating step profiles keep the nodes out of blocks:
+    n_nodes = sys.getrecursionlimit() * 2
+    nodes = [root]
+    for i in xrange(n_nodes):
+        nodes.append(project.tree.add_state(
+            deterministic_simpack.State(i + 1),
+            parent=nodes[-1],
+            step_profile=step_profiles[i % 2]
+        ))
+    leaf = nodes[-1]
+    assert leaf.block is None
+    
+    assert leaf.depth == n_nodes
+    assert leaf.get_root() is root
+    for generations in (0, 1, 2, 7, 100, n_nodes - 1, n_nodes):
+        assert leaf.get_ancestor(generations) is nodes[-1 - generations]
+    assert leaf.get_ancestor(n_nodes + 5, round=True) is root
+    assert root.get_ancestor(1, round=True) is root
+    with cute_testing.RaiseAssertor(NodeLookupError):
+        leaf.get_ancestor(n_nodes + 1)
+    with cute_testing.RaiseAssertor(NodeLookupError):
+        root.get_ancestor()
+    
+    # Common ancestors:
+    fork = project.simulate(nodes[500], 50)
+    assert fork.get_common_ancestor(leaf) is nodes[500]
+    assert leaf.get_common_ancestor(fork) is nodes[500]
+    assert nodes[300].get_common_ancestor(fork) is nodes[300]
+    assert leaf.get_common_ancestor(leaf) is leaf
+    other_root = project.root_this_state(
+        deterministic_simpack.State.create_root()
+    )
+    assert other_root.get_common_ancestor(leaf) is None
+    assert project.simulate(other_root, 5).get_common_ancestor(leaf) is None
+    
+    # Deleting nodes makes new roots:
+    project.tree.delete_node_range(
+        garlicsim.data_structures.NodeRange(nodes[10], nodes[20])
+    )
+    assert leaf.get_root() is nodes[21]
+    assert leaf.depth == n_nodes - 21
+    assert leaf.get_common_ancestor(nodes[5]) is None
+    assert leaf.get_ancestor(n_nodes - 21) is nodes[21]
@@ -102,4 +102,66 @@ def test_node_selection_and_range():
     #####################
     
     assert len(tree.nodes) == 21
-    
\ No newline at end of file
+        
+    
+def test_canonical_form():
+    '''Test compacting, union and intersection against sets of nodes.'''
+    from . import deterministic_simpack
+    project = garlicsim.Project(deterministic_simpack)
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    project.simulate(root, 100)
+    trunk = list(root.make_containing_path())
+    branch = list(project.simulate(trunk[30], 40).make_containing_path())
+    twig = list(project.simulate(branch[50], 20).make_containing_path())
+    other_branch = list(
+        project.simulate(trunk[30], 10).make_containing_path()
+    )
+    lines = (trunk, branch, twig, other_branch)
+    
+    random = __import__('random').Random(0)
+    def make_random_selection(n_ranges):
+        ranges = []
+        for i in xrange(n_ranges):
+            line = random.choice(lines)
+            head_index = random.randrange(len(line))
+            tail_index = random.randrange(head_index, len(line))
+            ranges.append(ds.NodeRange(line[head_index], line[tail_index]))
+        return ds.NodeSelection(ranges)
+        
+    for i in xrange(30):
+        first = make_random_selection(random.randint(1, 12))
+        second = make_random_selection(random.randint(1, 12))
+        first_nodes, second_nodes = set(first), set(second)
+        
+        compacted = first.copy()
+        compacted.compact()
+        assert set(compacted) == first_nodes
+        assert len(list(compacted)) == len(first_nodes)
+        assert compacted == first
+        # The canonical form has a range for each node that has no selected
+        # children:
+        assert len(compacted.ranges) == len(
+            [node for node in first_nodes if not
+             first_nodes.intersection(node.children)]
+        )
+        
+        assert set(first | second) == first_nodes | second_nodes
+        assert set(first & second) == first_nodes & second_nodes
+        for node in trunk[::7] + twig[::3]:
+            assert (node in first) == (node in first_nodes)
+            
+        for node_range in first.ranges:
+            assert set(node_range.get_outside_children()) == set(
+                child for node in node_range for child in node.children
+                if child not in node_range
+            )
+            
+    selection = ds.NodeSelection([ds.NodeRange(trunk[10], trunk[50]),
+                                  ds.NodeRange(twig[-15], twig[-5])])
+    tree = project.tree
+    n_nodes = len(tree.nodes)
+    tree.delete_node_selection(selection)
+    assert len(tree.nodes) == n_nodes - 41 - 11
+    assert set(tree.roots) == set((trunk[0], trunk[51], branch[31],
+                                   other_branch[31], twig[-4]))
+    assert twig[-1].get_root() is twig[-4]
@@ -0,0 +1,144 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for `garlicsim.data_structures.ScalarColumns`.'''
+
+import garlicsim
+
+from . import deterministic_simpack
+from .deterministic_simpack.state import get_x_squared
+
+
+def _get_values(scalar_columns, path, start_clock=None, end_clock=None):
+    clocks, values = scalar_columns.get_values(get_x_squared, path,
+                                               start_clock, end_clock)
+    return list(clocks), list(values)
+
+
+def test():
+    '''Test that the columns are filled correctly as the tree grows.'''
+    project = garlicsim.Project(deterministic_simpack)
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    leaf = project.simulate(root, 20)
+    
+    # The columns are filled with the existing nodes:
+    scalar_columns = project.enable_scalar_columns()
+    project.simulate(leaf, 10)
+    path = root.make_containing_path()
+    assert _get_values(scalar_columns, path) == \
+           (range(31), [x ** 2 for x in range(31)])
+    assert _get_values(scalar_columns, path, 5.5, 10) == \
+           (range(6, 11), [x ** 2 for x in range(6, 11)])
+    assert _get_values(scalar_columns, path, 40) == ([], [])
+    
+    # Forking in the middle of a timeline:
+    fork = project.simulate(path[15], 3, increment=100)
+    fork_path = fork.make_containing_path()
+    assert _get_values(scalar_columns, path) == \
+           (range(31), [x ** 2 for x in range(31)])
+    assert _get_values(scalar_columns, fork_path, 14) == \
+           ([14, 15, 16, 17, 18], [14 ** 2, 15 ** 2, 115 ** 2, 215 ** 2,
+                                   315 ** 2])
+    
+    # A touched node gets its values when it's finalized:
+    edited_node = project.fork_to_edit(path[3])
+    edited_node.state.x = 1000
+    edited_node.finalize()
+    project.simulate(edited_node, 2)
+    edited_path = edited_node.make_containing_path()
+    assert _get_values(scalar_columns, edited_path)[1] == \
+           [0, 1, 4, 1000 ** 2, 1001 ** 2, 1002 ** 2]
+    
+    # Deleting nodes:
+    project.tree.delete_node_range(
+        garlicsim.data_structures.NodeRange(path[25], path[30])
+    )
+    assert _get_values(scalar_columns, path)[1] == \
+           [x ** 2 for x in range(25)]
+    
+    
+
+def test_deleting():
+    '''Test that deleting nodes updates the columns without rebuilding.'''
+    project = garlicsim.Project(deterministic_simpack)
+    tree = project.tree
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    scalar_columns = project.enable_scalar_columns()
+    project.simulate(root, 40)
+    path = root.make_containing_path()
+    project.simulate(path[10], 5, increment=100)
+    project.simulate(path[20], 5, increment=200)
+    
+    def rebuild(tree):
+        raise Exception("The columns shouldn't be rebuilt.")
+    scalar_columns.rebuild = rebuild
+    
+    def check():
+        rebuilt_scalar_columns = garlicsim.data_structures.ScalarColumns(
+            scalar_columns.state_functions
+        )
+        garlicsim.data_structures.ScalarColumns.rebuild(
+            rebuilt_scalar_columns,
+            tree
+        )
+        for some_root in tree.roots:
+            for leaf in some_root.get_all_leaves():
+                some_path = leaf.make_containing_path()
+                assert _get_values(scalar_columns, some_path) == \
+                       _get_values(rebuilt_scalar_columns, some_path)
+        
+    # A range that starts and ends in the middle of segments, with a fork in
+    # it:
+    tree.delete_node_range(
+        garlicsim.data_structures.NodeRange(path[5], path[15])
+    )
+    assert len(tree.roots) == 3
+    check()
+    assert _get_values(scalar_columns, path)[1] == \
+           [x ** 2 for x in range(5)]
+    (new_root,) = [node for node in tree.roots if node.state.x == 16]
+    assert _get_values(scalar_columns, new_root.make_containing_path()) == \
+           (range(16, 41), [x ** 2 for x in range(16, 41)])
+    
+    # A selection of a few ranges:
+    new_path = new_root.make_containing_path()
+    node_selection = garlicsim.data_structures.NodeSelection([
+        garlicsim.data_structures.NodeRange(new_path[2], new_path[3]),
+        garlicsim.data_structures.NodeRange(new_path[20], new_path[24]),
+    ])
+    tree.delete_node_selection(node_selection)
+    check()
+    assert _get_values(scalar_columns, new_path)[1] == \
+           [16 ** 2, 17 ** 2]
+    
+    # Continuing to simulate after deleting:
+    project.simulate(new_path[1], 3)
+    check()
+    assert _get_values(scalar_columns, new_path)[1] == \
+           [16 ** 2, 17 ** 2, 18 ** 2, 19 ** 2, 20 ** 2]
+    
+    
+def test_compute_in_crunchers():
+    '''Test that crunchers can compute the values of the state functions.'''
+    cruncher_types = garlicsim.Project(deterministic_simpack).\
+        crunching_manager.get_available_cruncher_types()
+    for cruncher_type in cruncher_types:
+        yield check_compute_in_crunchers, cruncher_type
+        
+        
+def check_compute_in_crunchers(cruncher_type):
+    project = garlicsim.Project(deterministic_simpack)
+    project.crunching_manager.cruncher_type = cruncher_type
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    scalar_columns = project.enable_scalar_columns(compute_in_crunchers=True)
+    job = project.begin_crunching(root, 50)
+    assert job.wait(timeout=60)
+    path = root.make_containing_path()
+    clocks, values = _get_values(scalar_columns, path, end_clock=50)
+    assert values == [x ** 2 for x in range(51)]
+    for node in path:
+        assert not hasattr(
+            node.state,
+            garlicsim.data_structures.scalar_columns.\
+                SCALAR_VALUES_ATTRIBUTE_NAME
+        )
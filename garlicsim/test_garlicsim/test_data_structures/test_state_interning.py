@@ -0,0 +1,125 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for `garlicsim.data_structures.StateInterner`.'''
+
+import gc
+import cPickle
+
+import garlicsim
+
+from . import deterministic_simpack
+
+
+class Thing(object):
+    '''A weakly-referenceable attribute for states.'''
+    def __init__(self, value):
+        self.value = value
+
+
+def test():
+    '''Test that identical states are shared, and only them.'''
+    project = garlicsim.Project(deterministic_simpack)
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    project.simulate(root, 10)
+    state_interner = project.enable_state_interning()
+    assert state_interner.n_states == 10 # The root is touched.
+    assert state_interner.n_state_hits == 0
+
+    # Crunching from the root again gives identical states:
+    leaf = project.simulate(root, 10)
+    assert state_interner.n_states == 20
+    assert state_interner.n_state_hits == 10
+    assert state_interner.get_hit_rate() == 0.5
+    assert state_interner.bytes_saved > 0
+    (first_leaf, second_leaf) = [end_node for end_node in
+                                 root.get_all_leaves().keys()]
+    assert first_leaf is not second_leaf
+    assert first_leaf.state is second_leaf.state
+    assert [node.state.x for node in leaf.make_containing_path()] == range(11)
+
+    # Different states aren't shared:
+    other_leaf = project.simulate(root, 10, increment=2)
+    assert other_leaf.state.x == 20
+    assert state_interner.n_state_hits == 10
+
+    # `fork_to_edit` gets a private copy:
+    new_node = project.fork_to_edit(leaf)
+    assert new_node.state is not leaf.state
+    new_node.state.x = 7
+    new_node.still_in_editing = False
+    assert leaf.state.x == 10
+    assert state_interner.n_states == 30
+
+
+def test_attributes():
+    '''Test that states with different clocks share their attributes.'''
+    project = garlicsim.Project(deterministic_simpack)
+    state_interner = project.enable_state_interning()
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    things = [Thing(i % 2) for i in xrange(4)]
+    nodes = [root]
+    for thing in things:
+        state = deterministic_simpack.State(thing.value)
+        state.thing = thing
+        nodes.append(project.tree.add_state(state, parent=nodes[-1]))
+    del nodes[0]
+    assert nodes[0].state.thing is not nodes[1].state.thing
+    assert nodes[0].state.thing is nodes[2].state.thing
+    assert nodes[1].state.thing is nodes[3].state.thing
+    assert state_interner.n_attribute_hits == 2
+    assert state_interner.n_state_hits == 0
+
+
+def test_fingerprint_function():
+    '''Test interning with a fingerprint function that ignores the clock.'''
+    project = garlicsim.Project(deterministic_simpack)
+    state_interner = project.tree.enable_state_interning(
+        fingerprint_function=lambda state: state.x
+    )
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    first_leaf = project.simulate(root, 3)
+    second_leaf = project.simulate(root, 3)
+    assert first_leaf.state is second_leaf.state
+    assert state_interner.n_state_hits == 3
+    
+    # A state with the same fingerprint but a different clock isn't replaced:
+    node = project.simulate(root, 6, increment=0)
+    assert [node.state.clock for node in node.make_containing_path()] == \
+           range(7)
+    assert state_interner.n_state_hits == 3
+    
+
+def test_weak_references():
+    '''Test that the interning tables don't keep deleted states alive.'''
+    project = garlicsim.Project(deterministic_simpack)
+    state_interner = project.enable_state_interning()
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    project.simulate(root, 5)
+    assert len(state_interner._states) == 5
+    project.tree.delete_node_range(
+        garlicsim.data_structures.NodeRange(root.children[0],
+                                            root.get_all_leaves().keys()[0])
+    )
+    gc.collect()
+    assert len(state_interner._states) == 0
+
+
+def test_pickling():
+    '''Test pickling a project with shared states.'''
+    project = garlicsim.Project(deterministic_simpack)
+    project.enable_state_interning()
+    root = project.root_this_state(deterministic_simpack.State.create_root())
+    project.simulate(root, 5)
+    project.simulate(root, 5)
+
+    unpickled_project = cPickle.loads(cPickle.dumps(project, 2))
+    (unpickled_root,) = unpickled_project.tree.roots
+    (first_leaf, second_leaf) = unpickled_root.get_all_leaves().keys()
+    assert first_leaf.state is second_leaf.state
+    state_interner = unpickled_project.tree.state_interner
+    assert state_interner.n_state_hits == 5
+    unpickled_project.simulate(unpickled_root, 5)
+    assert state_interner.n_state_hits == 5
+    unpickled_project.simulate(unpickled_root, 5)
+    assert state_interner.n_state_hits == 10
@@ -186,4 +186,83 @@ def test_double_caching():
     g = cache()(f)
     
     assert f is g
-    
\ No newline at end of file
+            
+        
+def test_cache_info():
+    '''Test the hit and miss statistics of cached functions.'''
+    f = cache()(counting_func)
+    g = cache(max_size=2)(counting_func)
+    
+    for cached_function in (f, g):
+        assert tuple(cached_function.cache_info()) == \
+               (0, 0, cached_function.cache_info().max_size, 0)
+        cached_function(1)
+        cached_function(1)
+        cached_function(a=1, b=2)
+        cached_function(2)
+        cached_function([1, 2])
+        cached_function([1, 2])
+        
+        cache_info = cached_function.cache_info()
+        assert cache_info.hits == 3
+        assert cache_info.misses == 3
+        
+        cached_function.cache_clear()
+        cache_info = cached_function.cache_info()
+        assert (cache_info.hits, cache_info.misses,
+                cache_info.current_size) == (0, 0, 0)
+        
+    assert f.cache_info().max_size == float('inf')
+    assert g.cache_info().max_size == 2
+    
+    
+def test_method():
+    '''Test caching a method, making sure the object doesn't leak.'''
+    
+    class A(object):
+        @cache()
+        def f(self, x=1):
+            return counting_func()
+    
+    a = A()
+    result = a.f()
+    assert a.f() == a.f(1) == a.f(x=1) == result
+    assert a.f(2) != result
+    assert A().f() != result
+    
+    a_ref = weakref.ref(a)
+    del a
+    gc.collect()
+    assert a_ref() is None
+    
+    # Dead keys are removed on the next call:
+    A.f.im_func(A())
+    gc.collect()
+    A.f.im_func(7)
+    assert A.f.cache_info().current_size == 1
+    
+    
+def test_thread_safety():
+    '''Test that a cache with a `max_size` may be used by several threads.'''
+    import threading
+    
+    f = cache(max_size=5)(counting_func)
+    errors = []
+    
+    def hammer():
+        try:
+            for i in xrange(500):
+                f(i % 8, meow=(i % 3))
+        except Exception, exception:
+            errors.append(exception)
+            
+    threads = [threading.Thread(target=hammer) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+        
+    assert not errors
+    cache_info = f.cache_info()
+    assert cache_info.current_size == 5
+    assert cache_info.hits + cache_info.misses == 2000
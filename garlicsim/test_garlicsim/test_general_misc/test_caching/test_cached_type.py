@@ -17,4 +17,27 @@ def test():
         
     assert A() is A(1) is A(b=2) is A(1, 2) is A(1, b=2)
     assert A() is not A(3) is not A(b=7) is not A(1, 2, 'meow') is not A(x=9)
-    
\ No newline at end of file
+        
+
+def test_weakref():
+    '''Test that `CachedType` doesn't keep weakreffable arguments alive.'''
+    import gc
+    import weakref
+    
+    class A(object):
+        __metaclass__ = CachedType
+        def __init__(self, a, b=2, *args, **kwargs):
+            pass
+        
+    class B(object): pass
+    
+    b = B()
+    assert A(b) is A(b, 2) is A(a=b) is not A(B())
+    assert A(1, 2, b) is A(1, 2, b) is not A(1, 2, B())
+    assert A(1, meow=b) is A(1, 2, meow=b) is not A(1, meow=B())
+    assert A([1]) is A([1])
+    
+    b_ref = weakref.ref(b)
+    del b
+    gc.collect()
+    assert b_ref() is None
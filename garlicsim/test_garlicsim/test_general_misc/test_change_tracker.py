@@ -0,0 +1,69 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for `garlicsim.general_misc.change_tracker`.'''
+
+import cPickle
+
+import garlicsim
+from garlicsim.general_misc.change_tracker import ChangeTracker
+from garlicsim.asynchronous_crunching import CrunchingProfile
+
+import garlicsim_lib.simpacks.life
+
+
+class Thing(object):
+    '''An object without a version, which will be tracked by pickle.'''
+    def __init__(self, value):
+        self.value = value
+
+
+def test_pickle_tracking():
+    '''Test tracking objects by pickle.'''
+    change_tracker = ChangeTracker()
+    thing = Thing(1)
+    assert change_tracker.check_in(thing)
+    assert thing in change_tracker
+    assert not change_tracker.check_in(thing)
+    thing.value = 2
+    assert change_tracker.check_in(thing)
+    assert not change_tracker.check_in(thing)
+
+
+def test_version_tracking():
+    '''Test tracking a `CrunchingProfile` by its version.'''
+    project = garlicsim.Project(garlicsim_lib.simpacks.life)
+    crunching_profile = CrunchingProfile(
+        clock_target=10,
+        step_profile=project.build_step_profile()
+    )
+    change_tracker = ChangeTracker()
+    assert change_tracker.check_in(crunching_profile)
+    assert not change_tracker.check_in(crunching_profile)
+
+    version = crunching_profile.version
+    crunching_profile.raise_clock_target(5)
+    assert crunching_profile.version == version
+    assert not change_tracker.check_in(crunching_profile)
+
+    crunching_profile.raise_clock_target(20)
+    assert crunching_profile.version > version
+    assert change_tracker.check_in(crunching_profile)
+    assert not change_tracker.check_in(crunching_profile)
+
+    crunching_profile.clock_target = 30
+    assert change_tracker.check_in(crunching_profile)
+    assert not change_tracker.check_in(crunching_profile)
+
+    crunching_profile.step_profile = project.build_step_profile()
+    assert change_tracker.check_in(crunching_profile)
+
+    # A profile pickled without `.version` is tracked by pickle:
+    old_crunching_profile = cPickle.loads(cPickle.dumps(crunching_profile, 2))
+    del old_crunching_profile.__dict__['version']
+    assert change_tracker.check_in(old_crunching_profile)
+    assert not change_tracker.check_in(old_crunching_profile)
+    old_crunching_profile.clock_target = 40
+    assert old_crunching_profile.version == 1
+    assert change_tracker.check_in(old_crunching_profile)
+
@@ -0,0 +1,52 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+Testing module for `garlicsim.general_misc.cute_profile.SamplingProfiler`.
+'''
+
+import cPickle
+
+from garlicsim.general_misc import cute_profile
+
+from .test_cute_profile import func
+
+
+def test():
+    '''Test that `SamplingProfiler` profiles only in its windows.'''
+    sampling_profiler = cute_profile.SamplingProfiler(window_size=3, period=2)
+    stats_dicts = []
+    for i in range(12):
+        sampling_profiler.before_call()
+        func(1, 2)
+        stats_dict = sampling_profiler.after_call()
+        if stats_dict is not None:
+            stats_dicts.append(stats_dict)
+        
+    assert len(stats_dicts) == 2
+    assert sampling_profiler.flush() is None
+    
+    # Raw stats `dict`s must survive pickling to be sent between processes:
+    stats_dicts = [cPickle.loads(cPickle.dumps(stats_dict, 2)) for
+                   stats_dict in stats_dicts]
+    
+    stats = cute_profile.make_stats(*stats_dicts)
+    ((func_key, func_stats),) = \
+        [(key, value) for (key, value) in stats.stats.iteritems() if
+         key[2] == 'func']
+    (primitive_calls, total_calls) = func_stats[:2]
+    assert total_calls == 6
+    
+    cute_profile.add_stats(stats, stats_dicts[0])
+    assert stats.stats[func_key][1] == 9
+
+    
+def test_partial_window():
+    '''Test flushing a window that wasn't completed.'''
+    sampling_profiler = cute_profile.SamplingProfiler(window_size=10)
+    sampling_profiler.before_call()
+    func(1, 2)
+    assert sampling_profiler.after_call() is None
+    stats = cute_profile.make_stats(sampling_profiler.flush())
+    assert [key for key in stats.stats if key[2] == 'func']
+    assert sampling_profiler.flush() is None
@@ -0,0 +1,96 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+Testing module for `garlicsim.general_misc.persistent.channel_pickling`.
+'''
+
+import cPickle
+
+from garlicsim.general_misc import cute_testing
+
+from garlicsim.general_misc.persistent import (CrossProcessPersistent,
+                                               ChannelPickler,
+                                               ChannelUnpickler)
+
+
+class LookupTable(CrossProcessPersistent):
+    '''A heavy, read-only object.'''
+    def __init__(self, size):
+        self.values = range(size)
+
+
+class Message(object):
+    '''A message that refers to some persistents.'''
+    def __init__(self, *things):
+        self.things = things
+
+
+def test():
+    '''Test that persistents are sent in full only once.'''
+    channel_pickler = ChannelPickler()
+    channel_unpickler = ChannelUnpickler()
+    lookup_table = LookupTable(1000)
+    other_lookup_table = LookupTable(1000)
+
+    first_pickle = channel_pickler.dumps(Message(lookup_table, lookup_table))
+    second_pickle = channel_pickler.dumps(Message(lookup_table))
+    assert len(second_pickle) < len(first_pickle) / 10
+    third_pickle = channel_pickler.dumps(
+        Message(lookup_table, other_lookup_table)
+    )
+    assert len(third_pickle) > len(first_pickle) * 0.9
+
+    first_message = channel_unpickler.loads(first_pickle)
+    (first_table, also_first_table) = first_message.things
+    assert first_table.values == range(1000)
+    assert first_table is also_first_table
+    (second_table,) = channel_unpickler.loads(second_pickle).things
+    assert second_table is first_table
+    (third_table, fourth_table) = channel_unpickler.loads(third_pickle).things
+    assert third_table is first_table
+    assert fourth_table.values == range(1000)
+    assert fourth_table.has_same_uuid_as(other_lookup_table)
+
+    # The unpickler keeps the persistents alive:
+    del first_message, first_table, also_first_table, second_table, \
+        third_table
+    (table,) = channel_unpickler.loads(second_pickle).things
+    assert table.values == range(1000)
+
+
+def test_unknown_persistent():
+    '''Test that an unpickler can't resolve another channel's persistents.'''
+    channel_pickler = ChannelPickler()
+    lookup_table = LookupTable(10)
+    channel_pickler.dumps(lookup_table)
+    with_token_only = channel_pickler.dumps(Message(lookup_table))
+    with cute_testing.RaiseAssertor(cPickle.UnpicklingError):
+        ChannelUnpickler().loads(with_token_only)
+
+
+def test_failed_pickling():
+    '''Test that a message that failed to pickle doesn't count as sent.'''
+    channel_pickler = ChannelPickler()
+    channel_unpickler = ChannelUnpickler()
+    lookup_table = LookupTable(10)
+    with cute_testing.RaiseAssertor(Exception):
+        channel_pickler.dumps(Message(lookup_table, lambda: None))
+    assert not channel_pickler.sent_uuids
+    (table,) = channel_unpickler.loads(
+        channel_pickler.dumps(Message(lookup_table))
+    ).things
+    assert table is lookup_table
+
+
+def test_self_reference():
+    '''Test sending a persistent that refers to itself.'''
+    channel_pickler = ChannelPickler()
+    channel_unpickler = ChannelUnpickler()
+    lookup_table = LookupTable(10)
+    lookup_table.itself = lookup_table
+    table = channel_unpickler.loads(channel_pickler.dumps(lookup_table))
+    assert table.itself is table
+    assert channel_unpickler.loads(channel_pickler.dumps(lookup_table)) is \
+           table
+
@@ -0,0 +1,134 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for `garlicsim.general_misc.read_write_lock`.'''
+
+from __future__ import with_statement
+
+import threading
+
+from garlicsim.general_misc import cute_testing
+
+from garlicsim.general_misc.read_write_lock import ReadWriteLock
+
+
+def _run_in_thread(function):
+    '''Run `function` in another thread, returning its exception or `None`.'''
+    result = []
+    def target():
+        try:
+            function()
+        except Exception, exception:
+            result.append(exception)
+        else:
+            result.append(None)
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    (exception,) = result
+    return exception
+
+
+def test_reentrance():
+    '''Test that both kinds of locks can be acquired again by their holder.'''
+    lock = ReadWriteLock()
+    assert not lock.is_held()
+
+    with lock.read:
+        with lock.read:
+            assert lock.is_held()
+        assert lock.is_held()
+    assert not lock.is_held()
+
+    with lock.write:
+        with lock.read:
+            with lock.write:
+                assert lock.is_held()
+        assert lock.is_held()
+    assert not lock.is_held()
+
+    with cute_testing.RaiseAssertor(ValueError):
+        lock.release()
+
+
+def test_exclusion():
+    '''Test that writers exclude everyone, and readers exclude writers.'''
+    lock = ReadWriteLock()
+
+    def acquire_and_release_read():
+        lock.acquireRead(timeout=0.05)
+        lock.release()
+
+    def acquire_and_release_write():
+        lock.acquireWrite(timeout=0.05)
+        lock.release()
+
+    with lock.read:
+        assert _run_in_thread(acquire_and_release_read) is None
+        assert isinstance(_run_in_thread(acquire_and_release_write),
+                          RuntimeError)
+
+    with lock.write:
+        assert isinstance(_run_in_thread(acquire_and_release_read),
+                          RuntimeError)
+        assert isinstance(_run_in_thread(acquire_and_release_write),
+                          RuntimeError)
+
+    assert _run_in_thread(acquire_and_release_read) is None
+    assert _run_in_thread(acquire_and_release_write) is None
+
+
+def test_upgrade():
+    '''Test that a reader can upgrade to a writer.'''
+    lock = ReadWriteLock()
+
+    def acquire_and_release_read():
+        lock.acquireRead(timeout=0.05)
+        lock.release()
+
+    with lock.read:
+        with lock.read:
+            with lock.write:
+                assert isinstance(_run_in_thread(acquire_and_release_read),
+                                  RuntimeError)
+            # After an upgrade we're still a writer until we release
+            # everything:
+            assert isinstance(_run_in_thread(acquire_and_release_read),
+                              RuntimeError)
+    assert not lock.is_held()
+    assert _run_in_thread(acquire_and_release_read) is None
+
+
+def test_writers_preferred():
+    '''Test that new readers wait for pending writers.'''
+    lock = ReadWriteLock()
+    events = []
+    writer_is_pending = threading.Event()
+
+    def write():
+        writer_is_pending.set()
+        with lock.write:
+            events.append('write')
+
+    def read():
+        with lock.read:
+            events.append('read')
+
+    lock.acquireRead()
+    writer = threading.Thread(target=write)
+    writer.start()
+    writer_is_pending.wait()
+    while not lock._n_pending_writers:
+        pass
+
+    # We already hold a read lock, so we may acquire another one:
+    with lock.read:
+        pass
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    lock.release()
+    writer.join()
+    reader.join()
+
+    assert events == ['write', 'read']
@@ -0,0 +1,40 @@
+import garlicsim.data_structures
+import garlicsim.misc
+
+
+END = 50
+
+
+class State(garlicsim.data_structures.State):
+
+    def __init__(self, x=0):
+        self.x = x
+
+    def step(self):
+        if self.x >= END:
+            raise garlicsim.misc.WorldEnded
+        return State(self.x + 1)
+
+    def step_many(self, n):
+        State.n_multi_step_calls += 1
+        if self.x + n > END:
+            raise garlicsim.misc.WorldEnded
+        return State(self.x + n)
+
+    def inplace_step(self):
+        if self.x >= END:
+            raise garlicsim.misc.WorldEnded
+        self.x += 1
+
+    def inplace_step_many(self, n):
+        State.n_multi_step_calls += 1
+        if self.x + n > END:
+            self.x = END
+            raise garlicsim.misc.WorldEnded
+        self.x += n
+
+    n_multi_step_calls = 0
+
+    @staticmethod
+    def create_root():
+        return State()
@@ -0,0 +1,89 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for multi-step functions.'''
+
+import time
+
+import garlicsim
+from garlicsim.misc.simpack_grokker.step_type import StepType
+
+from . import simpack
+from .simpack import State
+
+
+def test_grokking():
+    '''Test that the simpack grokker finds the multi-step functions.'''
+    simpack_grokker = garlicsim.misc.SimpackGrokker(simpack)
+    assert simpack_grokker.multi_step_functions == {
+        State.step: State.step_many,
+        State.inplace_step: State.inplace_step_many,
+    }
+    assert StepType.get_step_type(State.step_many) is None
+    
+    # The step iterators get the multi-step functions from the grokker:
+    state = State.create_root()
+    for step_function in (State.step, State.inplace_step):
+        step_iterator = simpack_grokker.get_step_iterator(
+            state,
+            garlicsim.misc.StepProfile(step_function)
+        )
+        assert step_iterator.multi_step_function == \
+               simpack_grokker.multi_step_functions[step_function]
+    assert simpack_grokker.get_inplace_step_iterator(
+        state,
+        garlicsim.misc.StepProfile(State.inplace_step)
+    ).multi_step_function == State.inplace_step_many
+    assert len(simpack_grokker.all_step_functions) == 2
+
+
+def test_simulate():
+    '''Test that `simulate` does all the steps with one call.'''
+    root = State.create_root()
+    for step_function in (State.step, State.inplace_step):
+        State.n_multi_step_calls = 0
+        state = garlicsim.simulate(root, 30, step_function)
+        assert State.n_multi_step_calls == 1
+        assert state.x == 30
+        assert state.clock == 30
+        assert root.x == 0
+
+
+def test_world_ended():
+    '''Test multi-step functions when the simulation ends in the middle.'''
+    root = State.create_root()
+    state = garlicsim.simulate(root, 100, State.step)
+    assert state.x == 50
+    assert state.clock == 50
+    state = garlicsim.simulate(root, 100, State.inplace_step)
+    assert state.x == 50
+
+
+def test_stride():
+    '''Test that crunchers skip states according to the stride.'''
+    for step_function in (State.step, State.inplace_step):
+        project = garlicsim.Project(simpack)
+        root = project.root_this_state(State.create_root())
+        job = project.begin_crunching(root, 100, step_function)
+        job.crunching_profile.stride = 10
+        while project.crunching_manager.jobs:
+            project.sync_crunchers()
+            time.sleep(0.01)
+        (leaf,) = root.get_all_leaves().keys()
+        path = leaf.make_containing_path()
+        assert [state.x for state in path.states()] == [0, 10, 20, 30, 40, 50]
+        assert leaf.ends
+        assert [node.stride for node in list(path)[:-1]] == [1] + [10] * 4
+        
+        # The simulation ends in the middle of a stride, so we don't know how
+        # many steps there are between the last two states:
+        other_root = project.root_this_state(State.create_root())
+        job = project.begin_crunching(other_root, 100, step_function)
+        job.crunching_profile.stride = 15
+        while project.crunching_manager.jobs:
+            project.sync_crunchers()
+            time.sleep(0.01)
+        (other_leaf,) = other_root.get_all_leaves().keys()
+        other_path = other_leaf.make_containing_path()
+        assert [(node.state.x, node.stride) for node in other_path] == \
+               [(0, 1), (15, 15), (30, 15), (45, 15), (50, None)]
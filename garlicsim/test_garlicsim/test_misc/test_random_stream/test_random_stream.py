@@ -0,0 +1,126 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for `RandomStream`.'''
+
+from __future__ import division
+from __future__ import with_statement
+
+import copy
+import cPickle
+import random
+
+from garlicsim.general_misc import random_tools
+from garlicsim.general_misc.temp_value_setters import TempValueSetter
+
+import garlicsim
+from garlicsim.misc import RandomStream
+from garlicsim.misc import random_stream as random_stream_module
+
+
+def test_reproducible():
+    '''Test that streams with the same seed make the same draws.'''
+    stream = RandomStream(7)
+    other_stream = RandomStream(7)
+    draws = [stream.random() for i in xrange(20)]
+    assert [other_stream.random() for i in xrange(20)] == draws
+    assert stream.counter == other_stream.counter == 20
+    assert all(0 <= draw < 1 for draw in draws)
+    assert RandomStream(8).random() != draws[0]
+    assert RandomStream().random() != RandomStream().random()
+
+    stream.seed(7)
+    assert stream.random() == draws[0]
+    stream.jumpahead(5)
+    assert stream.random() == draws[6]
+
+
+def test_batched_draws():
+    '''Test that batched draws are the same as drawing one at a time.'''
+    stream = RandomStream('batched')
+    draws = [stream.random() for i in xrange(30)]
+    stream.seed('batched')
+    assert list(stream.uniforms(3)) == draws[:3]
+    assert list(stream.uniforms(0)) == []
+    assert stream.random() == draws[3]
+    assert list(stream.uniforms(26)) == draws[4:]
+
+    stream.seed('batched')
+    exponentials = stream.exponentials(10, mean=2)
+    stream.seed('batched')
+    assert list(exponentials) == \
+           [stream.expovariate(1 / 2) for i in xrange(10)]
+
+    stream.seed('batched')
+    other_stream = RandomStream('batched')
+    sequence = range(50)
+    random.Random.shuffle.im_func(other_stream, sequence)
+    assert random_tools.shuffled(range(50), stream) == sequence
+    assert stream.counter == other_stream.counter == 49
+
+
+def test_copying():
+    '''Test that copies of a stream continue with the same draws.'''
+    for copy_function in (copy.deepcopy,
+                          lambda x: cPickle.loads(cPickle.dumps(x, 2)),
+                          lambda x: cPickle.loads(cPickle.dumps(x))):
+        stream = RandomStream(3)
+        stream.random()
+        stream.gauss(0, 1)
+        stream_copy = copy_function(stream)
+        assert stream_copy == stream
+        assert stream_copy is not stream
+        assert stream_copy.gauss(0, 1) == stream.gauss(0, 1)
+        assert [stream_copy.random() for i in xrange(10)] == \
+               list(stream.uniforms(10))
+        assert stream_copy.getrandbits(100) == stream.getrandbits(100)
+
+    # Streams are small, and copying them doesn't seed them again:
+    stream = RandomStream(3)
+    assert not hasattr(stream, '__dict__')
+    assert len(cPickle.dumps(stream, 2)) < 100
+    def fail(*args, **kwargs):
+        raise AssertionError
+    with TempValueSetter((random_stream_module.os, 'urandom'), fail):
+        with TempValueSetter((RandomStream, 'seed'), fail):
+            assert copy.deepcopy(stream) == stream
+            assert cPickle.loads(cPickle.dumps(stream, 2)) == stream
+
+
+def test_children():
+    '''Test that child streams depend only on the lineage and labels.'''
+    stream = RandomStream(5)
+    child = stream.get_child()
+    stream.random()
+    assert stream.get_child() == child
+    assert stream.get_child('other') != child
+    assert child.counter == 0
+    assert child.random() != RandomStream(5).random()
+    assert RandomStream(5).get_child().get_child() == \
+           child.get_child()
+
+
+def test_crunchers():
+    '''Test that a simulation gets the same randomness in every cruncher.'''
+    from garlicsim_lib.simpacks import life
+    cruncher_types = garlicsim.Project(life).crunching_manager.\
+        get_available_cruncher_types()
+    states = []
+    for cruncher_type in cruncher_types:
+        project = garlicsim.Project(life)
+        project.crunching_manager.cruncher_type = cruncher_type
+        root = project.root_this_state(
+            life.State.create_messy_root(12, 12, seed=1)
+        )
+        step_profile = project.build_step_profile(randomness=0.5)
+        job = project.begin_crunching(root, 5, step_profile)
+        assert job.wait(timeout=60)
+        path = root.make_containing_path()
+        states.append(list(path.states())[:6])
+    expected_states = \
+        garlicsim.list_simulate(life.State.create_messy_root(12, 12, seed=1),
+                                5, step_profile)
+    assert len(states) >= 2
+    for cruncher_states in states:
+        assert cruncher_states == expected_states
+    assert expected_states[1] != life.State.create_messy_root(12, 12, seed=1)
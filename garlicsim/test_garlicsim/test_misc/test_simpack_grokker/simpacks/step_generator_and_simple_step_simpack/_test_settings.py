@@ -19,4 +19,5 @@ CRUNCHERS_LIST = \
         [garlicsim.asynchronous_crunching.crunchers.ProcessCruncher] if 
         import_tools.exists('multiprocessing')
         else []
-    )
\ No newline at end of file
+    ) + \
+    [garlicsim.asynchronous_crunching.crunchers.RemoteCruncher]
\ No newline at end of file
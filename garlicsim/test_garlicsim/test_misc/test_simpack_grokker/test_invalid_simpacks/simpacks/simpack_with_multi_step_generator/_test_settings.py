@@ -0,0 +1,31 @@
+from garlicsim.general_misc import import_tools
+from garlicsim.general_misc.reasoned_bool import ReasonedBool
+
+import garlicsim
+from garlicsim.misc import InvalidSimpack
+
+from .state import State
+
+
+ENDABLE = False
+PROBLEM = None
+VALID = ReasonedBool(
+    False,
+    reason=InvalidSimpack("The `simpack_with_multi_step_generator` simpack "
+                          "defines `step_generator_many`, but multi-step "
+                          "variants are supported only for simple and inplace "
+                          "step functions, and `step_generator` is a step "
+                          "generator.")
+)
+CONSTANT_CLOCK_INTERVAL = None
+HISTORY_DEPENDENT = False
+N_STEP_FUNCTIONS = 1
+DEFAULT_STEP_FUNCTION = None
+DEFAULT_STEP_FUNCTION_TYPE = None
+CRUNCHERS_LIST = \
+    [garlicsim.asynchronous_crunching.crunchers.ThreadCruncher] + \
+    (
+        [garlicsim.asynchronous_crunching.crunchers.ProcessCruncher] if 
+        import_tools.exists('multiprocessing')
+        else []
+    )
\ No newline at end of file
@@ -0,0 +1,19 @@
+import garlicsim.data_structures
+
+
+class State(garlicsim.data_structures.State):
+    
+    def __init__(self):
+        pass
+    
+    def step_generator(self):
+        while True:
+            yield State()
+    
+    def step_generator_many(self, n):
+        raise NotImplementedError
+        
+    @staticmethod
+    def create_root():
+        return State()
+    
@@ -0,0 +1,106 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+Benchmark for the time it takes to `import garlicsim`.
+
+Every short script and every `ProcessCruncher` worker on platforms that don't
+fork pays this cost, so we keep it within a budget.
+'''
+
+import os.path
+import sys
+import subprocess
+
+import garlicsim
+from garlicsim.bootstrap.bootstrap import SKIP_PREREQUISITE_CHECKS_VARIABLE
+
+
+IMPORT_TIME_BUDGET = 0.5
+'''Seconds that `import garlicsim` may take, not counting the interpreter.'''
+
+N_IMPORTED_MODULES_BUDGET = 60
+'''Number of modules that `import garlicsim` may add to `sys.modules`.'''
+
+
+measuring_script = '''
+import sys
+import time
+n_modules = len(sys.modules)
+start_time = time.time()
+import garlicsim
+print time.time() - start_time
+print len(sys.modules) - n_modules
+print ' '.join(sorted(sys.modules))
+'''
+
+
+def _measure_import():
+    '''
+    Import `garlicsim` in a fresh process.
+
+    Returns the time it took, the number of modules imported, and the names of
+    all the modules in `sys.modules`.
+    '''
+    environment = dict(os.environ)
+    environment[SKIP_PREREQUISITE_CHECKS_VARIABLE] = '1'
+    environment['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(garlicsim.__file__))] +
+        [path for path in environment.get('PYTHONPATH', '').split(os.pathsep)
+         if path]
+    )
+    process = subprocess.Popen([sys.executable, '-c', measuring_script],
+                               stdout=subprocess.PIPE, env=environment)
+    (output, _) = process.communicate()
+    assert process.returncode == 0
+    (import_time, n_imported_modules, module_names) = output.splitlines()
+    return (float(import_time), int(n_imported_modules),
+            module_names.split())
+
+
+def test():
+    '''Test that `import garlicsim` is within the budget.'''
+    # Taking the best of a few runs, to avoid noise from the system:
+    measurements = [_measure_import() for i in range(3)]
+    import_time = min(measurement[0] for measurement in measurements)
+    (_, n_imported_modules, module_names) = measurements[-1]
+
+    assert import_time <= IMPORT_TIME_BUDGET
+    assert n_imported_modules <= N_IMPORTED_MODULES_BUDGET
+
+    # The heavy subpackages are imported only when used:
+    for module_name in ['garlicsim.misc', 'garlicsim.data_structures',
+                        'garlicsim.asynchronous_crunching',
+                        'garlicsim.synchronous_crunching']:
+        assert module_name not in module_names
+
+
+def test_environment_untouched():
+    '''Test that `import garlicsim` doesn't change the environment.'''
+    environment = dict(os.environ)
+    environment.pop(SKIP_PREREQUISITE_CHECKS_VARIABLE, None)
+    environment['PYTHONPATH'] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(garlicsim.__file__))] +
+        [path for path in environment.get('PYTHONPATH', '').split(os.pathsep)
+         if path]
+    )
+    script = ('import os, garlicsim\n'
+              'print os.environ.get(%r)' % SKIP_PREREQUISITE_CHECKS_VARIABLE)
+    process = subprocess.Popen([sys.executable, '-c', script],
+                               stdout=subprocess.PIPE, env=environment)
+    (output, _) = process.communicate()
+    assert process.returncode == 0
+    assert output.strip() == 'None'
+
+
+def test_lazy_attributes():
+    '''Test that lazily-imported attributes are the real objects.'''
+    from garlicsim.asynchronous_crunching import Project
+    from garlicsim.synchronous_crunching import simulate
+    import garlicsim.misc.step_profile
+    assert garlicsim.Project is Project
+    assert garlicsim.simulate is simulate
+    assert garlicsim.misc.StepProfile is \
+           garlicsim.misc.step_profile.StepProfile
+    assert not hasattr(garlicsim, 'no_such_module')
+
@@ -0,0 +1 @@
+MAX_LOOKBACK_STEPS = 3
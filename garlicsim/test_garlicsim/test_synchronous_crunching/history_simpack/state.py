@@ -0,0 +1,22 @@
+import garlicsim.data_structures
+
+
+class State(garlicsim.data_structures.State):
+    
+    def __init__(self, fibonacci=1):
+        self.fibonacci = fibonacci
+
+    @staticmethod
+    def history_step(history_browser, lookback=3):
+        # A Fibonacci-like sequence that sums the state `lookback` states ago
+        # with the last one:
+        last_state = history_browser.get_last_state()
+        try:
+            old_state = history_browser[-lookback]
+        except IndexError:
+            old_state = history_browser[0]
+        return State(last_state.fibonacci + old_state.fibonacci)
+
+    @staticmethod
+    def create_root():
+        return State()
@@ -0,0 +1,25 @@
+import garlicsim.data_structures
+import garlicsim.misc
+
+
+END = 20
+
+
+class State(garlicsim.data_structures.State):
+
+    def __init__(self, x=0):
+        self.x = x
+
+    def step(self):
+        if self.x >= END:
+            raise garlicsim.misc.WorldEnded
+        return State(self.x + 2)
+
+    def inplace_step(self):
+        if self.x >= END:
+            raise garlicsim.misc.WorldEnded
+        self.x += 2
+
+    @staticmethod
+    def create_root():
+        return State()
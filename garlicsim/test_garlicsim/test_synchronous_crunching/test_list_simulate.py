@@ -0,0 +1,63 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for `list_simulate` and `iter_simulate`.'''
+
+from __future__ import with_statement
+
+from garlicsim.general_misc import cute_testing
+from garlicsim.general_misc.infinity import infinity
+
+import garlicsim
+
+from .simpack import State
+
+
+def test_stride():
+    '''Test that `stride` keeps only every `stride`-th state.'''
+    root = State.create_root()
+    for step_function in (State.step, State.inplace_step):
+        states = garlicsim.list_simulate(root, 7, step_function, stride=3)
+        assert [state.clock for state in states] == [0, 3, 6]
+        assert [state.x for state in states] == [0, 6, 12]
+        assert len(set(map(id, states))) == 3
+        assert root.x == 0
+        
+        iter_states = list(garlicsim.iter_simulate(root, 7, step_function,
+                                                   stride=3))
+        assert [state.x for state in iter_states] == [0, 6, 12]
+        
+        # The simulation ends before the states are at a stride's boundary:
+        states = garlicsim.list_simulate(root, 100, step_function, stride=4)
+        assert [state.x for state in states] == [0, 8, 16]
+    
+    with cute_testing.RaiseAssertor(Exception):
+        garlicsim.list_simulate(root, 7, stride=0)
+        
+        
+def test_until():
+    '''Test stopping the simulation with `until`.'''
+    root = State.create_root()
+    for step_function in (State.step, State.inplace_step):
+        states = garlicsim.list_simulate(root, infinity, step_function,
+                                         until=3)
+        assert [state.clock for state in states] == [0, 1, 2, 3]
+        states = garlicsim.list_simulate(root, infinity, step_function,
+                                         until=(lambda state: state.x >= 7),
+                                         stride=2)
+        assert [state.x for state in states] == [0, 4, 8]
+        states = garlicsim.list_simulate(root, 2, step_function, until=10)
+        assert [state.x for state in states] == [0, 2, 4]
+        
+        
+def test_columns():
+    '''Test getting attributes of states in columns.'''
+    root = State.create_root()
+    for step_function in (State.step, State.inplace_step):
+        columns = garlicsim.list_simulate(root, 4, step_function,
+                                          columns=['clock', 'x'])
+        assert columns == {'clock': [0, 1, 2, 3, 4], 'x': [0, 2, 4, 6, 8]}
+        columns = garlicsim.list_simulate(root, infinity, step_function,
+                                          columns=['x'], stride=5)
+        assert columns == {'x': [0, 10, 20]}
+        assert root.x == 0
@@ -0,0 +1,106 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for simulating with a bounded history lookback.'''
+
+from __future__ import with_statement
+
+import time
+
+from garlicsim.general_misc import cute_testing
+from garlicsim.general_misc import binary_search
+
+import garlicsim
+from garlicsim.synchronous_crunching import WindowHistoryBrowser
+
+from . import history_simpack
+
+
+class ClockState(object):
+    '''A stand-in for a state, having only a clock.'''
+    def __init__(self, clock):
+        self.clock = clock
+
+        
+def _get_expected_fibonaccis(n, lookback=3):
+    '''Calculate the sequence that `history_simpack` should produce.'''
+    fibonaccis = [1]
+    for i in range(n):
+        old_fibonacci = fibonaccis[max(-lookback, -len(fibonaccis))]
+        fibonaccis.append(fibonaccis[-1] + old_fibonacci)
+    return fibonaccis
+
+
+def test_history_window():
+    '''Test that a `HistoryWindow` drops states beyond the lookback.'''
+    history_window = garlicsim.misc.HistoryWindow(max_lookback_clock=2.5)
+    for clock in range(10):
+        history_window.append(ClockState(clock))
+    # Keeping clock 6, which is just beyond the lookback:
+    assert [state.clock for state in history_window] == [6, 7, 8, 9]
+    assert history_window.n_dropped_states == 6
+    
+    history_window = garlicsim.misc.HistoryWindow(max_lookback_clock=2.5,
+                                                  max_lookback_steps=5)
+    for clock in range(10):
+        history_window.append(ClockState(clock))
+    assert len(history_window) == 6
+    
+    history_window = garlicsim.misc.HistoryWindow()
+    for clock in range(10):
+        history_window.append(ClockState(clock))
+    assert len(history_window) == 10
+    
+    
+def test_window_history_browser():
+    '''Test the `BaseHistoryBrowser` API of `WindowHistoryBrowser`.'''
+    history_browser = WindowHistoryBrowser(ClockState(0),
+                                           max_lookback_clock=3)
+    for clock in range(1, 10):
+        history_browser.record_state(ClockState(clock))
+    assert len(history_browser) == 10
+    assert history_browser.get_last_state().clock == 9
+    assert history_browser[-1].clock == history_browser[9].clock == 9
+    assert history_browser[-4].clock == history_browser[6].clock == 6
+    assert history_browser.get_state_by_clock(7.4).clock == 7
+    assert history_browser.get_state_by_clock(
+        7.4,
+        rounding=binary_search.HIGH
+    ).clock == 8
+    assert history_browser.get_state_by_clock(100).clock == 9
+    for index in (5, -5):
+        with cute_testing.RaiseAssertor(garlicsim.misc.HistoryLookbackError):
+            history_browser[index]
+    with cute_testing.RaiseAssertor(IndexError):
+        history_browser[-11]
+    with cute_testing.RaiseAssertor(garlicsim.misc.HistoryLookbackError):
+        history_browser.get_state_by_clock(5.5)
+        
+
+def test_simulate():
+    '''Test synchronous simulation of a simpack with a bounded lookback.'''
+    root = history_simpack.State.create_root()
+    expected_fibonaccis = _get_expected_fibonaccis(30)
+    assert garlicsim.simulate(root, 30).fibonacci == expected_fibonaccis[-1]
+    states = garlicsim.list_simulate(root, 30)
+    assert [state.fibonacci for state in states] == expected_fibonaccis
+    assert [state.fibonacci for state in garlicsim.iter_simulate(root, 30)] \
+           == expected_fibonaccis
+    
+    # The step function looks further back than the simpack said it would:
+    with cute_testing.RaiseAssertor(garlicsim.misc.HistoryLookbackError):
+        garlicsim.simulate(root, 30, lookback=5)
+        
+        
+def test_thread_cruncher():
+    '''Test that `ThreadCruncher` keeps all the states within the lookback.'''
+    project = garlicsim.Project(history_simpack)
+    root = project.root_this_state(history_simpack.State.create_root())
+    project.begin_crunching(root, 300)
+    while project.crunching_manager.jobs:
+        project.sync_crunchers()
+        time.sleep(0.01)
+    (leaf,) = root.get_all_leaves().keys()
+    states = leaf.make_containing_path().states()
+    assert [state.fibonacci for state in states] == \
+           _get_expected_fibonaccis(300)
@@ -0,0 +1,7 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Settings module for the `_history_test` simpack'''
+
+
+MAX_LOOKBACK_CLOCK = 20
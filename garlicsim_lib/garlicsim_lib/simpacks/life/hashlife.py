@@ -0,0 +1,417 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `HashlifeBoard` class and its quadtree.
+
+See its documentation for more information.
+'''
+
+import random
+
+import garlicsim
+
+
+MAX_N_NODES = 2 ** 21
+'''
+The number of nodes after which the table of nodes is cleared.
+
+Nodes stay valid after the table is cleared, but new nodes that are equal to
+old ones won't be the same objects, so some computations will be repeated.
+'''
+
+_nodes = {}
+'''The table of nodes, by their quadrants, making equal nodes identical.'''
+
+
+class Node(object):
+    '''
+    A square of cells of size `2 ** level`, in a hash-consed quadtree.
+
+    Nodes are immutable, and they're made only with `get_node` and `get_leaf`,
+    which return the existing node if there's one with the same quadrants.
+    This means that a repetitive pattern is stored once, and that whatever we
+    compute about a node, like its future, is computed once and remembered in
+    its `.results`.
+    '''
+
+    __slots__ = ('level', 'nw', 'ne', 'sw', 'se', 'population', 'results')
+
+    def __init__(self, level, nw, ne, sw, se, population):
+
+        self.level = level
+        '''The node is a square of `2 ** level` by `2 ** level` cells.'''
+
+        (self.nw, self.ne, self.sw, self.se) = (nw, ne, sw, se)
+
+        self.population = population
+        '''The number of live cells in the node.'''
+
+        self.results = {}
+        '''The computed futures of the node's center, by rule and step.'''
+
+
+    def __reduce__(self):
+        if self.level == 0:
+            return (get_leaf, (bool(self.population),))
+        return (get_node, (self.nw, self.ne, self.sw, self.se))
+
+
+    def __copy__(self):
+        return self
+
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+_dead = Node(0, None, None, None, None, 0)
+_alive = Node(0, None, None, None, None, 1)
+_empty_nodes = [_dead]
+
+
+def get_leaf(alive):
+    '''Get the node of a single cell, which is dead or alive.'''
+    return _alive if alive else _dead
+
+
+def get_node(nw, ne, sw, se):
+    '''Get the node with the given quadrants.'''
+    key = (nw, ne, sw, se)
+    try:
+        return _nodes[key]
+    except KeyError:
+        if len(_nodes) >= MAX_N_NODES:
+            _nodes.clear()
+        node = _nodes[key] = Node(
+            nw.level + 1, nw, ne, sw, se,
+            nw.population + ne.population + sw.population + se.population
+        )
+        return node
+
+
+def get_empty_node(level):
+    '''Get the node of size `2 ** level` in which all cells are dead.'''
+    while len(_empty_nodes) <= level:
+        empty_node = _empty_nodes[-1]
+        _empty_nodes.append(get_node(empty_node, empty_node, empty_node,
+                                     empty_node))
+    return _empty_nodes[level]
+
+
+def build_node(level, get_cell, x=0, y=0):
+    '''
+    Build a node of size `2 ** level` from a function of the coordinates.
+
+    `get_cell(x, y)` says whether the cell is alive, and `(x, y)` are the
+    coordinates of the node's top-left cell.
+    '''
+    if level == 0:
+        return get_leaf(get_cell(x, y))
+    half = 1 << (level - 1)
+    return get_node(build_node(level - 1, get_cell, x, y),
+                    build_node(level - 1, get_cell, x + half, y),
+                    build_node(level - 1, get_cell, x, y + half),
+                    build_node(level - 1, get_cell, x + half, y + half))
+
+
+def get_cell(node, x, y):
+    '''Get whether cell `(x, y)` in the node is alive.'''
+    while node.level > 0:
+        if not node.population:
+            return False
+        half = 1 << (node.level - 1)
+        if y < half:
+            if x < half:
+                node = node.nw
+            else:
+                (node, x) = (node.ne, x - half)
+        else:
+            y -= half
+            if x < half:
+                node = node.sw
+            else:
+                (node, x) = (node.se, x - half)
+    return node is _alive
+
+
+def set_cell(node, x, y, alive):
+    '''Get a node like `node` in which cell `(x, y)` is `alive`.'''
+    if node.level == 0:
+        return get_leaf(alive)
+    half = 1 << (node.level - 1)
+    (nw, ne, sw, se) = (node.nw, node.ne, node.sw, node.se)
+    if y < half:
+        if x < half:
+            nw = set_cell(nw, x, y, alive)
+        else:
+            ne = set_cell(ne, x - half, y, alive)
+    else:
+        if x < half:
+            sw = set_cell(sw, x, y - half, alive)
+        else:
+            se = set_cell(se, x - half, y - half, alive)
+    return get_node(nw, ne, sw, se)
+
+
+def nodes_equal(node, other_node):
+    '''
+    Get whether two nodes have the same cells.
+
+    Equal nodes are usually identical, but not after the table of nodes was
+    cleared.
+    '''
+    if node is other_node:
+        return True
+    if node.level != other_node.level or \
+       node.population != other_node.population or node.level == 0:
+        return False
+    return nodes_equal(node.nw, other_node.nw) and \
+           nodes_equal(node.ne, other_node.ne) and \
+           nodes_equal(node.sw, other_node.sw) and \
+           nodes_equal(node.se, other_node.se)
+
+
+def _step_level_2(node, rule):
+    '''Get the center of a 4x4 node after one generation.'''
+    (birth, survival) = rule
+    cells = [[get_cell(node, x, y) for x in xrange(4)] for y in xrange(4)]
+
+    def next_cell(x, y):
+        n_neighbors = sum(cells[y + j][x + i] for i in (-1, 0, 1)
+                          for j in (-1, 0, 1) if i or j)
+        return (n_neighbors in survival) if cells[y][x] else \
+               (n_neighbors in birth)
+
+    return get_node(get_leaf(next_cell(1, 1)), get_leaf(next_cell(2, 1)),
+                    get_leaf(next_cell(1, 2)), get_leaf(next_cell(2, 2)))
+
+
+def _get_center(node):
+    '''Get the center of a node, a node of half its size.'''
+    return get_node(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+
+def step_node(node, step_exponent, rule):
+    '''
+    Get the center of `node` after `2 ** step_exponent` generations.
+
+    The center is a node of half the size of `node`. `step_exponent` may be
+    at most `node.level - 2`, because cells further than that from the center
+    could affect it. `rule` is a tuple `(birth, survival)` of sets of numbers
+    of live neighbors.
+    '''
+    assert 0 <= step_exponent <= node.level - 2
+    key = (rule, step_exponent)
+    try:
+        return node.results[key]
+    except KeyError:
+        pass
+
+    level = node.level
+    if not node.population:
+        result = get_empty_node(level - 1)
+    elif level == 2:
+        result = _step_level_2(node, rule)
+    else:
+        (nw, ne, sw, se) = (node.nw, node.ne, node.sw, node.se)
+        subnodes = (
+            (nw, get_node(nw.ne, ne.nw, nw.se, ne.sw), ne),
+            (get_node(nw.sw, nw.se, sw.nw, sw.ne), _get_center(node),
+             get_node(ne.sw, ne.se, se.nw, se.ne)),
+            (sw, get_node(sw.ne, se.nw, sw.se, se.sw), se),
+        )
+        if step_exponent == level - 2:
+            # Going half the way in the subnodes, and half in their results:
+            first_exponent = second_exponent = level - 3
+            parts = [[step_node(subnode, first_exponent, rule) for subnode in
+                      row] for row in subnodes]
+        else:
+            # Going all the way in the second half:
+            second_exponent = step_exponent
+            parts = [[_get_center(subnode) for subnode in row] for row in
+                     subnodes]
+        quarters = [
+            step_node(get_node(parts[i][j], parts[i][j + 1],
+                               parts[i + 1][j], parts[i + 1][j + 1]),
+                      second_exponent, rule)
+            for (i, j) in ((0, 0), (0, 1), (1, 0), (1, 1))
+        ]
+        result = get_node(*quarters)
+
+    node.results[key] = result
+    return result
+
+
+def step_torus(node, step_exponent, rule):
+    '''
+    Get a torus after `2 ** step_exponent` generations.
+
+    `node` is the torus, in which the right edge touches the left edge and the
+    bottom edge touches the top edge. We tile it into a node big enough for
+    the step, and take the torus from the center of the result.
+    '''
+    tiled_node = node
+    while tiled_node.level < max(node.level, step_exponent) + 2:
+        tiled_node = get_node(tiled_node, tiled_node, tiled_node, tiled_node)
+    result = step_node(tiled_node, step_exponent, rule)
+    # The center starts at a multiple of the torus' size, so its top-left
+    # corner is the torus:
+    while result.level > node.level:
+        result = result.nw
+    return result
+
+
+def _is_power_of_two(number):
+    return number >= 1 and not (number & (number - 1))
+
+
+class HashlifeBoard(object):
+    '''
+    A Life board kept in a hash-consed quadtree, computed with Hashlife.
+
+    `Board` keeps a list of all the cells, and computes every one of them in
+    every generation, which is slow for big boards. `HashlifeBoard` keeps the
+    board as a `Node`, and uses the Hashlife algorithm, which remembers the
+    future of every node that it computed, so empty and repetitive regions
+    cost almost nothing, and it can advance `2 ** step_exponent` generations
+    in one step. Big sparse boards may be advanced thousands of generations in
+    milliseconds.
+
+    The board has the same interface as `Board`, and it wraps around the
+    edges in the same way. Its width and height must be powers of two. If the
+    board has randomness, the generations are computed one by one.
+    '''
+
+    def __init__(self, width=None, height=None, fill='empty', parent=None,
+                 birth=[3], survival=[2, 3], randomness=0, random_=random,
+                 step_exponent=0):
+        '''
+        Constructor.
+
+        If `parent` is specified, makes a board which is descendent from the
+        parent by `2 ** step_exponent` generations. `random_` is the
+        generator to draw randomness from, like a `random.Random` or a state's
+        `RandomStream`.
+        '''
+        if parent:
+            assert width == height == None
+            (self.width, self.height) = (parent.width, parent.height)
+            rule = (frozenset(birth), frozenset(survival))
+            if randomness:
+                node = parent.node
+                for i in xrange(2 ** step_exponent):
+                    node = self._add_randomness(step_torus(node, 0, rule),
+                                                randomness, random_)
+                self.node = node
+            else:
+                self.node = step_torus(parent.node, step_exponent, rule)
+            return
+
+        assert fill in ['empty', 'full', 'random']
+        if not (_is_power_of_two(width) and _is_power_of_two(height)):
+            raise garlicsim.misc.GarlicSimException(
+                "A `HashlifeBoard`'s width and height must be powers of two, "
+                "but they're %s and %s." % (width, height)
+            )
+        (self.width, self.height) = (width, height)
+        level = 0
+        while (1 << level) < max(width, height):
+            level += 1
+
+        if fill == 'empty':
+            self.node = get_empty_node(level)
+        elif fill == 'full':
+            self.node = build_node(level, lambda x, y: True)
+        elif fill == 'random':
+            values = [random_.random() < 0.5 for i in
+                      xrange(width * height)]
+            self.node = build_node(
+                level,
+                lambda x, y: values[(x % width) * height + (y % height)]
+            )
+
+    node = None
+    '''
+    The node of the board.
+
+    If the board isn't square, this is a square of the size of its longer
+    side, in which the board repeats.
+    '''
+
+
+    def _add_randomness(self, node, randomness, random_):
+        '''Make cells in `node` random, like `Board` does.'''
+        from .state import _get_uniforms
+        n_cells = self.width * self.height
+        random_cell_draws = _get_uniforms(random_, n_cells)
+        random_values = _get_uniforms(random_, n_cells)
+        self.node = node
+        for x in xrange(self.width):
+            for y in xrange(self.height):
+                i = x * self.height + y
+                if random_cell_draws[i] <= randomness:
+                    self.set(x, y, random_values[i] < 0.5)
+        return self.node
+
+
+    def get(self, x, y):
+        '''Get the value of cell `(x, y)` in the board.'''
+        return get_cell(self.node, x % self.width, y % self.height)
+
+
+    def set(self, x, y, value):
+        '''
+        Set the value of cell `(x, y)` in the board to the specified value.
+        '''
+        (x, y) = (x % self.width, y % self.height)
+        size = 1 << self.node.level
+        node = self.node
+        for x_copy in xrange(x, size, self.width):
+            for y_copy in xrange(y, size, self.height):
+                node = set_cell(node, x_copy, y_copy, bool(value))
+        self.node = node
+
+
+    def get_n_live_cells(self):
+        '''Get the number of live cells in the board.'''
+        size = 1 << self.node.level
+        n_copies = (size // self.width) * (size // self.height)
+        return self.node.population // n_copies
+
+
+    def __repr__(self):
+        '''Display the board, ASCII-art style.'''
+        cell = lambda x, y: "#" if self.get(x, y) is True else " "
+        row = lambda y: "".join(cell(x, y) for x in xrange(self.width))
+        return "\n".join(row(y) for y in xrange(self.height))
+
+
+    def __eq__(self, other):
+        return isinstance(other, HashlifeBoard) and \
+               (self.width, self.height) == (other.width, other.height) and \
+               nodes_equal(self.node, other.node)
+
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+
+    @staticmethod
+    def create_diehard(width=64, height=32):
+        '''
+        Create the Diehard Metushelah.
+
+        It looks like this:
+
+                   #
+             ##
+              #   ###
+
+        '''
+        board = HashlifeBoard(width, height)
+        (x, y) = (width//2, height//2)
+        for (i, j) in [(6, 0), (0, 1), (1, 1), (1, 2), (5, 2), (6, 2), (7, 2)]:
+            board.set(x + i, y + j, True)
+
+        return board
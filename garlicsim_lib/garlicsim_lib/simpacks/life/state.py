@@ -8,16 +8,33 @@ See its documentation for more information.
 '''
 
 import random
-import itertools
 
 import garlicsim.data_structures
 
+from .hashlife import HashlifeBoard
+
+
+_fallback_seed = 'no parent stream'
+'''The seed of the streams of children of states that have no stream.'''
+
 
 class State(garlicsim.data_structures.State):
     '''World state. A frozen moment in time in the simulation world.'''
+    
+    random_stream = None
+    '''
+    The `RandomStream` from which the board's randomness is drawn.
+    
+    Every state gets a child of its parent's stream, so crunching from a state
+    gives the same boards in every cruncher, and crunching from it again
+    reproduces the same branch. To explore other random outcomes, fork the
+    state by editing and give the fork a new stream. If it's `None`, like in a
+    state that was made by hand, the state's children get streams with a fixed
+    seed, so the simulation is still deterministic.
+    '''
 
     @staticmethod
-    def create_diehard(width=45, height=25):
+    def create_diehard(width=45, height=25, hashlife=False, seed=None):
         '''
         Create the Diehard Metushelah.
         
@@ -27,31 +44,45 @@ class State(garlicsim.data_structures.State):
              ##
               #   ###
 
+        If `hashlife` is `True`, the board is a `HashlifeBoard`, whose width
+        and height must be powers of two. `seed` is the seed of the state's
+        `RandomStream`; if it's `None`, a random seed is used.
         '''
         state = State()
-        state.board = Board.create_diehard(width, height)
+        state.random_stream = garlicsim.misc.RandomStream(seed)
+        board_type = HashlifeBoard if hashlife else Board
+        state.board = board_type.create_diehard(width, height)
         return state
 
     
     @staticmethod
-    def create_root(width=45, height=25, fill='empty'):
+    def create_root(width=45, height=25, fill='empty', seed=None,
+                    hashlife=False):
         '''
         Create a plain and featureless world state.
         
-        `fill` may be either 'empty', 'full', or 'random'.
+        `fill` may be either 'empty', 'full', or 'random'. `seed` is the seed
+        of the state's `RandomStream`; if it's `None`, a random seed is used.
+        If `hashlife` is `True`, the board is a `HashlifeBoard`, whose width
+        and height must be powers of two.
         '''
         state = State()
-        state.board = Board(width, height, fill)
+        state.random_stream = garlicsim.misc.RandomStream(seed)
+        board_type = HashlifeBoard if hashlife else Board
+        state.board = board_type(width, height, fill,
+                                 random_=state.random_stream.get_child('fill'))
         return state
 
     
     @staticmethod
-    def create_messy_root(width=45, height=25):
+    def create_messy_root(width=45, height=25, seed=None, hashlife=False):
         '''Create a state with a random board.'''
-        return State.create_root(width, height, fill='random')
+        return State.create_root(width, height, fill='random', seed=seed,
+                                 hashlife=hashlife)
     
 
-    def step_generator(self, birth=[3], survival=[2, 3], randomness=0):
+    def step_generator(self, birth=[3], survival=[2, 3], randomness=0,
+                       step_exponent=0):
         '''
         Perform a simulation step by yielding the next state every time.
         
@@ -62,18 +93,21 @@ class State(garlicsim.data_structures.State):
         of randomness that should come into the board, e.g. a randomness of
         `0.1` would introduce a random cell once in approximately 10 cells.
         `randomness` may also be given as `False` or `True` for `0` or `1`
-        respectively.
+        respectively. Every step advances `2 ** step_exponent` generations;
+        a `HashlifeBoard` advances many generations about as fast as one.
         '''
         # This isn't really more efficient than regular step; this is just a
         # demonstration that `garlicsim` can handle step generators.
         current_state = self
         while True:
             current_state = current_state.step(birth=birth, survival=survival,
-                                               randomness=randomness)
+                                               randomness=randomness,
+                                               step_exponent=step_exponent)
             yield current_state
     
     
-    def step(self, birth=[3], survival=[2, 3], randomness=0, *args, **kwargs):
+    def step(self, birth=[3], survival=[2, 3], randomness=0, step_exponent=0,
+             *args, **kwargs):
         '''
         Return the next state in time.
         
@@ -84,22 +118,32 @@ class State(garlicsim.data_structures.State):
         of randomness that should come into the board, e.g. a randomness of
         `0.1` would introduce a random cell once in approximately 10 cells.
         `randomness` may also be given as `False` or `True` for `0` or `1`
-        respectively.
+        respectively. Every step advances `2 ** step_exponent` generations;
+        a `HashlifeBoard` advances many generations about as fast as one.
         '''
         old_board = self.board
-        new_board = Board(parent=old_board,
-                          birth=birth,
-                          survival=survival,
-                          randomness=randomness)
+        if self.random_stream is not None:
+            random_stream = self.random_stream.get_child()
+        else:
+            random_stream = garlicsim.misc.RandomStream(_fallback_seed)
+        new_board = type(old_board)(parent=old_board,
+                                    birth=birth,
+                                    survival=survival,
+                                    randomness=randomness,
+                                    random_=random_stream,
+                                    step_exponent=step_exponent)
         new_state = State()
         new_state.board = new_board
+        new_state.random_stream = random_stream
+        if step_exponent and hasattr(self, 'clock'):
+            new_state.clock = self.clock + 2 ** step_exponent
         return new_state
     
     
     @garlicsim.general_misc.caching.cache()
     def get_n_live_cells(self):
         '''Return how many live cells there are in the board.'''
-        return self.board._Board__list.count(True)
+        return self.board.get_n_live_cells()
 
     def __repr__(self):
         return self.board.__repr__()
@@ -112,12 +156,8 @@ class State(garlicsim.data_structures.State):
     
     def __sub__(self, other): # todo: experimental, test
         if isinstance(other, State):
-            return sum(
-                (x-y) for (x, y) in itertools.izip(
-                    self.board._Board__list,
-                    other.board._Board__list
-                )
-            )
+            return self.board.get_n_live_cells() - \
+                   other.board.get_n_live_cells()
                 
         else:
             return NotImplemented
@@ -129,43 +169,54 @@ class Board(object):
     '''A Life board of cells which may be either dead or alive.''' 
     
     def __init__(self, width=None, height=None, fill='empty', parent=None,
-                 birth=[3], survival=[2, 3], randomness=0):
+                 birth=[3], survival=[2, 3], randomness=0, random_=random,
+                 step_exponent=0):
         '''
         Constructor.
         
         If `parent` is specified, makes a board which is descendent from the
-        parent.
+        parent by `2 ** step_exponent` generations. `random_` is the
+        generator to draw randomness from, like a `random.Random` or a state's
+        `RandomStream`.
         '''
         if parent:
             assert width == height == None
+            for i in xrange(2 ** step_exponent - 1):
+                parent = Board(parent=parent, birth=birth, survival=survival,
+                               randomness=randomness, random_=random_)
             self.width, self.height = (parent.width, parent.height)
-            self.__list = [None] * parent.width * parent.height
+            n_cells = parent.width * parent.height
+            self.__list = [None] * n_cells
+            if randomness:
+                # Drawing the randomness of all the cells at once:
+                random_cell_draws = _get_uniforms(random_, n_cells)
+                random_values = _get_uniforms(random_, n_cells)
             for x in xrange(parent.width):
                 for y in xrange(parent.height):
-                    self.set(
-                        x, 
-                        y, 
-                        parent.cell_will_become(x,
-                                                y,
-                                                birth=birth,
-                                                survival=survival,
-                                                randomness=randomness)
-                    )
+                    i = x * parent.height + y
+                    if randomness and random_cell_draws[i] <= randomness:
+                        self.__list[i] = random_values[i] < 0.5
+                    else:
+                        self.__list[i] = parent.cell_will_become(
+                            x,
+                            y,
+                            birth=birth,
+                            survival=survival
+                        )
             return
                 
         assert fill in ['empty', 'full', 'random']
         
+        self.width, self.height = (width, height)
+        n_cells = self.width * self.height
+        
         if fill == 'empty':
-            make_cell = lambda: False
+            self.__list = [False] * n_cells
         elif fill == 'full':
-            make_cell = lambda: True
+            self.__list = [True] * n_cells
         elif fill == 'random':    
-            make_cell = lambda: random.choice([True, False])
-
-        self.width, self.height = (width, height)
-        self.__list = []
-        for i in xrange(self.width*self.height):
-            self.__list.append(make_cell())
+            self.__list = [value < 0.5 for value in
+                           _get_uniforms(random_, n_cells)]
         
     
     def get(self, x, y):
@@ -180,6 +231,11 @@ class Board(object):
         self.__list[ (x%self.width) * self.height + (y%self.height) ] = value
 
         
+    def get_n_live_cells(self):
+        '''Get the number of live cells in the board.'''
+        return self.__list.count(True)
+
+        
     def get_live_neighbors_count(self, x, y):
         '''Get the number of live neighbors a cell has.'''
         result = 0
@@ -247,12 +303,23 @@ class Board(object):
 
 
 
-def determinism_function(step_profile):
-    '''Get determinism class of `step_profile`.'''
-    if step_profile['randomness']:
-        return garlicsim.misc.settings_constants.UNDETERMINISTIC
+def _get_uniforms(random_, n):
+    '''Get `n` random floats from `random_`, in one call if it can do it.'''
+    if isinstance(random_, garlicsim.misc.RandomStream):
+        return random_.uniforms(n)
     else:
-        return garlicsim.misc.settings_constants.DETERMINISTIC
+        return [random_.random() for i in xrange(n)]
+
+
+def determinism_function(step_profile):
+    '''
+    Get determinism class of `step_profile`.
+    
+    Even with `randomness`, the randomness is drawn from the new state's
+    `RandomStream`, which depends only on the old state, so every step profile
+    is deterministic.
+    '''
+    return garlicsim.misc.settings_constants.DETERMINISTIC
 
 
    
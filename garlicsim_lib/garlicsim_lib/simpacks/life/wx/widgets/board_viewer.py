@@ -36,6 +36,14 @@ class BoardViewer(scrolled.ScrolledPanel,
         
         self._buffer_bitmap = wx.EmptyBitmap(1, 1)
         
+        self._buffer_viewport = None
+        '''
+        The unscrolled position and size of the area in the buffer bitmap.
+        
+        We draw only the cells which are in the client area, so huge boards,
+        like big `HashlifeBoard`s, are drawn as fast as small ones.
+        '''
+        
         self.gui_project.active_node_changed_emitter.add_output(
             lambda: self.set_state(self.gui_project.get_active_state())
         )
@@ -84,32 +92,53 @@ class BoardViewer(scrolled.ScrolledPanel,
             return (1, 1)
 
         
+    def _get_viewport(self):
+        '''Get the unscrolled position and size of the client area.'''
+        return (tuple(self.CalcUnscrolledPosition(0, 0)),
+                tuple(self.GetClientSize()))
+
+    
     def _draw_buffer_bitmap(self):
-        '''Draw the buffer bitmap, which `on_paint` will draw to the screen.'''
+        '''
+        Draw the buffer bitmap, which `on_paint` will draw to the screen.
+        
+        Only the cells which are in the client area are drawn.
+        '''
         
         board = self.board
         
         (w, h) = self._get_size_from_board()
-        self._buffer_bitmap = wx.EmptyBitmap(w, h)
+        self._buffer_viewport = ((x0, y0), (client_w, client_h)) = \
+            self._get_viewport()
+        self._buffer_bitmap = wx.EmptyBitmap(max(client_w, 1),
+                                             max(client_h, 1))
         
         dc = wx.MemoryDC(self._buffer_bitmap)
         
+        dc.SetBackground(wx_tools.get_background_brush())
+        dc.Clear()
         
         dc.SetPen(wx.TRANSPARENT_PEN)
         dc.SetBrush(wx.Brush('#d4d0c8'))
-        dc.DrawRectangle(0, 0, w, h)
+        dc.DrawRectangle(-x0, -y0, w, h)
         
         if board is None:
             return
         
+        cell_size = self.square_size + self.border_width
+        x_range = xrange(max(x0 // cell_size, 0),
+                         min((x0 + client_w) // cell_size + 1, board.width))
+        y_range = xrange(max(y0 // cell_size, 0),
+                         min((y0 + client_h) // cell_size + 1, board.height))
+        
         white_brush = wx.Brush('White')
         black_brush = wx.Brush('Black')
         rectangles = []
         brushes = []
-        for x in xrange(board.width):
-            for y in xrange(board.height):
-                rectangles.append([(self.square_size + self.border_width) * x,
-                                   (self.square_size + self.border_width) * y,
+        for x in x_range:
+            for y in y_range:
+                rectangles.append([cell_size * x - x0,
+                                   cell_size * y - y0,
                                    self.square_size,
                                    self.square_size])
                 brushes.append(black_brush if board.get(x,y) is True
@@ -128,7 +157,8 @@ class BoardViewer(scrolled.ScrolledPanel,
         (w, h) = self._get_size_from_board()
         self.SetVirtualSize((w, h))
         
-        if self.redraw_needed_flag is True:
+        if self.redraw_needed_flag is True or \
+           self._buffer_viewport != self._get_viewport():
             self._draw_buffer_bitmap()
             self.redraw_needed_flag = False
                 
@@ -137,8 +167,7 @@ class BoardViewer(scrolled.ScrolledPanel,
         dc.SetBackground(wx_tools.get_background_brush())
         dc.Clear()
         
-        dc.DrawBitmapPoint(self._buffer_bitmap,
-                           self.CalcScrolledPosition((0, 0)))
+        dc.DrawBitmapPoint(self._buffer_bitmap, (0, 0))
         
                 
         
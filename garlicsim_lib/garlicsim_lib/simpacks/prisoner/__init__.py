@@ -36,6 +36,7 @@ distribution of the population into different player types changes over time.
 
 from .state import State
 from .base_player import BasePlayer
+from .population import Population
 
 name = "Prisoner's Dilemma"
 
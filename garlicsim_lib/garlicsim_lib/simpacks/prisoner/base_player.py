@@ -14,6 +14,17 @@ from garlicsim.general_misc import identities
 from .player_type import PlayerType
 
 
+PAYOFF_MATRIX = (((-1, -1), (2, -4)),
+                 ((-4, 2), (1, 1)))
+'''
+The points gained by the two players, indexed by their moves.
+
+`PAYOFF_MATRIX[player_1_move][player_2_move]` is a tuple of the points that
+`player_1` and `player_2` gain, where a move of `True` (or `1`) is "be nice"
+and `False` (or `0`) is "be mean".
+'''
+
+
 class BasePlayer(identities.HasIdentity):
     '''
     A player that plays prisoner's dilemma, gaining and losing points.
@@ -79,25 +90,10 @@ class BasePlayer(identities.HasIdentity):
         assert isinstance(player_1_move, bool)
         assert isinstance(player_2_move, bool)
     
-        ### Calculating outcome of game in points for each player: ############
-        #                                                                     #
-        if player_1_move is True and player_2_move is True:
-            player_1.points += 1
-            player_2.points += 1
-            
-        elif player_1_move is True and player_2_move is False:
-            player_1.points += -4
-            player_2.points += 2
-            
-        elif player_1_move is False and player_2_move is True:
-            player_1.points += 2
-            player_2.points += -4
-            
-        elif player_1_move is False and player_2_move is False:
-            player_1.points += -1
-            player_2.points += -1
-        #                                                                     #
-        ### Finished calculating outcome of game in points for each player. ###
+        (player_1_gain, player_2_gain) = \
+            PAYOFF_MATRIX[player_1_move][player_2_move]
+        player_1.points += player_1_gain
+        player_2.points += player_2_gain
     
         player_1.other_player_played(player_2_move)
         player_2.other_player_played(player_1_move)
\ No newline at end of file
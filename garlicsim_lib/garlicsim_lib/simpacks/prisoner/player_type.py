@@ -26,9 +26,14 @@ class PlayerType(abc.ABCMeta):
     
     
     @staticmethod
-    def create_player_of_random_type():
-        '''Create a player of a random player type.'''
+    def create_player_of_random_type(random_=random):
+        '''
+        Create a player of a random player type.
+        
+        `random_` is the `random.Random` instance to use; by default it's the
+        `random` module's global one.
+        '''
         from .players import player_types_list
-        player_type = random.choice(player_types_list)
+        player_type = random_.choice(player_types_list)
         return player_type()
         
\ No newline at end of file
@@ -0,0 +1,280 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+This module defines the `Population` class.
+
+See its documentation for more information.
+'''
+
+import array
+import itertools
+import random
+
+from garlicsim.general_misc import random_tools
+
+from .base_player import BasePlayer, PAYOFF_MATRIX
+from .players import Angel, Devil, TitForTat, player_types_list
+
+
+builtin_player_types = (Angel, Devil, TitForTat)
+'''The player types that a `Population` keeps as strategy codes.'''
+
+CUSTOM_CODE = -1
+'''The strategy code of players that are kept as Python objects.'''
+
+_builtin_codes = dict((player_type, code) for (code, player_type) in
+                      enumerate(builtin_player_types))
+
+_fixed_moves = (1, 0, None)
+'''
+The move of every built-in strategy, by code.
+
+`None` means that the player plays the last move of its opponent, which is 1
+on the first round of the match.
+'''
+
+
+class Population(object):
+    '''
+    An array-backed pool of players, for tournaments with many players.
+
+    `State` keeps its players as a list of `BasePlayer` objects by default, and
+    every game calls their methods, which is too slow for a hundred thousand
+    players. A `Population` keeps the players of the built-in types, `Angel`,
+    `Devil` and `TitForTat`, as a strategy code, a last move and points in
+    arrays, and plays a round by looking up the payoffs of every pair in
+    `PAYOFF_MATRIX`. It counts the players of every type as they're added and
+    removed, so `get_n_players_of_given_type` doesn't scan the players.
+
+    Players of other types are kept as objects in `.custom_players`, and their
+    games call their methods like `BasePlayer.play_game` does, so any player
+    type may join a population.
+
+    Players are identified by their index. Use `get_player` to get a player
+    object; for built-in types it's a new player with the same points.
+    '''
+
+    def __init__(self, players=()):
+        '''
+        Constructor.
+
+        `players` is a list of players, i.e. instances of `BasePlayer`.
+        Players of built-in types are converted to codes.
+        '''
+
+        self.strategy_codes = array.array('b')
+        '''The strategy code of every player, or `CUSTOM_CODE`.'''
+
+        self.last_moves = array.array('b')
+        '''
+        The last move of every player's opponent in this match.
+
+        It's 1 before the first round, so a `TitForTat` plays nice.
+        '''
+
+        self.points = array.array('l')
+        '''The number of points that every player has.'''
+
+        self.custom_players = {}
+        '''Players of types that don't have a code, by index.'''
+
+        self.type_counts = {}
+        '''The number of players of every player type.'''
+
+        self.firsts = array.array('l')
+        '''The index of the first player in every pair of this match.'''
+
+        self.seconds = array.array('l')
+        '''The index of the second player in every pair of this match.'''
+
+        for player in players:
+            self.add_player(player)
+
+
+    @staticmethod
+    def create_from_player_types(player_types):
+        '''
+        Create a population with a new player of every type in `player_types`.
+
+        This doesn't create objects for players of built-in types, so it's
+        fast for big populations.
+        '''
+        population = Population()
+        for player_type in player_types:
+            population.add_player(player_type)
+        return population
+
+
+    def __len__(self):
+        return len(self.strategy_codes)
+
+
+    def __iter__(self):
+        return itertools.imap(self.get_player, xrange(len(self)))
+
+
+    def add_player(self, player):
+        '''
+        Add a player to the population. Returns its index.
+
+        `player` is a player or a player type, in which case a new player of
+        that type is added.
+        '''
+        self.strategy_codes.append(CUSTOM_CODE)
+        self.last_moves.append(1)
+        self.points.append(0)
+        index = len(self.strategy_codes) - 1
+        self.set_player(index, player)
+        return index
+
+
+    def set_player(self, index, player):
+        '''
+        Put a player at `index`, replacing the player that was there.
+
+        `player` is a player or a player type, in which case a new player of
+        that type is put.
+        '''
+        old_player_type = self.get_player_type(index)
+        if old_player_type is not None:
+            self.type_counts[old_player_type] -= 1
+            if not self.type_counts[old_player_type]:
+                del self.type_counts[old_player_type]
+        self.custom_players.pop(index, None)
+
+        if isinstance(player, BasePlayer):
+            player_type = type(player)
+            points = player.points
+        else:
+            player_type = player
+            points = 0
+
+        if player_type in _builtin_codes:
+            self.strategy_codes[index] = _builtin_codes[player_type]
+            last_play = getattr(player, 'last_play', None)
+            self.last_moves[index] = 1 if last_play is None else last_play
+        else:
+            if not isinstance(player, BasePlayer):
+                player = player_type()
+            self.strategy_codes[index] = CUSTOM_CODE
+            self.custom_players[index] = player
+            self.last_moves[index] = 1
+        self.points[index] = points
+        self.type_counts[player_type] = \
+            self.type_counts.get(player_type, 0) + 1
+
+
+    def get_player_type(self, index):
+        '''
+        Get the type of the player at `index`.
+
+        Returns `None` for an index that was added but not set yet.
+        '''
+        code = self.strategy_codes[index]
+        if code != CUSTOM_CODE:
+            return builtin_player_types[code]
+        elif index in self.custom_players:
+            return type(self.custom_players[index])
+        else:
+            return None
+
+
+    def get_player(self, index):
+        '''
+        Get the player at `index`.
+
+        For a custom player this is the player itself; for a built-in type this
+        is a new player with the same points.
+        '''
+        if index in self.custom_players:
+            return self.custom_players[index]
+        player = builtin_player_types[self.strategy_codes[index]]()
+        player.points = self.points[index]
+        return player
+
+
+    def pair_players(self, random_=random):
+        '''
+        Partition the players into pairs randomly, for a new match.
+        
+        `random_` is the `random.Random` instance to use.
+        '''
+        pairs = random_tools.random_partition(range(len(self)), 2,
+                                              random_=random_)
+        (firsts, seconds) = zip(*pairs) if pairs else ((), ())
+        self.firsts = array.array('l', firsts)
+        self.seconds = array.array('l', seconds)
+        self.last_moves = array.array('b', [1]) * len(self)
+
+
+    def play_round(self, round):
+        '''
+        Have every pair play against each other.
+
+        `round` is the round number in the match, starting with 0.
+        '''
+        strategy_codes = self.strategy_codes
+        last_moves = self.last_moves
+        points = self.points
+        for (i, j) in itertools.izip(self.firsts, self.seconds):
+            i_code = strategy_codes[i]
+            j_code = strategy_codes[j]
+            if i_code == CUSTOM_CODE or j_code == CUSTOM_CODE:
+                self._play_custom_game(i, j, round)
+                continue
+            i_move = _fixed_moves[i_code]
+            if i_move is None:
+                i_move = last_moves[i]
+            j_move = _fixed_moves[j_code]
+            if j_move is None:
+                j_move = last_moves[j]
+            (i_gain, j_gain) = PAYOFF_MATRIX[i_move][j_move]
+            points[i] += i_gain
+            points[j] += j_gain
+            last_moves[i] = j_move
+            last_moves[j] = i_move
+
+
+    def _play_custom_game(self, i, j, round):
+        '''Play a game in which at least one of the players is custom.'''
+        moves = []
+        for index in (i, j):
+            if index in self.custom_players:
+                move = self.custom_players[index].make_move(round)
+                assert isinstance(move, bool)
+                moves.append(int(move))
+            else:
+                move = _fixed_moves[self.strategy_codes[index]]
+                moves.append(self.last_moves[index] if move is None else move)
+        (i_move, j_move) = moves
+        (i_gain, j_gain) = PAYOFF_MATRIX[i_move][j_move]
+        for (index, gain, other_move) in ((i, i_gain, j_move),
+                                          (j, j_gain, i_move)):
+            self.points[index] += gain
+            self.last_moves[index] = other_move
+            if index in self.custom_players:
+                player = self.custom_players[index]
+                player.points = self.points[index]
+                player.other_player_played(bool(other_move))
+
+
+    def get_index_with_least_points(self):
+        '''Get the index of the player which has the least points.'''
+        return self.points.index(min(self.points))
+
+
+    def replace_player_with_least_points(self, random_=random):
+        '''
+        Replace the player with the least points with a random player.
+        
+        `random_` is the `random.Random` instance to use.
+        '''
+        self.set_player(self.get_index_with_least_points(),
+                        random_.choice(player_types_list))
+
+
+    def get_n_players_of_given_type(self, player_type):
+        '''Get the number of players of the type `player_type`.'''
+        return sum(n for (type_, n) in self.type_counts.iteritems()
+                   if issubclass(type_, player_type))
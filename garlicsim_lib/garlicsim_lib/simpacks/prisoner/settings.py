@@ -1,4 +1,9 @@
 # Copyright 2009-2011 Ram Rachum.
 # This program is distributed under the LGPL2.1 license.
 
-'''Settings modules for the `prisoner` simpack.'''
\ No newline at end of file
+'''Settings modules for the `prisoner` simpack.'''
+
+
+from .state import determinism_function
+
+DETERMINISM_FUNCTION = determinism_function
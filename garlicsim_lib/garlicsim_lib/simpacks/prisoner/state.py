@@ -19,19 +19,26 @@ import garlicsim.data_structures
 from .player_type import PlayerType
 from .base_player import BasePlayer
 from .players import player_types_list
+from .population import Population
 
 
+_fallback_seed = 'no stream'
+'''The seed of the stream given to states that have no stream.'''
+
 class State(garlicsim.data_structures.State):
     '''World state. A frozen moment in time in the simulation world.'''
     
-    def __init__(self, players, round=-1, match=0, n_rounds=7):
+    def __init__(self, players, round=-1, match=0, n_rounds=7,
+                 random_stream=None):
         '''
         Constructor.
         
         `players` is a list of players, i.e. instances of `BasePlayer`, that
-        will play against each other. `round` is the round number, with `-1`
-        being the preparation pseudo-round. `match` is the match number.
-        `n_rounds` is the number of rounds in a match.
+        will play against each other, or a `Population`. `round` is the round
+        number, with `-1` being the preparation pseudo-round. `match` is the
+        match number. `n_rounds` is the number of rounds in a match.
+        `random_stream` is the `RandomStream` for pairing and replacing
+        players; if it's `None`, one with a fixed seed is made when needed.
         '''
         
         assert -1 <= round <= (n_rounds - 1)
@@ -47,35 +54,76 @@ class State(garlicsim.data_structures.State):
         self.match = match
         '''The match number, going from `0` to infinity.'''
         
-        assert all(isinstance(player, BasePlayer) for player in players)
+        assert isinstance(players, Population) or \
+               all(isinstance(player, BasePlayer) for player in players)
         self.players = players
-        '''The list of players that play against each other.'''
+        '''
+        The players that play against each other.
+        
+        This is either a list of players or a `Population`, which is much
+        faster for many players.
+        '''
         
         assert n_rounds >= 1
         self.n_rounds = n_rounds
         '''The number of rounds in a match.'''
         
+        self.random_stream = random_stream
+        '''
+        The `RandomStream` from which pairings and new players are drawn.
+        
+        It's copied with the state, so crunching from a state gives the same
+        simulation in every cruncher, and crunching from it again reproduces
+        the same branch. To explore other random outcomes, fork the state by
+        editing and give the fork a new stream. If it's `None`, like in a state
+        that was made by hand, the next match gives the state a stream with a
+        fixed seed, so the simulation is still deterministic.
+        '''
+        
     
     @staticmethod
-    def create_root(n_players=70, n_rounds=7):
-        '''Create a plain and featureless world state.'''
+    def create_root(n_players=70, n_rounds=7, vectorized=False, seed=None):
+        '''
+        Create a plain and featureless world state.
+        
+        If `vectorized` is set to `True`, the players will be kept in a
+        `Population`. `seed` is the seed of the state's `RandomStream`; if
+        it's `None`, a random seed is used.
+        '''
+        player_types = [player_types_list[i % len(player_types_list)] for i
+                        in xrange(n_players)]
         state = State(
-            players=[player_types_list[i % len(player_types_list)]() for i
-                     in xrange(n_players)],
-            n_rounds=n_rounds
+            players=Population.create_from_player_types(player_types) if
+                    vectorized else
+                    [player_type() for player_type in player_types],
+            n_rounds=n_rounds,
+            random_stream=garlicsim.misc.RandomStream(seed)
         )
         state._prepare_for_new_match(replace_loser=False)
         return state
     
     
     @staticmethod
-    def create_messy_root(n_players=70, n_rounds=7):
-        '''Create a random and messy world state.'''
-        state = State(
-            players=[PlayerType.create_player_of_random_type() for i
-                     in xrange(n_players)],
-            n_rounds=n_rounds
-        )
+    def create_messy_root(n_players=70, n_rounds=7, vectorized=False,
+                          seed=None):
+        '''
+        Create a random and messy world state.
+        
+        If `vectorized` is set to `True`, the players will be kept in a
+        `Population`. `seed` is the seed of the state's `RandomStream`; if
+        it's `None`, a random seed is used.
+        '''
+        random_stream = garlicsim.misc.RandomStream(seed)
+        if vectorized:
+            players = Population.create_from_player_types(
+                [random_stream.choice(player_types_list) for i in
+                 xrange(n_players)]
+            )
+        else:
+            players = [PlayerType.create_player_of_random_type(random_stream)
+                       for i in xrange(n_players)]
+        state = State(players=players, n_rounds=n_rounds,
+                      random_stream=random_stream)
         state._prepare_for_new_match(replace_loser=False)
         return state
     
@@ -92,6 +140,10 @@ class State(garlicsim.data_structures.State):
             self._prepare_for_new_match()
             return
     
+        if isinstance(self.players, Population):
+            self.players.play_round(self.round)
+            return
+            
         for player_1, player_2 in self.player_pairs:
             BasePlayer.play_game(player_1, player_2, self.round)
     
@@ -110,21 +162,50 @@ class State(garlicsim.data_structures.State):
         '''
         assert self.round == -1
         
+        if getattr(self, 'random_stream', None) is None:
+            self.random_stream = garlicsim.misc.RandomStream(_fallback_seed)
+        random_ = self.random_stream
+        
+        if isinstance(self.players, Population):
+            if replace_loser:
+                self.players.replace_player_with_least_points(random_)
+            self.players.pair_players(random_)
+            return
+        
         if replace_loser:
             loser = self.get_player_with_least_points()
             self.players.remove(loser)
-            self.players.append(PlayerType.create_player_of_random_type())
+            self.players.append(
+                PlayerType.create_player_of_random_type(random_)
+            )
     
-        self.player_pairs = random_tools.random_partition(self.players, 2)
+        self.player_pairs = random_tools.random_partition(self.players, 2,
+                                                          random_=random_)
         
         
     def get_player_with_least_points(self):
         '''Get the player which has the lowest number of points.'''
+        if isinstance(self.players, Population):
+            return self.players.get_player(
+                self.players.get_index_with_least_points()
+            )
         return min(self.players, key=lambda player: player.points)
 
     
     def get_n_players_of_given_type(self, player_type):
         '''Get the number of existing players of the type `player_type`.'''
+        if isinstance(self.players, Population):
+            return self.players.get_n_players_of_given_type(player_type)
         return len([player for player in self.players
                     if isinstance(player, player_type)])
 
+
+def determinism_function(step_profile):
+    '''
+    Get determinism class of `step_profile`.
+    
+    Pairings and new players are drawn from the state's `RandomStream`, so
+    every step profile is deterministic.
+    '''
+    return garlicsim.misc.settings_constants.DETERMINISTIC
+
@@ -7,6 +7,8 @@ This module defines the `EventSet` class.
 See its documentation for more information.
 '''
 
+from garlicsim.general_misc.infinity import infinity
+
 from .event import Event
 
 
@@ -49,4 +51,26 @@ class EventSet(object):
         closest_event.action()
         
         return closest_event.time_left
+    
+    
+    def get_time_until_next_event(self):
+        '''
+        Get the time left until the closest pending event.
+        
+        Returns `infinity` if there are no pending events.
+        '''
+        if not self.events:
+            return infinity
+        return self.events[0].time_left
+    
+    
+    def pass_time(self, time):
+        '''
+        Pass `time` without making any event happen.
+        
+        `time` must be shorter than the time until the closest pending event.
+        '''
+        assert time < self.get_time_until_next_event()
+        for event in self.events:
+            event.time_left -= time
     
\ No newline at end of file
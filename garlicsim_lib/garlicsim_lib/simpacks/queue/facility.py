@@ -2,11 +2,14 @@
 # This program is distributed under the LGPL2.1 license.
 
 '''
-This module defines the `Server` class.
+This module defines the `Facility` class.
 
 See its documentation for more information.
 '''
 
+import collections
+import heapq
+
 from garlicsim.general_misc import identities
 
 import garlicsim
@@ -14,9 +17,16 @@ from .server import Server
 
 
 class Facility(identities.HasIdentity):
-    '''A facility in which there are servers serving clients.'''
+    '''
+    A facility in which there are servers serving clients.
+    
+    The facility keeps a heap of the indices of its idle servers, so a new
+    client is given to the first idle server without looking at the busy
+    ones, and the clients waiting in queue are kept in a `deque`.
+    '''
     
-    def __init__(self, event_set, servers=[], clients=[]):
+    def __init__(self, event_set, servers=None, clients=None,
+                 random_stream=None):
         identities.HasIdentity.__init__(self)
         
         self.event_set = event_set
@@ -24,16 +34,41 @@ class Facility(identities.HasIdentity):
         An event set for events such as servers finishing or clients arriving.
         '''
         
-        self.servers = servers
+        self.servers = servers if servers is not None else []
         '''List of all the servers in the facility.'''
         
-        self.clients = clients
+        self.random_stream = random_stream
+        '''
+        The `RandomStream` that new servers draw service times from.
+        
+        If it's `None`, the `random` module is used.
+        '''
+        
+        self.clients = set(clients or ())
         '''
-        List of all the clients, both those getting served and those on queue.
+        Set of all the clients, both those getting served and those on queue.
+        '''
+        
+        self.waiting_clients = collections.deque(clients or ())
+        '''Queue of all the clients waiting to be served, first come first.'''
+        
+        self.n_finished_clients = sum(server.client_counter for server in
+                                      self.servers)
+        '''The number of clients that were served by all servers.'''
+        
+        self.server_indices = dict((server, i) for (i, server) in
+                                   enumerate(self.servers))
+        '''The index of every server in `.servers`.'''
+        
+        self.idle_server_indices = [i for (i, server) in
+                                    enumerate(self.servers) if
+                                    not server.is_busy()]
         '''
+        Heap of the indices of the idle servers in `.servers`.
         
-        self.waiting_clients = clients[:]
-        '''List of all the clients waiting in the queue.'''
+        It may also contain indices of servers that were made busy without
+        the facility; they're dropped when they get to the top.
+        '''
         
         
     def create_server(self, mean_service_time):
@@ -41,20 +76,22 @@ class Facility(identities.HasIdentity):
         new_server = Server(
             event_set=self.event_set,
             facility=self,
-            mean_service_time=mean_service_time
+            mean_service_time=mean_service_time,
+            random_stream=self.random_stream
         )
         self.servers.append(new_server)
+        self.server_indices[new_server] = len(self.servers) - 1
+        heapq.heappush(self.idle_server_indices, len(self.servers) - 1)
         return new_server
 
     
     def add_client(self, client):
         '''Add a new client to this facility, to be served by a server.'''
-        self.clients.append(client)
+        self.clients.add(client)
         if not self.waiting_clients: # Queue is empty, no waiting clients
             # If there's an idle server, have it service the new client:
-            idle_servers = list(self.idle_servers_generator())
-            if idle_servers:
-                first_idle_server = idle_servers[0]
+            first_idle_server = self.pop_first_idle_server()
+            if first_idle_server is not None:
                 first_idle_server.service_client(client)
             else:
                 self.waiting_clients.append(client)
@@ -62,6 +99,20 @@ class Facility(identities.HasIdentity):
             self.waiting_clients.append(client)
             
             
+    def pop_first_idle_server(self):
+        '''
+        Take the idle server that comes first in `.servers`.
+        
+        Returns `None` if all servers are busy.
+        '''
+        idle_server_indices = self.idle_server_indices
+        while idle_server_indices:
+            server = self.servers[heapq.heappop(idle_server_indices)]
+            if not server.is_busy():
+                return server
+        return None
+            
+            
     def idle_servers_generator(self):
         '''Generator that yields servers in the facility that are idle.'''
         for server in self.servers:
@@ -73,17 +124,30 @@ class Facility(identities.HasIdentity):
         '''
         Order a server to start servicing the first client in the queue.
         
-        The server must be idle.
+        The server must be idle. If there are no clients in the queue, the
+        server will wait for the next client that arrives.
         '''
         assert not server.is_busy()
         if self.waiting_clients:
-            client = self.waiting_clients.pop(0)
+            client = self.waiting_clients.popleft()
             server.service_client(client)
+        else:
+            heapq.heappush(self.idle_server_indices,
+                           self.server_indices[server])
+            
+            
+    def client_finished(self, server, client):
+        '''
+        Note that `server` finished serving `client`, and feed it a new one.
+        '''
+        self.clients.remove(client)
+        self.n_finished_clients += 1
+        self.feed_client(server)
         
     
     def finished_client_count(self):
         '''Return the number of clients that were served by all servers.'''
-        return sum((server.client_counter for server in self.servers))
+        return self.n_finished_clients
         
     
     def __repr__(self):
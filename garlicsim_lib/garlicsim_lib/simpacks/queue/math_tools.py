@@ -7,13 +7,17 @@ from __future__ import division
 
 import random
 
-def time_for_next_occurence(mean_time_for_next_occurence):
+def time_for_next_occurence(mean_time_for_next_occurence, random_=None):
     '''
     Given a mean time between occurences, generate the time for next occurence.
     
-    Only for occurences that obey a Poisson distribution.
+    Only for occurences that obey a Poisson distribution. `random_` is the
+    generator to draw from, like a `random.Random` or a state's
+    `RandomStream`; by default it's the `random` module's global one.
     '''
-    return random.expovariate(1 / mean_time_for_next_occurence)
+    if random_ is None:
+        random_ = random
+    return random_.expovariate(1 / mean_time_for_next_occurence)
 
 
  
\ No newline at end of file
@@ -18,7 +18,8 @@ from .client import Client
 
 class Population(identities.HasIdentity):
     '''A population which generates clients.'''
-    def __init__(self, event_set, facility, size=infinity, mean_arrival_time=1):
+    def __init__(self, event_set, facility, size=infinity, mean_arrival_time=1,
+                 random_stream=None):
         '''
         Constructor.
         
@@ -49,6 +50,13 @@ class Population(identities.HasIdentity):
         self.next_arrival = None
         '''The event of the next arrival.'''
         
+        self.random_stream = random_stream
+        '''
+        The `RandomStream` to draw arrival times from.
+        
+        If it's `None`, the `random` module is used.
+        '''
+        
         self.schedule_next_arrival()
         
         
@@ -56,7 +64,8 @@ class Population(identities.HasIdentity):
         '''Schedule the next arrival of a client from the population.'''
         assert self.next_arrival is None
         self.next_arrival = self.event_set.create_event(
-            math_tools.time_for_next_occurence(self.mean_arrival_time),
+            math_tools.time_for_next_occurence(self.mean_arrival_time,
+                                               self.random_stream),
             self.make_arrival
         )
     
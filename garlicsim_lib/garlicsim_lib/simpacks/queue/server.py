@@ -16,7 +16,8 @@ from . import math_tools
 class Server(identities.HasIdentity):
     '''A server which serves clients in a facility.'''
     
-    def __init__(self, event_set, facility, mean_service_time):
+    def __init__(self, event_set, facility, mean_service_time,
+                 random_stream=None):
         '''
         Constructor.
         
@@ -43,6 +44,13 @@ class Server(identities.HasIdentity):
         
         self.client_counter = 0
         '''A counter for the number of clients that this server served.'''
+        
+        self.random_stream = random_stream
+        '''
+        The `RandomStream` to draw service times from.
+        
+        If it's `None`, the `random` module is used.
+        '''
     
         
     def service_client(self, client):
@@ -55,7 +63,8 @@ class Server(identities.HasIdentity):
                self.finish_service_event is None
         self.current_client = client
         self.finish_service_event = self.event_set.create_event(
-            math_tools.time_for_next_occurence(self.mean_service_time),
+            math_tools.time_for_next_occurence(self.mean_service_time,
+                                               self.random_stream),
             self.finish_client
         )
         
@@ -67,8 +76,7 @@ class Server(identities.HasIdentity):
         client = self.current_client 
         self.current_client = None
         self.finish_service_event = None
-        self.facility.clients.remove(client)
-        self.facility.feed_client(self)
+        self.facility.client_finished(self, client)
         
         
     def is_busy(self):
@@ -2,3 +2,8 @@
 # This program is distributed under the LGPL2.1 license.
 
 '''Settings module for the `queue` simpack.'''
+
+
+from .state import determinism_function
+
+DETERMINISM_FUNCTION = determinism_function
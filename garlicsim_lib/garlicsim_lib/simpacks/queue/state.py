@@ -16,10 +16,14 @@ from .facility import Facility
 from .population import Population
 
 
+_fallback_seed = 'no stream'
+'''The seed of the stream given to states that have no stream.'''
+
 class State(garlicsim.data_structures.State):
     '''World state. A frozen moment in time in the simulation world.'''
     
-    def __init__(self, event_set, facility, servers, population):
+    def __init__(self, event_set, facility, servers, population,
+                 random_stream=None):
         garlicsim.data_structures.State.__init__(self)
         
         self.event_set = event_set
@@ -33,16 +37,44 @@ class State(garlicsim.data_structures.State):
         
         self.population = population
         '''Population from which the clients arrive.'''
+        
+        self.random_stream = random_stream
+        '''
+        The `RandomStream` from which arrival and service times are drawn.
+        
+        It's copied with the state, so crunching from a state gives the same
+        simulation in every cruncher, and crunching from it again reproduces
+        the same branch. To explore other random outcomes, fork the state by
+        editing and give the fork a new stream. If it's `None`, like in a state
+        that was made by hand, the first step gives the state a stream with a
+        fixed seed, so the simulation is still deterministic.
+        '''
+        
+        self.aggregated_time = 0
+        '''The time that passed in the simulation since the root state.'''
+        
+        self.queue_length_integral = 0
+        '''The integral of the number of clients in queue over time.'''
+        
+        self.busy_servers_integral = 0
+        '''The integral of the number of busy servers over time.'''
 
         
     @staticmethod
     def create_root(n_servers=3, population_size=infinity, mean_arrival_time=1,
-                    mean_service_time=3):
-        '''Create a plain and featureless world state.'''
+                    mean_service_time=3, seed=None):
+        '''
+        Create a plain and featureless world state.
+        
+        `seed` is the seed of the state's `RandomStream`. If it's `None`, a
+        random seed is used.
+        '''
         
         event_set = events_module.EventSet()
         
-        facility = Facility(event_set=event_set)
+        random_stream = garlicsim.misc.RandomStream(seed)
+        
+        facility = Facility(event_set=event_set, random_stream=random_stream)
         
         for i in range(n_servers):
             facility.create_server(mean_service_time=mean_service_time)
@@ -51,24 +83,134 @@ class State(garlicsim.data_structures.State):
             event_set=event_set,
             facility=facility,
             size=population_size,
-            mean_arrival_time=mean_arrival_time
+            mean_arrival_time=mean_arrival_time,
+            random_stream=random_stream
         )
         
         return State(
             event_set=event_set,
             facility=facility,
             servers=facility.servers,
-            population=population
+            population=population,
+            random_stream=random_stream
         )
     
     
-    def inplace_step(self):
-        '''Modify the state in-place to make it the next moment in time.'''
+    def inplace_step(self, time_step=None):
+        '''
+        Modify the state in-place to make it the next moment in time.
+        
+        If `time_step` is `None`, the step makes the next event happen, like a
+        client arriving or a server finishing. Otherwise, the step advances the
+        clock by `time_step`, making all the events until then happen. The
+        state's running aggregates, like `.get_utilization()`, cover the events
+        that happened inside the step, so a simulation with a big `time_step`
+        reaches a clock target in few states without losing its statistics.
+        '''
+        self._ensure_random_stream()
+        if time_step is None:
+            self.clock += self._do_next_event()
+        else:
+            self.clock += self._advance(time_step)
+        
+        
+    def inplace_step_many(self, n, time_step=None):
+        '''
+        Modify the state in-place to make it `n` moments later in time.
+        
+        `time_step` is like in `inplace_step`.
+        '''
+        self._ensure_random_stream()
+        if time_step is not None:
+            self.clock += self._advance(n * time_step)
+            return
+        clock = self.clock
+        try:
+            for i in xrange(n):
+                clock += self._do_next_event()
+        finally:
+            self.clock = clock
+    
+            
+    def _ensure_random_stream(self):
+        '''
+        Give the state a `RandomStream` with a fixed seed if it has none.
+        
+        The facility, the servers and the population draw from it too.
+        '''
+        if getattr(self, 'random_stream', None) is not None:
+            return
+        self.random_stream = garlicsim.misc.RandomStream(_fallback_seed)
+        for thing in [self.facility, self.population] + self.servers:
+            thing.random_stream = self.random_stream
+            
+            
+    def _do_next_event(self):
+        '''
+        Make the next event happen, updating the aggregates.
+        
+        Returns the time that passed.
+        '''
+        self._aggregate(self.event_set.get_time_until_next_event())
+        return self.event_set.do_next_event()
+    
+    
+    def _advance(self, time):
+        '''
+        Make all the events in the next `time` happen, updating the aggregates.
+        
+        Returns the time that passed, which is `time`.
+        '''
+        event_set = self.event_set
+        time_left = time
+        while event_set.get_time_until_next_event() <= time_left:
+            time_left -= self._do_next_event()
+        self._aggregate(time_left)
+        event_set.pass_time(time_left)
+        return time
+    
+    
+    def _aggregate(self, time):
+        '''Add `time` with the current queue and servers to the aggregates.'''
+        facility = self.facility
+        n_waiting_clients = len(facility.waiting_clients)
+        n_busy_servers = len(facility.clients) - n_waiting_clients
+        self.aggregated_time += time
+        self.queue_length_integral += n_waiting_clients * time
+        self.busy_servers_integral += n_busy_servers * time
+        
         
-        # todo good idea: t=None means step to next client. If given int just
-        # do many steps. (What with cut last?)
+    def get_n_served_clients(self):
+        '''Get the number of clients that were served since the root state.'''
+        return self.facility.finished_client_count()
+    
+    
+    def get_mean_queue_length(self):
+        '''Get the mean number of clients in queue since the root state.'''
+        if not self.aggregated_time:
+            return 0
+        return self.queue_length_integral / self.aggregated_time
+    
+    
+    def get_utilization(self):
+        '''
+        Get the fraction of the time in which the servers were busy.
         
-        time_passed = self.event_set.do_next_event()
-        self.clock += time_passed
+        This is measured since the root state.
+        '''
+        if not self.aggregated_time or not self.servers:
+            return 0
+        return self.busy_servers_integral / \
+               (self.aggregated_time * len(self.servers))
+
+
+def determinism_function(step_profile):
+    '''
+    Get determinism class of `step_profile`.
+    
+    Arrival and service times are drawn from the state's `RandomStream`, so
+    every step profile is deterministic.
+    '''
+    return garlicsim.misc.settings_constants.DETERMINISTIC
 
         
\ No newline at end of file
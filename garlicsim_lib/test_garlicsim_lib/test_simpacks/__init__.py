@@ -0,0 +1,4 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing package for the `garlicsim_lib` simpacks.'''
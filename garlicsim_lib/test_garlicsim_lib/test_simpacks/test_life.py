@@ -0,0 +1,132 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for the `life` simpack.'''
+
+import copy
+import cPickle
+
+import nose
+
+import garlicsim
+from garlicsim_lib.simpacks import life
+from garlicsim_lib.simpacks.life.hashlife import HashlifeBoard
+
+
+def _get_cells(board):
+    '''Get the values of all the cells in the board.'''
+    return [[board.get(x, y) for x in xrange(board.width)] for y in
+            xrange(board.height)]
+
+
+def test_hashlife():
+    '''Test that `HashlifeBoard` makes the same boards as `Board`.'''
+    for (width, height) in [(16, 16), (32, 8), (4, 16)]:
+        state = life.State.create_messy_root(width, height, seed=3)
+        hashlife_state = life.State.create_messy_root(width, height, seed=3,
+                                                      hashlife=True)
+        assert isinstance(hashlife_state.board, HashlifeBoard)
+        assert _get_cells(hashlife_state.board) == _get_cells(state.board)
+
+        states = garlicsim.list_simulate(state, 8)
+        for step_exponent in xrange(4):
+            hashlife_states = garlicsim.list_simulate(
+                hashlife_state, 1, step_exponent=step_exponent
+            )
+            assert hashlife_states[-1].clock == 2 ** step_exponent
+            assert _get_cells(hashlife_states[-1].board) == \
+                   _get_cells(states[2 ** step_exponent].board)
+            assert hashlife_states[-1].get_n_live_cells() == \
+                   states[2 ** step_exponent].get_n_live_cells()
+
+        # Randomness is drawn like in `Board`:
+        assert _get_cells(hashlife_state.step(randomness=0.2).board) == \
+               _get_cells(state.step(randomness=0.2).board)
+
+
+def test_hashlife_board():
+    '''Test getting, setting, comparing and copying a `HashlifeBoard`.'''
+    board = HashlifeBoard(16, 8)
+    other_board = HashlifeBoard(16, 8)
+    assert board == other_board
+    assert board.get_n_live_cells() == 0
+    board.set(3, 2, True)
+    board.set(-1, 9, True)
+    assert board.get(3, 2) is board.get(15, 1) is board.get(31, -7) is True
+    assert board.get(2, 3) is False
+    assert board.get_n_live_cells() == 2
+    assert board != other_board
+    other_board.set(15, 1, True)
+    other_board.set(3, 2, True)
+    assert board == other_board
+    board.set(3, 2, False)
+    assert board.get_n_live_cells() == 1
+    assert board != other_board
+    for copy_function in (copy.deepcopy,
+                          lambda x: cPickle.loads(cPickle.dumps(x, 2))):
+        assert copy_function(other_board) == other_board
+
+    assert HashlifeBoard.create_diehard(64, 32).get_n_live_cells() == 7
+    nose.tools.assert_raises(garlicsim.misc.GarlicSimException,
+                             HashlifeBoard, 45, 25)
+
+
+def test_hashlife_long_run():
+    '''Test running a huge sparse board for many generations.'''
+    state = life.State.create_diehard(2 ** 20, 2 ** 20, hashlife=True)
+    state.clock = 0
+    assert state.get_n_live_cells() == 7
+    # The Diehard Metushelah dies after 130 generations:
+    states = garlicsim.list_simulate(state, 3, step_exponent=6)
+    assert [state.clock for state in states] == [0, 64, 128, 192]
+    assert states[2].get_n_live_cells() > 0
+    assert states[3].get_n_live_cells() == 0
+
+    glider_state = life.State.create_root(64, 64, hashlife=True)
+    for (x, y) in [(1, 0), (2, 1), (0, 2), (1, 2), (2, 2)]:
+        glider_state.board.set(x, y, True)
+    # Every 256 generations, the glider travels around the board:
+    new_glider_state = glider_state.step(step_exponent=40)
+    assert new_glider_state == glider_state
+    assert new_glider_state.get_n_live_cells() == 5
+
+
+def test_recomputing():
+    '''Test that random boards are recomputed the same after dropping.'''
+    project = garlicsim.Project(life)
+    assert project.simpack_grokker.settings.DETERMINISM_FUNCTION(
+        project.build_step_profile(randomness=0.2)
+    ) is garlicsim.misc.settings_constants.DETERMINISTIC
+    root = project.root_this_state(life.State.create_messy_root(seed=5))
+    project.simulate(root, 20, randomness=0.2)
+    boards = [_get_cells(state.board) for state in
+              root.make_containing_path().states()]
+
+    other_project = garlicsim.Project(life)
+    checkpointer = other_project.enable_checkpointing(interval=5)
+    other_root = other_project.root_this_state(
+        life.State.create_messy_root(seed=5)
+    )
+    other_project.simulate(other_root, 20, randomness=0.2)
+    assert [_get_cells(state.board) for state in
+            other_root.make_containing_path().states()] == boards
+    assert checkpointer.n_recomputed_states > 0
+
+
+def test_recomputing_without_stream():
+    '''Test recomputing the random children of a state without a stream.'''
+    root_state = life.State()
+    root_state.board = life.state.Board(24, 12, fill='random')
+    assert root_state.random_stream is None
+    boards = []
+    for checkpointing in (False, True):
+        project = garlicsim.Project(life)
+        if checkpointing:
+            checkpointer = project.enable_checkpointing(interval=4)
+        root = project.root_this_state(copy.deepcopy(root_state))
+        project.simulate(root, 12, randomness=0.3)
+        boards.append([_get_cells(state.board) for state in
+                       root.make_containing_path().states()])
+    assert checkpointer.n_recomputed_states > 0
+    assert boards[0] == boards[1]
+    assert boards[0][1] != boards[0][2]
@@ -0,0 +1,127 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for the `prisoner` simpack.'''
+
+import array
+import copy
+import random
+
+import garlicsim
+from garlicsim_lib.simpacks import prisoner
+from garlicsim_lib.simpacks.prisoner.players import Angel, Devil, TitForTat
+
+
+class Grudger(prisoner.BasePlayer):
+    '''Custom player which plays nice until the opponent plays mean.'''
+
+    def make_move(self, round):
+        if round == 0:
+            self.betrayed = False
+        return not self.betrayed
+
+    def other_player_played(self, move):
+        if not move:
+            self.betrayed = True
+
+
+def _get_points(state):
+    '''Get the points of the players in `state`, by player type.'''
+    points = {}
+    for player in state.players:
+        points.setdefault(type(player), []).append(player.points)
+    for points_list in points.itervalues():
+        points_list.sort()
+    return points
+
+
+def test_vectorized_matches_objects():
+    '''Test that a `Population` plays just like player objects do.'''
+    player_types = [Angel, Devil, TitForTat, Grudger] * 25
+    random.shuffle(player_types)
+    object_state = prisoner.State([player_type() for player_type in
+                                   player_types])
+    vectorized_state = prisoner.State(
+        prisoner.Population.create_from_player_types(player_types)
+    )
+    for state in (object_state, vectorized_state):
+        state.clock = 0
+        state._prepare_for_new_match(replace_loser=False)
+    # Playing the same pairs in both states:
+    population = vectorized_state.players
+    index_by_player = dict((player, i) for (i, player) in
+                           enumerate(object_state.players))
+    population.firsts = array.array(
+        'l', [index_by_player[player_1] for (player_1, player_2) in
+              object_state.player_pairs]
+    )
+    population.seconds = array.array(
+        'l', [index_by_player[player_2] for (player_1, player_2) in
+              object_state.player_pairs]
+    )
+
+    for i in xrange(object_state.n_rounds):
+        object_state.inplace_step()
+        vectorized_state.inplace_step()
+
+    assert _get_points(vectorized_state) == _get_points(object_state)
+    assert [player.points for player in vectorized_state.players] == \
+           [player.points for player in object_state.players]
+    for player_type in (Angel, Devil, TitForTat, Grudger,
+                        prisoner.BasePlayer):
+        assert vectorized_state.get_n_players_of_given_type(player_type) == \
+               object_state.get_n_players_of_given_type(player_type)
+    assert vectorized_state.get_player_with_least_points().points == \
+           object_state.get_player_with_least_points().points
+
+
+def test_natural_selection():
+    '''Test that the loser is replaced and the type counts are kept.'''
+    state = prisoner.State.create_messy_root(1000, vectorized=True)
+    population = state.players
+    assert len(population) == 1000
+    for i in xrange(3 * (state.n_rounds + 1)):
+        state = garlicsim.simulate(state)
+        assert len(population) == len(state.players) == 1000
+        assert sum(state.players.type_counts.itervalues()) == 1000
+        for player_type in (Angel, Devil, TitForTat):
+            assert state.get_n_players_of_given_type(player_type) == \
+                   len([player for player in state.players if
+                        type(player) is player_type])
+    assert state.match == 3
+    assert population.points[0] == 0 # The original state wasn't changed.
+    assert copy.deepcopy(state).players.points == state.players.points
+
+
+def test_seed():
+    '''Test that states with the same seed make the same simulation.'''
+    for vectorized in (False, True):
+        results = []
+        for i in xrange(2):
+            state = prisoner.State.create_messy_root(vectorized=vectorized,
+                                                     seed=9)
+            state = garlicsim.simulate(state, 30)
+            results.append([(type(player), player.points) for player in
+                            state.players])
+        assert results[0] == results[1]
+
+
+def test_recomputing_without_stream():
+    '''Test recomputing the pairings of a state without a stream.'''
+    root_state = prisoner.State([player_type() for player_type in
+                                 [Angel, Devil, TitForTat] * 10])
+    root_state._prepare_for_new_match(replace_loser=False)
+    root_state.random_stream = None
+    results = []
+    for checkpointing in (False, True):
+        project = garlicsim.Project(prisoner)
+        if checkpointing:
+            checkpointer = project.enable_checkpointing(interval=5)
+        root = project.root_this_state(copy.deepcopy(root_state))
+        project.simulate(root, 30)
+        results.append([
+            [(type(player), player.points) for player in state.players]
+            for state in root.make_containing_path().states()
+        ])
+    assert checkpointer.n_recomputed_states > 0
+    assert results[0] == results[1]
@@ -0,0 +1,102 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''Testing module for the `queue` simpack.'''
+
+import copy
+
+import garlicsim
+from garlicsim_lib.simpacks import queue
+
+
+def _check_facility(facility):
+    '''Check that the facility's bookkeeping agrees with its servers.'''
+    servers = facility.servers
+    busy_servers = [server for server in servers if server.is_busy()]
+    served_clients = set(server.current_client for server in busy_servers)
+    assert facility.clients == served_clients | set(facility.waiting_clients)
+    assert len(facility.clients) == \
+           len(busy_servers) + len(facility.waiting_clients)
+    assert facility.finished_client_count() == \
+           sum(server.client_counter for server in servers)
+    if facility.waiting_clients:
+        assert len(busy_servers) == len(servers)
+    idle_server_indices = [i for (i, server) in enumerate(servers) if
+                           not server.is_busy()]
+    assert set(idle_server_indices) <= set(facility.idle_server_indices)
+
+
+def test_facility():
+    '''Test that the facility serves clients like it should.'''
+    state = queue.State.create_root(n_servers=20, mean_arrival_time=0.1,
+                                    mean_service_time=3)
+    state.clock = 0
+    assert len(state.servers) == 20
+    facility = state.facility
+    first_clients = []
+    for i in xrange(3000):
+        n_clients = len(facility.clients)
+        n_waiting_clients = len(facility.waiting_clients)
+        idle_servers = list(facility.idle_servers_generator())
+        state.inplace_step()
+        _check_facility(facility)
+        if len(facility.clients) > n_clients and not n_waiting_clients and \
+           idle_servers:
+            # A client arrived; it must have gone to the first idle server:
+            assert idle_servers[0].is_busy()
+        if facility.waiting_clients and not first_clients:
+            first_clients = list(facility.waiting_clients)[:3]
+    # The clients that waited first were served first:
+    for client in first_clients:
+        assert client not in facility.waiting_clients
+    assert facility.finished_client_count() > 0
+
+    state_copy = copy.deepcopy(state)
+    _check_facility(state_copy.facility)
+    for i in xrange(100):
+        state_copy.inplace_step()
+        _check_facility(state_copy.facility)
+
+
+def test_seed():
+    '''Test that states with the same seed make the same simulation.'''
+    clocks = []
+    for i in xrange(2):
+        state = queue.State.create_root(seed=4)
+        states = garlicsim.list_simulate(state, 50)
+        clocks.append([state.clock for state in states])
+    assert clocks[0] == clocks[1]
+
+
+def test_time_step():
+    '''Test stepping with a `time_step`, skipping the events in between.'''
+    root = queue.State.create_root(mean_arrival_time=1, mean_service_time=2,
+                                   seed=2)
+    root.clock = 0
+    states = garlicsim.list_simulate(root, 10, time_step=50)
+    assert [state.clock for state in states] == range(0, 550, 50)
+    state = states[-1]
+    assert abs(state.aggregated_time - 500) < 1e-6
+    assert state.get_n_served_clients() > 100
+    assert 0 < state.get_mean_queue_length()
+    assert 0 < state.get_utilization() <= 1
+    _check_facility(state.facility)
+
+    # Stepping event by event gives the same simulation:
+    event_state = copy.deepcopy(root)
+    while event_state.clock + \
+          event_state.event_set.get_time_until_next_event() <= 500:
+        event_state.inplace_step()
+    assert event_state.get_n_served_clients() == \
+           state.get_n_served_clients()
+    assert len(event_state.facility.waiting_clients) == \
+           len(state.facility.waiting_clients)
+    event_state.inplace_step_many(1, time_step=500 - event_state.clock)
+    for name in ('aggregated_time', 'queue_length_integral',
+                 'busy_servers_integral'):
+        assert abs(getattr(event_state, name) - getattr(state, name)) < 1e-6
+
+    many_state = copy.deepcopy(root)
+    many_state.inplace_step_many(10, time_step=50)
+    assert many_state.clock == 500
+    assert many_state.get_n_served_clients() == state.get_n_served_clients()
@@ -26,6 +26,8 @@ from garlicsim_wx.general_misc import thread_timer
 
 import garlicsim
 from garlicsim.asynchronous_crunching import crunchers
+from garlicsim.asynchronous_crunching.job_scheduler import (PATH_PRIORITY,
+                                                            PLAYBACK_PRIORITY)
 import garlicsim_wx
 from garlicsim_wx.general_misc import emitters
         
@@ -82,7 +84,7 @@ class GuiProject(object):
         
         if (not project): # Note this is the project given as an argument
             if (crunchers.ProcessCruncher in 
-                simpack_grokker.available_cruncher_types):
+                self.project.crunching_manager.get_available_cruncher_types()):
                 
                 self.project.crunching_manager.cruncher_type = \
                     crunchers.ProcessCruncher
@@ -560,10 +562,13 @@ class GuiProject(object):
             if self.infinity_job:
                 self.infinity_job.crunching_profile.clock_target = \
                     self.infinity_job.node.state.clock + self.default_buffer
+                self.infinity_job.priority = PATH_PRIORITY
                 self.infinity_job = \
                     self.project.ensure_buffer_on_path(node,
                                                        self.path,
-                                                       infinity)   
+                                                       infinity)
+                if self.infinity_job:
+                    self.infinity_job.priority = PLAYBACK_PRIORITY
         
         
     def __modify_path_to_include_active_node(self):
@@ -589,6 +594,8 @@ class GuiProject(object):
         self.infinity_job = \
             self.project.ensure_buffer_on_path(self.active_node, self.path,
                                                infinity)
+        if self.infinity_job:
+            self.infinity_job.priority = PLAYBACK_PRIORITY
         
         self.timer_for_playing.Start(1000//25)
         
@@ -618,6 +625,7 @@ class GuiProject(object):
         if self.infinity_job:
             self.infinity_job.crunching_profile.clock_target = \
                 self.infinity_job.node.state.clock + self.default_buffer
+            self.infinity_job.priority = PATH_PRIORITY
         
         self.last_tracked_real_time = None
         self.round_pseudoclock_to_active_node()
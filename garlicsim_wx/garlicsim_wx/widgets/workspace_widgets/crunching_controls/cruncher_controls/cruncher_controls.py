@@ -5,10 +5,12 @@ import pkg_resources
 import wx
 
 from garlicsim_wx.general_misc import wx_tools
+from garlicsim_wx.general_misc import cute_timer
 
 import garlicsim, garlicsim_wx
 
 from .cruncher_selection_dialog import CruncherSelectionDialog
+from .profile_dialog import ProfileDialog
 
     
 class CruncherControls(wx.Panel):
@@ -51,6 +53,54 @@ class CruncherControls(wx.Panel):
         self.main_v_sizer.Add(self.change_cruncher_button, 0,
                               wx.ALIGN_RIGHT | wx.BOTTOM, 5)
         
+        self.telemetry_title_text = wx.StaticText(self, -1, 'Crunchers:')
+        
+        self.main_v_sizer.Add(self.telemetry_title_text, 0)
+        
+        self.telemetry_static_text = wx.StaticText(self, -1, '')
+        
+        self.main_v_sizer.Add(self.telemetry_static_text, 0,
+                              wx.EXPAND | wx.ALL, 5)
+        
+        self.profiling_h_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        
+        self.main_v_sizer.Add(self.profiling_h_sizer, 0,
+                              wx.EXPAND | wx.BOTTOM, 5)
+        
+        self.profiling_check_box = wx.CheckBox(self, -1,
+                                               'Profile step function')
+        self.profiling_check_box.SetValue(
+            self.gui_project.project.crunching_manager.profiling
+        )
+        self.profiling_check_box.SetToolTipString(
+            'Have all crunchers profile the step function, so you could find '
+            'where the simulation spends its time.'
+        )
+        self.Bind(wx.EVT_CHECKBOX, self.on_profiling_check_box,
+                  self.profiling_check_box)
+        
+        self.profiling_h_sizer.Add(self.profiling_check_box, 1,
+                                   wx.ALIGN_CENTER_VERTICAL)
+        
+        self.show_profile_button = wx.Button(self, -1, 'Show profile...')
+        self.Bind(wx.EVT_BUTTON, self.on_show_profile_button,
+                  self.show_profile_button)
+        
+        self.profiling_h_sizer.Add(self.show_profile_button, 0)
+        
+        self.telemetry_update_timer = cute_timer.CuteTimer(self)
+        '''
+        Timer to use for updating the cruncher telemetry display.
+        
+        Telemetry changes all the time while crunching, so rather than react
+        to every change we just update it periodically.
+        '''
+        
+        self.Bind(wx.EVT_TIMER, self.on_telemetry_update_timer,
+                  self.telemetry_update_timer)
+        
+        self.telemetry_update_timer.Start(1000)
+        
         self.gui_project.cruncher_type_changed_emitter.add_output(
             self._recalculate
         )
@@ -62,10 +112,54 @@ class CruncherControls(wx.Panel):
         cruncher_selection_dialog.Destroy()
         
     
+    def on_profiling_check_box(self, event):
+        self.gui_project.project.set_crunching_profiling(
+            self.profiling_check_box.GetValue()
+        )
+        
+        
+    def on_show_profile_button(self, event):
+        ProfileDialog.create_show_modal_and_destroy(self)
+        
+    
     def _recalculate(self):
         '''Ensure we display the correct current cruncher type.'''
         self.cruncher_in_use_static_text.SetLabel(
             self.gui_project.project.crunching_manager.cruncher_type.__name__
         )
         
-
+        
+        
+    def on_telemetry_update_timer(self, event):
+        '''Handler for when the telemetry timer goes off.'''
+        self._recalculate_telemetry()
+        
+        
+    def _recalculate_telemetry(self):
+        '''Ensure we display up-to-date telemetry of the active crunchers.'''
+        telemetry_dict = self.gui_project.project.get_crunching_telemetry()
+        
+        if not telemetry_dict:
+            label = 'Idle.'
+        else:
+            lines = []
+            for telemetry in telemetry_dict.itervalues():
+                mean_step_time = telemetry.get_mean_step_time()
+                line = ('%.1f states/sec, step %s, queue %s/%s, '
+                        'blocked %.1fs' % (
+                    telemetry.get_states_per_second(),
+                    ('%.1fms' % (mean_step_time * 1000)) if
+                    mean_step_time is not None else '?',
+                    telemetry.queue_depth,
+                    telemetry.queue_high_water_mark,
+                    telemetry.blocked_time
+                ))
+                if telemetry.pickled_bytes:
+                    line += ', %.1fKB/state' % \
+                        (telemetry.get_mean_pickled_size() / 1024.0)
+                lines.append(line)
+            label = '\n'.join(lines)
+            
+        if self.telemetry_static_text.GetLabel() != label:
+            self.telemetry_static_text.SetLabel(label)
+            self.main_v_sizer.Layout()
@@ -56,8 +56,8 @@ class CruncherSelectionDialog(CuteDialog):
         self.main_v_sizer.Add(self.h_sizer, 0, wx.EXPAND)
         
         self.cruncher_types_availability = cruncher_types_availability = \
-            self.gui_project.project.simpack_grokker.\
-            cruncher_types_availability
+            self.gui_project.project.crunching_manager.\
+            get_cruncher_types_availability()
 
         self.cruncher_titles = cruncher_titles = OrderedDict()
         
@@ -0,0 +1,71 @@
+# Copyright 2009-2011 Ram Rachum.
+# This program is distributed under the LGPL2.1 license.
+
+'''
+Defines the `ProfileDialog` class.
+
+See its documentation for more details.
+'''
+
+import StringIO
+
+import wx
+
+from garlicsim_wx.widgets.general_misc.cute_dialog import CuteDialog
+
+import garlicsim
+import garlicsim_wx
+
+
+class ProfileDialog(CuteDialog):
+    '''Dialog showing the profiling data collected from the crunchers.'''
+    def __init__(self, cruncher_controls):
+        CuteDialog.__init__(
+            self,
+            cruncher_controls.GetTopLevelParent(),
+            title='Crunching profile',
+            size=(800, 500),
+            style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER
+        )
+        self.frame = cruncher_controls.frame
+        self.gui_project = cruncher_controls.gui_project
+        
+        self.main_v_sizer = wx.BoxSizer(wx.VERTICAL)
+        
+        self.profile_text_ctrl = wx.TextCtrl(
+            self,
+            value=self._get_profile_text(),
+            style=wx.TE_MULTILINE | wx.TE_READONLY | wx.HSCROLL
+        )
+        self.profile_text_ctrl.SetFont(
+            wx.Font(9, wx.MODERN, wx.NORMAL, wx.NORMAL)
+        )
+        
+        self.main_v_sizer.Add(self.profile_text_ctrl, 1, wx.EXPAND | wx.ALL,
+                              border=10)
+        
+        self.dialog_button_sizer = wx.StdDialogButtonSizer()
+        
+        self.main_v_sizer.Add(self.dialog_button_sizer, 0,
+                              wx.ALIGN_CENTER | wx.ALL, border=10)
+        
+        self.ok_button = wx.Button(self, wx.ID_OK, 'Close')
+        self.dialog_button_sizer.AddButton(self.ok_button)
+        self.ok_button.SetDefault()
+        self.dialog_button_sizer.SetAffirmativeButton(self.ok_button)
+        self.dialog_button_sizer.Realize()
+        
+        self.SetSizer(self.main_v_sizer)
+        self.Layout()
+        
+        
+    def _get_profile_text(self):
+        '''Get the aggregated profiling data as text.'''
+        stats = self.gui_project.project.get_crunching_profile_stats()
+        if stats is None:
+            return ('No profiling data has been collected yet. Turn on '
+                    'profiling and crunch the simulation for a while.')
+        stream = StringIO.StringIO()
+        stats.stream = stream
+        stats.sort_stats('cumulative').print_stats(40)
+        return stream.getvalue()